@@ -0,0 +1,341 @@
+"""
+Bulk document indexing - background jobs that pool chunks across documents
+into shared embedding and upsert batches per collection
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+from .collections import (CollectionManager, CollectionType, DocumentMetadata,
+                          get_collection_manager)
+
+logger = logging.getLogger(__name__)
+
+# Deterministic chunk ids make a retried bulk job overwrite instead of duplicate
+CHUNK_ID_NAMESPACE = uuid.UUID("6f1c2a4e-8d2b-4c55-9a51-0c7e2b1d9f00")
+
+
+@dataclass
+class DocumentIndexStatus:
+    """Per-document outcome of a bulk job."""
+    doc_id: str
+    collection_type: str
+    status: str = "pending"  # pending | indexed | failed
+    chunks_total: int = 0
+    chunks_indexed: int = 0
+    message: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "doc_id": self.doc_id,
+            "collection_type": self.collection_type,
+            "status": self.status,
+            "success": self.status == "indexed",
+            "chunks_total": self.chunks_total,
+            "chunks_indexed": self.chunks_indexed,
+            "message": self.message,
+        }
+
+
+@dataclass
+class BulkDocument:
+    """Document queued for bulk indexing."""
+    text: str
+    metadata: DocumentMetadata
+    collection_type: CollectionType
+    status: Optional[DocumentIndexStatus] = None
+
+
+@dataclass
+class _PendingChunk:
+    document: BulkDocument
+    chunk: Dict[str, Any]
+    index: int
+    total: int
+    tokens: int
+
+
+@dataclass
+class BulkIndexJob:
+    """Background bulk indexing job with pollable progress."""
+    job_id: str
+    documents: List[BulkDocument]
+    statuses: List[DocumentIndexStatus]
+    owner: Optional[str] = None
+    status: str = "pending"  # pending | running | completed | failed
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    completed_at: Optional[float] = None
+    chunks_total: int = 0
+    chunks_indexed: int = 0
+    embedding_batches: int = 0
+    upsert_batches: int = 0
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed")
+
+    @property
+    def progress(self) -> float:
+        """Share of work done: indexed chunks once chunking has finished."""
+        if self.finished:
+            return 1.0
+        if not self.chunks_total:
+            return 0.0
+        return self.chunks_indexed / self.chunks_total
+
+    def to_dict(self, include_documents: bool = True) -> Dict[str, Any]:
+        successful = sum(1 for status in self.statuses if status.status == "indexed")
+        failed = sum(1 for status in self.statuses if status.status == "failed")
+        end = self.completed_at or time.time()
+        duration = end - self.started_at if self.started_at else 0.0
+        result = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "progress": round(self.progress, 4),
+            "total_documents": len(self.statuses),
+            "successful": successful,
+            "failed": failed,
+            "pending": len(self.statuses) - successful - failed,
+            "chunks_total": self.chunks_total,
+            "chunks_indexed": self.chunks_indexed,
+            "embedding_batches": self.embedding_batches,
+            "upsert_batches": self.upsert_batches,
+            "chunks_per_second": round(self.chunks_indexed / duration, 1) if duration else None,
+            "processing_time_ms": duration * 1000,
+            "error": self.error,
+        }
+        if include_documents:
+            result["results"] = [status.to_dict() for status in self.statuses]
+        return result
+
+
+class BulkIndexer:
+    """
+    Indexes many documents with as few embedding requests and upserts as possible.
+
+    Chunks of all documents are grouped by collection and packed into embedding
+    batches bounded by input count and token budget; embedded points are
+    buffered and upserted in fixed-size batches.
+    """
+
+    def __init__(
+        self,
+        collection_manager: Optional[CollectionManager] = None,
+        embed_batch_size: int = 256,
+        embed_batch_tokens: int = 100_000,
+        upsert_batch_size: int = 512,
+        max_concurrency: int = 4,
+    ):
+        self.manager = collection_manager or get_collection_manager()
+        self.embeddings = self.manager.embeddings
+        self.embed_batch_size = min(embed_batch_size, getattr(self.embeddings, "max_batch_inputs", embed_batch_size))
+        self.embed_batch_tokens = embed_batch_tokens
+        self.upsert_batch_size = upsert_batch_size
+        self.max_concurrency = max_concurrency
+
+    async def run(self, job: BulkIndexJob) -> BulkIndexJob:
+        """Run a job to completion; per-document failures do not fail the job."""
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            by_collection = self._chunk_documents(job)
+            for collection_type, chunks in by_collection.items():
+                await self._index_collection(job, collection_type, chunks)
+
+            for status in job.statuses:
+                if status.status == "pending":
+                    status.status = "indexed"
+                    status.message = "Indexed successfully"
+            job.status = "completed"
+
+        except Exception as e:
+            logger.error(f"❌ Bulk index job {job.job_id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+            for status in job.statuses:
+                if status.status == "pending":
+                    status.status = "failed"
+                    status.message = f"Error: {e}"
+        finally:
+            job.completed_at = time.time()
+            job.documents = []  # Release document texts; statuses stay pollable
+
+        logger.info(
+            f"✅ Bulk index job {job.job_id}: {job.chunks_indexed}/{job.chunks_total} chunks, "
+            f"{job.embedding_batches} embedding batches, {job.upsert_batches} upserts"
+        )
+        return job
+
+    def _chunk_documents(self, job: BulkIndexJob) -> Dict[CollectionType, List[_PendingChunk]]:
+        by_collection: Dict[CollectionType, List[_PendingChunk]] = {}
+        for document in job.documents:
+            chunks = self.manager.chunk_document(document.text, document.metadata)
+            document.status.chunks_total = len(chunks)
+            if not chunks:
+                document.status.status = "failed"
+                document.status.message = "No chunks created"
+                continue
+            pending = by_collection.setdefault(document.collection_type, [])
+            for index, chunk in enumerate(chunks):
+                pending.append(_PendingChunk(document, chunk, index, len(chunks), self._count_tokens(chunk["text"])))
+            job.chunks_total += len(chunks)
+        return by_collection
+
+    def _count_tokens(self, text: str) -> int:
+        count_tokens = getattr(self.embeddings, "count_tokens", None)
+        return count_tokens(text) if count_tokens else len(text) // 4 + 1
+
+    def _embedding_batches(self, chunks: List[_PendingChunk]) -> List[List[_PendingChunk]]:
+        """Greedily fill batches up to the input and token limits."""
+        batches: List[List[_PendingChunk]] = []
+        current: List[_PendingChunk] = []
+        tokens = 0
+        for chunk in chunks:
+            if current and (len(current) >= self.embed_batch_size or tokens + chunk.tokens > self.embed_batch_tokens):
+                batches.append(current)
+                current, tokens = [], 0
+            current.append(chunk)
+            tokens += chunk.tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _index_collection(
+        self, job: BulkIndexJob, collection_type: CollectionType, chunks: List[_PendingChunk]
+    ) -> None:
+        collection_name = self.manager.get_collection_name(collection_type)
+        await asyncio.to_thread(self.manager.ensure_collection, collection_name)
+
+        buffer: List[tuple] = []
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def embed(batch: List[_PendingChunk]) -> None:
+            async with semaphore:
+                try:
+                    embeddings = await self.embeddings.embed_batch([chunk.chunk["text"] for chunk in batch])
+                    if len(embeddings) != len(batch):
+                        raise ValueError(f"embedding count mismatch: {len(embeddings)} vs {len(batch)}")
+                except Exception as e:
+                    self._fail(batch, f"Embedding failed: {e}")
+                    return
+                job.embedding_batches += 1
+                buffer.extend(zip(batch, embeddings))
+                while len(buffer) >= self.upsert_batch_size:
+                    points = buffer[:self.upsert_batch_size]
+                    del buffer[:self.upsert_batch_size]
+                    await self._upsert(job, collection_type, points)
+
+        await asyncio.gather(*(embed(batch) for batch in self._embedding_batches(chunks)))
+        if buffer:
+            await self._upsert(job, collection_type, buffer)
+
+    async def _upsert(self, job: BulkIndexJob, collection_type: CollectionType, points: List[tuple]) -> None:
+        vectors, payloads, ids = [], [], []
+        for chunk, embedding in points:
+            doc_id = chunk.document.metadata.doc_id
+            vectors.append(embedding.vector)
+            payloads.append(self.manager.chunk_payload(chunk.chunk, doc_id, chunk.index, chunk.total, embedding))
+            ids.append(str(uuid.uuid5(CHUNK_ID_NAMESPACE, f"{collection_type.value}:{doc_id}:{chunk.index}")))
+
+        try:
+            success = await asyncio.to_thread(self.manager.upsert_points, collection_type, vectors, payloads, ids)
+            if not success:
+                raise RuntimeError("vector store rejected the batch")
+        except Exception as e:
+            self._fail([chunk for chunk, _ in points], f"Upsert failed: {e}")
+            return
+
+        self.manager.schedule_completions_merge()
+        job.upsert_batches += 1
+        job.chunks_indexed += len(points)
+        for chunk, _ in points:
+            chunk.document.status.chunks_indexed += 1
+
+    @staticmethod
+    def _fail(chunks: List[_PendingChunk], message: str) -> None:
+        for chunk in chunks:
+            status = chunk.document.status
+            if status.status != "failed":
+                status.status = "failed"
+                status.message = message
+                logger.warning(f"⚠️ Bulk indexing of {status.doc_id} failed: {message}")
+
+
+class BulkIndexJobRegistry:
+    """In-process registry of bulk index jobs running as background tasks."""
+
+    def __init__(self, indexer: Optional[BulkIndexer] = None, max_finished_jobs: int = 100):
+        self._indexer = indexer
+        self.max_finished_jobs = max_finished_jobs
+        self._jobs: Dict[str, BulkIndexJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def indexer(self) -> BulkIndexer:
+        if self._indexer is None:
+            self._indexer = BulkIndexer()
+        return self._indexer
+
+    def submit(
+        self, entries: List[Union[BulkDocument, DocumentIndexStatus]], owner: Optional[str] = None
+    ) -> BulkIndexJob:
+        """
+        Start a job in the background.
+
+        Args:
+            entries: Documents to index, in request order; a DocumentIndexStatus
+                stands for a document rejected up front and is reported as is
+            owner: Id of the submitting user
+        """
+        documents, statuses = [], []
+        for entry in entries:
+            if isinstance(entry, BulkDocument):
+                entry.status = DocumentIndexStatus(entry.metadata.doc_id, entry.collection_type.value)
+                documents.append(entry)
+                statuses.append(entry.status)
+            else:
+                statuses.append(entry)
+
+        job = BulkIndexJob(job_id=str(uuid.uuid4()), documents=documents, statuses=statuses, owner=owner)
+        self._jobs[job.job_id] = job
+        self._tasks[job.job_id] = asyncio.create_task(self._run(job))
+        self._prune()
+        return job
+
+    async def _run(self, job: BulkIndexJob) -> None:
+        try:
+            await self.indexer.run(job)
+        finally:
+            self._tasks.pop(job.job_id, None)
+
+    def get(self, job_id: str) -> Optional[BulkIndexJob]:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str) -> Optional[BulkIndexJob]:
+        """Wait for a job to finish."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return self._jobs.get(job_id)
+
+    def _prune(self) -> None:
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda job: job.created_at)[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job.job_id]
+
+
+# Global registry instance
+_bulk_index_jobs = None
+
+
+def get_bulk_index_jobs() -> BulkIndexJobRegistry:
+    """Get global bulk index job registry."""
+    global _bulk_index_jobs
+    if _bulk_index_jobs is None:
+        _bulk_index_jobs = BulkIndexJobRegistry()
+    return _bulk_index_jobs
@@ -1,14 +1,21 @@
 """
 Векторные коллекции - управление коллекциями документов
 """
+import heapq
 import logging
+import re
+import time
 import uuid
 import asyncio
-from typing import List, Dict, Any, Optional, AsyncIterator, Union
+from typing import List, Dict, Any, Optional, AsyncIterator, Set, Tuple, Union
 from enum import Enum
 from dataclasses import dataclass
-from .qdrant_client import get_qdrant_client
+from .qdrant_client import (QdrantCollectionConfig, QdrantVectorStore, get_local_vector_store,
+                            get_qdrant_client)
 from .embeddings import get_embeddings_service, DocumentChunker
+from .filters import PayloadFilter, parse_filter
+from .lexical_index import get_lexical_index_store, reciprocal_rank_fusion
+from .completion_index import completion_entries, get_completion_index
 
 # Import standardized async patterns
 from app.core.async_utils import (
@@ -45,6 +52,7 @@ class DocumentMetadata:
     tags: Optional[List[str]] = None
     content_type: Optional[str] = None
     file_path: Optional[str] = None
+    source_version: Optional[str] = None  # Revision in the source system (page version, commit SHA)
 
 class CollectionManager:
     """Manager for document collections and indexing."""
@@ -52,13 +60,115 @@ class CollectionManager:
     def __init__(self):
         """Initialize collection manager."""
         self.qdrant = get_qdrant_client()
+        self.lexical = get_lexical_index_store()
+        self.completions = get_completion_index()
+        self._completions_merge: Optional[asyncio.Task] = None
         self.embeddings = get_embeddings_service()
         self.chunker = DocumentChunker(chunk_size=1000, overlap=200)
+        
+        # Zero-downtime rebuilds: docs_<type> is an alias of docs_<type>_v<N>
+        self.reindex_config = {
+            "batch_size": 256,
+            "indexing_threshold": 20000,  # Qdrant default, restored after the bulk load
+            "warmup_queries": 5,
+            "index_timeout": AsyncTimeouts.DATABASE_MIGRATION,
+            "keep_previous_version": False,
+        }
+        self._shadow_collections: Dict[CollectionType, str] = {}
+        self._reindex_locks: Dict[CollectionType, asyncio.Lock] = {}
+        
+        # Cross-collection search: one batch request per query, no per-collection existence checks
+        self.search_config = {
+            "score_threshold": 0.3,   # Filter out very low relevance results early
+            "score_thresholds": {},   # Per collection type value, e.g. {"jira": 0.4}
+            "collections_ttl": 30.0,  # Seconds before the known collections are refreshed
+            # Hybrid retrieval: BM25 runs alongside vector search, rankings fused with RRF
+            "hybrid": True,
+            "vector_weight": 1.0,
+            "lexical_weight": 1.0,
+            "rrf_k": 60,
+        }
+        self._known_collections: Optional[Set[str]] = None
+        self._known_collections_at = 0.0
+        self._collections_refresh: Optional[asyncio.Task] = None
     
     def get_collection_name(self, collection_type: CollectionType) -> str:
-        """Get collection name for given type."""
+        """Get collection name (alias of the live version) for given type."""
         return f"docs_{collection_type.value}"
     
+    @staticmethod
+    def get_version_name(collection_name: str, version: int) -> str:
+        """Name of a concrete collection version behind the alias."""
+        return f"{collection_name}_v{version}"
+    
+    def _next_version_name(self, collection_name: str) -> str:
+        """Version following the one the alias currently points to."""
+        live_name = self.qdrant.resolve_collection(collection_name)
+        match = re.fullmatch(rf"{re.escape(collection_name)}_v(\d+)", live_name)
+        version = int(match.group(1)) + 1 if match else 1
+        return self.get_version_name(collection_name, version)
+    
+    def ensure_collection(self, collection_name: str) -> bool:
+        """Create the first version and its alias unless the collection exists."""
+        if self.qdrant.collection_exists(collection_name):
+            return True
+        
+        version_name = self.get_version_name(collection_name, 1)
+        success = self.qdrant.create_collection(
+            collection_name=version_name,
+            vector_size=1536  # OpenAI ada-002 embedding size
+        )
+        if success:
+            self.ensure_payload_indexes(collection_name, version_name)
+            self.qdrant.switch_alias(collection_name, version_name)
+            if self._known_collections is not None:
+                self._known_collections.add(collection_name)
+        return success
+    
+    def ensure_payload_indexes(self, collection_name: str, target_name: Optional[str] = None) -> Dict[str, str]:
+        """
+        Create missing payload indexes and recreate those whose type changed.
+        
+        Args:
+            collection_name: Collection (alias) name the definitions belong to
+            target_name: Concrete collection to index (default: the alias target)
+            
+        Returns:
+            Indexed key -> "created" | "migrated" for every change made
+        """
+        target_name = target_name or self.qdrant.resolve_collection(collection_name)
+        wanted = QdrantCollectionConfig.payload_indexes_for(collection_name[len("docs_"):])
+        existing = self.qdrant.get_payload_indexes(target_name)
+        
+        changes = {}
+        for field_name, field_schema in wanted.items():
+            if existing.get(field_name) == field_schema:
+                continue
+            if field_name in existing:
+                self.qdrant.delete_payload_index(target_name, field_name)
+                changes[field_name] = "migrated"
+            else:
+                changes[field_name] = "created"
+            self.qdrant.create_payload_index(target_name, field_name, field_schema)
+        
+        if changes:
+            logger.info(f"🗂️ Payload indexes of {target_name}: {changes}")
+        return changes
+    
+    def ensure_storage_profile(self, collection_name: str) -> Dict[str, Any]:
+        """
+        Migrate the live version of a collection to its storage profile in place.
+        
+        Qdrant re-optimizes the segments in the background and keeps serving
+        (the local backend re-encodes synchronously). reindex_collection() is
+        the alternative when a fresh build is wanted: new versions are always
+        created with the current profile.
+        
+        Returns:
+            Settings that were changed
+        """
+        return self.qdrant.apply_storage_profile(self.qdrant.resolve_collection(collection_name))
+    
     @async_retry(max_attempts=2, delay=2.0, exceptions=(Exception,))
     async def initialize_collections(self) -> Dict[str, bool]:
         """
@@ -80,6 +190,15 @@ class CollectionManager:
     
     async def _initialize_collections_internal(self) -> Dict[str, bool]:
         """Internal collection initialization with concurrent processing"""
+        if isinstance(self.qdrant, QdrantVectorStore):
+            # Probed on the running loop: the sync wrappers cannot run here
+            health = await self.qdrant.health_check()
+            if health["status"] != "healthy":
+                logger.error(f"❌ Qdrant at {self.qdrant.host}:{self.qdrant.port} is unhealthy: {health.get('error')}")
+                logger.warning("⚠️ Degraded mode: serving collections from the local vector index")
+                self.qdrant = get_local_vector_store()
+                self._known_collections = None
+        
         logger.info(f"🔄 Initializing {len(CollectionType)} collections concurrently...")
         
         # Create initialization tasks for each collection
@@ -114,6 +233,12 @@ class CollectionManager:
         successful_count = sum(1 for success in results.values() if success)
         logger.info(f"✅ Collection initialization completed: {successful_count}/{len(CollectionType)} successful")
         
+        # Collections indexed before the lexical index existed (or with a
+        # fresh LEXICAL_INDEX_PATH) get their payloads indexed for BM25...
+        await asyncio.to_thread(self.backfill_lexical_indexes)
+        # ...and autocomplete starts from the titles already indexed
+        await asyncio.to_thread(self.rebuild_completions)
+        
         return results
     
     async def _initialize_single_collection(self, collection_type: CollectionType) -> bool:
@@ -131,17 +256,25 @@ class CollectionManager:
             if not exists:
                 # Create collection with timeout
                 success = await with_timeout(
-                    asyncio.to_thread(
-                        self.qdrant.create_collection,
-                        collection_name=collection_name,
-                        vector_size=1536  # OpenAI ada-002 embedding size
-                    ),
+                    asyncio.to_thread(self.ensure_collection, collection_name),
                     AsyncTimeouts.DATABASE_TRANSACTION,  # 30 seconds to create collection
                     f"Collection creation timed out for {collection_name}"
                 )
                 return success
             else:
-                return True  # Already exists
+                # Existing collections pick up new or changed payload index definitions
+                await with_timeout(
+                    asyncio.to_thread(self.ensure_payload_indexes, collection_name),
+                    AsyncTimeouts.DATABASE_MIGRATION,
+                    f"Payload index migration timed out for {collection_name}"
+                )
+                # ...and their storage profile (quantization, on_disk, HNSW)
+                await with_timeout(
+                    asyncio.to_thread(self.ensure_storage_profile, collection_name),
+                    AsyncTimeouts.DATABASE_MIGRATION,
+                    f"Storage profile migration timed out for {collection_name}"
+                )
+                return True
                 
         except Exception as e:
             logger.error(f"❌ Failed to initialize collection {collection_name}: {e}")
@@ -167,71 +300,20 @@ class CollectionManager:
         try:
             collection_name = self.get_collection_name(collection_type)
             
-            # Ensure collection exists
-            if not self.qdrant.collection_exists(collection_name):
-                self.qdrant.create_collection(collection_name)
+            # Ensure collection exists (backend calls are blocking: kept off the event loop)
+            await asyncio.to_thread(self.ensure_collection, collection_name)
             
-            # Chunk document
-            chunks = self.chunker.chunk_document(
-                text=text,
-                metadata={
-                    "doc_id": metadata.doc_id,
-                    "title": metadata.title,
-                    "source": metadata.source,
-                    "source_type": metadata.source_type.value,
-                    "author": metadata.author,
-                    "created_at": metadata.created_at,
-                    "updated_at": metadata.updated_at,
-                    "url": metadata.url,
-                    "tags": metadata.tags or [],
-                    "content_type": metadata.content_type,
-                    "file_path": metadata.file_path
-                }
-            )
-            
-            if not chunks:
-                logger.warning(f"No chunks created for document: {metadata.doc_id}")
-                return False
-            
-            # Generate embeddings for chunks
-            chunk_texts = [chunk["text"] for chunk in chunks]
-            embeddings = await self.embeddings.embed_texts(chunk_texts)
-            
-            if len(embeddings) != len(chunks):
-                logger.error(f"Embedding count mismatch: {len(embeddings)} vs {len(chunks)}")
+            points = await self._prepare_points(text, metadata)
+            if points is None:
                 return False
-            
-            # Prepare vectors and payloads with proper UUIDs
-            vectors = [emb.vector for emb in embeddings]
-            payloads = []
-            chunk_ids = []
-            
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-                # Generate proper UUID for each chunk
-                chunk_uuid = str(uuid.uuid4())
-                chunk_ids.append(chunk_uuid)
-                
-                payload = {
-                    **chunk,
-                    "original_doc_id": metadata.doc_id,  # Keep original doc ID in payload
-                    "chunk_id": f"{metadata.doc_id}_{i}",  # Human-readable chunk reference
-                    "embedding_token_count": embedding.token_count,
-                    "embedding_cost": embedding.cost_estimate,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
-                }
-                payloads.append(payload)
+            vectors, payloads, chunk_ids = points
             
             # Store vectors in Qdrant
-            success = self.qdrant.upsert_vectors(
-                collection_name=collection_name,
-                vectors=vectors,
-                payloads=payloads,
-                ids=chunk_ids
-            )
+            success = await asyncio.to_thread(self.upsert_points, collection_type, vectors, payloads, chunk_ids)
             
             if success:
-                logger.info(f"Indexed document {metadata.doc_id} with {len(chunks)} chunks")
+                logger.info(f"Indexed document {metadata.doc_id} with {len(chunk_ids)} chunks")
+                self.schedule_completions_merge()
             
             return success
             
@@ -239,13 +321,110 @@ class CollectionManager:
             logger.error(f"Failed to index document {metadata.doc_id}: {e}")
             return False
     
+    def upsert_points(
+        self,
+        collection_type: CollectionType,
+        vectors: List[List[float]],
+        payloads: List[Dict[str, Any]],
+        ids: List[str]
+    ) -> bool:
+        """Upsert prepared points into the live collection (and a rebuild in progress)."""
+        collection_name = self.get_collection_name(collection_type)
+        success = self.qdrant.upsert_vectors(
+            collection_name=collection_name,
+            vectors=vectors,
+            payloads=payloads,
+            ids=ids
+        )
+        if success:
+            self.lexical.upsert(collection_name, ids, payloads)
+            self.completions.add(collection_type.value, completion_entries(payloads))
+        
+        # A rebuild in progress must not miss documents indexed meanwhile
+        shadow_name = self._shadow_collections.get(collection_type)
+        if success and shadow_name:
+            self.qdrant.upsert_vectors(
+                collection_name=shadow_name,
+                vectors=vectors,
+                payloads=payloads,
+                ids=ids
+            )
+            if self.lexical.exists(shadow_name):
+                self.lexical.upsert(shadow_name, ids, payloads)
+        return success
+    
+    def chunk_document(self, text: str, metadata: DocumentMetadata) -> List[Dict[str, Any]]:
+        """Split a document into chunks carrying its metadata."""
+        return self.chunker.chunk_document(
+            text=text,
+            metadata={
+                "doc_id": metadata.doc_id,
+                "title": metadata.title,
+                "source": metadata.source,
+                "source_type": metadata.source_type.value,
+                "author": metadata.author,
+                "created_at": metadata.created_at,
+                "updated_at": metadata.updated_at,
+                "url": metadata.url,
+                "tags": metadata.tags or [],
+                "content_type": metadata.content_type,
+                "file_path": metadata.file_path,
+                "source_version": metadata.source_version
+            }
+        )
+    
+    @staticmethod
+    def chunk_payload(
+        chunk: Dict[str, Any], doc_id: str, index: int, total: int, embedding: "EmbeddingResult"
+    ) -> Dict[str, Any]:
+        """Payload stored with a chunk vector."""
+        return {
+            **chunk,
+            "original_doc_id": doc_id,  # Keep original doc ID in payload
+            "chunk_id": f"{doc_id}_{index}",  # Human-readable chunk reference
+            "embedding_token_count": embedding.token_count,
+            "embedding_cost": embedding.cost_estimate,
+            "chunk_index": index,
+            "total_chunks": total
+        }
+    
+    async def _prepare_points(
+        self, text: str, metadata: DocumentMetadata
+    ) -> Optional[Tuple[List[List[float]], List[Dict[str, Any]], List[str]]]:
+        """Chunk and embed a document into (vectors, payloads, ids)."""
+        # Chunk document
+        chunks = self.chunk_document(text, metadata)
+        
+        if not chunks:
+            logger.warning(f"No chunks created for document: {metadata.doc_id}")
+            return None
+        
+        # Generate embeddings for chunks
+        chunk_texts = [chunk["text"] for chunk in chunks]
+        embeddings = await self.embeddings.embed_texts(chunk_texts)
+        
+        if len(embeddings) != len(chunks):
+            logger.error(f"Embedding count mismatch: {len(embeddings)} vs {len(chunks)}")
+            return None
+        
+        # Prepare vectors and payloads with proper UUIDs
+        vectors = [emb.vector for emb in embeddings]
+        payloads = [
+            self.chunk_payload(chunk, metadata.doc_id, i, len(chunks), embedding)
+            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+        ]
+        chunk_ids = [str(uuid.uuid4()) for _ in chunks]
+        
+        return vectors, payloads, chunk_ids
+    
     @async_retry(max_attempts=2, delay=1.0, exceptions=(Exception,))
     async def search_documents(
         self,
         query: str,
         collection_types: List[CollectionType] = None,
         limit: int = 10,
-        filters: Dict[str, Any] = None
+        filters: Dict[str, Any] = None,
+        user_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Search documents across collections.
@@ -256,6 +435,7 @@ class CollectionManager:
             collection_types: Collections to search (default: all)
             limit: Maximum results per collection
             filters: Optional filters for search
+            user_id: Searching user; only their queries feed autocomplete
             
         Returns:
             List of search results with scores and metadata
@@ -267,7 +447,7 @@ class CollectionManager:
             timeout = self._calculate_multi_collection_search_timeout(collection_types, limit)
             
             return await with_timeout(
-                self._search_documents_internal(query, collection_types, limit, filters),
+                self._search_documents_internal(query, collection_types, limit, filters, user_id),
                 timeout,
                 f"Multi-collection search timed out (query: '{query[:50]}...', collections: {len(collection_types or CollectionType)}, limit: {limit})",
                 {
@@ -286,7 +466,8 @@ class CollectionManager:
             return []
     
     async def _search_documents_internal(
-        self, query: str, collection_types: List[CollectionType], limit: int, filters: Dict[str, Any]
+        self, query: str, collection_types: List[CollectionType], limit: int, filters: Dict[str, Any],
+        user_id: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Internal search method with optimized concurrent collection processing"""
         if collection_types is None:
@@ -294,6 +475,34 @@ class CollectionManager:
         
         logger.info(f"🔍 Searching {len(collection_types)} collections concurrently for: '{query[:100]}...'")
         
+        # Filters are parsed once and pushed down to the payload indexes of every collection
+        payload_filter = parse_filter(filters)
+        
+        # BM25 needs no embedding: it runs while the query is embedded and searched
+        if self.search_config["hybrid"]:
+            vector_results, lexical_results = await asyncio.gather(
+                self._vector_search(query, collection_types, limit, payload_filter),
+                self._lexical_search(query, collection_types, limit, payload_filter),
+            )
+            final_results = self._fuse_results(vector_results, lexical_results, limit)
+        else:
+            final_results = (await self._vector_search(query, collection_types, limit, payload_filter))[:limit]
+        
+        if final_results:
+            # Successful queries feed autocomplete of the sources that answered them
+            self.completions.record_query(
+                query, {result["collection_type"] for result in final_results}, user_id
+            )
+            self.schedule_completions_merge()
+        
+        logger.info(f"✅ Search completed: {len(final_results)} results from {len(collection_types)} collections")
+        return final_results
+    
+    async def _vector_search(
+        self, query: str, collection_types: List[CollectionType], limit: int,
+        payload_filter: Optional[PayloadFilter]
+    ) -> List[Dict[str, Any]]:
+        """Vector hits of all collections ranked by normalized score."""
         # OPTIMIZATION 1: Cache embedding generation to avoid redundant computation
         query_embedding = await self._get_or_generate_embedding(query)
         
@@ -301,49 +510,131 @@ class CollectionManager:
             logger.error("❌ Failed to generate query embedding")
             return []
         
-        # OPTIMIZATION 2: Increase concurrency and optimize search distribution
-        search_tasks = [
-            self._search_single_collection_optimized(collection_type, query_embedding.vector, limit, filters)
-            for collection_type in collection_types
-        ]
+        # One request per collection with its own limit and threshold, all sent as a
+        # single batch; collections known not to exist are skipped without a round trip
+        known = await self._existing_collections()
+        requests = []
+        for collection_type in collection_types:
+            collection_name = self.get_collection_name(collection_type)
+            if known is not None and collection_name not in known:
+                logger.debug(f"Collection {collection_name} does not exist, skipping")
+                continue
+            requests.append({
+                "collection_type": collection_type,
+                "collection_name": collection_name,
+                "query_vector": query_embedding.vector,
+                "limit": self._calculate_adaptive_limit(collection_type, limit),
+                "score_threshold": self._score_threshold(collection_type),
+                "filters": payload_filter,
+            })
+        if not requests:
+            return []
         
-        # OPTIMIZATION 3: Execute searches with higher concurrency and better timeout handling
-        search_results = await safe_gather(
-            *search_tasks,
-            return_exceptions=True,
-            timeout=AsyncTimeouts.VECTOR_SEARCH,  # 15 seconds for all searches
-            max_concurrency=10  # Increased from 5 to 10 for better parallelism
-        )
+        try:
+            batches = await with_timeout(
+                asyncio.to_thread(self.qdrant.search_batch, requests),
+                AsyncTimeouts.VECTOR_SEARCH,  # 15 seconds for all collections
+                f"Vector search timed out for {len(requests)} collections",
+                {"collections": [request["collection_name"] for request in requests]}
+            )
+        except AsyncTimeoutError as e:
+            logger.warning(f"⏰ Batch search timed out: {e}")
+            return []
         
-        # OPTIMIZATION 4: Parallel result processing and aggregation
         all_results = []
-        successful_searches = 0
+        for request, hits in zip(requests, batches):
+            all_results.extend(self._merge_hits(request, hits))
         
-        for collection_type, result in zip(collection_types, search_results):
-            if isinstance(result, Exception):
-                logger.warning(f"⚠️ Search failed for collection {collection_type.value}: {result}")
-                continue
-            
-            successful_searches += 1
-            all_results.extend(result)
-        
-        # OPTIMIZATION 5: Optimized sorting with heap for better performance on large result sets
-        if len(all_results) > 1000:  # Use heap-based sorting for large datasets
-            import heapq
-            # Get top results more efficiently
-            top_results = heapq.nlargest(limit * 2, all_results, key=lambda x: x["score"])
-            all_results = sorted(top_results, key=lambda x: x["score"], reverse=True)
-        else:
-            # Standard sorting for smaller datasets
-            all_results.sort(key=lambda x: x["score"], reverse=True)
+        # Normalized scores are comparable across collections with different thresholds
+        all_results.sort(key=lambda x: x["normalized_score"], reverse=True)
+        return all_results
+    
+    async def _lexical_search(
+        self, query: str, collection_types: List[CollectionType], limit: int,
+        payload_filter: Optional[PayloadFilter]
+    ) -> List[Dict[str, Any]]:
+        """BM25 hits of all collections ranked by score."""
+        requests = [
+            {
+                "collection_type": collection_type,
+                "collection_name": self.get_collection_name(collection_type),
+                "query": query,
+                "limit": self._calculate_adaptive_limit(collection_type, limit),
+                "filters": payload_filter,
+            }
+            for collection_type in collection_types
+        ]
+        try:
+            batches = await asyncio.to_thread(self.lexical.search_batch, requests)
+        except Exception as e:
+            logger.warning(f"⚠️ Lexical search failed: {e}")
+            return []
+        
+        all_results = [
+            {
+                "id": hit["id"],
+                "lexical_score": hit["score"],
+                "collection_type": request["collection_type"].value,
+                "payload": hit["payload"],
+            }
+            for request, hits in zip(requests, batches)
+            for hit in hits
+        ]
+        all_results.sort(key=lambda x: x["lexical_score"], reverse=True)
+        return all_results
+    
+    def _fuse_results(
+        self, vector_results: List[Dict[str, Any]], lexical_results: List[Dict[str, Any]], limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Merge vector and BM25 rankings with weighted reciprocal rank fusion.
         
-        # Return top results
-        final_results = all_results[:limit]
+        A point found by both keeps its vector score and gains a lexical_score;
+        points found only by BM25 have a score of 0.0. Results are ordered by
+        fused_score.
+        """
+        def key(result: Dict[str, Any]) -> tuple:
+            return result["collection_type"], result["id"]
         
-        logger.info(
-            f"✅ Search completed: {len(final_results)} results from {successful_searches}/{len(collection_types)} collections"
+        fused = reciprocal_rank_fusion(
+            [
+                ([key(result) for result in vector_results], self.search_config["vector_weight"]),
+                ([key(result) for result in lexical_results], self.search_config["lexical_weight"]),
+            ],
+            k=self.search_config["rrf_k"],
         )
-        return final_results
+        
+        merged: Dict[tuple, Dict[str, Any]] = {}
+        for result in vector_results:
+            merged[key(result)] = {**result, "lexical_score": None}
+        for result in lexical_results:
+            if key(result) in merged:
+                merged[key(result)]["lexical_score"] = result["lexical_score"]
+            else:
+                merged[key(result)] = {"score": 0.0, "normalized_score": 0.0, **result}
+        
+        top = heapq.nlargest(limit, (k for k in merged if k in fused), key=fused.get)
+        return [{**merged[k], "fused_score": fused[k]} for k in top]
+    
+    @staticmethod
+    def _merge_hits(request: Dict[str, Any], hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Results of one collection with a normalized score: cosine similarity
+        rescaled from [score_threshold, 1] to [0, 1], so a collection with a
+        stricter threshold does not outrank on raw similarity alone.
+        """
+        threshold = request["score_threshold"] or 0.0
+        span = max(1.0 - threshold, 1e-6)
+        return [
+            {
+                "id": hit["id"],
+                "score": hit["score"],
+                "normalized_score": min(max((hit["score"] - threshold) / span, 0.0), 1.0),
+                "collection_type": request["collection_type"].value,
+                "payload": hit["payload"],
+            }
+            for hit in hits
+        ]
     
     async def _get_or_generate_embedding(self, query: str) -> Optional["EmbeddingResult"]:
         """Get or generate embedding with caching optimization"""
@@ -380,86 +671,108 @@ class CollectionManager:
             logger.error(f"❌ Failed to generate or cache embedding: {e}")
             return None
     
-    async def _search_single_collection_optimized(
-        self, collection_type: CollectionType, query_vector: List[float], limit: int, filters: Dict[str, Any]
-    ) -> List[Dict[str, Any]]:
-        """Optimized single collection search with enhanced error handling and performance"""
-        collection_name = self.get_collection_name(collection_type)
-        
-        try:
-            # OPTIMIZATION 1: Adaptive limit based on collection type and expected relevance
-            adaptive_limit = self._calculate_adaptive_limit(collection_type, limit)
-            
-            # OPTIMIZATION 2: Check collection health before search
-            if not await self._quick_collection_health_check(collection_name):
-                logger.warning(f"⚠️ Collection {collection_name} appears unhealthy, skipping")
-                return []
-            
-            # OPTIMIZATION 3: Execute search with optimized parameters
-            raw_results = await with_timeout(
-                self.qdrant.search_vectors(
-                    collection_name=collection_name,
-                    query_vector=query_vector,
-                    limit=adaptive_limit,
-                    score_threshold=0.3,  # Filter out very low relevance results early
-                    filters=filters,
-                ),
-                AsyncTimeouts.VECTOR_SEARCH // 2,  # 7.5 seconds per collection
-                f"Vector search timed out for collection: {collection_name}",
-                {"collection": collection_name, "limit": adaptive_limit}
-            )
-            
-            # OPTIMIZATION 4: Fast result processing with minimal data transformation
-            processed_results = []
-            for result in raw_results:
-                processed_result = {
-                    "id": result["id"],
-                    "score": result["score"],
-                    "collection_type": collection_type.value,
-                    "payload": result["payload"]
-                }
-                processed_results.append(processed_result)
-            
-            logger.debug(f"📊 Collection {collection_name}: {len(processed_results)} results")
-            return processed_results
-            
-        except AsyncTimeoutError as e:
-            logger.warning(f"⏰ Search timeout for collection {collection_name}: {e}")
-            return []
-        except Exception as e:
-            logger.error(f"❌ Search error for collection {collection_name}: {e}")
-            return []
-    
     def _calculate_adaptive_limit(self, collection_type: CollectionType, base_limit: int) -> int:
         """Calculate adaptive search limit based on collection characteristics"""
         # Increase limit for collections likely to have more relevant results
+        # Keyed by value: not every content type has a CollectionType member
         multipliers = {
-            CollectionType.DOCUMENTS: 1.5,      # Documents often have high relevance
-            CollectionType.KNOWLEDGE_BASE: 1.3,  # Knowledge base is curated
-            CollectionType.CODE_SNIPPETS: 1.2,   # Code snippets are specific
-            CollectionType.CHAT_HISTORY: 1.0     # Chat history may be noisy
+            "documents": 1.5,       # Documents often have high relevance
+            "knowledge_base": 1.3,  # Knowledge base is curated
+            "code_snippets": 1.2,   # Code snippets are specific
+            "chat_history": 1.0     # Chat history may be noisy
         }
         
-        multiplier = multipliers.get(collection_type, 1.0)
+        multiplier = multipliers.get(collection_type.value, 1.0)
         adaptive_limit = int(base_limit * multiplier)
         
         # Cap at reasonable maximum to avoid performance degradation
         return min(adaptive_limit, base_limit * 2, 200)
     
-    async def _quick_collection_health_check(self, collection_name: str) -> bool:
-        """Quick health check for collection availability"""
+    def _score_threshold(self, collection_type: CollectionType) -> float:
+        """Minimum similarity of results from a collection"""
+        return self.search_config["score_thresholds"].get(collection_type.value, self.search_config["score_threshold"])
+    
+    async def _existing_collections(self) -> Optional[Set[str]]:
+        """
+        Known collection and alias names, refreshed in the background once
+        older than collections_ttl. None (search everything) until the first
+        listing succeeds.
+        """
+        if self._known_collections is None:
+            await self._refresh_collections()
+        elif time.monotonic() - self._known_collections_at > self.search_config["collections_ttl"]:
+            if self._collections_refresh is None or self._collections_refresh.done():
+                self._collections_refresh = create_background_task(
+                    self._refresh_collections(), name="refresh_known_collections"
+                )
+        return self._known_collections
+    
+    async def _refresh_collections(self) -> None:
         try:
-            # Fast health check with minimal timeout
-            collections = await with_timeout(
-                self.qdrant.list_collections(),
-                2.0,  # Very fast timeout for health check
-                f"Health check timeout for {collection_name}"
+            self._known_collections = await with_timeout(
+                asyncio.to_thread(self.qdrant.get_collection_names),
+                2.0,  # Very fast timeout: searches fall back to trying every collection
+                "Collection listing timed out"
+            )
+            self._known_collections_at = time.monotonic()
+        except Exception as e:
+            # Better to try and fail than to skip collections
+            logger.warning(f"⚠️ Failed to list collections: {e}")
+    
+    def schedule_completions_merge(self) -> None:
+        """Merge pending autocomplete entries in a background thread once enough piled up."""
+        if not self.completions.needs_merge:
+            return
+        if self._completions_merge is None or self._completions_merge.done():
+            self._completions_merge = create_background_task(
+                asyncio.to_thread(self.completions.merge), name="merge_completions"
             )
-            return collection_name in collections
-        except Exception:
-            # If health check fails, assume collection is available
-            # Better to try and fail than to skip
-            return True
+    
+    def backfill_lexical_indexes(self) -> Dict[str, int]:
+        """
+        Index stored payloads of collections whose lexical index is empty.
+        
+        Returns:
+            Number of points indexed per backfilled collection
+        """
+        backfilled = {}
+        for collection_type in CollectionType:
+            collection_name = self.get_collection_name(collection_type)
+            if self.lexical.info(collection_name)["points_count"] or not self.qdrant.collection_exists(collection_name):
+                continue
+            indexed = 0
+            offset = None
+            while True:
+                points, offset = self.qdrant.scroll(collection_name, self.reindex_config["batch_size"], offset)
+                if points:
+                    self.lexical.upsert(
+                        collection_name, [point["id"] for point in points], [point["payload"] for point in points]
+                    )
+                    indexed += len(points)
+                if offset is None:
+                    break
+            if indexed:
+                backfilled[collection_name] = indexed
+        if backfilled:
+            logger.info(f"🔤 Backfilled lexical indexes: {backfilled}")
+        return backfilled
+    
+    def rebuild_completions(self, collection_types: Optional[List[CollectionType]] = None) -> Dict[str, int]:
+        """
+        Rebuild autocomplete titles and headings from the lexical index.
+        
+        Drops entries of deleted documents; query history is kept.
+        
+        Returns:
+            Number of entries per collection type
+        """
+        rebuilt = {}
+        for collection_type in collection_types or list(CollectionType):
+            entries = completion_entries(self.lexical.payloads(self.get_collection_name(collection_type)))
+            self.completions.rebuild_source(collection_type.value, entries)
+            rebuilt[collection_type.value] = len(entries)
+        logger.info(f"🔤 Rebuilt completions: {sum(rebuilt.values())} titles and headings")
+        return rebuilt
     
     def _calculate_multi_collection_search_timeout(
         self, collection_types: List[CollectionType], limit: int
@@ -497,32 +810,25 @@ class CollectionManager:
         try:
             collection_name = self.get_collection_name(collection_type)
             
-            if not self.qdrant.collection_exists(collection_name):
+            if not await asyncio.to_thread(self.qdrant.collection_exists, collection_name):
                 logger.warning(f"Collection {collection_name} does not exist")
                 return False
             
-            # Find all chunks for this document
-            # Use a filter to find all points with this doc_id
-            filter_condition = {"original_doc_id": doc_id}
+            # All chunks of the document carry its id in the payload
+            filters = {"original_doc_id": doc_id}
+            deleted = await asyncio.to_thread(self.qdrant.delete_points, collection_name, filters=filters)
+            await asyncio.to_thread(self.lexical.delete, collection_name, filters=filters)
             
-            # Search for all chunks (large limit to get all)
-            results = self.qdrant.search_vectors(
-                collection_name=collection_name,
-                query_vector=[0.0] * 1536,  # Dummy vector
-                limit=1000,  # Large limit
-                filter_conditions=filter_condition
-            )
+            # A rebuild in progress must not resurrect the document
+            shadow_name = self._shadow_collections.get(collection_type)
+            if shadow_name:
+                await asyncio.to_thread(self.qdrant.delete_points, shadow_name, filters=filters)
+                await asyncio.to_thread(self.lexical.delete, shadow_name, filters=filters)
             
-            if not results:
+            if not deleted:
                 logger.warning(f"No chunks found for document: {doc_id}")
-                return True
-            
-            # Delete all chunk points
-            point_ids = [result["id"] for result in results]
-            
-            # Note: Qdrant client doesn't have bulk delete in our simplified version
-            # In production, you'd use client.delete() with point IDs
-            logger.info(f"Would delete {len(point_ids)} chunks for document {doc_id}")
+            else:
+                logger.info(f"🗑️ Deleted {deleted} chunks of document {doc_id}")
             
             return True
             
@@ -613,7 +919,8 @@ class CollectionManager:
                 return {
                     "exists": True,
                     "type": collection_type.value,
-                    "status": "active",
+                    "status": "rebuilding" if collection_type in self._shadow_collections else "active",
+                    "version": await asyncio.to_thread(self.qdrant.resolve_collection, collection_name),
                     "last_checked": "just_now"
                 }
             else:
@@ -632,34 +939,165 @@ class CollectionManager:
                 "error": str(e)
             }
     
-    async def reindex_collection(self, collection_type: CollectionType) -> bool:
+    async def reindex_collection(
+        self,
+        collection_type: CollectionType,
+        documents: Optional[List[tuple]] = None
+    ) -> bool:
         """
-        Reindex entire collection (recreate from source).
+        Rebuild a collection without downtime.
+        
+        The new version is built in a shadow collection while searches keep
+        using the live one through the alias: points are loaded in bulk with
+        HNSW indexing deferred, the index is built and warmed up with sample
+        queries, then the alias is switched atomically and the previous
+        version is deleted.
         
         Args:
             collection_type: Collection to reindex
+            documents: Optional (text, DocumentMetadata) pairs to index into the
+                new version; by default points of the live version are copied
             
         Returns:
-            True if successful
+            True if the new version went live
         """
-        try:
-            collection_name = self.get_collection_name(collection_type)
-            
-            # Delete existing collection
-            if self.qdrant.collection_exists(collection_name):
-                self.qdrant.delete_collection(collection_name)
-                logger.info(f"Deleted existing collection: {collection_name}")
-            
-            # Recreate collection
-            success = self.qdrant.create_collection(collection_name)
-            if success:
-                logger.info(f"Recreated collection: {collection_name}")
-            
-            return success
-            
-        except Exception as e:
-            logger.error(f"Failed to reindex collection {collection_type.value}: {e}")
+        lock = self._reindex_locks.setdefault(collection_type, asyncio.Lock())
+        if lock.locked():
+            logger.warning(f"⚠️ Reindex of {collection_type.value} is already running")
             return False
+        
+        async with lock:
+            collection_name = self.get_collection_name(collection_type)
+            shadow_name = None
+            try:
+                await asyncio.to_thread(self.ensure_collection, collection_name)
+                shadow_name = await asyncio.to_thread(self._next_version_name, collection_name)
+                await asyncio.to_thread(self.qdrant.delete_collection, shadow_name)  # leftover of a failed build
+                await asyncio.to_thread(self.lexical.drop, shadow_name)
+                # Created up front so upserts made during the load reach it too
+                await asyncio.to_thread(self.lexical.upsert, shadow_name, [], [])
+                
+                # Bulk load without building HNSW on every batch
+                await asyncio.to_thread(
+                    self.qdrant.create_collection,
+                    collection_name=shadow_name,
+                    vector_size=1536,
+                    indexing_threshold=0
+                )
+                # Index payloads before the load, as Qdrant recommends
+                await asyncio.to_thread(self.ensure_payload_indexes, collection_name, shadow_name)
+                self._shadow_collections[collection_type] = shadow_name
+                logger.info(f"🔄 Rebuilding {collection_name} into {shadow_name}")
+                
+                if documents is None:
+                    expected = await self._copy_points(collection_name, shadow_name)
+                else:
+                    expected = await self._index_into(shadow_name, documents)
+                
+                await asyncio.to_thread(
+                    self.qdrant.update_collection,
+                    shadow_name,
+                    indexing_threshold=self.reindex_config["indexing_threshold"]
+                )
+                indexed = await asyncio.to_thread(
+                    self.qdrant.wait_for_indexing, shadow_name, self.reindex_config["index_timeout"]
+                )
+                loaded = await asyncio.to_thread(self.qdrant.count_points, shadow_name)
+                if not indexed or loaded < expected:
+                    raise RuntimeError(f"shadow collection not ready: {loaded}/{expected} points, indexed={indexed}")
+                
+                await self._warmup_collection(shadow_name)
+                
+                previous_name = await asyncio.to_thread(self._switch_to_version, collection_name, shadow_name)
+                self._shadow_collections.pop(collection_type, None)
+                # The lexical index was rebuilt alongside: it goes live too
+                await asyncio.to_thread(self.lexical.replace, collection_name, shadow_name)
+                await asyncio.to_thread(self.rebuild_completions, [collection_type])
+                logger.info(f"✅ {collection_name} now serves {shadow_name} ({loaded} points)")
+                
+                # Garbage-collect the previous version
+                if previous_name and not self.reindex_config["keep_previous_version"]:
+                    await asyncio.to_thread(self.qdrant.delete_collection, previous_name)
+                    logger.info(f"🗑️ Deleted previous version: {previous_name}")
+                
+                return True
+                
+            except Exception as e:
+                logger.error(f"Failed to reindex collection {collection_type.value}: {e}")
+                if shadow_name:
+                    self._shadow_collections.pop(collection_type, None)
+                    await asyncio.to_thread(self.qdrant.delete_collection, shadow_name)
+                    await asyncio.to_thread(self.lexical.drop, shadow_name)
+                return False
+    
+    def _switch_to_version(self, collection_name: str, version_name: str) -> Optional[str]:
+        """Point the alias at a version; returns the previously served collection."""
+        if collection_name not in self.qdrant.get_aliases() and self.qdrant.collection_exists(collection_name):
+            # Pre-alias deployment: a plain collection holds the alias name
+            # and has to go before the alias can be created
+            logger.warning(f"⚠️ Replacing plain collection {collection_name} with an alias")
+            self.qdrant.delete_collection(collection_name)
+        return self.qdrant.switch_alias(collection_name, version_name)
+    
+    async def _copy_points(self, source_name: str, target_name: str) -> int:
+        """Copy points with vectors in batches, indexing their payloads for BM25; returns the number copied."""
+        copied = 0
+        offset = None
+        while True:
+            points, offset = await asyncio.to_thread(
+                self.qdrant.scroll, source_name, self.reindex_config["batch_size"], offset
+            )
+            if points:
+                await asyncio.to_thread(
+                    self.qdrant.upsert_vectors,
+                    collection_name=target_name,
+                    vectors=[point["vector"] for point in points],
+                    payloads=[point["payload"] for point in points],
+                    ids=[point["id"] for point in points]
+                )
+                await asyncio.to_thread(
+                    self.lexical.upsert,
+                    target_name,
+                    [point["id"] for point in points],
+                    [point["payload"] for point in points]
+                )
+                copied += len(points)
+            if offset is None:
+                return copied
+    
+    async def _index_into(self, target_name: str, documents: List[tuple]) -> int:
+        """Chunk and embed documents into a collection version; returns chunk count."""
+        indexed = 0
+        for text, metadata in documents:
+            points = await self._prepare_points(text, metadata)
+            if points is None:
+                continue
+            vectors, payloads, chunk_ids = points
+            await asyncio.to_thread(
+                self.qdrant.upsert_vectors,
+                collection_name=target_name,
+                vectors=vectors,
+                payloads=payloads,
+                ids=chunk_ids
+            )
+            await asyncio.to_thread(self.lexical.upsert, target_name, chunk_ids, payloads)
+            indexed += len(chunk_ids)
+        return indexed
+    
+    async def _warmup_collection(self, collection_name: str) -> int:
+        """Run sample queries (vectors of stored points) against a new version."""
+        points, _ = await asyncio.to_thread(
+            self.qdrant.scroll, collection_name, self.reindex_config["warmup_queries"]
+        )
+        for point in points:
+            await asyncio.to_thread(
+                self.qdrant.search_vectors,
+                collection_name=collection_name,
+                query_vector=point["vector"],
+                limit=10
+            )
+        logger.info(f"🔥 Warmed up {collection_name} with {len(points)} queries")
+        return len(points)
 
 # Global collection manager instance
 _collection_manager = None
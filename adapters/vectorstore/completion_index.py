@@ -0,0 +1,409 @@
+"""
+Completion index - in-memory prefix index for search autocomplete
+
+Completions come from document titles, markdown headings and anonymized
+successful queries, ranked by popularity. A vector search per keystroke is
+too slow for autocomplete; a prefix lookup here takes microseconds.
+
+Every source (collection type) keeps its entries in a sorted array of
+normalized keys with a block sparse table for range-maximum queries: a
+prefix is a contiguous key range and its top-k entries are extracted
+max-first without scanning the range. Additions go to a small sorted delta
+that is merged into a new array in the background (merge()), so ingestion
+and search history update the index incrementally.
+"""
+import bisect
+import hashlib
+import heapq
+import logging
+import re
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Entries per block of the range-maximum structure: partial blocks are
+# scanned with NumPy, whole blocks come from the sparse table
+BLOCK_SIZE = 64
+
+# Pending additions of a source before merge() is due
+MERGE_THRESHOLD = 20000
+
+# A query is suggested once it succeeded for this many distinct users, so a
+# query only one user typed (possibly carrying their personal data) never
+# reaches other users, however often they repeat it
+QUERY_MIN_USERS = 2
+MAX_QUERY_LENGTH = 100
+MAX_PENDING_QUERIES = 100000
+
+# Queries with e-mails, links or long numbers (phones, account ids) are not recorded
+SENSITIVE_RE = re.compile(r"[\w.+-]+@[\w-]+\.\w+|https?://|\d{6,}")
+HEADING_RE = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+DOCUMENTS = "documents"
+QUERIES = "queries"
+
+
+def normalize_key(text: str) -> str:
+    """Lowercase with collapsed whitespace: the form prefixes are matched on."""
+    return " ".join(text.lower().split())
+
+
+def completion_entries(payloads: Iterable[Dict[str, Any]]) -> List[str]:
+    """Titles (once per document) and markdown headings of chunk payloads."""
+    entries = []
+    for payload in payloads:
+        if payload.get("title") and not payload.get("chunk_index"):
+            entries.append(payload["title"])
+        entries.extend(HEADING_RE.findall(payload.get("text") or ""))
+    return entries
+
+
+class SortedRun:
+    """
+    Immutable sorted array of (key, text, weight) with a block sparse table
+    over the weights for range-maximum queries.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str, float]] = ()):
+        entries = list(entries)
+        self.keys: List[str] = [entry[0] for entry in entries]
+        self.texts: List[str] = [entry[1] for entry in entries]
+        self.weights = np.fromiter((entry[2] for entry in entries), dtype=np.float64, count=len(entries))
+        self.table = self._build_table(self.weights)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def entries(self) -> Iterator[Tuple[str, str, float]]:
+        return zip(self.keys, self.texts, self.weights.tolist())
+
+    @classmethod
+    def merged(cls, older: "SortedRun", newer: Iterable[Tuple[str, str, float]]) -> "SortedRun":
+        """Union of two sorted entry streams; newer entries replace older ones with the same key."""
+        entries = []
+        previous = None
+        # Tagging newer entries 0 makes them come first among equal keys
+        stream = heapq.merge(
+            ((key, 0, text, weight) for key, text, weight in newer),
+            ((key, 1, text, weight) for key, text, weight in older.entries()),
+        )
+        for key, _, text, weight in stream:
+            if key != previous:
+                entries.append((key, text, weight))
+                previous = key
+        return cls(entries)
+
+    @staticmethod
+    def _build_table(weights: np.ndarray) -> List[np.ndarray]:
+        """Sparse table over block maxima: level j holds the argmax of 2**j blocks."""
+        blocks = -(-len(weights) // BLOCK_SIZE)
+        if not blocks:
+            return []
+        padded = np.full(blocks * BLOCK_SIZE, -np.inf)
+        padded[:len(weights)] = weights
+        level = padded.reshape(blocks, BLOCK_SIZE).argmax(axis=1) + np.arange(blocks) * BLOCK_SIZE
+        table = [level]
+        span = 1
+        while 2 * span <= blocks:
+            left, right = level[:-span], level[span:]
+            level = np.where(padded[left] >= padded[right], left, right)
+            table.append(level)
+            span *= 2
+        return table
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        position = bisect.bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return self.texts[position], float(self.weights[position])
+        return None
+
+    def _argmax(self, low: int, high: int) -> int:
+        """Position of the largest weight in keys[low:high] (high > low)."""
+        weights = self.weights
+        first, last = low // BLOCK_SIZE, (high - 1) // BLOCK_SIZE
+        if first == last:
+            return low + int(weights[low:high].argmax())
+        candidates = [
+            low + int(weights[low:(first + 1) * BLOCK_SIZE].argmax()),
+            last * BLOCK_SIZE + int(weights[last * BLOCK_SIZE:high].argmax()),
+        ]
+        if last - first > 1:
+            level = (last - first - 1).bit_length() - 1
+            candidates.append(int(self.table[level][first + 1]))
+            candidates.append(int(self.table[level][last - (1 << level)]))
+        return max(candidates, key=lambda position: (weights[position], -position))
+
+    def top(self, prefix: str, limit: int) -> List[Tuple[str, str, float]]:
+        """The limit heaviest entries starting with prefix, heaviest first."""
+        top = []
+        low, high = key_range(self.keys, prefix)
+        if low >= high:
+            return top
+        position = self._argmax(low, high)
+        heap = [(-self.weights[position], position, low, high)]
+        while heap and len(top) < limit:
+            _, position, low, high = heapq.heappop(heap)
+            top.append((self.keys[position], self.texts[position], float(self.weights[position])))
+            for start, stop in ((low, position), (position + 1, high)):
+                if start < stop:
+                    best = self._argmax(start, stop)
+                    heapq.heappush(heap, (-self.weights[best], best, start, stop))
+        return top
+
+
+def key_range(keys: List[str], prefix: str) -> Tuple[int, int]:
+    """Slice of sorted keys starting with prefix."""
+    return bisect.bisect_left(keys, prefix), bisect.bisect_left(keys, prefix + "\U0010ffff")
+
+
+class PrefixIndex:
+    """
+    Completions of one source in tiers, newest first: a small dict of recent
+    additions (scanned), a sorted delta run and the sorted base run.
+
+    Every tier stores total weights, so the newest tier holding a key is
+    authoritative and the union of the per-tier top-k holds the true top-k.
+    Recent additions are folded into the delta run every RECENT_LIMIT
+    entries; merge() folds the delta into a new base.
+    """
+
+    RECENT_LIMIT = 256
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.base = SortedRun()
+        # Delta being merged into the base: still read until the new base is swapped in
+        self.frozen = SortedRun()
+        self.delta = SortedRun()
+        self.recent: Dict[str, List[Any]] = {}
+        # Bumped by build(): a merge started before a rebuild must not overwrite it
+        self.generation = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self.delta) + len(self.recent)
+
+    @property
+    def size(self) -> int:
+        return len(self.base) + len(self.frozen) + self.pending
+
+    def _tiers(self) -> List[SortedRun]:
+        return [self.delta, self.frozen, self.base]
+
+    def _get(self, key: str) -> Optional[Tuple[str, float]]:
+        entry = self.recent.get(key)
+        if entry is not None:
+            return entry[0], entry[1]
+        for run in self._tiers():
+            found = run.get(key)
+            if found is not None:
+                return found
+        return None
+
+    # ---- writes -----------------------------------------------------------
+
+    def add(self, text: str, weight: float = 1.0) -> None:
+        key = normalize_key(text)
+        if not key:
+            return
+        with self.lock:
+            current = self._get(key)
+            if current is None:
+                self.recent[key] = [text, weight]
+            else:
+                self.recent[key] = [current[0], current[1] + weight]
+            if len(self.recent) >= self.RECENT_LIMIT:
+                self.delta = SortedRun.merged(self.delta, self._recent_entries())
+                self.recent = {}
+
+    def _recent_entries(self) -> List[Tuple[str, str, float]]:
+        return [(key, text, weight) for key, (text, weight) in sorted(self.recent.items())]
+
+    def build(self, entries: Iterable[Tuple[str, float]]) -> None:
+        """Replace all entries (a rebuild from scratch)."""
+        merged: Dict[str, List[Any]] = {}
+        for text, weight in entries:
+            key = normalize_key(text)
+            if key:
+                merged.setdefault(key, [text, 0.0])[1] += weight
+        base = SortedRun((key, text, weight) for key, (text, weight) in sorted(merged.items()))
+        with self.lock:
+            self.base, self.frozen, self.delta, self.recent = base, SortedRun(), SortedRun(), {}
+            self.generation += 1
+
+    def merge(self) -> int:
+        """Merge pending additions into a new base run; returns the number of entries merged."""
+        with self.lock:
+            if not self.pending or len(self.frozen):
+                return 0
+            self.frozen = SortedRun.merged(self.delta, self._recent_entries())
+            self.delta, self.recent = SortedRun(), {}
+            base, frozen, generation = self.base, self.frozen, self.generation
+
+        # Built outside the lock: lookups keep reading the old base and the frozen run
+        merged = SortedRun.merged(base, frozen.entries())
+
+        with self.lock:
+            if self.generation != generation:
+                # build() replaced every entry meanwhile, the frozen run included
+                return 0
+            self.base, self.frozen = merged, SortedRun()
+        return len(frozen)
+
+    # ---- reads ------------------------------------------------------------
+
+    def top(self, prefix: str, limit: int) -> Dict[str, List[Any]]:
+        """key -> [text, weight] of the limit heaviest entries starting with prefix."""
+        with self.lock:
+            candidates: Dict[str, List[Any]] = {}
+            for key, (text, weight) in self.recent.items():
+                if key.startswith(prefix):
+                    candidates[key] = [text, weight]
+            # Newest tier first: a key already seen carries its current weight
+            tiers = self._tiers()
+            for depth, run in enumerate(tiers):
+                for key, text, weight in run.top(prefix, limit):
+                    if key in candidates:
+                        continue
+                    # Only the newest tier holding the key is current
+                    if any(newer.get(key) is not None for newer in tiers[:depth]):
+                        continue
+                    candidates[key] = [text, weight]
+            return candidates
+
+
+class CompletionIndex:
+    """
+    Completions of all sources; suggest() merges the sources a user may see.
+
+    Sources are collection type values ("confluence", "jira", ...). Titles
+    and headings of a source can be rebuilt from scratch (rebuild_source) -
+    which also drops deleted documents - without touching its query log.
+    """
+
+    def __init__(self, merge_threshold: int = MERGE_THRESHOLD):
+        self.merge_threshold = merge_threshold
+        self.indexes: Dict[Tuple[str, str], PrefixIndex] = {}
+        # normalized query -> [successes, hashed user ids]; the hashes are
+        # dropped (None) once the query is promoted to the index
+        self.pending_queries: Dict[str, List[Any]] = {}
+        self.lock = threading.Lock()
+
+    def _index(self, source: str, kind: str) -> PrefixIndex:
+        with self.lock:
+            index = self.indexes.get((source, kind))
+            if index is None:
+                index = self.indexes[(source, kind)] = PrefixIndex()
+            return index
+
+    @property
+    def needs_merge(self) -> bool:
+        return any(index.pending >= self.merge_threshold for index in list(self.indexes.values()))
+
+    def add(self, source: str, texts: Iterable[str], weight: float = 1.0) -> None:
+        """Add titles/headings of ingested documents"""
+        index = self._index(source, DOCUMENTS)
+        for text in texts:
+            index.add(text, weight)
+
+    def rebuild_source(self, source: str, texts: Iterable[str], weights: Optional[Iterable[float]] = None) -> None:
+        """Replace the titles/headings of a source (weight 1 per occurrence by default)"""
+        texts = list(texts)
+        weights = [1.0] * len(texts) if weights is None else weights
+        self._index(source, DOCUMENTS).build(zip(texts, weights))
+
+    def record_query(self, query: str, sources: Iterable[str], user_id: Optional[str] = None) -> bool:
+        """
+        Count a successful query of user_id for the sources that answered it;
+        returns True once it is suggestible. Only a truncated hash of the user
+        id is kept, and only until the query is promoted. Anonymous queries
+        are not recorded: their users cannot be told apart.
+        """
+        key = normalize_key(query)
+        if user_id is None or not key or len(key) > MAX_QUERY_LENGTH or SENSITIVE_RE.search(key):
+            return False
+        user = hashlib.sha256(str(user_id).encode()).hexdigest()[:16]
+        with self.lock:
+            if len(self.pending_queries) >= MAX_PENDING_QUERIES:
+                self.pending_queries.clear()
+            entry = self.pending_queries.setdefault(key, [0, set()])
+            entry[0] += 1
+            users = entry[1]
+            if users is None:
+                weight = 1
+            else:
+                users.add(user)
+                if len(users) < QUERY_MIN_USERS:
+                    return False
+                # The earlier successes were only counted: they are credited on promotion
+                entry[1] = None
+                weight = entry[0]
+        for source in set(sources):
+            self._index(source, QUERIES).add(query.strip(), weight)
+        return True
+
+    def merge(self) -> int:
+        """Merge pending additions of every source; returns the number merged"""
+        return sum(index.merge() for index in list(self.indexes.values()))
+
+    def resolve_sources(self, sources: Optional[Iterable[str]]) -> Optional[set]:
+        """
+        Sources of the index visible through data source ids: "confluence_main"
+        grants "confluence". None means every source.
+        """
+        if sources is None:
+            return None
+        requested = list(sources)
+        known = {source for source, _ in list(self.indexes)}
+        return {
+            source for source in known
+            if any(name == source or name.startswith(source + "_") for name in requested)
+        }
+
+    def suggest(self, prefix: str, limit: int = 5,
+                sources: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Top completions of prefix by popularity over the allowed sources"""
+        key = normalize_key(prefix)
+        if not key or limit <= 0:
+            return []
+        # Typing "api " should not lose the trailing space of the prefix
+        if prefix[-1:].isspace():
+            key += " "
+        allowed = self.resolve_sources(sources)
+
+        merged: Dict[str, Dict[str, Any]] = {}
+        for (source, _), index in list(self.indexes.items()):
+            if allowed is not None and source not in allowed:
+                continue
+            for entry_key, (text, weight) in index.top(key, limit).items():
+                entry = merged.setdefault(entry_key, {"text": text, "weight": 0.0, "sources": []})
+                entry["weight"] += weight
+                if source not in entry["sources"]:
+                    entry["sources"].append(source)
+        top = heapq.nsmallest(limit, merged.values(), key=lambda entry: (-entry["weight"], entry["text"].lower()))
+        for entry in top:
+            # Keep what the user typed, complete with the rest of the entry
+            text = entry["text"]
+            typed = prefix.lstrip()
+            entry["completion"] = typed + text[len(typed):] if text.lower().startswith(typed.lower()) else text
+        return top
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": {f"{source}:{kind}": index.size for (source, kind), index in list(self.indexes.items())},
+            "pending_queries": len(self.pending_queries),
+        }
+
+
+_completion_index: Optional[CompletionIndex] = None
+
+
+def get_completion_index() -> CompletionIndex:
+    """Process-wide completion index, fed by CollectionManager and read by the suggestion endpoints."""
+    global _completion_index
+    if _completion_index is None:
+        _completion_index = CompletionIndex()
+    return _completion_index
@@ -47,6 +47,7 @@ class OpenAIEmbeddings:
         
         self.model = "text-embedding-ada-002"
         self.max_tokens = 8192  # Max tokens for ada-002
+        self.max_batch_inputs = 2048  # Max inputs per embeddings request
         self.cost_per_1k_tokens = 0.0001  # USD per 1k tokens
         
         # Token encoder for token counting
@@ -172,6 +173,54 @@ class OpenAIEmbeddings:
             cost_estimate=cost_estimate
         )
     
+    @async_retry(
+        max_attempts=3,
+        delay=1.0,
+        backoff=2.0,
+        exceptions=(Exception,)
+    )
+    async def embed_batch(self, texts: List[str]) -> List[EmbeddingResult]:
+        """
+        Generate embeddings for a batch of texts with a single API request.
+        
+        Unlike embed_texts, results are aligned with the input and a failure
+        raises instead of dropping texts, so callers can attribute errors.
+        
+        Args:
+            texts: Input texts (at most max_batch_inputs)
+            
+        Returns:
+            One EmbeddingResult per input text, in order
+        """
+        if not texts:
+            return []
+        if not self.api_key:
+            return [self._mock_embedding(text) for text in texts]
+        
+        token_counts = [self.count_tokens(text) for text in texts]
+        inputs = [
+            self.split_text_by_tokens(text, self.max_tokens)[0] if count > self.max_tokens else text
+            for text, count in zip(texts, token_counts)
+        ]
+        
+        response = await with_timeout(
+            openai.Embedding.acreate(model=self.model, input=inputs),
+            self._calculate_batch_embedding_timeout(inputs),
+            f"Batch embedding request timed out (batch size: {len(inputs)})"
+        )
+        
+        # The API may return items out of order; "index" refers to the input
+        vectors = {item["index"]: item["embedding"] for item in response["data"]}
+        return [
+            EmbeddingResult(
+                text=text,
+                vector=vectors[i],
+                token_count=min(count, self.max_tokens),
+                cost_estimate=(min(count, self.max_tokens) / 1000) * self.cost_per_1k_tokens
+            )
+            for i, (text, count) in enumerate(zip(inputs, token_counts))
+        ]
+    
     @async_retry(max_attempts=2, delay=2.0, exceptions=(Exception,))
     async def embed_texts(self, texts: List[str]) -> List[EmbeddingResult]:
         """
@@ -0,0 +1,257 @@
+"""
+Payload filter DSL shared by the vector store backends
+
+Filters are plain JSON-friendly dicts, so they travel unchanged from API
+requests to the backend:
+
+    {"source_type": "confluence"}                      match
+    {"tags": ["adr", "rfc"]}                           match any
+    {"author": {"except": ["bot"]}}                    match except
+    {"chunk_index": {"gte": 0, "lt": 3}}               numeric range
+    {"updated_at": {"gte": "2024-01-01T00:00:00Z"}}    datetime range
+    {"url": {"is_empty": True}}  /  {"url": None}      missing, null or []
+    {"must": [...], "should": [...], "must_not": [...]} nested clauses
+
+Field conditions of one dict are combined with AND; keys may be dotted
+("meta.lang"). parse_filter() validates a dict into a PayloadFilter that
+is translated to a Qdrant Filter or evaluated in Python by the local index.
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+try:
+    from qdrant_client.http import models
+    QDRANT_MODELS_AVAILABLE = True
+except ImportError:
+    QDRANT_MODELS_AVAILABLE = False
+
+CLAUSES = ("must", "should", "must_not")
+RANGE_OPS = ("gt", "gte", "lt", "lte")
+OPERATORS = ("eq", "any", "except", "is_empty") + RANGE_OPS
+
+# Payload index types understood by both backends (Qdrant PayloadSchemaType values)
+PAYLOAD_SCHEMA_TYPES = ("keyword", "integer", "float", "bool", "datetime")
+
+
+class FilterError(ValueError):
+    """Invalid filter expression"""
+    pass
+
+
+@dataclass(frozen=True)
+class Condition:
+    """Condition on one payload key; op is match, any, except, range, datetime_range or is_empty."""
+    key: str
+    op: str
+    value: Any
+
+
+@dataclass
+class PayloadFilter:
+    """must: all hold; should: at least one holds (when given); must_not: none holds."""
+    must: List[Union[Condition, "PayloadFilter"]] = field(default_factory=list)
+    should: List[Union[Condition, "PayloadFilter"]] = field(default_factory=list)
+    must_not: List[Union[Condition, "PayloadFilter"]] = field(default_factory=list)
+
+    def conditions(self) -> List[Condition]:
+        """All field conditions, including nested ones."""
+        found = []
+        for item in self.must + self.should + self.must_not:
+            found.extend(item.conditions() if isinstance(item, PayloadFilter) else [item])
+        return found
+
+
+def to_timestamp(value: Any) -> Optional[float]:
+    """POSIX timestamp of a datetime, date or ISO 8601 string (naive means UTC); None otherwise."""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=timezone.utc).timestamp()
+    return None
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _parse_field(key: str, spec: Any) -> List[Condition]:
+    if spec is None:
+        return [Condition(key, "is_empty", True)]
+    if isinstance(spec, (list, tuple, set)):
+        return [Condition(key, "any", tuple(spec))]
+    if isinstance(spec, (datetime, date)):
+        return [Condition(key, "datetime_range", (("gte", spec), ("lte", spec)))]
+    if not isinstance(spec, dict):
+        if not isinstance(spec, (str, int, float)):
+            raise FilterError(f"Unsupported value for {key}: {spec!r}")
+        return [Condition(key, "match", spec)]
+
+    unknown = set(spec) - set(OPERATORS)
+    if unknown:
+        raise FilterError(f"Unknown operators for {key}: {', '.join(sorted(unknown))}")
+    conditions = []
+    if "eq" in spec:
+        conditions.extend(_parse_field(key, spec["eq"]))
+    for op in ("any", "except"):
+        if op in spec:
+            if not isinstance(spec[op], (list, tuple, set)):
+                raise FilterError(f"{key}.{op} expects a list")
+            conditions.append(Condition(key, op, tuple(spec[op])))
+    if "is_empty" in spec:
+        conditions.append(Condition(key, "is_empty", bool(spec["is_empty"])))
+
+    bounds = tuple((op, spec[op]) for op in RANGE_OPS if op in spec)
+    if bounds:
+        if all(_is_number(value) for _, value in bounds):
+            conditions.append(Condition(key, "range", bounds))
+        elif all(to_timestamp(value) is not None for _, value in bounds):
+            conditions.append(Condition(key, "datetime_range", bounds))
+        else:
+            raise FilterError(f"Range bounds of {key} must be all numbers or all dates")
+    return conditions
+
+
+def parse_filter(filters: Optional[Dict[str, Any]]) -> Optional[PayloadFilter]:
+    """Validate a filter dict; None or {} means no filtering."""
+    if not filters:
+        return None
+    if not isinstance(filters, dict):
+        raise FilterError("Filter must be an object")
+
+    parsed = PayloadFilter()
+    for key, spec in filters.items():
+        if key in CLAUSES:
+            items = spec if isinstance(spec, list) else [spec]
+            for item in items:
+                nested = parse_filter(item)
+                if nested is None:
+                    raise FilterError(f"Empty {key} clause")
+                getattr(parsed, key).append(nested)
+        else:
+            parsed.must.extend(_parse_field(key, spec))
+    return parsed
+
+
+# ---- Python evaluation (local index) -------------------------------------
+
+def payload_values(payload: Optional[Dict[str, Any]], key: str) -> List[Any]:
+    """Values of a (dotted) payload key; arrays are flattened, null and missing give []."""
+    value: Any = payload
+    for part in key.split("."):
+        if not isinstance(value, dict):
+            return []
+        value = value.get(part)
+    if value is None:
+        return []
+    return [v for v in value if v is not None] if isinstance(value, list) else [value]
+
+
+def _same(left: Any, right: Any) -> bool:
+    # True == 1 in Python but not in a payload
+    return left == right and isinstance(left, bool) == isinstance(right, bool)
+
+
+def _in_range(value: Optional[float], bounds: tuple) -> bool:
+    if value is None:
+        return False
+    for op, bound in bounds:
+        if op == "gt" and not value > bound:
+            return False
+        if op == "gte" and not value >= bound:
+            return False
+        if op == "lt" and not value < bound:
+            return False
+        if op == "lte" and not value <= bound:
+            return False
+    return True
+
+
+def condition_matches(payload: Optional[Dict[str, Any]], condition: Condition) -> bool:
+    """Evaluate one condition against a payload (None payloads never match)."""
+    if payload is None:
+        return False
+    values = payload_values(payload, condition.key)
+    op = condition.op
+    if op == "is_empty":
+        return (not values) == condition.value
+    if op == "match":
+        return any(_same(value, condition.value) for value in values)
+    if op == "any":
+        return any(_same(value, accepted) for value in values for accepted in condition.value)
+    if op == "except":
+        return bool(values) and not any(_same(value, excluded) for value in values for excluded in condition.value)
+    if op == "range":
+        return any(_is_number(value) and _in_range(value, condition.value) for value in values)
+    if op == "datetime_range":
+        bounds = tuple((bound_op, to_timestamp(bound)) for bound_op, bound in condition.value)
+        return any(_in_range(to_timestamp(value), bounds) for value in values)
+    raise FilterError(f"Unknown condition: {op}")
+
+
+def filter_matches(payload: Optional[Dict[str, Any]], payload_filter: Optional[PayloadFilter]) -> bool:
+    """Evaluate a parsed filter against a payload."""
+    if payload_filter is None:
+        return payload is not None
+
+    def holds(item: Union[Condition, PayloadFilter]) -> bool:
+        if isinstance(item, PayloadFilter):
+            return filter_matches(payload, item)
+        return condition_matches(payload, item)
+
+    return (
+        payload is not None
+        and all(holds(item) for item in payload_filter.must)
+        and (not payload_filter.should or any(holds(item) for item in payload_filter.should))
+        and not any(holds(item) for item in payload_filter.must_not)
+    )
+
+
+# ---- Qdrant translation ---------------------------------------------------
+
+def _qdrant_condition(condition: Condition) -> Any:
+    key, op, value = condition.key, condition.op, condition.value
+    if op == "is_empty":
+        is_empty = models.IsEmptyCondition(is_empty=models.PayloadField(key=key))
+        return is_empty if value else models.Filter(must_not=[is_empty])
+    if op == "match":
+        if isinstance(value, float):  # MatchValue takes keywords, integers and bools only
+            return models.FieldCondition(key=key, range=models.Range(gte=value, lte=value))
+        return models.FieldCondition(key=key, match=models.MatchValue(value=value))
+    if op == "any":
+        return models.FieldCondition(key=key, match=models.MatchAny(any=list(value)))
+    if op == "except":
+        return models.FieldCondition(key=key, match=models.MatchExcept(**{"except": list(value)}))
+    if op == "range":
+        return models.FieldCondition(key=key, range=models.Range(**dict(value)))
+    if op == "datetime_range":
+        bounds = {bound_op: datetime.fromtimestamp(to_timestamp(bound), timezone.utc) for bound_op, bound in value}
+        return models.FieldCondition(key=key, range=models.DatetimeRange(**bounds))
+    raise FilterError(f"Unknown condition: {op}")
+
+
+def to_qdrant_filter(filters: Union[None, Dict[str, Any], PayloadFilter]) -> Optional["models.Filter"]:
+    """Translate a filter dict (or a parsed filter) to a Qdrant Filter."""
+    payload_filter = filters if isinstance(filters, PayloadFilter) or filters is None else parse_filter(filters)
+    if payload_filter is None:
+        return None
+    if not QDRANT_MODELS_AVAILABLE:
+        raise FilterError("Qdrant client not installed")
+
+    def translate(items: List[Union[Condition, PayloadFilter]]) -> Optional[List[Any]]:
+        translated = [
+            to_qdrant_filter(item) if isinstance(item, PayloadFilter) else _qdrant_condition(item)
+            for item in items
+        ]
+        return translated or None
+
+    return models.Filter(
+        must=translate(payload_filter.must),
+        should=translate(payload_filter.should),
+        must_not=translate(payload_filter.must_not),
+    )
@@ -0,0 +1,377 @@
+"""
+Local lexical index - BM25 over chunk payloads, next to the vector index
+
+Vector search misses exact identifiers (ticket keys, function names, error
+codes) and SQL ILIKE scans cannot use indexes. Every collection gets an
+inverted index that is updated with the same upserts/deletes as its
+vectors, persisted as an append-only log and queried in parallel with
+vector search; reciprocal_rank_fusion() merges both rankings.
+"""
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple, TypeVar, Union
+
+from .filters import PayloadFilter, filter_matches, parse_filter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Payload fields indexed for every point
+TEXT_FIELDS = ("title", "text")
+
+# Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Reciprocal rank fusion constant: larger values flatten the head of each ranking
+RRF_K = 60
+
+# The log is rewritten once it holds this many records per live document
+COMPACT_RATIO = 2.0
+MIN_COMPACT_RECORDS = 1024
+
+# Words with their joiners kept: "PROJ-123", "get_user", "ERR.CONN_RESET", "v1.2.3"
+TOKEN_RE = re.compile(r"\w+(?:[-./:]\w+)*")
+PART_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased tokens; a compound identifier yields itself and its parts,
+    so "PROJ-123" matches exactly and "proj" still matches it.
+    """
+    tokens = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        parts = PART_RE.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Tuple[Sequence[Hashable], float]],
+                           k: int = RRF_K) -> Dict[Hashable, float]:
+    """
+    Fuse ranked key lists into one score per key: sum of weight / (k + rank).
+
+    Ranks need no score calibration, so BM25 and cosine lists fuse directly;
+    a weight of 0 switches a ranking off.
+    """
+    fused: Dict[Hashable, float] = {}
+    for keys, weight in rankings:
+        if not weight:
+            continue
+        for rank, key in enumerate(keys, start=1):
+            fused[key] = fused.get(key, 0.0) + weight / (k + rank)
+    return fused
+
+
+def fuse_ranked_items(rankings: Sequence[Tuple[Sequence[T], float]], key: Callable[[T], Hashable],
+                      k: int = RRF_K) -> List[Tuple[T, float]]:
+    """
+    Fuse ranked item lists (best first) into (item, fused score) pairs, best first.
+
+    Every ranking comes paired with its own weight. An item found by several
+    rankings is taken from the last one, so the richer ranking goes last.
+    """
+    fused = reciprocal_rank_fusion([([key(item) for item in items], weight) for items, weight in rankings], k)
+    items_by_key = {key(item): item for items, _ in rankings for item in items}
+    return [(items_by_key[item_key], score)
+            for item_key, score in sorted(fused.items(), key=lambda entry: entry[1], reverse=True)]
+
+
+class LexicalIndex:
+    """
+    Inverted index of one collection: term -> {point id: term frequency}.
+
+    On disk an index directory holds postings.jsonl, an append-only log of
+    upserts (term counts and payload) and deletes replayed on open.
+    """
+
+    def __init__(self, name: str, path: Optional[str] = None):
+        self.name = name
+        self.path = path
+        self.lock = threading.RLock()
+
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.terms: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}
+        self.payloads: Dict[str, Dict[str, Any]] = {}
+        self.total_length = 0
+        self._log = None
+        self._records = 0
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            if os.path.exists(self._file):
+                self._load()
+
+    @property
+    def count(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def _file(self) -> str:
+        return os.path.join(self.path, "postings.jsonl")
+
+    # ---- writes -----------------------------------------------------------
+
+    def _add(self, point_id: str, terms: Dict[str, int], payload: Dict[str, Any]) -> None:
+        self._remove(point_id)
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[point_id] = frequency
+        self.terms[point_id] = terms
+        self.lengths[point_id] = sum(terms.values())
+        self.payloads[point_id] = payload
+        self.total_length += self.lengths[point_id]
+
+    def _remove(self, point_id: str) -> bool:
+        terms = self.terms.pop(point_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            postings = self.postings[term]
+            del postings[point_id]
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(point_id)
+        del self.payloads[point_id]
+        return True
+
+    def upsert(self, ids: List[Any], payloads: List[Dict[str, Any]]) -> None:
+        if len(ids) != len(payloads):
+            raise ValueError("Ids and payloads must have the same length")
+        records = []
+        with self.lock:
+            for point_id, payload in zip(ids, payloads):
+                text = " ".join(str(payload.get(field) or "") for field in TEXT_FIELDS)
+                terms = dict(Counter(tokenize(text)))
+                self._add(str(point_id), terms, payload)
+                records.append({"op": "upsert", "id": str(point_id), "terms": terms, "payload": payload})
+            self._append_log(records)
+
+    def delete(self, ids: Optional[List[Any]] = None,
+               filters: Union[None, Dict[str, Any], PayloadFilter] = None) -> int:
+        """Delete points by id and/or payload filter; returns the number deleted."""
+        payload_filter = filters if isinstance(filters, PayloadFilter) else parse_filter(filters)
+        with self.lock:
+            targets = [str(i) for i in ids] if ids is not None else list(self.payloads)
+            if payload_filter is not None:
+                targets = [i for i in targets if i in self.payloads and filter_matches(self.payloads[i], payload_filter)]
+            deleted = [point_id for point_id in targets if self._remove(point_id)]
+            self._append_log([{"op": "delete", "id": point_id} for point_id in deleted])
+            return len(deleted)
+
+    # ---- reads ------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10,
+               filters: Union[None, Dict[str, Any], PayloadFilter] = None) -> List[Dict[str, Any]]:
+        """Top points by BM25 score of the query terms."""
+        payload_filter = filters if isinstance(filters, PayloadFilter) else parse_filter(filters)
+        with self.lock:
+            if not self.count or limit <= 0:
+                return []
+            average_length = self.total_length / self.count
+            scores: Dict[str, float] = {}
+            for term in self._query_terms(query):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (self.count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for point_id, frequency in postings.items():
+                    norm = frequency + BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[point_id] / average_length)
+                    scores[point_id] = scores.get(point_id, 0.0) + idf * frequency * (BM25_K1 + 1) / norm
+
+            candidates = scores.items()
+            if payload_filter is not None:
+                candidates = [(i, s) for i, s in candidates if filter_matches(self.payloads[i], payload_filter)]
+            top = heapq.nlargest(limit, candidates, key=lambda item: item[1])
+            return [{"id": point_id, "score": score, "payload": self.payloads[point_id]} for point_id, score in top]
+
+    def _query_terms(self, query: str) -> Set[str]:
+        """
+        Query tokens; parts of a compound identifier are only a fallback when
+        the identifier itself is not indexed, so "PROJ-123" does not score
+        every document that mentions "proj".
+        """
+        terms = set()
+        for match in TOKEN_RE.finditer(query.lower()):
+            token = match.group()
+            parts = PART_RE.findall(token)
+            if token in self.postings or len(parts) <= 1:
+                terms.add(token)
+            else:
+                terms.update(parts)
+        return terms
+
+    def info(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "name": self.name,
+                "points_count": self.count,
+                "terms_count": len(self.postings),
+                "average_length": self.total_length / self.count if self.count else 0.0,
+                "persisted": bool(self.path),
+            }
+
+    # ---- persistence ------------------------------------------------------
+
+    def _append_log(self, records: List[Dict[str, Any]]) -> None:
+        if not self.path or not records:
+            return
+        if self._log is None:
+            self._log = open(self._file, "a")
+        self._log.write("".join(json.dumps(record) + "\n" for record in records))
+        self._log.flush()
+        self._records += len(records)
+        if self._records >= MIN_COMPACT_RECORDS and self._records > self.count * COMPACT_RATIO:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the log with one upsert per live point."""
+        with self.lock:
+            if not self.path:
+                return
+            self._close_log()
+            temporary = self._file + ".tmp"
+            with open(temporary, "w") as handle:
+                for point_id, terms in self.terms.items():
+                    record = {"op": "upsert", "id": point_id, "terms": terms, "payload": self.payloads[point_id]}
+                    handle.write(json.dumps(record) + "\n")
+            os.replace(temporary, self._file)
+            self._records = self.count
+
+    def _close_log(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _load(self) -> None:
+        with open(self._file) as handle:
+            for line in handle:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                self._records += 1
+                if record["op"] == "upsert":
+                    self._add(record["id"], record["terms"], record["payload"])
+                else:
+                    self._remove(record["id"])
+        logger.info(f"📂 Loaded lexical index {self.name}: {self.count} points from {self.path}")
+
+    def close(self) -> None:
+        self._close_log()
+
+
+class LexicalIndexStore:
+    """
+    Named lexical indexes, one per collection (or data source).
+
+    With a path every index is persisted in its own directory and reopened
+    on start; without one everything lives in memory. Indexes are created
+    by their first upsert.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.indexes: Dict[str, LexicalIndex] = {}
+        self.lock = threading.RLock()
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            for name in sorted(os.listdir(path)):
+                if os.path.exists(os.path.join(path, name, "postings.jsonl")):
+                    self.indexes[name] = LexicalIndex(name, os.path.join(path, name))
+
+    def _index(self, name: str) -> LexicalIndex:
+        with self.lock:
+            index = self.indexes.get(name)
+            if index is None:
+                index = LexicalIndex(name, os.path.join(self.path, name) if self.path else None)
+                self.indexes[name] = index
+            return index
+
+    def exists(self, name: str) -> bool:
+        return name in self.indexes
+
+    def upsert(self, name: str, ids: List[Any], payloads: List[Dict[str, Any]]) -> None:
+        """Index (or reindex) points by their text payload fields"""
+        self._index(name).upsert(ids, payloads)
+
+    def delete(self, name: str, ids: Optional[List[Any]] = None,
+               filters: Union[None, Dict[str, Any], PayloadFilter] = None) -> int:
+        """Delete points by ids and/or payload filter; returns the number deleted"""
+        if not self.exists(name):
+            return 0
+        return self.indexes[name].delete(ids, filters)
+
+    def search(self, name: str, query: str, limit: int = 10,
+               filters: Union[None, Dict[str, Any], PayloadFilter] = None) -> List[Dict[str, Any]]:
+        """BM25 search of one index"""
+        index = self.indexes.get(name)
+        if index is None:
+            return []
+        return index.search(query, limit, filters)
+
+    def search_batch(self, requests: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Run several searches in one call (mirrors the vector store batch interface)"""
+        return [
+            self.search(request["collection_name"], request["query"], request.get("limit", 10), request.get("filters"))
+            for request in requests
+        ]
+
+    def payloads(self, name: str) -> List[Dict[str, Any]]:
+        """Snapshot of the payloads of an index"""
+        index = self.indexes.get(name)
+        if index is None:
+            return []
+        with index.lock:
+            return list(index.payloads.values())
+
+    def drop(self, name: str) -> bool:
+        """Delete an index with its files"""
+        with self.lock:
+            index = self.indexes.pop(name, None)
+            if index is None:
+                return False
+            index.close()
+            if index.path:
+                shutil.rmtree(index.path, ignore_errors=True)
+            return True
+
+    def replace(self, name: str, source_name: str) -> None:
+        """Serve the index built as source_name under name (a rebuilt collection going live)"""
+        with self.lock:
+            index = self.indexes.pop(source_name)
+            self.drop(name)
+            if index.path:
+                index.close()
+                target = os.path.join(self.path, name)
+                os.replace(index.path, target)
+                index.path = target
+            index.name = name
+            self.indexes[name] = index
+
+    def info(self, name: str) -> Dict[str, Any]:
+        if not self.exists(name):
+            return {"name": name, "points_count": 0}
+        return self.indexes[name].info()
+
+    def close(self) -> None:
+        """Release all index logs"""
+        for index in list(self.indexes.values()):
+            index.close()
+
+
+def get_lexical_index_store() -> LexicalIndexStore:
+    """Lexical index store of a CollectionManager, persisted under LEXICAL_INDEX_PATH when set."""
+    return LexicalIndexStore(path=os.getenv("LEXICAL_INDEX_PATH") or None)
@@ -0,0 +1,1155 @@
+"""
+Local vector index - in-process backend with the interface of the Qdrant client
+
+Exact NumPy search for small collections and an HNSW graph for large ones,
+payload filters backed by payload indexes, int8/binary quantized scans,
+deletes and optional memory-mapped persistence. Serves tests,
+local development, single-node deployments and the degraded mode when the
+Qdrant server is unreachable.
+"""
+import heapq
+import json
+import logging
+import math
+import os
+import random
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from .filters import (PAYLOAD_SCHEMA_TYPES, Condition, PayloadFilter,
+                      condition_matches, parse_filter, payload_values,
+                      to_timestamp)
+from .qdrant_client import QdrantCollectionConfig, QdrantError
+
+logger = logging.getLogger(__name__)
+
+DISTANCES = ("cosine", "dot", "euclid")
+
+# Mirrors the hnsw_config of QdrantCollectionConfig. full_scan_threshold is in
+# KB of vectors as in Qdrant: below ~20 MB a NumPy scan beats walking the graph
+DEFAULT_HNSW_CONFIG = {
+    "m": 16,
+    "ef_construct": 100,
+    "ef": 64,
+    "full_scan_threshold": 20000,
+}
+
+# Storage of collections created without a profile: float32 vectors only
+DEFAULT_STORAGE = {"name": None, "on_disk": False, "quantization": None, "search": {}}
+
+# Deleted slots are compacted away once they make up this share of a collection
+COMPACT_RATIO = 0.5
+MIN_COMPACT_SLOTS = 1024
+
+
+def normalize_distance(distance: Any) -> str:
+    """Accept "cosine"/"dot"/"euclid" or a qdrant Distance member."""
+    name = str(getattr(distance, "value", distance)).lower()
+    if name not in DISTANCES:
+        raise QdrantError(f"Unsupported distance: {distance}")
+    return name
+
+
+def similarities(vectors: np.ndarray, query: np.ndarray, distance: str) -> np.ndarray:
+    """Higher-is-better similarity of each row to query (cosine rows are pre-normalized)."""
+    if distance == "euclid":
+        return -np.linalg.norm(vectors - query, axis=1)
+    return vectors @ query
+
+
+class HNSWGraph:
+    """
+    Hierarchical navigable small world graph over the slots of a collection.
+
+    Neighbour lists are plain lists (layer 0 indexed by slot, the sparse upper
+    layers in dicts); snapshots store layer 0 as a -1 padded int32 array.
+    Deleted slots stay in the graph as waypoints and are filtered out of
+    results by the caller.
+    """
+
+    def __init__(self, vectors: Callable[[], np.ndarray], distance: str,
+                 m: int = 16, ef_construct: int = 100, seed: int = 42):
+        self.vectors = vectors
+        self.distance = distance
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construct = ef_construct
+        self.level_mult = 1 / math.log(m)
+        self.rng = random.Random(seed)
+        self.size = 0  # slots [0, size) are in the graph
+        self.levels: List[int] = []
+        self.layer0: List[List[int]] = []
+        self.upper: List[Dict[int, List[int]]] = []
+        self.entry_point = -1
+
+    def _neighbors(self, node: int, layer: int) -> List[int]:
+        if layer == 0:
+            return self.layer0[node]
+        return self.upper[layer - 1].get(node, [])
+
+    def _set_neighbors(self, node: int, layer: int, neighbors: List[int]) -> None:
+        if layer == 0:
+            self.layer0[node] = neighbors
+        else:
+            self.upper[layer - 1][node] = neighbors
+
+    def _scores(self, query: np.ndarray, nodes: List[int]) -> List[float]:
+        return similarities(self.vectors()[nodes], query, self.distance).tolist()
+
+    def _search_layer(self, query: np.ndarray, entry_points: List[Tuple[float, int]],
+                      ef: int, layer: int) -> List[Tuple[float, int]]:
+        """Best-first search; returns up to ef (score, node) pairs, best first."""
+        visited = {node for _, node in entry_points}
+        candidates = [(-score, node) for score, node in entry_points]
+        heapq.heapify(candidates)
+        results = list(entry_points)
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            negative_score, node = heapq.heappop(candidates)
+            if len(results) >= ef and -negative_score < results[0][0]:
+                break
+            fresh = [n for n in self._neighbors(node, layer) if n not in visited]
+            if not fresh:
+                continue
+            visited.update(fresh)
+            for neighbor, score in zip(fresh, self._scores(query, fresh)):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, neighbor))
+                    heapq.heappush(results, (score, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted(results, reverse=True)
+
+    def _select_neighbors(self, candidates: List[Tuple[float, int]], limit: int) -> List[int]:
+        """HNSW heuristic: skip candidates closer to an already selected neighbour than to the base."""
+        if len(candidates) <= limit:
+            return [node for _, node in candidates]
+        nodes = [node for _, node in candidates]
+        vectors = self.vectors()[nodes]
+        if self.distance == "euclid":
+            squared = (vectors * vectors).sum(axis=1)
+            pairwise = -np.sqrt(np.maximum(squared[:, None] + squared[None, :] - 2 * vectors @ vectors.T, 0))
+        else:
+            pairwise = vectors @ vectors.T
+        pairwise = pairwise.tolist()
+        selected: List[int] = []
+        for i, (score, _) in enumerate(candidates):
+            row = pairwise[i]
+            if all(row[j] <= score for j in selected):
+                selected.append(i)
+                if len(selected) >= limit:
+                    break
+        if len(selected) < limit:  # keep the graph connected: fill up with the nearest skipped
+            chosen = set(selected)
+            selected += [i for i in range(len(nodes)) if i not in chosen][:limit - len(selected)]
+        return [nodes[i] for i in selected]
+
+    def add(self, node: int) -> None:
+        """Insert slot node (slots are added in order)."""
+        level = min(int(-math.log(1.0 - self.rng.random()) * self.level_mult), 15)
+        self.levels.append(level)
+        self.layer0.append([])
+        while len(self.upper) < level:
+            self.upper.append({})
+        self.size = max(self.size, node + 1)
+
+        if self.entry_point < 0:
+            self.entry_point = node
+            return
+
+        query = self.vectors()[node]
+        entry = [(self._scores(query, [self.entry_point])[0], self.entry_point)]
+        top = self.levels[self.entry_point]
+        for layer in range(top, level, -1):
+            entry = self._search_layer(query, entry, 1, layer)[:1]
+
+        for layer in range(min(level, top), -1, -1):
+            found = self._search_layer(query, entry, self.ef_construct, layer)
+            limit = self.m0 if layer == 0 else self.m
+            neighbors = self._select_neighbors(found, self.m)
+            self._set_neighbors(node, layer, neighbors)
+            for neighbor in neighbors:
+                links = self._neighbors(neighbor, layer)
+                if node in links:
+                    continue
+                links = links + [node]
+                if len(links) > limit:
+                    scores = self._scores(self.vectors()[neighbor], links)
+                    links = self._select_neighbors(sorted(zip(scores, links), reverse=True), limit)
+                self._set_neighbors(neighbor, layer, links)
+            entry = found
+
+        if level > top:
+            self.entry_point = node
+
+    def search(self, query: np.ndarray, limit: int, ef: int,
+               accept: Callable[[int], bool]) -> List[Tuple[float, int]]:
+        """Approximate top-limit (score, node) among accepted nodes."""
+        if self.entry_point < 0:
+            return []
+        entry = [(self._scores(query, [self.entry_point])[0], self.entry_point)]
+        for layer in range(self.levels[self.entry_point], 0, -1):
+            entry = self._search_layer(query, entry, 1, layer)[:1]
+
+        ef = max(ef, limit)
+        while True:
+            found = self._search_layer(query, entry, ef, 0)
+            accepted = [(score, node) for score, node in found if accept(node)]
+            # Deleted or filtered-out nodes crowd the beam: widen it until enough pass
+            if len(accepted) >= limit or ef >= self.size:
+                return accepted[:limit]
+            ef = min(ef * 4, self.size)
+
+    def save(self, path: str) -> None:
+        layer0 = np.full((self.size, self.m0), -1, dtype=np.int32)
+        for node, neighbors in enumerate(self.layer0):
+            layer0[node, :len(neighbors)] = neighbors
+        np.savez(
+            path,
+            layer0=layer0,
+            levels=np.asarray(self.levels, dtype=np.int8),
+            meta=np.array(json.dumps({
+                "size": self.size,
+                "entry_point": self.entry_point,
+                "upper": [{str(k): v for k, v in layer.items()} for layer in self.upper],
+            })),
+        )
+
+    def load(self, path: str) -> None:
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            self.layer0 = [row[row >= 0].tolist() for row in data["layer0"]]
+            self.levels = data["levels"].tolist()
+        self.size = meta["size"]
+        self.entry_point = meta["entry_point"]
+        self.upper = [{int(k): v for k, v in layer.items()} for layer in meta["upper"]]
+
+
+class PayloadIndex:
+    """
+    Index over one payload key: value postings for match/any conditions
+    (keyword, integer, bool) and values sorted for range conditions
+    (integer, float, datetime). Postings of deleted slots are left in place;
+    searches mask tombstones anyway and compaction rebuilds the index.
+    """
+
+    def __init__(self, key: str, schema: str):
+        if schema not in PAYLOAD_SCHEMA_TYPES:
+            raise QdrantError(f"Unsupported payload index type for {key}: {schema}")
+        self.key = key
+        self.schema = schema
+        self.postings: Dict[Tuple[str, Any], List[int]] = {}
+        self._range_slots: List[int] = []
+        self._range_values: List[float] = []
+        self._sorted: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @staticmethod
+    def _posting_key(value: Any) -> Tuple[str, Any]:
+        return type(value).__name__, value
+
+    def _accepts(self, value: Any) -> bool:
+        if self.schema == "keyword":
+            return isinstance(value, str)
+        if self.schema == "bool":
+            return isinstance(value, bool)
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def add(self, slot: int, payload: Optional[Dict[str, Any]]) -> None:
+        for value in payload_values(payload, self.key):
+            if self.schema in ("keyword", "integer", "bool") and self._accepts(value):
+                self.postings.setdefault(self._posting_key(value), []).append(slot)
+            if self.schema == "datetime":
+                number = to_timestamp(value)
+            elif self.schema in ("integer", "float") and isinstance(value, (int, float)) and not isinstance(value, bool):
+                number = float(value)
+            else:
+                number = None
+            if number is not None:
+                self._range_slots.append(slot)
+                self._range_values.append(number)
+                self._sorted = None
+
+    def supports(self, condition: Condition) -> bool:
+        if condition.op in ("match", "any") and self.schema not in ("keyword", "integer", "bool"):
+            return False
+        if condition.op == "match":
+            return self._accepts(condition.value)
+        if condition.op == "any":
+            return all(self._accepts(value) for value in condition.value)
+        if condition.op == "range":
+            return self.schema in ("integer", "float")
+        if condition.op == "datetime_range":
+            return self.schema == "datetime"
+        return False
+
+    def mask(self, condition: Condition, size: int) -> np.ndarray:
+        mask = np.zeros(size, dtype=bool)
+        if condition.op in ("match", "any"):
+            values = [condition.value] if condition.op == "match" else condition.value
+            for value in values:
+                slots = self.postings.get(self._posting_key(value))
+                if slots:
+                    mask[slots] = True
+            return mask
+
+        if self._sorted is None:
+            order = np.argsort(self._range_values, kind="stable")
+            self._sorted = (np.asarray(self._range_slots, dtype=np.int64)[order],
+                            np.asarray(self._range_values, dtype=np.float64)[order])
+        slots, values = self._sorted
+        low, high = 0, len(values)
+        for op, bound in condition.value:
+            bound = to_timestamp(bound) if condition.op == "datetime_range" else float(bound)
+            if op == "gt":
+                low = max(low, int(np.searchsorted(values, bound, side="right")))
+            elif op == "gte":
+                low = max(low, int(np.searchsorted(values, bound, side="left")))
+            elif op == "lt":
+                high = min(high, int(np.searchsorted(values, bound, side="left")))
+            elif op == "lte":
+                high = min(high, int(np.searchsorted(values, bound, side="right")))
+        if low < high:
+            mask[slots[low:high]] = True
+        return mask
+
+
+class VectorQuantizer:
+    """
+    Compressed copy of the vectors that scans run over: scalar int8 (one byte
+    per dimension, values clipped to a quantile range) or binary (the sign
+    bit of each dimension). Its scores are approximate; searches rescore the
+    best candidates with the original vectors.
+    """
+
+    BLOCK = 1024  # dequantized block stays in cache
+
+    def __init__(self, kind: str, dimension: int, quantile: float = 0.99,
+                 bounds: Optional[Tuple[float, float]] = None):
+        if kind not in ("scalar", "binary"):
+            raise QdrantError(f"Unsupported quantization: {kind}")
+        self.kind = kind
+        self.dimension = dimension
+        self.quantile = quantile
+        self.bounds = tuple(bounds) if bounds else None
+        width = dimension if kind == "scalar" else (dimension + 7) // 8
+        self.codes = np.zeros((0, width), dtype=np.uint8)
+        self.size = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.size * self.codes.shape[1]
+
+    def fit(self, vectors: np.ndarray) -> None:
+        """Scalar range from the central quantile of the values (outliers are clipped)."""
+        if self.kind != "scalar" or not len(vectors):
+            return
+        tail = (1.0 - self.quantile) / 2
+        low, high = np.quantile(vectors, [tail, 1.0 - tail])
+        self.bounds = (float(low), float(high) if high > low else float(low) + 1.0)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        if self.kind == "binary":
+            return np.packbits(vectors > 0, axis=1)
+        if self.bounds is None:
+            self.fit(vectors)
+        low, high = self.bounds
+        return np.clip(np.rint((vectors - low) * (255.0 / (high - low))), 0, 255).astype(np.uint8)
+
+    def set(self, start: int, vectors: np.ndarray) -> None:
+        """Encode vectors into rows [start, start + len(vectors))."""
+        end = start + len(vectors)
+        if end > len(self.codes):
+            codes = np.zeros((max(end, 2 * len(self.codes), 1024), self.codes.shape[1]), dtype=np.uint8)
+            codes[:self.size] = self.codes[:self.size]
+            self.codes = codes
+        self.codes[start:end] = self.encode(vectors)
+        self.size = max(self.size, end)
+
+    def scores(self, query: np.ndarray, distance: str, stop: int) -> np.ndarray:
+        """Approximate higher-is-better similarity of rows [0, stop) to query."""
+        codes = self.codes[:stop]
+        if self.kind == "binary":
+            hamming = np.bitwise_count(codes ^ np.packbits(query > 0)).sum(axis=1, dtype=np.int32)
+            # Share of agreeing signs estimates the angle: 1 - 2 * hamming / dimension ~ cosine
+            return 1.0 - 2.0 * hamming.astype(np.float32) / self.dimension
+
+        low, high = self.bounds
+        scale = (high - low) / 255.0
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), self.BLOCK):
+            block = codes[start:start + self.BLOCK].astype(np.float32)
+            if distance == "euclid":
+                scores[start:start + self.BLOCK] = similarities(block * scale + low, query, distance)
+            else:
+                # (code * scale + low) . query without materializing the dequantized block
+                scores[start:start + self.BLOCK] = (block @ query) * scale + low * float(query.sum())
+        return scores
+
+
+class LocalCollection:
+    """
+    One collection: vectors in a growable (optionally memory-mapped) array,
+    ids and payloads in slot order, deletes as tombstones.
+
+    On disk a collection directory holds config.json, vectors.f32 (memmap),
+    points.jsonl (append-only upsert/delete log) and graph.npz (HNSW snapshot).
+    Payload indexes and the quantized copy are derived data: only their
+    definitions are stored.
+
+    storage follows the profiles of QdrantCollectionConfig. With quantization
+    scans run over the compressed copy and rescore limit * oversampling
+    candidates with the originals. Persisted originals are always
+    memory-mapped, so on_disk only decides whether they count as resident.
+    """
+
+    def __init__(self, name: str, vector_size: int = 1536, distance: Any = "cosine",
+                 indexing_threshold: Optional[int] = None,
+                 hnsw_config: Optional[Dict[str, Any]] = None, path: Optional[str] = None,
+                 storage: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.vector_size = vector_size
+        self.distance = normalize_distance(distance)
+        # Qdrant semantics: 0 disables index building (bulk loads), anything else enables it
+        self.indexing_threshold = indexing_threshold
+        self.hnsw_config = {**DEFAULT_HNSW_CONFIG, **(hnsw_config or {})}
+        self.path = path
+        self.lock = threading.RLock()
+
+        self.ids: List[str] = []
+        self.payloads: List[Optional[Dict[str, Any]]] = []
+        self.slot_of: Dict[str, int] = {}
+        self.deleted = np.zeros(0, dtype=bool)
+        self.vectors = np.zeros((0, vector_size), dtype=np.float32)
+        self.dimension: Optional[int] = None
+        self.graph: Optional[HNSWGraph] = None
+        self.payload_indexes: Dict[str, PayloadIndex] = {}
+        self.storage = self._normalize_storage(storage)
+        self.quantizer: Optional[VectorQuantizer] = None
+        self._log = None
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            if os.path.exists(self._file("config.json")):
+                self._load()
+            else:
+                self._write_config()
+
+    # ---- properties -------------------------------------------------------
+
+    @property
+    def slots(self) -> int:
+        return len(self.ids)
+
+    @property
+    def count(self) -> int:
+        return len(self.slot_of)
+
+    @property
+    def indexing_enabled(self) -> bool:
+        return self.indexing_threshold != 0
+
+    def _above_full_scan_threshold(self, points: int) -> bool:
+        kilobytes = points * (self.dimension or self.vector_size) * 4 / 1024
+        return kilobytes >= self.hnsw_config["full_scan_threshold"]
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    # ---- writes -----------------------------------------------------------
+
+    def upsert(self, vectors: List[List[float]], payloads: List[Dict[str, Any]], ids: List[Any]) -> None:
+        if not (len(vectors) == len(payloads) == len(ids)):
+            raise QdrantError("Vectors, payloads and ids must have the same length")
+        if not vectors:
+            return
+        batch = np.asarray(vectors, dtype=np.float32)
+        with self.lock:
+            if self.dimension is None:
+                # The declared size is adopted from the first write when it differs:
+                # the mock embedder and tests produce shorter vectors than ada-002
+                self.dimension = batch.shape[1]
+                self.vector_size = self.dimension
+                self._build_quantizer()
+                self._write_config()
+            if batch.ndim != 2 or batch.shape[1] != self.dimension:
+                raise QdrantError(
+                    f"Wrong vector dimension for {self.name}: expected {self.dimension}, got {batch.shape[-1]}"
+                )
+            if self.distance == "cosine":
+                norms = np.linalg.norm(batch, axis=1, keepdims=True)
+                batch = batch / np.where(norms == 0, 1, norms)
+
+            # An update tombstones the old slot and appends a new one, so the
+            # graph never holds a stale position for a vector
+            start = self.slots
+            self._reserve(start + len(batch))
+            self.vectors[start:start + len(batch)] = batch
+            if self.quantizer is not None:
+                self.quantizer.set(start, batch)
+            records = []
+            for offset, (point_id, payload) in enumerate(zip(ids, payloads)):
+                point_id = str(point_id)
+                slot = start + offset
+                previous = self.slot_of.get(point_id)
+                if previous is not None:
+                    self.deleted[previous] = True
+                    self.payloads[previous] = None
+                self.ids.append(point_id)
+                self.payloads.append(payload)
+                self.slot_of[point_id] = slot
+                for index in self.payload_indexes.values():
+                    index.add(slot, payload)
+                records.append({"op": "upsert", "slot": slot, "id": point_id, "payload": payload})
+            self._append_log(records)
+
+            if self.indexing_enabled:
+                self.build_index()
+
+    def delete(self, ids: Optional[List[Any]] = None,
+               filters: Union[None, Dict[str, Any], PayloadFilter] = None) -> int:
+        """Delete points by id and/or payload filter; returns the number deleted."""
+        payload_filter = filters if isinstance(filters, PayloadFilter) else parse_filter(filters)
+        with self.lock:
+            slots = set()
+            if ids is not None:
+                slots.update(self.slot_of[str(i)] for i in ids if str(i) in self.slot_of)
+            if payload_filter is not None:
+                matching = set(np.flatnonzero(self._filter_mask(payload_filter) & ~self.deleted[:self.slots]).tolist())
+                slots = slots & matching if ids is not None else matching
+            for slot in slots:
+                self.deleted[slot] = True
+                del self.slot_of[self.ids[slot]]
+                self.payloads[slot] = None
+            self._append_log([{"op": "delete", "slot": slot} for slot in sorted(slots)])
+
+            tombstones = self.slots - self.count
+            if self.slots >= MIN_COMPACT_SLOTS and tombstones > self.slots * COMPACT_RATIO:
+                self.compact()
+            return len(slots)
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self.vectors)
+        if size <= capacity and self.vectors.shape[1] == self.dimension:
+            if len(self.deleted) < size:
+                self.deleted = np.concatenate([self.deleted, np.zeros(size - len(self.deleted), dtype=bool)])
+            return
+        capacity = max(size, 2 * capacity, 1024)
+        if self.path:
+            if isinstance(self.vectors, np.memmap):
+                self.vectors.flush()
+            with open(self._file("vectors.f32"), "ab") as handle:
+                handle.truncate(capacity * self.dimension * 4)
+            self.vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r+",
+                                     shape=(capacity, self.dimension))
+        else:
+            vectors = np.zeros((capacity, self.dimension), dtype=np.float32)
+            if self.slots:
+                vectors[:self.slots] = self.vectors[:self.slots]
+            self.vectors = vectors
+        self.deleted = np.concatenate([self.deleted, np.zeros(size - len(self.deleted), dtype=bool)])
+
+    def compact(self) -> None:
+        """Drop tombstoned slots; the graph is rebuilt over the surviving points."""
+        with self.lock:
+            live = [slot for slot in range(self.slots) if not self.deleted[slot]]
+            vectors = np.array(self.vectors[live], dtype=np.float32)
+            ids = [self.ids[slot] for slot in live]
+            payloads = [self.payloads[slot] for slot in live]
+
+            self.ids, self.payloads, self.slot_of = [], [], {}
+            self.deleted = np.zeros(0, dtype=bool)
+            self.graph = None
+            if self.path:
+                self._close_log()
+                for name in ("points.jsonl", "graph.npz", "vectors.f32"):
+                    if os.path.exists(self._file(name)):
+                        os.remove(self._file(name))
+            self.vectors = np.zeros((0, self.dimension or self.vector_size), dtype=np.float32)
+            self._reserve(len(ids))
+            self.vectors[:len(ids)] = vectors
+            self.ids = ids
+            self.payloads = payloads
+            self.slot_of = {point_id: slot for slot, point_id in enumerate(ids)}
+            self._rebuild_payload_indexes()
+            self._build_quantizer()
+            self._append_log([
+                {"op": "upsert", "slot": slot, "id": point_id, "payload": payload}
+                for slot, (point_id, payload) in enumerate(zip(ids, payloads))
+            ])
+            logger.info(f"🧹 Compacted {self.name}: {len(ids)} points kept")
+            if self.indexing_enabled:
+                self.build_index()
+
+    # ---- storage ----------------------------------------------------------
+
+    @staticmethod
+    def _normalize_storage(storage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        storage = storage or DEFAULT_STORAGE
+        return {
+            "name": storage.get("name"),
+            "on_disk": bool(storage.get("on_disk")),
+            "quantization": storage.get("quantization"),
+            "search": dict(storage.get("search") or {}),
+        }
+
+    def _build_quantizer(self, bounds: Optional[Tuple[float, float]] = None) -> None:
+        """(Re)encode the quantized copy of all slots; scalar ranges come from a sample."""
+        quantization = self.storage["quantization"]
+        if not quantization or self.dimension is None:
+            self.quantizer = None
+            return
+        self.quantizer = VectorQuantizer(
+            quantization["type"], self.dimension, quantization.get("quantile") or 0.99, bounds
+        )
+        if bounds is None and self.slots:
+            self.quantizer.fit(np.asarray(self.vectors[:self.slots:max(1, self.slots // 10000)]))
+        for start in range(0, self.slots, VectorQuantizer.BLOCK):
+            self.quantizer.set(start, np.asarray(self.vectors[start:min(start + VectorQuantizer.BLOCK, self.slots)]))
+
+    def configure_storage(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Move the collection to a storage profile: the quantized copy is
+        re-encoded and the graph rebuilt when m or ef_construct change.
+        Returns the settings that changed.
+        """
+        with self.lock:
+            storage = self._normalize_storage(profile)
+            hnsw_config = {**self.hnsw_config, **profile.get("hnsw_config", {})}
+            changes = {
+                key: storage[key] for key in ("on_disk", "quantization", "search")
+                if storage[key] != self.storage[key]
+            }
+            hnsw_changes = {key: value for key, value in hnsw_config.items() if self.hnsw_config.get(key) != value}
+            if hnsw_changes:
+                changes["hnsw_config"] = hnsw_changes
+            self.storage = storage
+            self.hnsw_config = hnsw_config
+
+            if "quantization" in changes:
+                self._build_quantizer()
+            if self.graph is not None and ({"m", "ef_construct"} & set(hnsw_changes)):
+                self.graph = None
+                if self.path and os.path.exists(self._file("graph.npz")):
+                    os.remove(self._file("graph.npz"))
+                if self.indexing_enabled:
+                    self.build_index()
+            self._write_config()
+            return changes
+
+    def ram_vector_bytes(self) -> int:
+        """Bytes of vector data searches keep resident: the quantized copy plus in-memory originals."""
+        resident = self.quantizer.nbytes if self.quantizer is not None else 0
+        if not (self.storage["on_disk"] and self.path):
+            resident += self.slots * (self.dimension or self.vector_size) * 4
+        return resident
+
+    # ---- payload indexes --------------------------------------------------
+
+    def create_payload_index(self, key: str, schema: str) -> None:
+        """Index a payload key (re)built over the current points."""
+        with self.lock:
+            index = PayloadIndex(key, schema)
+            for slot, payload in enumerate(self.payloads):
+                index.add(slot, payload)
+            self.payload_indexes[key] = index
+            self._write_config()
+
+    def delete_payload_index(self, key: str) -> None:
+        with self.lock:
+            self.payload_indexes.pop(key, None)
+            self._write_config()
+
+    def _rebuild_payload_indexes(self) -> None:
+        schemas = {key: index.schema for key, index in self.payload_indexes.items()}
+        self.payload_indexes = {}
+        for key, schema in schemas.items():
+            self.create_payload_index(key, schema)
+
+    def _filter_mask(self, payload_filter: PayloadFilter) -> np.ndarray:
+        """Slots matching the filter; indexed conditions are answered from their payload index."""
+        size = self.slots
+
+        def evaluate(item: Union[Condition, PayloadFilter]) -> np.ndarray:
+            if isinstance(item, PayloadFilter):
+                return self._filter_mask(item)
+            index = self.payload_indexes.get(item.key)
+            if index is not None and index.supports(item):
+                return index.mask(item, size)
+            return np.fromiter((condition_matches(payload, item) for payload in self.payloads), dtype=bool, count=size)
+
+        mask = np.ones(size, dtype=bool)
+        for item in payload_filter.must:
+            mask &= evaluate(item)
+        if payload_filter.should:
+            any_mask = np.zeros(size, dtype=bool)
+            for item in payload_filter.should:
+                any_mask |= evaluate(item)
+            mask &= any_mask
+        for item in payload_filter.must_not:
+            mask &= ~evaluate(item)
+        return mask
+
+    # ---- index ------------------------------------------------------------
+
+    def build_index(self, force: bool = False) -> int:
+        """
+        Add unindexed slots to the HNSW graph once the collection reaches
+        full_scan_threshold (or always with force). Returns the slots added.
+        """
+        with self.lock:
+            if self.graph is None:
+                if not force and not self._above_full_scan_threshold(self.count):
+                    return 0
+                self.graph = HNSWGraph(
+                    lambda: self.vectors, self.distance,
+                    m=self.hnsw_config["m"], ef_construct=self.hnsw_config["ef_construct"],
+                )
+            start = self.graph.size
+            for slot in range(start, self.slots):
+                self.graph.add(slot)
+            return self.slots - start
+
+    # ---- reads ------------------------------------------------------------
+
+    def search(self, query_vector: List[float], limit: int = 10, score_threshold: Optional[float] = None,
+               filters: Union[None, Dict[str, Any], PayloadFilter] = None,
+               exact: bool = False) -> List[Dict[str, Any]]:
+        payload_filter = filters if isinstance(filters, PayloadFilter) else parse_filter(filters)
+        with self.lock:
+            if not self.count or limit <= 0:
+                return []
+            query = np.asarray(query_vector, dtype=np.float32)
+            if query.shape != (self.dimension,):
+                raise QdrantError(
+                    f"Wrong query dimension for {self.name}: expected {self.dimension}, got {query.shape[-1]}"
+                )
+            if self.distance == "cosine":
+                norm = np.linalg.norm(query)
+                query = query / norm if norm else query
+
+            allowed = ~self.deleted[:self.slots]
+            if payload_filter is not None:
+                allowed &= self._filter_mask(payload_filter)
+            # Selective filters leave few candidates: scoring them exactly beats the graph
+            use_graph = (
+                not exact and self.graph is not None
+                and self._above_full_scan_threshold(int(allowed.sum()))
+            )
+            if use_graph:
+                hits = self.graph.search(query, limit, self.hnsw_config["ef"], lambda slot: allowed[slot])
+                tail = self._exact(query, limit, allowed, start=self.graph.size)
+                hits = sorted(hits + tail, reverse=True)[:limit]
+            elif self.quantizer is not None and not exact:
+                hits = self._quantized(query, limit, allowed)
+            else:
+                hits = self._exact(query, limit, allowed)
+
+            results = []
+            for score, slot in hits:
+                score = -score if self.distance == "euclid" else score
+                if score_threshold is not None and (
+                    score > score_threshold if self.distance == "euclid" else score < score_threshold
+                ):
+                    continue
+                results.append({"id": self.ids[slot], "score": float(score), "payload": self.payloads[slot]})
+            return results
+
+    def _exact(self, query: np.ndarray, limit: int, allowed: np.ndarray, start: int = 0) -> List[Tuple[float, int]]:
+        """Brute-force top-limit over allowed slots [start, slots)."""
+        allowed = allowed[start:]
+        candidates = int(allowed.sum())
+        if not candidates:
+            return []
+        # Score the contiguous block (a view, no copy) and mask out the rest
+        scores = similarities(self.vectors[start:self.slots], query, self.distance)
+        scores[~allowed] = -np.inf
+        limit = min(limit, candidates)
+        top = np.argpartition(-scores, limit - 1)[:limit] if len(scores) > limit else np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), int(i) + start) for i in top]
+
+    def _quantized(self, query: np.ndarray, limit: int, allowed: np.ndarray) -> List[Tuple[float, int]]:
+        """Scan the quantized copy, then rescore the best limit * oversampling with the originals."""
+        candidates = int(allowed.sum())
+        if not candidates:
+            return []
+        scores = self.quantizer.scores(query, self.distance, self.slots)
+        scores[~allowed] = -np.inf
+        search = self.storage["search"]
+        rescore = search.get("rescore", True)
+        oversampling = max(search.get("oversampling") or 1.0, 1.0) if rescore else 1.0
+        pool = min(candidates, math.ceil(limit * oversampling))
+        top = np.argpartition(-scores, pool - 1)[:pool] if len(scores) > pool else np.arange(len(scores))
+        if not rescore:
+            top = top[np.argsort(-scores[top])]
+            return [(float(scores[i]), int(i)) for i in top]
+
+        # Ascending slots read the (memory-mapped) originals front to back
+        top = np.sort(top)
+        exact = similarities(self.vectors[top], query, self.distance)
+        order = np.argsort(-exact)[:limit]
+        return [(float(exact[i]), int(top[i])) for i in order]
+
+    def scroll(self, limit: int = 256, offset: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Page through live points in slot order; offset is the slot to resume from."""
+        with self.lock:
+            page = []
+            slot = offset or 0
+            while slot < self.slots and len(page) < limit:
+                if not self.deleted[slot]:
+                    page.append({
+                        "id": self.ids[slot],
+                        "vector": self.vectors[slot].tolist(),
+                        "payload": self.payloads[slot],
+                    })
+                slot += 1
+            while slot < self.slots and self.deleted[slot]:
+                slot += 1
+            return page, slot if slot < self.slots else None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "status": "green",
+            "vector_count": self.count,
+            "vector_size": self.dimension or self.vector_size,
+            "distance": self.distance,
+            "indexed_vectors_count": self.graph.size if self.graph else 0,
+            "deleted_slots": self.slots - self.count,
+            "payload_schema": {key: index.schema for key, index in self.payload_indexes.items()},
+            "indexing_threshold": self.indexing_threshold,
+            "on_disk": bool(self.path),
+            "storage_profile": self.storage["name"],
+            "quantization": (self.storage["quantization"] or {}).get("type"),
+            "ram_vector_bytes": self.ram_vector_bytes(),
+        }
+
+    # ---- persistence ------------------------------------------------------
+
+    def _write_config(self) -> None:
+        if not self.path:
+            return
+        with open(self._file("config.json"), "w") as handle:
+            json.dump({
+                "name": self.name,
+                "vector_size": self.vector_size,
+                "dimension": self.dimension,
+                "distance": self.distance,
+                "indexing_threshold": self.indexing_threshold,
+                "hnsw_config": self.hnsw_config,
+                "payload_indexes": {key: index.schema for key, index in self.payload_indexes.items()},
+                "storage": self.storage,
+                "quantizer_bounds": self.quantizer.bounds if self.quantizer is not None else None,
+            }, handle)
+
+    def _append_log(self, records: List[Dict[str, Any]]) -> None:
+        if not self.path or not records:
+            return
+        if self._log is None:
+            self._log = open(self._file("points.jsonl"), "a")
+        self._log.write("".join(json.dumps(record) + "\n" for record in records))
+        self._log.flush()
+
+    def _close_log(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _load(self) -> None:
+        with open(self._file("config.json")) as handle:
+            config = json.load(handle)
+        self.vector_size = config["vector_size"]
+        self.dimension = config["dimension"]
+        self.distance = config["distance"]
+        self.indexing_threshold = config["indexing_threshold"]
+        self.hnsw_config = {**DEFAULT_HNSW_CONFIG, **config["hnsw_config"]}
+        self.payload_indexes = {
+            key: PayloadIndex(key, schema) for key, schema in config.get("payload_indexes", {}).items()
+        }
+        self.storage = self._normalize_storage(config.get("storage"))
+        if self.dimension is None:
+            return
+
+        if os.path.exists(self._file("points.jsonl")):
+            with open(self._file("points.jsonl")) as handle:
+                for line in handle:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record["op"] == "upsert":
+                        previous = self.slot_of.get(record["id"])
+                        if previous is not None:
+                            self.payloads[previous] = None
+                        self.ids.append(record["id"])
+                        self.payloads.append(record["payload"])
+                        self.slot_of[record["id"]] = record["slot"]
+                    else:
+                        self.slot_of.pop(self.ids[record["slot"]], None)
+                        self.payloads[record["slot"]] = None
+
+        capacity = os.path.getsize(self._file("vectors.f32")) // (4 * self.dimension)
+        self.vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r+",
+                                 shape=(capacity, self.dimension))
+        self.deleted = np.ones(self.slots, dtype=bool)
+        self.deleted[list(self.slot_of.values())] = False
+        for index in self.payload_indexes.values():
+            for slot, payload in enumerate(self.payloads):
+                index.add(slot, payload)
+        self._build_quantizer(config.get("quantizer_bounds"))
+
+        if os.path.exists(self._file("graph.npz")):
+            self.graph = HNSWGraph(
+                lambda: self.vectors, self.distance,
+                m=self.hnsw_config["m"], ef_construct=self.hnsw_config["ef_construct"],
+            )
+            self.graph.load(self._file("graph.npz"))
+        logger.info(f"📂 Loaded {self.name}: {self.count} points from {self.path}")
+
+    def flush(self) -> None:
+        """Persist vectors and the graph snapshot (the point log is written through)."""
+        with self.lock:
+            if not self.path:
+                return
+            if isinstance(self.vectors, np.memmap):
+                self.vectors.flush()
+            if self.graph is not None:
+                self.graph.save(self._file("graph.npz"))
+            self._write_config()
+
+    def close(self) -> None:
+        self.flush()
+        self._close_log()
+
+
+class LocalVectorStore:
+    """
+    In-process vector store with the sync interface CollectionManager uses
+    on QdrantVectorStore: collections, aliases, upsert/search/scroll/delete.
+
+    With a path every collection is persisted in its own directory and
+    reopened on start; without one everything lives in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None, hnsw_config: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.hnsw_config = hnsw_config
+        self.collections: Dict[str, LocalCollection] = {}
+        # alias name -> collection name, resolved by every point operation like Qdrant does
+        self.aliases: Dict[str, str] = {}
+        self.lock = threading.RLock()
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            for name in sorted(os.listdir(path)):
+                if os.path.exists(os.path.join(path, name, "config.json")):
+                    self.collections[name] = LocalCollection(name, path=os.path.join(path, name))
+            if os.path.exists(self._aliases_file):
+                with open(self._aliases_file) as handle:
+                    self.aliases = json.load(handle)
+
+    @property
+    def _aliases_file(self) -> str:
+        return os.path.join(self.path, "aliases.json")
+
+    def _save_aliases(self) -> None:
+        if self.path:
+            with open(self._aliases_file, "w") as handle:
+                json.dump(self.aliases, handle)
+
+    def _collection(self, collection_name: str) -> LocalCollection:
+        collection = self.collections.get(self.resolve_collection(collection_name))
+        if collection is None:
+            raise QdrantError(f"Collection {collection_name} does not exist")
+        return collection
+
+    def health_check(self) -> Dict[str, Any]:
+        """Health of the local backend"""
+        return {
+            "status": "healthy",
+            "backend": "local",
+            "total_collections": len(self.collections),
+            "path": self.path,
+        }
+
+    def resolve_collection(self, collection_name: str) -> str:
+        """Resolve an alias to the collection it points to"""
+        return self.aliases.get(collection_name, collection_name)
+
+    def collection_exists(self, collection_name: str) -> bool:
+        """Check if collection (or alias) exists"""
+        return self.resolve_collection(collection_name) in self.collections
+
+    def create_collection(self, collection_name: str, vector_size: int = 1536,
+                          indexing_threshold: Optional[int] = None, distance: Any = "cosine") -> bool:
+        """Create (or recreate) a collection"""
+        with self.lock:
+            if collection_name in self.collections:
+                self.delete_collection(collection_name)
+            path = os.path.join(self.path, collection_name) if self.path else None
+            profile = self._storage_profile(collection_name)
+            self.collections[collection_name] = LocalCollection(
+                collection_name, vector_size, distance, indexing_threshold, profile["hnsw_config"], path, profile
+            )
+        logger.info(f"✅ Created local collection: {collection_name}")
+        return True
+
+    def _storage_profile(self, collection_name: str) -> Dict[str, Any]:
+        """Storage profile of QdrantCollectionConfig; the store's own hnsw_config wins"""
+        profile = QdrantCollectionConfig.storage_profile_for(collection_name)
+        hnsw_config = dict(profile["hnsw_config"])
+        if profile["search"].get("hnsw_ef"):
+            hnsw_config["ef"] = profile["search"]["hnsw_ef"]
+        return {**profile, "hnsw_config": {**hnsw_config, **(self.hnsw_config or {})}}
+
+    def apply_storage_profile(self, collection_name: str) -> Dict[str, Any]:
+        """Bring a collection to its storage profile; returns the changed settings"""
+        collection = self._collection(collection_name)
+        changes = collection.configure_storage(self._storage_profile(collection.name))
+        if changes:
+            logger.info(f"🗜️ Storage profile {collection.storage['name']} applied to {collection.name}: {changes}")
+        return changes
+
+    def update_collection(self, collection_name: str, indexing_threshold: Optional[int] = None) -> bool:
+        """Update collection optimizer settings"""
+        collection = self._collection(collection_name)
+        with collection.lock:
+            collection.indexing_threshold = indexing_threshold
+            collection._write_config()
+        return True
+
+    def wait_for_indexing(self, collection_name: str, timeout: float = 300.0) -> bool:
+        """Build the pending part of the index (synchronous in process)"""
+        if not self.collection_exists(collection_name):
+            return False
+        collection = self._collection(collection_name)
+        if collection.indexing_enabled:
+            collection.build_index()
+        collection.flush()
+        return True
+
+    def delete_collection(self, collection_name: str) -> bool:
+        """Delete a collection together with the aliases pointing to it"""
+        with self.lock:
+            collection = self.collections.pop(collection_name, None)
+            if collection is not None:
+                collection.close()
+                if collection.path:
+                    for name in os.listdir(collection.path):
+                        os.remove(os.path.join(collection.path, name))
+                    os.rmdir(collection.path)
+            self.aliases = {alias: name for alias, name in self.aliases.items() if name != collection_name}
+            self._save_aliases()
+        return True
+
+    def list_collections(self) -> List[str]:
+        """List collection names (aliases are not included)"""
+        return list(self.collections)
+
+    def get_aliases(self) -> Dict[str, str]:
+        """Alias name -> collection name"""
+        return dict(self.aliases)
+
+    def get_collection_names(self) -> Set[str]:
+        """Names of all collections and aliases"""
+        return set(self.collections) | set(self.aliases)
+
+    def switch_alias(self, alias_name: str, collection_name: str) -> Optional[str]:
+        """Atomically point alias at collection; returns the previous target"""
+        with self.lock:
+            if alias_name in self.collections:
+                raise QdrantError(f"Alias {alias_name} conflicts with an existing collection")
+            if collection_name not in self.collections:
+                raise QdrantError(f"Collection {collection_name} does not exist")
+            previous = self.aliases.get(alias_name)
+            self.aliases[alias_name] = collection_name
+            self._save_aliases()
+        return previous
+
+    def get_collection_info(self, collection_name: str) -> Dict[str, Any]:
+        """Information about a collection (or the collection behind an alias)"""
+        info = self._collection(collection_name).info()
+        info["alias"] = collection_name if info["name"] != collection_name else None
+        return info
+
+    def count_points(self, collection_name: str) -> int:
+        """Number of points in collection"""
+        if not self.collection_exists(collection_name):
+            return 0
+        return self._collection(collection_name).count
+
+    def scroll(self, collection_name: str, limit: int = 256,
+               offset: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Page through points with vectors; returns (points, next_offset)"""
+        if not self.collection_exists(collection_name):
+            return [], None
+        return self._collection(collection_name).scroll(limit, offset)
+
+    def upsert_vectors(self, collection_name: str, vectors: List[List[float]],
+                       payloads: List[Dict[str, Any]], ids: List[str]) -> bool:
+        """Insert/update vectors"""
+        if not self.collection_exists(collection_name):
+            self.create_collection(collection_name, vector_size=len(vectors[0]) if vectors else 1536)
+        self._collection(collection_name).upsert(vectors, payloads, ids)
+        return True
+
+    def search_vectors(self, collection_name: str, query_vector: List[float],
+                       limit: int = 10, filter_conditions: Optional[Dict] = None,
+                       score_threshold: Optional[float] = None,
+                       filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """Search for similar vectors"""
+        if not self.collection_exists(collection_name):
+            return []
+        if filter_conditions and filters:
+            filters = {"must": [filter_conditions, filters]}
+        return self._collection(collection_name).search(
+            query_vector, limit, score_threshold, filters or filter_conditions
+        )
+
+    def search_batch(self, requests: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Run several searches in one call (the batch interface of QdrantVectorStore)"""
+        return [
+            self.search_vectors(
+                request["collection_name"], request["query_vector"], request.get("limit", 10),
+                score_threshold=request.get("score_threshold"), filters=request.get("filters"),
+            )
+            for request in requests
+        ]
+
+    def delete_points(self, collection_name: str, ids: Optional[List[str]] = None,
+                      filters: Optional[Dict[str, Any]] = None) -> int:
+        """Delete points by ids and/or payload filter; returns the number deleted"""
+        if not self.collection_exists(collection_name):
+            return 0
+        return self._collection(collection_name).delete(ids, filters)
+
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema: str) -> bool:
+        """Create (or rebuild) a payload index"""
+        self._collection(collection_name).create_payload_index(field_name, field_schema)
+        logger.info(f"🗂️ Created payload index {collection_name}.{field_name} ({field_schema})")
+        return True
+
+    def delete_payload_index(self, collection_name: str, field_name: str) -> bool:
+        """Drop a payload index"""
+        self._collection(collection_name).delete_payload_index(field_name)
+        return True
+
+    def get_payload_indexes(self, collection_name: str) -> Dict[str, str]:
+        """Indexed payload key -> index type"""
+        if not self.collection_exists(collection_name):
+            return {}
+        return {key: index.schema for key, index in self._collection(collection_name).payload_indexes.items()}
+
+    def flush(self) -> None:
+        """Persist all collections"""
+        for collection in list(self.collections.values()):
+            collection.flush()
+
+    def close(self) -> None:
+        """Persist and release all collections"""
+        for collection in list(self.collections.values()):
+            collection.close()
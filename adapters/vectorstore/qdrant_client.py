@@ -4,9 +4,12 @@ Qdrant Vector Store Client для AI Assistant MVP
 """
 
 import logging
-from typing import List, Dict, Any, Optional, Union
+import os
+import re
+from typing import List, Dict, Any, Optional, Set, Tuple, Union, TYPE_CHECKING
 import asyncio
 from datetime import datetime
+from urllib.parse import urlparse
 import uuid
 
 try:
@@ -20,8 +23,14 @@ try:
 except ImportError:
     QDRANT_AVAILABLE = False
 
+from app.config import get_qdrant_url
 from app.core.exceptions import ServiceError
 
+from .filters import to_qdrant_filter
+
+if TYPE_CHECKING:
+    from .local_index import LocalVectorStore
+
 logger = logging.getLogger(__name__)
 
 class QdrantError(ServiceError):
@@ -41,6 +50,20 @@ class QdrantCollectionConfig:
     OPENAI_EMBEDDINGS_DIM = 1536  # text-embedding-3-small/large
     SENTENCE_TRANSFORMERS_DIM = 384  # all-MiniLM-L6-v2
     
+    # Payload indexes (key -> keyword | integer | float | bool | datetime) for
+    # the keys search filters use; a collection config may extend them with
+    # its own "payload_indexes"
+    PAYLOAD_INDEXES = {
+        "original_doc_id": "keyword",
+        "source": "keyword",
+        "source_type": "keyword",
+        "author": "keyword",
+        "tags": "keyword",
+        "content_type": "keyword",
+        "created_at": "datetime",
+        "updated_at": "datetime",
+    }
+    
     # Collection configurations
     COLLECTION_CONFIGS = {
         DOCUMENTS: {
@@ -77,6 +100,93 @@ class QdrantCollectionConfig:
             "on_disk_payload": True
         }
     }
+    
+    # Vector storage profiles: where vectors live, how they are compressed and
+    # how hard HNSW searches. Quantized profiles keep a compressed copy in RAM
+    # (int8: 4x smaller, binary: 32x smaller), leave the float32 originals on
+    # disk and rescore the top limit * oversampling candidates with them
+    STORAGE_PROFILES = {
+        "memory": {
+            "on_disk": False,
+            "quantization": None,
+            "hnsw_config": {"m": 16, "ef_construct": 100},
+            "search": {"hnsw_ef": 64},
+        },
+        "scalar_int8": {
+            "on_disk": True,
+            "quantization": {"type": "scalar", "quantile": 0.99, "always_ram": True},
+            "hnsw_config": {"m": 16, "ef_construct": 128},
+            "search": {"hnsw_ef": 128, "rescore": True, "oversampling": 2.0},
+        },
+        # Only for embedding models validated with binary codes (e.g. OpenAI
+        # text-embedding-3); other vectors need much more oversampling
+        "binary": {
+            "on_disk": True,
+            "quantization": {"type": "binary", "always_ram": True},
+            "hnsw_config": {"m": 16, "ef_construct": 128},
+            "search": {"hnsw_ef": 128, "rescore": True, "oversampling": 3.0},
+        },
+    }
+    DEFAULT_STORAGE_PROFILE = "memory"
+    
+    # The large collections (Confluence spaces, code) trade a little latency for RAM
+    COLLECTION_STORAGE_PROFILES = {
+        CODE_SNIPPETS: "scalar_int8",
+        "confluence": "scalar_int8",
+        "gitlab": "scalar_int8",
+        "github": "scalar_int8",
+    }
+    
+    @classmethod
+    def base_name(cls, collection_name: str) -> str:
+        """Collection name without the docs_ prefix and the _vN version suffix"""
+        name = collection_name[len("docs_"):] if collection_name.startswith("docs_") else collection_name
+        return re.sub(r"_v\d+$", "", name)
+    
+    @classmethod
+    def payload_indexes_for(cls, collection_name: str) -> Dict[str, str]:
+        """Payload index definitions of a collection"""
+        config = cls.COLLECTION_CONFIGS.get(collection_name, {})
+        return {**cls.PAYLOAD_INDEXES, **config.get("payload_indexes", {})}
+    
+    @classmethod
+    def storage_profile_for(cls, collection_name: str) -> Dict[str, Any]:
+        """Storage profile of a collection, alias or collection version"""
+        base_name = cls.base_name(collection_name)
+        name = cls.COLLECTION_STORAGE_PROFILES.get(base_name, cls.DEFAULT_STORAGE_PROFILE)
+        profile = cls.STORAGE_PROFILES[name]
+        hnsw_config = {**profile["hnsw_config"], **cls.COLLECTION_CONFIGS.get(base_name, {}).get("hnsw_config", {})}
+        return {**profile, "name": name, "hnsw_config": hnsw_config}
+    
+    @staticmethod
+    def quantization_config(profile: Dict[str, Any]) -> Optional[Any]:
+        """Qdrant quantization config of a profile (None: full vectors only)"""
+        quantization = profile.get("quantization")
+        if not quantization:
+            return None
+        if quantization["type"] == "scalar":
+            return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=quantization.get("quantile"),
+                always_ram=quantization.get("always_ram", True)
+            ))
+        if quantization["type"] == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(
+                always_ram=quantization.get("always_ram", True)
+            ))
+        raise QdrantError(f"Unsupported quantization: {quantization['type']}")
+    
+    @staticmethod
+    def search_params(profile: Dict[str, Any]) -> Optional[Any]:
+        """Qdrant search params of a profile: hnsw_ef and quantized rescoring"""
+        search = profile.get("search", {})
+        quantization = None
+        if profile.get("quantization"):
+            quantization = models.QuantizationSearchParams(
+                rescore=search.get("rescore", True),
+                oversampling=search.get("oversampling")
+            )
+        return models.SearchParams(hnsw_ef=search.get("hnsw_ef"), quantization=quantization)
 
 class QdrantVectorStore:
     """Qdrant vector store implementation"""
@@ -171,14 +281,17 @@ class QdrantVectorStore:
             )
             
             # Create collection
+            profile = self.collections.storage_profile_for(collection_name)
             await self.client.create_collection(
                 collection_name=collection_name,
                 vectors_config=VectorParams(
                     size=config["vectors"]["size"],
-                    distance=config["vectors"]["distance"]
+                    distance=config["vectors"]["distance"],
+                    on_disk=profile["on_disk"]
                 ),
                 on_disk_payload=config.get("on_disk_payload", True),
-                hnsw_config=config.get("hnsw_config", None)
+                hnsw_config=models.HnswConfigDiff(**profile["hnsw_config"]),
+                quantization_config=self.collections.quantization_config(profile)
             )
             
             logger.info(f"✅ Created collection: {collection_name}")
@@ -237,21 +350,8 @@ class QdrantVectorStore:
                            filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Search for similar vectors"""
         try:
-            # Build filter if provided
-            qdrant_filter = None
-            if filters:
-                conditions = []
-                for field, value in filters.items():
-                    if isinstance(value, (str, int, float, bool)):
-                        conditions.append(
-                            FieldCondition(
-                                key=field,
-                                match=MatchValue(value=value)
-                            )
-                        )
-                
-                if conditions:
-                    qdrant_filter = Filter(must=conditions)
+            # Filter DSL -> Qdrant Filter (MatchAny, Range, DatetimeRange, nested clauses)
+            qdrant_filter = to_qdrant_filter(filters)
             
             # Perform search
             search_result = await self.client.search(
@@ -259,7 +359,10 @@ class QdrantVectorStore:
                 query_vector=query_vector,
                 limit=limit,
                 score_threshold=score_threshold,
-                query_filter=qdrant_filter
+                query_filter=qdrant_filter,
+                search_params=self.collections.search_params(
+                    self.collections.storage_profile_for(collection_name)
+                )
             )
             
             # Format results
@@ -279,6 +382,53 @@ class QdrantVectorStore:
             logger.error(f"❌ Search failed in {collection_name}: {e}")
             raise QdrantError(f"Vector search failed: {e}")
     
+    async def search_batch_async(self, requests: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Run several searches at once.
+        
+        Requests against the same collection share one query_batch_points
+        call and collections are queried concurrently. Each request holds
+        collection_name, query_vector, limit, score_threshold and filters;
+        a failing collection yields empty results for its requests.
+        """
+        positions: Dict[str, List[int]] = {}
+        for position, request in enumerate(requests):
+            positions.setdefault(request["collection_name"], []).append(position)
+        
+        async def search_collection(collection_name: str, batch: List[int]) -> List[List[Dict[str, Any]]]:
+            params = self.collections.search_params(self.collections.storage_profile_for(collection_name))
+            responses = await self.client.query_batch_points(
+                collection_name=collection_name,
+                requests=[
+                    models.QueryRequest(
+                        query=requests[position]["query_vector"],
+                        limit=requests[position].get("limit", 10),
+                        score_threshold=requests[position].get("score_threshold"),
+                        filter=to_qdrant_filter(requests[position].get("filters")),
+                        params=params,
+                        with_payload=True
+                    )
+                    for position in batch
+                ]
+            )
+            return [
+                [{"id": point.id, "score": point.score, "payload": point.payload} for point in response.points]
+                for response in responses
+            ]
+        
+        results: List[List[Dict[str, Any]]] = [[] for _ in requests]
+        outcomes = await asyncio.gather(
+            *(search_collection(name, batch) for name, batch in positions.items()),
+            return_exceptions=True
+        )
+        for (collection_name, batch), outcome in zip(positions.items(), outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"❌ Batch search failed in {collection_name}: {outcome}")
+                continue
+            for position, hits in zip(batch, outcome):
+                results[position] = hits
+        return results
+    
     async def delete_vectors(self, collection_name: str,
                            ids: List[str]) -> bool:
         """Delete vectors by IDs"""
@@ -297,20 +447,65 @@ class QdrantVectorStore:
             logger.error(f"❌ Failed to delete vectors from {collection_name}: {e}")
             raise QdrantError(f"Vector deletion failed: {e}")
     
+    async def delete_points_async(self, collection_name: str, ids: Optional[List[str]] = None,
+                                  filters: Optional[Dict[str, Any]] = None) -> int:
+        """Delete points by IDs and/or payload filter; returns the number deleted"""
+        qdrant_filter = to_qdrant_filter(filters)
+        if ids is not None:
+            has_id = models.HasIdCondition(has_id=ids)
+            qdrant_filter = Filter(must=[has_id] + ([qdrant_filter] if qdrant_filter else []))
+        if qdrant_filter is None:
+            return 0
+        
+        before = (await self.client.count(collection_name, count_filter=qdrant_filter, exact=True)).count
+        await self.client.delete(
+            collection_name=collection_name,
+            points_selector=models.FilterSelector(filter=qdrant_filter)
+        )
+        logger.info(f"🗑️ Deleted {before} points from {collection_name}")
+        return before
+    
+    async def create_payload_index_async(self, collection_name: str, field_name: str, field_schema: str) -> bool:
+        """Create a payload index used by filtered searches"""
+        await self.client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=models.PayloadSchemaType(field_schema),
+            wait=True
+        )
+        logger.info(f"🗂️ Created payload index {collection_name}.{field_name} ({field_schema})")
+        return True
+    
+    async def delete_payload_index_async(self, collection_name: str, field_name: str) -> bool:
+        """Drop a payload index"""
+        await self.client.delete_payload_index(collection_name=collection_name, field_name=field_name, wait=True)
+        return True
+    
+    async def get_payload_indexes_async(self, collection_name: str) -> Dict[str, str]:
+        """Indexed payload key -> index type"""
+        info = await self.client.get_collection(collection_name)
+        return {
+            key: getattr(schema.data_type, "value", schema.data_type)
+            for key, schema in (info.payload_schema or {}).items()
+        }
+    
     async def get_collection_info(self, collection_name: str) -> Dict[str, Any]:
         """Get information about a collection"""
         try:
-            info = await self.client.get_collection(collection_name)
+            resolved_name = await self.resolve_collection_async(collection_name)
+            info = await self.client.get_collection(resolved_name)
             
             return {
-                "name": collection_name,
+                "name": resolved_name,
+                "alias": collection_name if resolved_name != collection_name else None,
                 "status": info.status.value if info.status else "unknown",
                 "vector_count": info.points_count,
                 "vector_size": info.config.params.vectors.size,
                 "distance": info.config.params.vectors.distance.value,
                 "segments_count": info.segments_count,
                 "disk_data_size": info.disk_data_size,
-                "ram_data_size": info.ram_data_size
+                "ram_data_size": info.ram_data_size,
+                "storage_profile": self.collections.storage_profile_for(resolved_name)["name"]
             }
             
         except Exception as e:
@@ -327,11 +522,129 @@ class QdrantVectorStore:
             logger.error(f"❌ Failed to list collections: {e}")
             return []
     
+    # Aliases: search and upsert accept an alias name and Qdrant resolves it
+    # server-side on every request, so a switch is picked up atomically
+    async def get_aliases_async(self) -> Dict[str, str]:
+        """Alias name -> collection name"""
+        response = await self.client.get_aliases()
+        return {alias.alias_name: alias.collection_name for alias in response.aliases}
+    
+    async def get_collection_names_async(self) -> Set[str]:
+        """Names of all collections and aliases"""
+        collections, aliases = await asyncio.gather(self.client.get_collections(), self.get_aliases_async())
+        return {c.name for c in collections.collections} | set(aliases)
+    
+    async def resolve_collection_async(self, collection_name: str) -> str:
+        """Resolve an alias to the collection it points to"""
+        aliases = await self.get_aliases_async()
+        return aliases.get(collection_name, collection_name)
+    
+    async def switch_alias_async(self, alias_name: str, collection_name: str) -> Optional[str]:
+        """Atomically point alias at collection; returns the previous target"""
+        previous = (await self.get_aliases_async()).get(alias_name)
+        operations = []
+        if previous:
+            operations.append(models.DeleteAliasOperation(
+                delete_alias=models.DeleteAlias(alias_name=alias_name)
+            ))
+        operations.append(models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias_name)
+        ))
+        # Both operations are applied by Qdrant in a single request
+        await self.client.update_collection_aliases(change_aliases_operations=operations)
+        logger.info(f"🔀 Alias {alias_name}: {previous} -> {collection_name}")
+        return previous
+    
+    async def apply_storage_profile_async(self, collection_name: str) -> Dict[str, Any]:
+        """
+        Bring an existing collection to its storage profile in place.
+        
+        Qdrant rebuilds the affected segments in the background while the
+        collection keeps serving; returns the settings that were changed.
+        """
+        profile = self.collections.storage_profile_for(collection_name)
+        info = await self.client.get_collection(collection_name)
+        
+        changes: Dict[str, Any] = {}
+        if bool(info.config.params.vectors.on_disk) != profile["on_disk"]:
+            changes["on_disk"] = profile["on_disk"]
+        hnsw_changes = {
+            key: value for key, value in profile["hnsw_config"].items()
+            if getattr(info.config.hnsw_config, key, None) != value
+        }
+        if hnsw_changes:
+            changes["hnsw_config"] = hnsw_changes
+        current = info.config.quantization_config
+        current_type = "scalar" if getattr(current, "scalar", None) else "binary" if getattr(current, "binary", None) else None
+        wanted_type = (profile["quantization"] or {}).get("type")
+        if current_type != wanted_type:
+            changes["quantization"] = wanted_type
+        if not changes:
+            return changes
+        
+        await self.client.update_collection(
+            collection_name=collection_name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=profile["on_disk"])} if "on_disk" in changes else None,
+            hnsw_config=models.HnswConfigDiff(**hnsw_changes) if hnsw_changes else None,
+            quantization_config=(
+                self.collections.quantization_config(profile) or models.Disabled.DISABLED
+            ) if "quantization" in changes else None
+        )
+        logger.info(f"🗜️ Storage profile {profile['name']} applied to {collection_name}: {changes}")
+        return changes
+    
+    async def update_collection_async(self, collection_name: str, indexing_threshold: Optional[int] = None) -> bool:
+        """Update optimizer settings; indexing_threshold=0 defers HNSW building"""
+        await self.client.update_collection(
+            collection_name=collection_name,
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=indexing_threshold)
+        )
+        return True
+    
+    async def wait_for_indexing_async(self, collection_name: str, timeout: float = 300.0,
+                                      poll_interval: float = 1.0) -> bool:
+        """Wait until optimizers have finished building the index (status green)"""
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            info = await self.client.get_collection(collection_name)
+            if info.status == CollectionStatus.GREEN:
+                return True
+            if asyncio.get_running_loop().time() >= deadline:
+                logger.warning(f"⚠️ Index build for {collection_name} did not finish in {timeout}s")
+                return False
+            await asyncio.sleep(poll_interval)
+    
+    async def scroll_async(self, collection_name: str, limit: int = 256,
+                           offset: Optional[Any] = None) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+        """Page through points with vectors; returns (points, next_offset)"""
+        records, next_offset = await self.client.scroll(
+            collection_name=collection_name,
+            limit=limit,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        points = [
+            {"id": record.id, "vector": record.vector, "payload": record.payload}
+            for record in records
+        ]
+        return points, next_offset
+    
+    async def count_points_async(self, collection_name: str) -> int:
+        """Exact number of points in collection"""
+        result = await self.client.count(collection_name=collection_name, exact=True)
+        return result.count
+    
     async def initialize_default_collections(self) -> None:
         """Initialize default collections for the assistant"""
         try:
             for collection_name in self.collections.COLLECTION_CONFIGS.keys():
                 await self.create_collection(collection_name)
+                existing = await self.get_payload_indexes_async(collection_name)
+                for field_name, field_schema in self.collections.payload_indexes_for(collection_name).items():
+                    if existing.get(field_name) != field_schema:
+                        await self.create_payload_index_async(collection_name, field_name, field_schema)
+                await self.apply_storage_profile_async(collection_name)
             
             logger.info("✅ Default collections initialized")
             
@@ -435,17 +748,19 @@ class QdrantVectorStore:
     
     # Alias for test compatibility
     def create_collection(self, collection_name: str, vector_size: int = 1536, 
-                         distance: Distance = Distance.COSINE, force_recreate: bool = False):
-        """Create collection that works in both sync and async contexts"""
+                         distance: Distance = Distance.COSINE, force_recreate: bool = False,
+                         indexing_threshold: Optional[int] = None):
+        """Create a collection (sync); async callers await _async_create_collection"""
         if self.use_memory:
             return True
-        else:
-            # Return coroutine for async usage
-            return self._async_create_collection(collection_name, vector_size, distance, force_recreate)
+        return self._run_sync(self._async_create_collection(
+            collection_name, vector_size, distance, force_recreate, indexing_threshold
+        ))
     
     async def _async_create_collection(self, collection_name: str, vector_size: int = 1536,
                                      distance: Distance = Distance.COSINE, 
-                                     force_recreate: bool = False) -> bool:
+                                     force_recreate: bool = False,
+                                     indexing_threshold: Optional[int] = None) -> bool:
         """Async create collection implementation"""
         try:
             # Check if collection exists
@@ -466,15 +781,23 @@ class QdrantVectorStore:
                 {"vectors": {"size": vector_size, "distance": distance}}
             )
             
-            # Create collection
+            optimizers_config = None
+            if indexing_threshold is not None:
+                optimizers_config = models.OptimizersConfigDiff(indexing_threshold=indexing_threshold)
+            
+            # Create collection with the storage profile of its name (versions included)
+            profile = self.collections.storage_profile_for(collection_name)
             await self.client.create_collection(
                 collection_name=collection_name,
                 vectors_config=VectorParams(
                     size=config["vectors"]["size"],
-                    distance=config["vectors"]["distance"]
+                    distance=config["vectors"]["distance"],
+                    on_disk=profile["on_disk"]
                 ),
                 on_disk_payload=config.get("on_disk_payload", True),
-                hnsw_config=config.get("hnsw_config", None)
+                hnsw_config=models.HnswConfigDiff(**profile["hnsw_config"]),
+                quantization_config=self.collections.quantization_config(profile),
+                optimizers_config=optimizers_config
             )
             
             logger.info(f"✅ Created collection: {collection_name}")
@@ -494,12 +817,107 @@ class QdrantVectorStore:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             collections = loop.run_until_complete(self.client.get_collections())
+            aliases = loop.run_until_complete(self.get_aliases_async())
             loop.close()
-            return collection_name in [c.name for c in collections.collections]
+            return collection_name in aliases or collection_name in [c.name for c in collections.collections]
         except Exception as e:
             logger.error(f"❌ Failed to check collection existence: {e}")
             return False
     
+    def _run_sync(self, coroutine):
+        """Run a coroutine on a private event loop (sync wrappers)"""
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+    
+    def resolve_collection(self, collection_name: str) -> str:
+        """Resolve an alias to the collection it points to (sync)"""
+        if self.use_memory:
+            return collection_name
+        return self._run_sync(self.resolve_collection_async(collection_name))
+    
+    def get_collection_names(self) -> Set[str]:
+        """Names of all collections and aliases (sync)"""
+        if self.use_memory:
+            return set()
+        return self._run_sync(self.get_collection_names_async())
+    
+    def search_batch(self, requests: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Run several searches at once (sync)"""
+        if self.use_memory:
+            return [[] for _ in requests]
+        return self._run_sync(self.search_batch_async(requests))
+    
+    def get_aliases(self) -> Dict[str, str]:
+        """Alias name -> collection name (sync)"""
+        if self.use_memory:
+            return {}
+        return self._run_sync(self.get_aliases_async())
+    
+    def switch_alias(self, alias_name: str, collection_name: str) -> Optional[str]:
+        """Atomically point alias at collection (sync)"""
+        if self.use_memory:
+            return None
+        return self._run_sync(self.switch_alias_async(alias_name, collection_name))
+    
+    def update_collection(self, collection_name: str, indexing_threshold: Optional[int] = None) -> bool:
+        """Update optimizer settings (sync)"""
+        if self.use_memory:
+            return True
+        return self._run_sync(self.update_collection_async(collection_name, indexing_threshold))
+    
+    def apply_storage_profile(self, collection_name: str) -> Dict[str, Any]:
+        """Bring a collection to its storage profile (sync)"""
+        if self.use_memory:
+            return {}
+        return self._run_sync(self.apply_storage_profile_async(collection_name))
+    
+    def wait_for_indexing(self, collection_name: str, timeout: float = 300.0) -> bool:
+        """Wait for the index build to finish (sync)"""
+        if self.use_memory:
+            return True
+        return self._run_sync(self.wait_for_indexing_async(collection_name, timeout))
+    
+    def scroll(self, collection_name: str, limit: int = 256,
+               offset: Optional[Any] = None) -> Tuple[List[Dict[str, Any]], Optional[Any]]:
+        """Page through points with vectors (sync)"""
+        if self.use_memory:
+            return [], None
+        return self._run_sync(self.scroll_async(collection_name, limit, offset))
+    
+    def count_points(self, collection_name: str) -> int:
+        """Number of points in collection (sync)"""
+        if self.use_memory:
+            return 0
+        return self._run_sync(self.count_points_async(collection_name))
+    
+    def delete_points(self, collection_name: str, ids: Optional[List[str]] = None,
+                      filters: Optional[Dict[str, Any]] = None) -> int:
+        """Delete points by IDs and/or payload match (sync)"""
+        if self.use_memory:
+            return 0
+        return self._run_sync(self.delete_points_async(collection_name, ids, filters))
+    
+    def create_payload_index(self, collection_name: str, field_name: str, field_schema: str) -> bool:
+        """Create a payload index (sync)"""
+        if self.use_memory:
+            return True
+        return self._run_sync(self.create_payload_index_async(collection_name, field_name, field_schema))
+    
+    def delete_payload_index(self, collection_name: str, field_name: str) -> bool:
+        """Drop a payload index (sync)"""
+        if self.use_memory:
+            return True
+        return self._run_sync(self.delete_payload_index_async(collection_name, field_name))
+    
+    def get_payload_indexes(self, collection_name: str) -> Dict[str, str]:
+        """Indexed payload key -> index type (sync)"""
+        if self.use_memory:
+            return {}
+        return self._run_sync(self.get_payload_indexes_async(self.resolve_collection(collection_name)))
+    
     def delete_collection(self, collection_name: str) -> bool:
         """Delete collection (sync)"""
         if self.use_memory:
@@ -564,22 +982,10 @@ class QdrantVectorStore:
                                  limit: int = 10, score_threshold: Optional[float] = None,
                                  filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Search for similar vectors (async implementation)"""
+        # collection_name may be an alias: Qdrant resolves it per request
         try:
-            # Build filter if provided
-            qdrant_filter = None
-            if filters:
-                conditions = []
-                for field, value in filters.items():
-                    if isinstance(value, (str, int, float, bool)):
-                        conditions.append(
-                            FieldCondition(
-                                key=field,
-                                match=MatchValue(value=value)
-                            )
-                        )
-                
-                if conditions:
-                    qdrant_filter = Filter(must=conditions)
+            # Filter DSL -> Qdrant Filter (MatchAny, Range, DatetimeRange, nested clauses)
+            qdrant_filter = to_qdrant_filter(filters)
             
             # Perform search
             search_result = await self.client.search(
@@ -587,7 +993,10 @@ class QdrantVectorStore:
                 query_vector=query_vector,
                 limit=limit,
                 score_threshold=score_threshold,
-                query_filter=qdrant_filter
+                query_filter=qdrant_filter,
+                search_params=self.collections.search_params(
+                    self.collections.storage_profile_for(collection_name)
+                )
             )
             
             # Format results
@@ -619,60 +1028,34 @@ async def get_qdrant_store() -> QdrantVectorStore:
     
     return qdrant_store
 
-# Backward compatibility alias
-class MockQdrantClient:
-    """Mock Qdrant client for testing and development"""
-    
-    def __init__(self):
-        self.collections = {}
-        
-    def collection_exists(self, collection_name: str) -> bool:
-        """Check if collection exists"""
-        return collection_name in self.collections
-    
-    def create_collection(self, collection_name: str, vector_size: int = 1536) -> bool:
-        """Create a collection"""
-        self.collections[collection_name] = {
-            "vector_size": vector_size,
-            "points": {}
-        }
-        return True
-    
-    def upsert_vectors(self, collection_name: str, vectors: List[List[float]], 
-                      payloads: List[Dict[str, Any]], ids: List[str]) -> bool:
-        """Insert/update vectors"""
-        if collection_name not in self.collections:
-            self.create_collection(collection_name)
-        
-        for i, (vector, payload, point_id) in enumerate(zip(vectors, payloads, ids)):
-            self.collections[collection_name]["points"][point_id] = {
-                "vector": vector,
-                "payload": payload
-            }
-        return True
-    
-    def search_vectors(self, collection_name: str, query_vector: List[float], 
-                      limit: int = 10, filter_conditions: Optional[Dict] = None) -> List[Dict[str, Any]]:
-        """Search for similar vectors"""
-        if collection_name not in self.collections:
-            return []
-        
-        # Simple mock search - return some sample results
-        results = []
-        points = self.collections[collection_name]["points"]
-        
-        for point_id, point_data in list(points.items())[:limit]:
-            results.append({
-                "id": point_id,
-                "score": 0.9,  # Mock score
-                "payload": point_data["payload"]
-            })
-        
-        return results
+def get_local_vector_store() -> "LocalVectorStore":
+    """In-process vector index, persisted under LOCAL_VECTOR_STORE_PATH when set."""
+    from .local_index import LocalVectorStore
+
+    return LocalVectorStore(path=os.getenv("LOCAL_VECTOR_STORE_PATH") or None)
+
+def get_qdrant_client() -> Union[QdrantVectorStore, "LocalVectorStore"]:
+    """
+    Get the vector store client used by CollectionManager.
+
+    VECTOR_STORE_BACKEND=qdrant connects to the server at QDRANT_URL; the
+    default "local" backend is the in-process index (get_local_vector_store).
+
+    No connection is made here (the factory is called from running event
+    loops): CollectionManager.initialize_collections() probes the server
+    with the async health_check() and switches to the local index in
+    degraded mode if it is unreachable.
+    """
+    if os.getenv("VECTOR_STORE_BACKEND", "local").lower() == "qdrant":
+        url = urlparse(get_qdrant_url())
+        return QdrantVectorStore(
+            host=url.hostname or "localhost",
+            port=url.port or 6333,
+            api_key=os.getenv("QDRANT_API_KEY"),
+            use_ssl=url.scheme == "https"
+        )
 
-def get_qdrant_client() -> MockQdrantClient:
-    """Get Qdrant client instance (mock for testing)"""
-    return MockQdrantClient()
+    return get_local_vector_store()
 
 async def initialize_qdrant(host: str = "localhost", port: int = 6333,
                           api_key: Optional[str] = None) -> QdrantVectorStore:
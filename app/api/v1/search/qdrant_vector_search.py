@@ -3,20 +3,30 @@ Qdrant Vector Search API endpoints
 """
 
 import logging
+import os
 import time
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel, Field
 from adapters.vectorstore.collections import (CollectionType, DocumentMetadata,
                                      get_collection_manager)
+from adapters.vectorstore.bulk_indexing import (BulkDocument,
+                                                DocumentIndexStatus,
+                                                get_bulk_index_jobs)
+from adapters.vectorstore.filters import FilterError, parse_filter
 from adapters.vectorstore.qdrant_client import get_qdrant_client
 
 from infra.monitoring.metrics import record_semantic_search_metrics
+from app.core.async_utils import create_background_task
 from app.security.auth import get_current_user, require_admin
 
 logger = logging.getLogger(__name__)
 
+# Bulk index requests beyond these limits are rejected with 413 (default 50 MB of text)
+BULK_INDEX_MAX_DOCUMENTS = int(os.getenv("BULK_INDEX_MAX_DOCUMENTS", "1000"))
+BULK_INDEX_MAX_TEXT_BYTES = int(os.getenv("BULK_INDEX_MAX_TEXT_BYTES", "52428800"))
+
 router = APIRouter(prefix="/qdrant", tags=["Qdrant Vector Search"])
 
 
@@ -43,7 +53,10 @@ class DocumentSearchRequest(BaseModel):
         None, description="Collections to search"
     )
     limit: int = Field(default=10, ge=1, le=100, description="Maximum results")
-    filters: Optional[Dict[str, Any]] = Field(None, description="Search filters")
+    filters: Optional[Dict[str, Any]] = Field(
+        None,
+        description='Payload filters, e.g. {"source_type": "jira", "updated_at": {"gte": "2024-01-01"}}',
+    )
 
 
 class DocumentSearchResult(BaseModel):
@@ -200,7 +213,7 @@ async def index_document(
 
 
 @router.post("/search", response_model=SearchResponse)
-async def search_documents(request: DocumentSearchRequest):
+async def search_documents(request: DocumentSearchRequest, http_request: Request):
     """Search documents using vector similarity."""
     start_time = time.time()
 
@@ -217,13 +230,21 @@ async def search_documents(request: DocumentSearchRequest):
                     status_code=400, detail=f"Invalid collection type: {e}"
                 )
 
-        # Perform search
+        try:
+            parse_filter(request.filters)
+        except FilterError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid filters: {e}")
+
+        # Perform search; the principal set by the auth middleware (if any)
+        # lets the query feed autocomplete
+        principal = getattr(http_request.state, "user", None)
         collection_manager = get_collection_manager()
         results = await collection_manager.search_documents(
             query=request.query,
             collection_types=collection_types,
             limit=request.limit,
             filters=request.filters,
+            user_id=getattr(principal, "user_id", None),
         )
 
         duration = time.time() - start_time
@@ -380,87 +401,116 @@ async def reindex_collection(
 # Bulk operations
 
 
-@router.post("/documents/bulk-index")
+@router.post("/documents/bulk-index", status_code=202)
 async def bulk_index_documents(
-    documents: List[DocumentIndexRequest], current_user=Depends(get_current_user)
+    documents: List[DocumentIndexRequest],
+    request: Request,
+    wait: bool = Query(False, description="Wait for the job and return its final status"),
+    current_user=Depends(get_current_user),
 ):
-    """Bulk index multiple documents."""
-    if len(documents) > 100:
+    """
+    Bulk index multiple documents as a background job.
+
+    Chunks of all documents are embedded and upserted in shared batches;
+    poll the returned status_url for progress and per-document status.
+    """
+    if not documents:
+        raise HTTPException(status_code=400, detail="No documents to index")
+    if len(documents) > BULK_INDEX_MAX_DOCUMENTS:
         raise HTTPException(
-            status_code=400, detail="Maximum 100 documents per bulk request"
+            status_code=413,
+            detail=f"Maximum {BULK_INDEX_MAX_DOCUMENTS} documents per bulk request",
+        )
+    text_bytes = sum(len(doc_request.text.encode("utf-8")) for doc_request in documents)
+    if text_bytes > BULK_INDEX_MAX_TEXT_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Maximum {BULK_INDEX_MAX_TEXT_BYTES} bytes of document text per bulk request",
         )
-
-    start_time = time.time()
-    results = []
 
     try:
-        collection_manager = get_collection_manager()
-
+        entries = []
         for doc_request in documents:
             try:
-                # Validate collection type
                 collection_type = CollectionType(doc_request.collection_type.lower())
-
-                # Create metadata
-                metadata = DocumentMetadata(
-                    doc_id=doc_request.doc_id,
-                    title=doc_request.title,
-                    source=doc_request.source,
-                    source_type=collection_type,
-                    author=doc_request.author,
-                    content_type=doc_request.content_type,
-                    tags=doc_request.tags,
-                    url=doc_request.url,
-                )
-
-                # Index document
-                success = await collection_manager.index_document(
-                    text=doc_request.text,
-                    metadata=metadata,
-                    collection_type=collection_type,
-                )
-
-                results.append(
-                    {
-                        "doc_id": doc_request.doc_id,
-                        "success": success,
-                        "message": (
-                            "Indexed successfully" if success else "Indexing failed"
-                        ),
-                    }
+            except ValueError:
+                entries.append(
+                    DocumentIndexStatus(
+                        doc_id=doc_request.doc_id,
+                        collection_type=doc_request.collection_type,
+                        status="failed",
+                        message=f"Invalid collection type: {doc_request.collection_type}",
+                    )
                 )
+                continue
+
+            metadata = DocumentMetadata(
+                doc_id=doc_request.doc_id,
+                title=doc_request.title,
+                source=doc_request.source,
+                source_type=collection_type,
+                author=doc_request.author,
+                content_type=doc_request.content_type,
+                tags=doc_request.tags,
+                url=doc_request.url,
+            )
+            entries.append(BulkDocument(doc_request.text, metadata, collection_type))
 
-            except Exception as e:
-                results.append(
-                    {
-                        "doc_id": doc_request.doc_id,
-                        "success": False,
-                        "message": f"Error: {str(e)}",
-                    }
-                )
+        jobs = get_bulk_index_jobs()
+        job = jobs.submit(entries, owner=getattr(current_user, "user_id", None))
+        logger.info(f"📦 Bulk index job {job.job_id} submitted: {len(documents)} documents")
 
-        duration = time.time() - start_time
-        successful_count = sum(1 for r in results if r["success"])
+        if wait:
+            job = await jobs.wait(job.job_id)
+            _record_bulk_index_metrics(job)
+            return {"success": job.status == "completed", **job.to_dict()}
 
-        # Record metrics
-        record_semantic_search_metrics(
-            endpoint="/qdrant/documents/bulk-index",
-            duration=duration,
-            results_count=successful_count,
-            relevance_score=successful_count / len(documents) if documents else 0.0,
-            status="success",
-            query_type="bulk_indexing",
+        create_background_task(
+            _record_bulk_index_metrics_when_done(jobs, job.job_id),
+            name=f"bulk_index_metrics_{job.job_id}",
         )
-
         return {
             "success": True,
+            "job_id": job.job_id,
+            "status": job.status,
             "total_documents": len(documents),
-            "successful": successful_count,
-            "failed": len(documents) - successful_count,
-            "results": results,
-            "processing_time_ms": duration * 1000,
+            "status_url": f"{request.url.path.rstrip('/')}/{job.job_id}",
         }
 
     except Exception as e:
         logger.error(f"Bulk indexing failed: {e}")
         raise HTTPException(status_code=500, detail=f"Bulk indexing failed: {str(e)}")
+
+
+@router.get("/documents/bulk-index/{job_id}")
+async def get_bulk_index_job(
+    job_id: str,
+    include_documents: bool = Query(True, description="Include per-document status"),
+    current_user=Depends(get_current_user),
+):
+    """Get progress and per-document status of a bulk index job."""
+    job = get_bulk_index_jobs().get(job_id)
+    scopes = getattr(current_user, "scopes", None) or []
+    if job is None or (job.owner and job.owner != getattr(current_user, "user_id", None) and "admin" not in scopes):
+        raise HTTPException(status_code=404, detail=f"Bulk index job not found: {job_id}")
+
+    return job.to_dict(include_documents=include_documents)
+
+
+def _record_bulk_index_metrics(job) -> None:
+    total = len(job.statuses)
+    successful = sum(1 for status in job.statuses if status.status == "indexed")
+    record_semantic_search_metrics(
+        endpoint="/qdrant/documents/bulk-index",
+        duration=(job.completed_at or time.time()) - (job.started_at or job.created_at),
+        results_count=successful,
+        relevance_score=successful / total if total else 0.0,
+        status="success" if job.status == "completed" else "error",
+        query_type="bulk_indexing",
+    )
+
+
+async def _record_bulk_index_metrics_when_done(jobs, job_id: str) -> None:
+    job = await jobs.wait(job_id)
+    if job is not None:
+        _record_bulk_index_metrics(job)
@@ -11,6 +11,8 @@ from .async_utils import (AsyncTaskManager, AsyncTimeouts,
 from .exceptions import AsyncResourceError, AsyncRetryError, AsyncTimeoutError
 from .http_client import (StandardHttpClient, api_client, http_client_context,
                           http_client_factory, internal_service_client)
+from .request_context import (RequestContext, get_request_context,
+                              merge_response_headers, on_response_start)
 
 __all__ = [
     # Async utilities
@@ -30,6 +32,11 @@ __all__ = [
     "http_client_context",
     "api_client",
     "internal_service_client",
+    # Request context
+    "RequestContext",
+    "get_request_context",
+    "merge_response_headers",
+    "on_response_start",
     # Exceptions
     "AsyncTimeoutError",
     "AsyncResourceError",
@@ -0,0 +1,247 @@
+"""
+Shared per-request context for pure ASGI middlewares
+
+Every middleware in the stack calls get_request_context(scope) and receives
+the same RequestContext, so request id generation, header parsing, route
+normalization and principal lookup happen once per request instead of once
+per layer. The context lives in scope["state"] and is therefore also
+visible to endpoints through request.state.request_context.
+"""
+
+import itertools
+import os
+import re
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.types import Message, Scope, Send
+
+REQUEST_CONTEXT_KEY = "request_context"
+
+# Metrics label for requests that did not match any route (scanners, typos)
+UNMATCHED_ROUTE = "/{unmatched}"
+
+RawHeaders = List[Tuple[bytes, bytes]]
+
+_UUID_RE = re.compile(
+    r"/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE
+)
+_HASH_RE = re.compile(r"/(?=[0-9]*[a-f])[0-9a-f]{16,}(?=/|$)", re.IGNORECASE)
+_NUMERIC_RE = re.compile(r"/\d+")
+_EMAIL_RE = re.compile(r"/[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}")
+
+
+@lru_cache(maxsize=4096)
+def normalize_path(path: str) -> str:
+    """Normalize path for metrics (remove IDs, etc.)."""
+    # Replace UUIDs
+    path = _UUID_RE.sub("/{uuid}", path)
+
+    # Replace hex hashes (commit SHAs, content digests)
+    path = _HASH_RE.sub("/{hash}", path)
+
+    # Replace numeric IDs
+    path = _NUMERIC_RE.sub("/{id}", path)
+
+    # Replace email addresses
+    path = _EMAIL_RE.sub("/{email}", path)
+
+    return path
+
+
+def route_template(scope: Scope) -> Optional[str]:
+    """Path template of the FastAPI route that matched this request, if any"""
+    template = getattr(scope.get("route"), "path_format", None)
+    if template is None:
+        return None
+    # Routes of mounted sub-applications are relative to the mount point
+    app_root_path = scope.get("app_root_path")
+    if app_root_path is not None:
+        template = scope.get("root_path", "")[len(app_root_path) :] + template
+    return template
+
+
+def _request_id_prefix() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+_request_id_prefix_value = _request_id_prefix()
+_request_counter = itertools.count(1)
+
+
+def _reset_request_ids():
+    global _request_id_prefix_value, _request_counter
+    _request_id_prefix_value = _request_id_prefix()
+    _request_counter = itertools.count(1)
+
+
+if hasattr(os, "register_at_fork"):
+    # Forked workers must not share the prefix of the parent process
+    os.register_at_fork(after_in_child=_reset_request_ids)
+
+
+def new_request_id() -> str:
+    """Process-unique request id: random per-process prefix plus a counter"""
+    return f"{_request_id_prefix_value}-{next(_request_counter):x}"
+
+
+class RequestContext:
+    """
+    Per-request data shared by all middlewares
+
+    Attributes:
+        request_id: Unique request identifier
+        start_time: perf_counter() value at context creation
+        started_at: Wall clock time at context creation
+        method: HTTP method
+        path: Raw request path
+        principal: Authenticated user set by the auth middleware
+        status_code: Response status once the response has started
+        response_size: Number of body bytes sent so far
+    """
+
+    __slots__ = (
+        "scope",
+        "request_id",
+        "start_time",
+        "started_at",
+        "method",
+        "path",
+        "principal",
+        "status_code",
+        "response_size",
+        "_route",
+        "_request",
+    )
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.request_id = new_request_id()
+        self.start_time = time.perf_counter()
+        self.started_at = time.time()
+        self.method = scope.get("method", "GET")
+        self.path = scope.get("path", "/")
+        self.principal: Any = None
+        self.status_code: Optional[int] = None
+        self.response_size = 0
+        self._route: Optional[str] = None
+        self._request: Optional[Request] = None
+
+    @property
+    def request(self) -> Request:
+        """Starlette request view over the scope (headers parsed once)"""
+        if self._request is None:
+            self._request = Request(self.scope)
+        return self._request
+
+    @property
+    def headers(self) -> Headers:
+        return self.request.headers
+
+    @property
+    def route(self) -> str:
+        """
+        Metrics label for the request path
+
+        The matched route template once routing has happened, the
+        normalized raw path before that (or for non-FastAPI routes).
+        """
+        if self._route is None:
+            template = route_template(self.scope)
+            if template is None:
+                return normalize_path(self.path)
+            self._route = template
+        return self._route
+
+    @property
+    def matched(self) -> bool:
+        """Whether routing found an endpoint for this request"""
+        return "endpoint" in self.scope or self._route is not None
+
+    @route.setter
+    def route(self, value: str):
+        self._route = value
+
+    @property
+    def user_id(self) -> str:
+        """User identifier for user-specific metrics"""
+        if self.principal:
+            return getattr(self.principal, "user_id", "unknown")
+
+        headers = self.headers
+        if "x-user-id" in headers:
+            return headers["x-user-id"]
+
+        if headers.get("authorization", "").startswith("Bearer "):
+            # In production, decode JWT properly
+            return "authenticated"
+
+        return "anonymous"
+
+    def set_principal(self, principal: Any):
+        """Record the authenticated user for later layers and endpoints"""
+        self.principal = principal
+        self.scope["state"]["user"] = principal
+
+    def elapsed(self) -> float:
+        """Seconds since the request entered the middleware stack"""
+        return time.perf_counter() - self.start_time
+
+
+def get_request_context(scope: Scope) -> RequestContext:
+    """Return the context of this request, creating it on first use"""
+    state = scope.setdefault("state", {})
+    context = state.get(REQUEST_CONTEXT_KEY)
+    if context is None:
+        context = RequestContext(scope)
+        state[REQUEST_CONTEXT_KEY] = context
+        state["request_id"] = context.request_id
+    return context
+
+
+def encode_headers(headers: Iterable[Tuple[str, str]]) -> RawHeaders:
+    """Encode header pairs into the raw ASGI representation"""
+    return [
+        (name.lower().encode("latin-1"), value.encode("latin-1"))
+        for name, value in headers
+    ]
+
+
+def merge_response_headers(
+    message: Message, extra: RawHeaders, drop: Iterable[bytes] = ()
+):
+    """
+    Set raw headers on an http.response.start message
+
+    Headers named in extra replace existing ones; headers named in drop are
+    removed. Header names must be lower-case bytes.
+    """
+    replaced = {name for name, _ in extra}
+    replaced.update(drop)
+    headers = [
+        header
+        for header in message.get("headers", ())
+        if header[0].lower() not in replaced
+    ]
+    headers.extend(extra)
+    message["headers"] = headers
+
+
+def on_response_start(send: Send, callback: Callable[[Message], None]) -> Send:
+    """
+    Wrap send so callback sees (and may edit) the response start message
+
+    Body messages are forwarded untouched, so streaming responses are not
+    buffered.
+    """
+
+    async def send_wrapper(message: Message):
+        if message["type"] == "http.response.start":
+            callback(message)
+        await send(message)
+
+    return send_wrapper
@@ -0,0 +1,309 @@
+"""
+Router registry with feature flags and deferred imports
+
+Routers are declared as RouterSpec entries instead of being imported one by
+one at app creation. Only routers whose feature is enabled are imported
+(sequentially by default; ROUTER_IMPORT_WORKERS > 1 imports them in a thread
+pool, which import-lock contention keeps from being measurably faster), and
+routers are mounted in declaration order afterwards so route precedence does
+not depend on import timing. Every load produces a StartupReport with per-router import times,
+memory growth and the result against the startup budget.
+
+Environment:
+    API_FEATURES            Comma-separated features to enable ("all" by default)
+    API_DISABLED_FEATURES   Comma-separated features to disable
+    ROUTER_IMPORT_WORKERS   Import threads (1 = sequential)
+    STARTUP_BUDGET_SECONDS  Time-to-ready budget for router loading
+"""
+
+import importlib
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import FastAPI
+
+logger = logging.getLogger(__name__)
+
+ALL_FEATURES = "all"
+
+
+@dataclass(frozen=True)
+class RouterSpec:
+    """Declarative description of a router to mount"""
+
+    module: str
+    prefix: str = ""
+    feature: str = "core"
+    attribute: str = "router"
+    factory: bool = False  # attribute is a callable returning the router
+    required: bool = False  # failure to load aborts startup
+
+    @property
+    def name(self) -> str:
+        return f"{self.module}:{self.attribute}"
+
+
+@dataclass
+class RouterLoadResult:
+    """Outcome of loading a single router"""
+
+    spec: RouterSpec
+    status: str  # mounted | disabled | failed
+    import_seconds: float = 0.0
+    new_modules: int = 0
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "router": self.spec.name,
+            "prefix": self.spec.prefix,
+            "feature": self.spec.feature,
+            "status": self.status,
+            "import_ms": round(self.import_seconds * 1000, 1),
+            "new_modules": self.new_modules,
+            "error": self.error,
+        }
+
+
+@dataclass
+class StartupReport:
+    """Router loading profile compared against the startup budget"""
+
+    results: List[RouterLoadResult] = field(default_factory=list)
+    total_seconds: float = 0.0
+    budget_seconds: Optional[float] = None
+    rss_before_mb: float = 0.0
+    rss_after_mb: float = 0.0
+    enabled_features: Optional[Set[str]] = None
+
+    @property
+    def mounted(self) -> List[RouterLoadResult]:
+        return [r for r in self.results if r.status == "mounted"]
+
+    @property
+    def failed(self) -> List[RouterLoadResult]:
+        return [r for r in self.results if r.status == "failed"]
+
+    @property
+    def disabled(self) -> List[RouterLoadResult]:
+        return [r for r in self.results if r.status == "disabled"]
+
+    @property
+    def over_budget(self) -> bool:
+        return (
+            self.budget_seconds is not None and self.total_seconds > self.budget_seconds
+        )
+
+    def slowest(self, limit: int = 10) -> List[RouterLoadResult]:
+        loaded = [r for r in self.results if r.status != "disabled"]
+        return sorted(loaded, key=lambda r: r.import_seconds, reverse=True)[:limit]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_seconds": round(self.total_seconds, 3),
+            "budget_seconds": self.budget_seconds,
+            "over_budget": self.over_budget,
+            "rss_before_mb": round(self.rss_before_mb, 1),
+            "rss_after_mb": round(self.rss_after_mb, 1),
+            "enabled_features": sorted(self.enabled_features)
+            if self.enabled_features is not None
+            else ALL_FEATURES,
+            "mounted": len(self.mounted),
+            "failed": len(self.failed),
+            "disabled": len(self.disabled),
+            "routers": [r.to_dict() for r in self.results],
+        }
+
+    def log(self, log: logging.Logger = logger, top: int = 10):
+        """Write the import profile and budget summary to the log"""
+        log.info(
+            f"📦 Routers: {len(self.mounted)} mounted, {len(self.failed)} failed, "
+            f"{len(self.disabled)} disabled in {self.total_seconds:.2f}s "
+            f"(RSS {self.rss_before_mb:.0f} → {self.rss_after_mb:.0f} MB)"
+        )
+        for result in self.slowest(top):
+            log.info(
+                f"   {result.import_seconds * 1000:8.1f} ms  {result.new_modules:5d} modules  "
+                f"{result.status:8s} {result.spec.name}"
+            )
+        for result in self.failed:
+            log.warning(f"⚠️ {result.spec.name} router not available: {result.error}")
+
+        if self.budget_seconds is None:
+            return
+        if self.over_budget:
+            offenders = ", ".join(r.spec.module for r in self.slowest(3))
+            log.warning(
+                f"⏱️ Startup budget exceeded: {self.total_seconds:.2f}s > "
+                f"{self.budget_seconds:.2f}s (slowest: {offenders})"
+            )
+        else:
+            log.info(
+                f"⏱️ Startup budget: {self.total_seconds:.2f}s of {self.budget_seconds:.2f}s"
+            )
+
+
+class FeatureFlags:
+    """Enabled/disabled router features"""
+
+    def __init__(
+        self, enabled: Optional[Iterable[str]] = None, disabled: Iterable[str] = ()
+    ):
+        # None means every feature is enabled
+        self.enabled = set(enabled) if enabled is not None else None
+        self.disabled = set(disabled)
+
+    @classmethod
+    def from_env(cls) -> "FeatureFlags":
+        enabled = _parse_list(os.getenv("API_FEATURES", ALL_FEATURES))
+        disabled = _parse_list(os.getenv("API_DISABLED_FEATURES", ""))
+        if ALL_FEATURES in enabled:
+            return cls(None, disabled)
+        return cls(enabled, disabled)
+
+    def is_enabled(self, feature: str) -> bool:
+        if feature in self.disabled:
+            return False
+        return self.enabled is None or feature in self.enabled
+
+
+class RouterRegistry:
+    """Loads and mounts declared routers according to feature flags"""
+
+    def __init__(
+        self,
+        specs: Iterable[RouterSpec] = (),
+        flags: Optional[FeatureFlags] = None,
+        max_workers: Optional[int] = None,
+        budget_seconds: Optional[float] = None,
+    ):
+        self.specs: List[RouterSpec] = list(specs)
+        self.flags = flags or FeatureFlags.from_env()
+        self.max_workers = max_workers or int(os.getenv("ROUTER_IMPORT_WORKERS", "1"))
+        if budget_seconds is None and os.getenv("STARTUP_BUDGET_SECONDS"):
+            budget_seconds = float(os.getenv("STARTUP_BUDGET_SECONDS"))
+        self.budget_seconds = budget_seconds
+
+    def register(self, spec: RouterSpec):
+        self.specs.append(spec)
+
+    def features(self) -> Set[str]:
+        return {spec.feature for spec in self.specs}
+
+    def load(self, app: FastAPI) -> StartupReport:
+        """Import enabled routers and mount them in declaration order"""
+        started = time.perf_counter()
+        report = StartupReport(
+            budget_seconds=self.budget_seconds,
+            rss_before_mb=_current_rss_mb(),
+            enabled_features=self.flags.enabled,
+        )
+
+        enabled = [spec for spec in self.specs if self.flags.is_enabled(spec.feature)]
+        modules = list(dict.fromkeys(spec.module for spec in enabled))
+        imported = self._import_modules(modules)
+
+        for spec in self.specs:
+            if not self.flags.is_enabled(spec.feature):
+                report.results.append(RouterLoadResult(spec, "disabled"))
+                continue
+
+            module, seconds, new_modules, error = imported[spec.module]
+            result = RouterLoadResult(spec, "failed", seconds, new_modules, error)
+            if module is not None:
+                try:
+                    router = getattr(module, spec.attribute)
+                    if spec.factory:
+                        router = router()
+                    app.include_router(router, prefix=spec.prefix)
+                    result.status = "mounted"
+                except Exception as e:
+                    result.error = f"{type(e).__name__}: {e}"
+
+            if result.status == "failed" and spec.required:
+                raise RuntimeError(
+                    f"Required router {spec.name} failed to load: {result.error}"
+                )
+            report.results.append(result)
+
+        report.total_seconds = time.perf_counter() - started
+        report.rss_after_mb = _current_rss_mb()
+        return report
+
+    def _import_modules(
+        self, modules: List[str]
+    ) -> Dict[str, Tuple[Any, float, int, Optional[str]]]:
+        """Import modules concurrently; returns module -> (module, seconds, new modules, error)"""
+        if self.max_workers <= 1 or len(modules) <= 1:
+            return {name: _timed_import(name) for name in modules}
+
+        # A package that is still initializing in one thread is already in
+        # sys.modules, so another thread would import its submodules against a
+        # half-built package. Settle all parent packages sequentially first.
+        parents = list(
+            dict.fromkeys(
+                parent for name in modules for parent in _parent_packages(name)
+            )
+        )
+        failed_parents = {
+            parent for parent in parents if _timed_import(parent)[0] is None
+        }
+        parallel = [
+            name
+            for name in modules
+            if not failed_parents.intersection(_parent_packages(name))
+        ]
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="router-import"
+        ) as pool:
+            results = dict(zip(parallel, pool.map(_timed_import, parallel)))
+
+        # Failures are re-imported sequentially so they match a plain import
+        # (shared dependencies imported concurrently can still collide)
+        for name in modules:
+            if name not in results or results[name][0] is None:
+                results[name] = _timed_import(name)
+        return results
+
+
+def _parent_packages(name: str) -> List[str]:
+    parts = name.split(".")
+    return [".".join(parts[:index]) for index in range(1, len(parts))]
+
+
+def _timed_import(name: str) -> Tuple[Any, float, int, Optional[str]]:
+    # With concurrent imports both figures also include work done by other
+    # threads in the meantime; they are a profile, not an exact attribution
+    modules_before = len(sys.modules)
+    started = time.perf_counter()
+    try:
+        module = importlib.import_module(name)
+        error = None
+    except Exception as e:
+        module = None
+        error = f"{type(e).__name__}: {e}"
+    seconds = time.perf_counter() - started
+    return module, seconds, max(0, len(sys.modules) - modules_before), error
+
+
+def _parse_list(value: str) -> Set[str]:
+    return {item.strip().lower() for item in value.split(",") if item.strip()}
+
+
+def _current_rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Peak RSS (KB on Linux) when /proc is unavailable
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
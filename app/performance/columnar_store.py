@@ -0,0 +1,297 @@
+"""
+Columnar ring buffer for metric data points
+Each field is a NumPy array; string fields (metric, model, user) are
+dictionary-encoded to small integer codes. The buffer grows geometrically up
+to its capacity and then overwrites the oldest points. While points arrive in
+time order the ring stays sorted, so time windows are located by binary
+search and only the selected slice is scanned by the vectorized filters.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MISSING = -1  # code for absent optional values (user id)
+
+
+class Dictionary:
+    """Bidirectional value <-> integer code mapping"""
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self):
+        self.codes: Dict[Any, int] = {}
+        self.values: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: Any) -> int:
+        if value is None:
+            return MISSING
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: Any) -> Optional[int]:
+        """Code of an already known value, None if never seen"""
+        return self.codes.get(value)
+
+    def decode(self, code: int) -> Any:
+        return None if code == MISSING else self.values[code]
+
+
+class Selection:
+    """Columns of the points matching a query, oldest first"""
+
+    __slots__ = ("timestamps", "values", "metrics", "models", "users")
+
+    def __init__(self, timestamps, values, metrics, models, users):
+        self.timestamps: np.ndarray = timestamps
+        self.values: np.ndarray = values
+        self.metrics: np.ndarray = metrics
+        self.models: np.ndarray = models
+        self.users: np.ndarray = users
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def where(self, mask: np.ndarray) -> "Selection":
+        return Selection(
+            self.timestamps[mask],
+            self.values[mask],
+            self.metrics[mask],
+            self.models[mask],
+            self.users[mask],
+        )
+
+    def sorted_by_time(self) -> "Selection":
+        if len(self) < 2 or bool(np.all(self.timestamps[1:] >= self.timestamps[:-1])):
+            return self
+        return self.where(np.argsort(self.timestamps, kind="stable"))
+
+
+class ColumnarMetricStore:
+    """Ring-buffered columnar store of (timestamp, metric, value, model, user) points"""
+
+    def __init__(self, capacity: int = 1_000_000, initial_capacity: int = 4096):
+        self.capacity = capacity
+        self.metric_codes = Dictionary()
+        self.model_codes = Dictionary()
+        self.user_codes = Dictionary()
+        self._allocate(min(initial_capacity, capacity))
+        self._start = 0  # physical index of the oldest point
+        self._size = 0
+        self._appended = 0  # total points ever appended (sequence numbers)
+        self._ordered = True  # every point is newer than the one before it
+        self._last_timestamp = float("-inf")
+        self._metric_counts: List[int] = []
+        # Rare free-form context, keyed by sequence number
+        self._contexts: Dict[int, Dict[str, Any]] = {}
+
+    def _allocate(self, size: int):
+        self._timestamps = np.empty(size, dtype=np.float64)
+        self._values = np.empty(size, dtype=np.float64)
+        self._metrics = np.empty(size, dtype=np.int16)
+        self._models = np.empty(size, dtype=np.int32)
+        self._users = np.empty(size, dtype=np.int32)
+
+    @property
+    def _columns(self) -> Tuple[np.ndarray, ...]:
+        return (
+            self._timestamps,
+            self._values,
+            self._metrics,
+            self._models,
+            self._users,
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column arrays"""
+        return sum(column.nbytes for column in self._columns)
+
+    def _grow(self):
+        """Double the arrays (up to capacity), unrolling the ring"""
+        old = [self._ordered_column(column) for column in self._columns]
+        self._allocate(min(len(self._timestamps) * 2, self.capacity))
+        for new, column in zip(self._columns, old):
+            new[: self._size] = column
+        self._start = 0
+
+    def _ordered_column(self, column: np.ndarray) -> np.ndarray:
+        end = self._start + self._size
+        if end <= len(column):
+            return column[self._start : end]
+        return np.concatenate((column[self._start :], column[: end - len(column)]))
+
+    def append(
+        self,
+        timestamp: float,
+        metric: Any,
+        value: float,
+        model: Any,
+        user: Any = None,
+        context: Optional[Dict[str, Any]] = None,
+    ):
+        """Add one point, evicting the oldest when the store is full"""
+        allocated = len(self._timestamps)
+        if self._size == allocated and allocated < self.capacity:
+            self._grow()
+            allocated = len(self._timestamps)
+
+        metric_code = self.metric_codes.encode(metric)
+        if metric_code == len(self._metric_counts):
+            self._metric_counts.append(0)
+
+        if self._size == allocated:
+            # Full: overwrite the oldest point
+            position = self._start
+            self._metric_counts[self._metrics[position]] -= 1
+            self._contexts.pop(self._appended - self._size, None)
+            self._start = (self._start + 1) % allocated
+        else:
+            position = (self._start + self._size) % allocated
+            self._size += 1
+
+        self._timestamps[position] = timestamp
+        self._values[position] = value
+        self._metrics[position] = metric_code
+        self._models[position] = self.model_codes.encode(model)
+        self._users[position] = self.user_codes.encode(user)
+        self._metric_counts[metric_code] += 1
+
+        if timestamp < self._last_timestamp:
+            self._ordered = False
+        self._last_timestamp = max(self._last_timestamp, timestamp)
+
+        if context:
+            self._contexts[self._appended] = context
+        self._appended += 1
+
+    def extend(self, rows: Iterable[Tuple]):
+        """Append (timestamp, metric, value, model, user[, context]) rows"""
+        for row in rows:
+            self.append(*row)
+
+    def count(self, metric: Any) -> int:
+        """Number of retained points of a metric (O(1))"""
+        code = self.metric_codes.lookup(metric)
+        return 0 if code is None else self._metric_counts[code]
+
+    def _segments(self) -> List[slice]:
+        """Physical slices holding the points, oldest first"""
+        end = self._start + self._size
+        allocated = len(self._timestamps)
+        if end <= allocated:
+            return [slice(self._start, end)]
+        return [slice(self._start, allocated), slice(0, end - allocated)]
+
+    def select(
+        self,
+        since: Optional[float] = None,
+        metric: Any = None,
+        model: Any = None,
+    ) -> Selection:
+        """Points newer than `since` matching the metric/model filters"""
+        metric_code = model_code = None
+        if metric is not None:
+            metric_code = self.metric_codes.lookup(metric)
+            if metric_code is None or not self._metric_counts[metric_code]:
+                return self._empty()
+        if model is not None:
+            model_code = self.model_codes.lookup(model)
+            if model_code is None:
+                return self._empty()
+
+        parts = []
+        for segment in self._segments():
+            start, stop = segment.start, segment.stop
+            if since is not None:
+                if self._ordered:
+                    start += int(
+                        np.searchsorted(
+                            self._timestamps[start:stop], since, side="left"
+                        )
+                    )
+                    mask = None
+                else:
+                    mask = self._timestamps[start:stop] >= since
+            else:
+                mask = None
+
+            if metric_code is not None:
+                metric_mask = self._metrics[start:stop] == metric_code
+                mask = metric_mask if mask is None else mask & metric_mask
+            if model_code is not None:
+                model_mask = self._models[start:stop] == model_code
+                mask = model_mask if mask is None else mask & model_mask
+
+            columns = [column[start:stop] for column in self._columns]
+            if mask is not None:
+                columns = [column[mask] for column in columns]
+            parts.append(columns)
+
+        if len(parts) == 1:
+            return Selection(*parts[0])
+        return Selection(*(np.concatenate(pieces) for pieces in zip(*parts)))
+
+    def tail(self, limit: int) -> Selection:
+        """The most recently appended points, oldest first"""
+        limit = max(0, min(limit, self._size))
+        columns = []
+        for column in self._columns:
+            ordered = self._ordered_column(column)
+            columns.append(ordered[len(ordered) - limit :])
+        return Selection(*columns)
+
+    def contexts_for_tail(self, limit: int) -> List[Optional[Dict[str, Any]]]:
+        """Contexts of the points returned by tail(limit)"""
+        limit = max(0, min(limit, self._size))
+        first = self._appended - limit
+        return [
+            self._contexts.get(sequence) for sequence in range(first, self._appended)
+        ]
+
+    def _empty(self) -> Selection:
+        return Selection(*(column[:0] for column in self._columns))
+
+    # Vectorized group-bys ---------------------------------------------------
+
+    @staticmethod
+    def counts_by(codes: np.ndarray, size: int) -> np.ndarray:
+        """Occurrences of each code 0..size-1 (missing codes ignored)"""
+        return np.bincount(codes[codes != MISSING], minlength=size)
+
+    @staticmethod
+    def sums_by(codes: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+        return np.bincount(codes, weights=values, minlength=size)
+
+    def decode_counts(
+        self, counts: np.ndarray, dictionary: Dictionary
+    ) -> Dict[Any, int]:
+        return {
+            dictionary.values[code]: int(count)
+            for code, count in enumerate(counts)
+            if count
+        }
+
+
+def linear_trend(values: Sequence[float]) -> float:
+    """Least-squares slope of values against their index"""
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+    if n < 2:
+        return 0.0
+    x = np.arange(n, dtype=np.float64)
+    x_centered = x - x.mean()
+    denominator = float(np.dot(x_centered, x_centered))
+    if denominator == 0:
+        return 0.0
+    return float(np.dot(x_centered, y - y.mean()) / denominator)
@@ -0,0 +1,129 @@
+"""
+Constant-time streaming statistics
+Rolling-window mean/stdev (Welford), exponentially weighted moving average and
+time-bucketed counters. Every update is O(1) (amortized for bucket expiry), so
+per-point cost does not depend on how much history a series has.
+"""
+
+import math
+from collections import deque
+from typing import Deque, List, Optional
+
+
+class RollingStats:
+    """
+    Mean and sample standard deviation over the last `size` values
+
+    Uses Welford's update with removal of the value leaving the window,
+    which avoids the cancellation errors of running sum / sum of squares.
+    """
+
+    __slots__ = ("size", "values", "mean", "_m2")
+
+    def __init__(self, size: int = 50):
+        self.size = size
+        self.values: Deque[float] = deque()
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, value: float):
+        if len(self.values) < self.size:
+            self.values.append(value)
+            delta = value - self.mean
+            self.mean += delta / len(self.values)
+            self._m2 += delta * (value - self.mean)
+            return
+
+        oldest = self.values.popleft()
+        self.values.append(value)
+        old_mean = self.mean
+        self.mean += (value - oldest) / self.size
+        self._m2 += (value - oldest) * (value - self.mean + oldest - old_mean)
+        if self._m2 < 0:  # rounding drift on constant series
+            self._m2 = 0.0
+
+    @property
+    def variance(self) -> float:
+        count = len(self.values)
+        return self._m2 / (count - 1) if count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class EWMA:
+    """Exponentially weighted moving average and variance"""
+
+    __slots__ = ("alpha", "value", "variance", "count")
+
+    def __init__(self, alpha: Optional[float] = None, span: int = 10):
+        # span N gives the usual alpha = 2 / (N + 1)
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1)
+        self.value: Optional[float] = None
+        self.variance = 0.0
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if self.value is None:
+            self.value = value
+            return
+        delta = value - self.value
+        self.value += self.alpha * delta
+        self.variance = (1 - self.alpha) * (self.variance + self.alpha * delta * delta)
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class TimeBucketCounter:
+    """
+    Totals and hits over a sliding time window
+
+    The window is split into fixed-width buckets; expired buckets are
+    subtracted from the running totals as time advances, so both add()
+    and ratio() are amortized O(1). Window edges are accurate to one bucket.
+    """
+
+    __slots__ = ("window_seconds", "bucket_seconds", "buckets", "total", "hits")
+
+    def __init__(self, window_seconds: float, buckets: int = 60):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = window_seconds / buckets
+        # [bucket index, total, hits]
+        self.buckets: Deque[List[int]] = deque()
+        self.total = 0
+        self.hits = 0
+
+    def add(self, timestamp: float, hit: bool):
+        index = int(timestamp // self.bucket_seconds)
+        self._expire(index)
+        if self.buckets and self.buckets[-1][0] >= index:
+            bucket = self.buckets[-1]  # late points count towards the newest bucket
+        else:
+            bucket = [index, 0, 0]
+            self.buckets.append(bucket)
+        bucket[1] += 1
+        self.total += 1
+        if hit:
+            bucket[2] += 1
+            self.hits += 1
+
+    def _expire(self, current_index: int):
+        horizon = current_index - int(round(self.window_seconds / self.bucket_seconds))
+        while self.buckets and self.buckets[0][0] <= horizon:
+            _, total, hits = self.buckets.popleft()
+            self.total -= total
+            self.hits -= hits
+
+    def advance(self, timestamp: float):
+        """Drop buckets that fell out of the window without adding a point"""
+        self._expire(int(timestamp // self.bucket_seconds))
+
+    def ratio(self) -> float:
+        return self.hits / self.total if self.total else 0.0
@@ -0,0 +1,361 @@
+"""
+Node-aware WebSocket delivery backends for multi-worker deployments
+Task 2.2: Scalability & Load Handling - Real-time Notifications
+
+Features:
+- Connection registry (user -> nodes) with heartbeats
+- Routing of notifications to the nodes that hold a user's connections
+- Cluster-wide broadcasts
+- Durable, capped offline queues with replay on reconnect
+- Redis backend (pub/sub + streams) and in-memory backend for single-node/tests
+"""
+
+import asyncio
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set
+
+try:
+    import redis.asyncio as redis
+
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Callback invoked for every message routed to this node from another node.
+# user_id is None for cluster-wide broadcasts.
+MessageHandler = Callable[[Optional[str], str], None]
+
+# Separates origin node, target user and payload in pub/sub envelopes
+_ENVELOPE_SEPARATOR = "\x1f"
+
+
+class DeliveryBackend(ABC):
+    """
+    Interface for cross-node WebSocket message delivery
+
+    The owning node delivers to its own connections directly; the backend
+    only routes messages to the other nodes of the cluster.
+    """
+
+    def __init__(self, heartbeat_ttl: float = 30.0, offline_queue_size: int = 50):
+        self.heartbeat_ttl = heartbeat_ttl
+        self.offline_queue_size = offline_queue_size
+        self.node_id: Optional[str] = None
+
+    @abstractmethod
+    async def start(self, node_id: str, handler: MessageHandler):
+        """Start receiving messages routed to node_id"""
+
+    @abstractmethod
+    async def stop(self):
+        """Stop receiving messages routed to this node"""
+
+    @abstractmethod
+    async def register_connection(self, user_id: str):
+        """Record that this node holds a connection of user_id"""
+
+    @abstractmethod
+    async def unregister_connection(self, user_id: str):
+        """Record that this node no longer holds connections of user_id"""
+
+    @abstractmethod
+    async def heartbeat(self, user_ids: Iterable[str]):
+        """Refresh registry entries for the users connected to this node"""
+
+    @abstractmethod
+    async def get_user_nodes(self, user_id: str) -> Set[str]:
+        """Nodes with a live connection of user_id"""
+
+    @abstractmethod
+    async def publish(self, user_id: str, payload: str) -> int:
+        """Route payload to other nodes holding user_id; returns node count"""
+
+    @abstractmethod
+    async def broadcast(self, payload: str) -> int:
+        """Route payload to every other node; returns receiving node count"""
+
+    @abstractmethod
+    async def enqueue_offline(self, user_id: str, payload: str):
+        """Store payload for a user without live connections"""
+
+    @abstractmethod
+    async def replay_offline(self, user_id: str) -> List[str]:
+        """Return and clear the stored payloads of a user"""
+
+    @abstractmethod
+    async def offline_count(self, user_id: str) -> int:
+        """Number of stored payloads for a user"""
+
+
+class InMemoryBus:
+    """Shared state of in-memory backends living in one process"""
+
+    def __init__(self):
+        self.handlers: Dict[str, MessageHandler] = {}
+        self.presence: Dict[str, Dict[str, float]] = {}
+        self.offline: Dict[str, Deque[str]] = {}
+
+
+class InMemoryDeliveryBackend(DeliveryBackend):
+    """
+    Delivery backend for single-node deployments and tests
+
+    Several backends sharing one InMemoryBus behave like nodes of a cluster.
+    """
+
+    def __init__(
+        self,
+        bus: Optional[InMemoryBus] = None,
+        heartbeat_ttl: float = 30.0,
+        offline_queue_size: int = 50,
+    ):
+        super().__init__(heartbeat_ttl, offline_queue_size)
+        self.bus = bus or InMemoryBus()
+
+    async def start(self, node_id: str, handler: MessageHandler):
+        self.node_id = node_id
+        self.bus.handlers[node_id] = handler
+
+    async def stop(self):
+        self.bus.handlers.pop(self.node_id, None)
+        for nodes in self.bus.presence.values():
+            nodes.pop(self.node_id, None)
+
+    async def register_connection(self, user_id: str):
+        self.bus.presence.setdefault(user_id, {})[self.node_id] = time.time()
+
+    async def unregister_connection(self, user_id: str):
+        nodes = self.bus.presence.get(user_id)
+        if nodes is not None:
+            nodes.pop(self.node_id, None)
+            if not nodes:
+                del self.bus.presence[user_id]
+
+    async def heartbeat(self, user_ids: Iterable[str]):
+        now = time.time()
+        for user_id in user_ids:
+            self.bus.presence.setdefault(user_id, {})[self.node_id] = now
+
+    async def get_user_nodes(self, user_id: str) -> Set[str]:
+        cutoff = time.time() - self.heartbeat_ttl
+        return {
+            node_id
+            for node_id, seen_at in self.bus.presence.get(user_id, {}).items()
+            if seen_at >= cutoff and node_id in self.bus.handlers
+        }
+
+    async def publish(self, user_id: str, payload: str) -> int:
+        nodes = await self.get_user_nodes(user_id)
+        nodes.discard(self.node_id)
+        for node_id in nodes:
+            self.bus.handlers[node_id](user_id, payload)
+        return len(nodes)
+
+    async def broadcast(self, payload: str) -> int:
+        handlers = [
+            handler
+            for node_id, handler in list(self.bus.handlers.items())
+            if node_id != self.node_id
+        ]
+        for handler in handlers:
+            handler(None, payload)
+        return len(handlers)
+
+    async def enqueue_offline(self, user_id: str, payload: str):
+        queue = self.bus.offline.get(user_id)
+        if queue is None:
+            queue = self.bus.offline[user_id] = deque(maxlen=self.offline_queue_size)
+        queue.append(payload)
+
+    async def replay_offline(self, user_id: str) -> List[str]:
+        return list(self.bus.offline.pop(user_id, ()))
+
+    async def offline_count(self, user_id: str) -> int:
+        return len(self.bus.offline.get(user_id, ()))
+
+
+class RedisDeliveryBackend(DeliveryBackend):
+    """
+    Redis delivery backend
+
+    - Registry: sorted set per user (member = node, score = last heartbeat)
+    - Routing: pub/sub channel per node plus one broadcast channel
+    - Offline queues: capped stream per user with a retention TTL
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        key_prefix: str = "ws",
+        heartbeat_ttl: float = 30.0,
+        offline_queue_size: int = 50,
+        offline_ttl_seconds: int = 24 * 3600,
+        client=None,
+    ):
+        super().__init__(heartbeat_ttl, offline_queue_size)
+        if client is None and not REDIS_AVAILABLE:
+            raise RuntimeError("redis package is required for RedisDeliveryBackend")
+
+        self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379")
+        self.key_prefix = key_prefix
+        self.offline_ttl_seconds = offline_ttl_seconds
+        self.client = client or redis.from_url(
+            self.redis_url, encoding="utf-8", decode_responses=True
+        )
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._handler: Optional[MessageHandler] = None
+
+    def _presence_key(self, user_id: str) -> str:
+        return f"{self.key_prefix}:presence:{user_id}"
+
+    def _offline_key(self, user_id: str) -> str:
+        return f"{self.key_prefix}:offline:{user_id}"
+
+    def _node_channel(self, node_id: str) -> str:
+        return f"{self.key_prefix}:node:{node_id}"
+
+    @property
+    def _broadcast_channel(self) -> str:
+        return f"{self.key_prefix}:broadcast"
+
+    async def start(self, node_id: str, handler: MessageHandler):
+        self.node_id = node_id
+        self._handler = handler
+        self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(
+            self._node_channel(node_id), self._broadcast_channel
+        )
+        self._listener = asyncio.ensure_future(self._listen())
+        logger.info(f"Redis WebSocket delivery started for node {node_id}")
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub:
+            await self._pubsub.unsubscribe()
+            await self._pubsub.close()
+            self._pubsub = None
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Redis WebSocket delivery listener error: {e}")
+                await asyncio.sleep(1.0)
+                continue
+
+            if not message or message.get("type") != "message":
+                continue
+
+            origin, target, payload = message["data"].split(_ENVELOPE_SEPARATOR, 2)
+            if origin == self.node_id:
+                continue
+            try:
+                self._handler(target or None, payload)
+            except Exception as e:
+                logger.error(f"WebSocket delivery handler failed: {e}")
+
+    async def register_connection(self, user_id: str):
+        key = self._presence_key(user_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.zadd(key, {self.node_id: time.time()})
+            pipe.expire(key, int(self.heartbeat_ttl * 2))
+            await pipe.execute()
+
+    async def unregister_connection(self, user_id: str):
+        await self.client.zrem(self._presence_key(user_id), self.node_id)
+
+    async def heartbeat(self, user_ids: Iterable[str]):
+        now = time.time()
+        async with self.client.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                key = self._presence_key(user_id)
+                pipe.zadd(key, {self.node_id: now})
+                pipe.expire(key, int(self.heartbeat_ttl * 2))
+            await pipe.execute()
+
+    async def get_user_nodes(self, user_id: str) -> Set[str]:
+        cutoff = time.time() - self.heartbeat_ttl
+        nodes = await self.client.zrangebyscore(
+            self._presence_key(user_id), cutoff, "+inf"
+        )
+        return set(nodes)
+
+    def _envelope(self, user_id: str, payload: str) -> str:
+        return _ENVELOPE_SEPARATOR.join((self.node_id, user_id, payload))
+
+    async def publish(self, user_id: str, payload: str) -> int:
+        nodes = await self.get_user_nodes(user_id)
+        nodes.discard(self.node_id)
+        if not nodes:
+            return 0
+
+        envelope = self._envelope(user_id, payload)
+        async with self.client.pipeline(transaction=False) as pipe:
+            for node_id in nodes:
+                pipe.publish(self._node_channel(node_id), envelope)
+            await pipe.execute()
+        return len(nodes)
+
+    async def broadcast(self, payload: str) -> int:
+        receivers = await self.client.publish(
+            self._broadcast_channel, self._envelope("", payload)
+        )
+        # The publishing node is subscribed to the broadcast channel as well
+        return max(receivers - 1, 0)
+
+    async def enqueue_offline(self, user_id: str, payload: str):
+        key = self._offline_key(user_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.xadd(
+                key,
+                {"payload": payload},
+                maxlen=self.offline_queue_size,
+                approximate=False,
+            )
+            pipe.expire(key, self.offline_ttl_seconds)
+            await pipe.execute()
+
+    async def replay_offline(self, user_id: str) -> List[str]:
+        key = self._offline_key(user_id)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.xrange(key)
+            pipe.delete(key)
+            entries, _ = await pipe.execute()
+        return [fields["payload"] for _, fields in entries]
+
+    async def offline_count(self, user_id: str) -> int:
+        return await self.client.xlen(self._offline_key(user_id))
+
+
+def create_delivery_backend(
+    redis_url: Optional[str] = None,
+) -> Optional[DeliveryBackend]:
+    """
+    Delivery backend configured by WEBSOCKET_DELIVERY
+
+    "redis" enables cross-worker delivery; anything else keeps the manager
+    single-process (None).
+    """
+    mode = os.getenv("WEBSOCKET_DELIVERY", "local").lower()
+    if mode != "redis":
+        return None
+    if not REDIS_AVAILABLE:
+        logger.warning("WEBSOCKET_DELIVERY=redis but redis package is not installed")
+        return None
+    return RedisDeliveryBackend(redis_url or os.getenv("REDIS_URL"))
@@ -8,20 +8,27 @@ Features:
 - Connection management and cleanup
 - Message queuing for offline users
 - Performance monitoring integration
+- Concurrent fan-out with per-connection bounded outbound queues
+- Multi-worker delivery through a pluggable DeliveryBackend (Redis pub/sub)
 """
 
 import asyncio
 import json
 import logging
+import os
+import socket
 import time
 import uuid
+from collections import deque
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Deque, Dict, List, Optional, Set, Union
 
 import websockets
 from fastapi import WebSocket, WebSocketDisconnect
 
+from .websocket_delivery import DeliveryBackend, create_delivery_backend
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,26 +45,108 @@ class NotificationType(Enum):
     PERFORMANCE_ALERT = "performance_alert"
 
 
+# Close code sent to clients that cannot keep up with their outbound queue
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class ConnectionChannel:
+    """
+    Outbound channel of a single WebSocket connection
+
+    Messages are enqueued as pre-serialized payloads and written by a
+    dedicated task, so a slow client only delays its own queue.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        manager: "WebSocketManager",
+        max_queue_size: int,
+        send_timeout: float,
+    ):
+        self.websocket = websocket
+        self.manager = manager
+        self.send_timeout = send_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.writer_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.writer_task = asyncio.ensure_future(self._writer())
+
+    def offer(self, payload: str) -> bool:
+        """Enqueue a payload without waiting; False if the queue is full"""
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def close(self):
+        if self.writer_task and self.writer_task is not asyncio.current_task():
+            self.writer_task.cancel()
+        self._drain()
+
+    async def _writer(self):
+        while True:
+            payload = await self.queue.get()
+            try:
+                async with asyncio.timeout(self.send_timeout):
+                    await self.manager._send_payload(self.websocket, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to send message to WebSocket: {e}")
+                await self.manager.disconnect(self.websocket)
+                return
+            finally:
+                self.queue.task_done()
+
+    def _drain(self):
+        """Drop queued payloads of a dead connection"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.manager.connection_stats["messages_dropped"] += 1
+
+
 class WebSocketManager:
     """
     WebSocket connection manager for real-time notifications
 
     Features:
     - User-specific connection tracking
-    - Message broadcasting
+    - Message broadcasting (serialized once, delivered concurrently)
     - Connection health monitoring
     - Offline message queuing
+    - Slow-consumer eviction
+    - Cross-node routing and durable offline queues when a delivery
+      backend is attached (otherwise everything stays in-process)
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        outbound_queue_size: int = 100,
+        send_timeout: float = 5.0,
+        history_size: int = 100,
+        offline_queue_size: int = 50,
+        delivery_backend: Optional[DeliveryBackend] = None,
+        node_id: Optional[str] = None,
+        heartbeat_interval: float = 10.0,
+    ):
         # Active connections by user_id
         self.active_connections: Dict[str, Set[WebSocket]] = {}
 
         # Connection metadata
         self.connection_metadata: Dict[WebSocket, Dict[str, Any]] = {}
 
+        # Outbound channel per connection
+        self.channels: Dict[WebSocket, ConnectionChannel] = {}
+        self.outbound_queue_size = outbound_queue_size
+        self.send_timeout = send_timeout
+
         # Offline message queue (user_id -> messages)
-        self.offline_messages: Dict[str, List[Dict[str, Any]]] = {}
+        self.offline_queue_size = offline_queue_size
+        self.offline_messages: Dict[str, Deque[Dict[str, Any]]] = {}
 
         # Connection statistics
         self.connection_stats = {
@@ -65,11 +154,59 @@ class WebSocketManager:
             "current_connections": 0,
             "messages_sent": 0,
             "messages_failed": 0,
+            "messages_dropped": 0,
+            "slow_consumers_evicted": 0,
             "connection_errors": 0,
+            "messages_routed": 0,
+            "messages_received_remote": 0,
         }
 
-        # Message history for debugging (limited to last 100 messages)
-        self.message_history: List[Dict[str, Any]] = []
+        # Cross-node delivery
+        self.delivery_backend = delivery_backend
+        self.node_id = (
+            node_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        )
+        self.heartbeat_interval = heartbeat_interval
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # Serializes start/stop: start() runs on every new connection
+        self._lifecycle_lock = asyncio.Lock()
+
+        # Recent send latencies in seconds
+        self.send_latencies: Deque[float] = deque(maxlen=1000)
+
+        # Message history for debugging (limited to last history_size messages)
+        self.message_history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+
+    async def start(self):
+        """Join the delivery cluster and start registry heartbeats"""
+        if self.delivery_backend is None or self._heartbeat_task is not None:
+            return
+
+        async with self._lifecycle_lock:
+            # Another connection may have joined while we waited for the lock
+            if self._heartbeat_task is not None:
+                return
+
+            await self.delivery_backend.start(self.node_id, self._on_routed_message)
+            self._heartbeat_task = asyncio.ensure_future(self._heartbeat_loop())
+            logger.info(f"WebSocket manager {self.node_id} joined delivery cluster")
+
+    async def stop(self):
+        """Leave the delivery cluster"""
+        async with self._lifecycle_lock:
+            if self._heartbeat_task is None:
+                return
+
+            self._heartbeat_task.cancel()
+            try:
+                await self._heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat_task = None
+
+            for user_id in list(self.active_connections):
+                await self.delivery_backend.unregister_connection(user_id)
+            await self.delivery_backend.stop()
 
     async def connect(
         self, websocket: WebSocket, user_id: str, connection_info: Dict[str, Any] = None
@@ -81,9 +218,18 @@ class WebSocketManager:
             # Add to active connections
             if user_id not in self.active_connections:
                 self.active_connections[user_id] = set()
+                if self.delivery_backend is not None:
+                    await self.delivery_backend.register_connection(user_id)
 
             self.active_connections[user_id].add(websocket)
 
+            # Start outbound channel
+            channel = ConnectionChannel(
+                websocket, self, self.outbound_queue_size, self.send_timeout
+            )
+            self.channels[websocket] = channel
+            channel.start()
+
             # Store connection metadata
             self.connection_metadata[websocket] = {
                 "user_id": user_id,
@@ -103,14 +249,16 @@ class WebSocketManager:
             await self._send_offline_messages(user_id, websocket)
 
             # Send connection confirmation
-            await self._send_to_websocket(
+            self._enqueue(
                 websocket,
-                {
-                    "type": "connection_established",
-                    "user_id": user_id,
-                    "timestamp": datetime.now().isoformat(),
-                    "queued_messages": len(self.offline_messages.get(user_id, [])),
-                },
+                self._serialize(
+                    {
+                        "type": "connection_established",
+                        "user_id": user_id,
+                        "timestamp": datetime.now().isoformat(),
+                        "queued_messages": len(self.offline_messages.get(user_id, [])),
+                    }
+                ),
             )
 
         except Exception as e:
@@ -121,15 +269,24 @@ class WebSocketManager:
     async def disconnect(self, websocket: WebSocket):
         """Disconnect a WebSocket"""
         try:
+            if websocket not in self.connection_metadata:
+                return
+
             metadata = self.connection_metadata.get(websocket, {})
             user_id = metadata.get("user_id")
 
+            channel = self.channels.pop(websocket, None)
+            if channel:
+                await channel.close()
+
             if user_id and user_id in self.active_connections:
                 self.active_connections[user_id].discard(websocket)
 
                 # Remove user entry if no more connections
                 if not self.active_connections[user_id]:
                     del self.active_connections[user_id]
+                    if self.delivery_backend is not None:
+                        await self.delivery_backend.unregister_connection(user_id)
 
             # Remove metadata
             if websocket in self.connection_metadata:
@@ -170,30 +327,18 @@ class WebSocketManager:
         # Add to message history
         self._add_to_history(user_id, message)
 
-        # Try to send to active connections
-        if user_id in self.active_connections:
-            active_connections = list(self.active_connections[user_id])
-            sent_count = 0
-
-            for websocket in active_connections:
-                try:
-                    await self._send_to_websocket(websocket, message)
-                    sent_count += 1
-                except Exception as e:
-                    logger.warning(
-                        f"Failed to send message to WebSocket for user {user_id}: {e}"
-                    )
-                    # Remove failed connection
-                    await self.disconnect(websocket)
-
-            if sent_count > 0:
-                logger.debug(
-                    f"Notification sent to {sent_count} connections for user {user_id}"
-                )
-                return True
+        # Serialize once and fan out to active connections
+        payload = self._serialize(message)
+        sent_count = self._deliver(user_id, payload)
+        sent_count += await self._route(user_id, payload)
+        if sent_count > 0:
+            logger.debug(
+                f"Notification sent to {sent_count} connections/nodes for user {user_id}"
+            )
+            return True
 
         # Queue message if user is offline
-        await self._queue_offline_message(user_id, message)
+        await self._queue_offline_message(user_id, message, payload)
         logger.debug(f"Notification queued for offline user {user_id}")
         return False
 
@@ -214,10 +359,12 @@ class WebSocketManager:
         message = {
             "type": notification_type.value,
             "data": data,
+            "priority": "high",
             "timestamp": datetime.now().isoformat(),
             "message_id": str(uuid.uuid4()),
             "broadcast": True,
         }
+        self._add_to_history("*", message)
 
         # Determine target users
         if target_users:
@@ -225,26 +372,32 @@ class WebSocketManager:
         else:
             users_to_notify = list(self.active_connections.keys())
 
+        # Serialization happens once for all recipients; enqueueing never blocks
+        payload = self._serialize(message)
         sent_count = 0
         failed_count = 0
 
         for user_id in users_to_notify:
-            try:
-                success = await self.send_notification(
-                    user_id, notification_type, data, priority="high"
-                )
-                if success:
-                    sent_count += 1
-                else:
-                    failed_count += 1
-            except Exception as e:
-                logger.error(f"Failed to send broadcast to user {user_id}: {e}")
+            if self._deliver(user_id, payload) > 0:
+                sent_count += 1
+            elif target_users and await self._route(user_id, payload) > 0:
+                sent_count += 1
+            else:
+                await self._queue_offline_message(user_id, message, payload)
                 failed_count += 1
 
+        result = {"sent": sent_count, "failed": failed_count}
+
+        # Untargeted broadcasts reach the users of the other nodes as well
+        if not target_users and self.delivery_backend is not None:
+            remote_nodes = await self.delivery_backend.broadcast(payload)
+            self.connection_stats["messages_routed"] += remote_nodes
+            result["remote_nodes"] = remote_nodes
+
         logger.info(
             f"Broadcast sent: {sent_count} successful, {failed_count} failed/queued"
         )
-        return {"sent": sent_count, "failed": failed_count}
+        return result
 
     async def send_task_notification(
         self,
@@ -345,6 +498,10 @@ class WebSocketManager:
                 for user_id, messages in self.offline_messages.items()
             },
             "connection_details": connection_details,
+            "pending_outbound": sum(
+                channel.queue.qsize() for channel in self.channels.values()
+            ),
+            "send_latency_ms": self._latency_summary(),
             "recent_messages": len(self.message_history),
             "timestamp": datetime.now().isoformat(),
         }
@@ -372,7 +529,9 @@ class WebSocketManager:
                     cleaned_count += 1  # Remove malformed messages
 
             if fresh_messages:
-                self.offline_messages[user_id] = fresh_messages
+                self.offline_messages[user_id] = deque(
+                    fresh_messages, maxlen=self.offline_queue_size
+                )
             else:
                 del self.offline_messages[user_id]
 
@@ -381,10 +540,95 @@ class WebSocketManager:
         )
         return cleaned_count
 
-    async def _send_to_websocket(self, websocket: WebSocket, message: Dict[str, Any]):
+    async def flush(self, timeout: Optional[float] = None):
+        """Wait until every outbound queue has been written"""
+        waiters = [channel.queue.join() for channel in list(self.channels.values())]
+        if waiters:
+            await asyncio.wait_for(asyncio.gather(*waiters), timeout=timeout)
+
+    async def _route(self, user_id: str, payload: str) -> int:
+        """Forward a payload to the other nodes holding the user's connections"""
+        if self.delivery_backend is None:
+            return 0
+        try:
+            routed = await self.delivery_backend.publish(user_id, payload)
+        except Exception as e:
+            logger.error(f"Failed to route WebSocket message for user {user_id}: {e}")
+            return 0
+        self.connection_stats["messages_routed"] += routed
+        return routed
+
+    def _on_routed_message(self, user_id: Optional[str], payload: str):
+        """Deliver a message routed here by another node"""
+        self.connection_stats["messages_received_remote"] += 1
+        if user_id is None:
+            for local_user in list(self.active_connections):
+                self._deliver(local_user, payload)
+        else:
+            self._deliver(user_id, payload)
+
+    async def _heartbeat_loop(self):
+        """Keep this node's registry entries alive"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.delivery_backend.heartbeat(list(self.active_connections))
+            except Exception as e:
+                logger.warning(f"WebSocket registry heartbeat failed: {e}")
+
+    def _serialize(self, message: Dict[str, Any]) -> str:
+        return json.dumps(message, default=str)
+
+    def _deliver(self, user_id: str, payload: str) -> int:
+        """Enqueue a payload to every connection of a user"""
+        delivered = 0
+        for websocket in list(self.active_connections.get(user_id, ())):
+            if self._enqueue(websocket, payload):
+                delivered += 1
+        return delivered
+
+    def _enqueue(self, websocket: WebSocket, payload: str) -> bool:
+        """Enqueue to one connection, evicting it if its queue is full"""
+        channel = self.channels.get(websocket)
+        if channel is None:
+            return False
+        if channel.offer(payload):
+            return True
+
+        self.connection_stats["messages_dropped"] += 1
+        metadata = self.connection_metadata.get(websocket, {})
+        if not metadata.get("evicting"):
+            metadata["evicting"] = True
+            self.connection_stats["slow_consumers_evicted"] += 1
+            logger.warning(
+                f"Evicting slow WebSocket consumer for user {metadata.get('user_id')}"
+            )
+            asyncio.ensure_future(self._evict(websocket))
+        return False
+
+    async def _evict(self, websocket: WebSocket):
+        """Close and forget a connection that cannot keep up"""
+        await self.disconnect(websocket)
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=SLOW_CONSUMER_CLOSE_CODE),
+                timeout=self.send_timeout,
+            )
+        except Exception as e:
+            logger.debug(f"Error closing evicted WebSocket: {e}")
+
+    async def _send_to_websocket(
+        self, websocket: WebSocket, message: Union[Dict[str, Any], str]
+    ):
         """Send message to a specific WebSocket connection"""
+        payload = message if isinstance(message, str) else self._serialize(message)
+        await self._send_payload(websocket, payload)
+
+    async def _send_payload(self, websocket: WebSocket, payload: str):
+        """Write a pre-serialized payload and record latency"""
+        start = time.perf_counter()
         try:
-            await websocket.send_text(json.dumps(message, default=str))
+            await websocket.send_text(payload)
 
             # Update metadata
             if websocket in self.connection_metadata:
@@ -393,54 +637,75 @@ class WebSocketManager:
 
             # Update stats
             self.connection_stats["messages_sent"] += 1
+            self.send_latencies.append(time.perf_counter() - start)
 
         except Exception as e:
             self.connection_stats["messages_failed"] += 1
             raise
 
+    def _latency_summary(self) -> Dict[str, float]:
+        """Send latency percentiles in milliseconds"""
+        if not self.send_latencies:
+            return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+
+        ordered = sorted(self.send_latencies)
+        n = len(ordered)
+        return {
+            "p50": round(ordered[int(n * 0.5)] * 1000, 3),
+            "p95": round(ordered[min(n - 1, int(n * 0.95))] * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3),
+        }
+
     async def _send_offline_messages(self, user_id: str, websocket: WebSocket):
         """Send queued offline messages to newly connected user"""
+        if self.delivery_backend is not None:
+            payloads = await self.delivery_backend.replay_offline(user_id)
+            for payload in payloads:
+                self._enqueue(websocket, payload)
+            if payloads:
+                logger.info(
+                    f"Replayed {len(payloads)} offline messages to user {user_id}"
+                )
+
         if user_id in self.offline_messages:
-            messages = self.offline_messages[user_id]
+            messages = self.offline_messages.pop(user_id)
 
             for message in messages:
-                try:
-                    await self._send_to_websocket(websocket, message)
-                except Exception as e:
-                    logger.warning(f"Failed to send offline message to {user_id}: {e}")
+                self._enqueue(websocket, self._serialize(message))
 
-            # Clear offline messages after sending
-            del self.offline_messages[user_id]
             logger.info(f"Sent {len(messages)} offline messages to user {user_id}")
 
-    async def _queue_offline_message(self, user_id: str, message: Dict[str, Any]):
-        """Queue message for offline user"""
+    async def _queue_offline_message(
+        self, user_id: str, message: Dict[str, Any], payload: Optional[str] = None
+    ):
+        """Queue message for offline user (keeps only the last messages)"""
+        if self.delivery_backend is not None:
+            try:
+                await self.delivery_backend.enqueue_offline(
+                    user_id, payload or self._serialize(message)
+                )
+                return
+            except Exception as e:
+                logger.error(f"Failed to persist offline message for {user_id}: {e}")
+
         if user_id not in self.offline_messages:
-            self.offline_messages[user_id] = []
+            self.offline_messages[user_id] = deque(maxlen=self.offline_queue_size)
 
         self.offline_messages[user_id].append(message)
 
-        # Limit queue size per user (keep only last 50 messages)
-        if len(self.offline_messages[user_id]) > 50:
-            self.offline_messages[user_id] = self.offline_messages[user_id][-50:]
-
     def _add_to_history(self, user_id: str, message: Dict[str, Any]):
         """Add message to history for debugging"""
-        history_entry = {
-            "user_id": user_id,
-            "message": message,
-            "sent_at": datetime.now().isoformat(),
-        }
-
-        self.message_history.append(history_entry)
-
-        # Keep only last 100 messages
-        if len(self.message_history) > 100:
-            self.message_history = self.message_history[-100:]
+        self.message_history.append(
+            {
+                "user_id": user_id,
+                "message": message,
+                "sent_at": datetime.now().isoformat(),
+            }
+        )
 
 
 # Global WebSocket manager instance
-websocket_manager = WebSocketManager()
+websocket_manager = WebSocketManager(delivery_backend=create_delivery_backend())
 
 
 # WebSocket connection handler
@@ -472,7 +737,8 @@ async def handle_websocket_connection(websocket: WebSocket):
             "client_ip": websocket.client.host if websocket.client else "unknown",
         }
 
-        # Connect user
+        # Connect user (joins the delivery cluster on first use)
+        await websocket_manager.start()
         await websocket_manager.connect(websocket, user_id, connection_info)
 
         # Handle incoming messages
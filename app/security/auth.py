@@ -21,13 +21,16 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr, validator
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 # Import standardized async patterns
 from app.core.async_utils import (AsyncTimeouts, async_retry,
                                   create_background_task, safe_gather,
                                   with_timeout)
 from app.core.exceptions import AsyncRetryError, AsyncTimeoutError
+from app.core.request_context import (encode_headers, get_request_context,
+                                      merge_response_headers,
+                                      on_response_start)
 
 logger = logging.getLogger(__name__)
 
@@ -469,51 +472,60 @@ async def _check_admin_privileges(user: User) -> bool:
     return "admin" in user.scopes if hasattr(user, "scopes") else False
 
 
-class AuthMiddleware(BaseHTTPMiddleware):
+class AuthMiddleware:
     """
     Enhanced authentication middleware with async patterns
     Provides timeout protection and concurrent validation
     """
 
-    async def dispatch(self, request: Request, call_next):
+    EXCLUDED_PATHS = frozenset(["/health_smoke", "/docs", "/redoc", "/openapi.json"])
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Authentication middleware to protect all API endpoints
         Enhanced with standardized async patterns
         """
-        EXCLUDED_PATHS = ["/health_smoke", "/docs", "/redoc", "/openapi.json"]
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
         # Skip authentication for excluded paths
-        if request.url.path in EXCLUDED_PATHS or request.url.path.startswith(
-            "/api/v1/auth/token"
-        ):
-            return await call_next(request)
+        path = scope["path"]
+        if path in self.EXCLUDED_PATHS or path.startswith("/api/v1/auth/token"):
+            await self.app(scope, receive, send)
+            return
 
+        context = get_request_context(scope)
         try:
             # Authenticate user with timeout protection
             auth_result = await with_timeout(
-                self._authenticate_request(request),
+                self._authenticate_request(context.request),
                 AsyncTimeouts.HTTP_REQUEST,  # 30 seconds for auth
                 "Request authentication timed out",
-                {"path": request.url.path, "method": request.method},
+                {"path": path, "method": context.method},
             )
-
-            if auth_result:
-                request.state.user = auth_result
-            else:
-                return self._create_auth_error_response("Authentication failed")
-
-            return await call_next(request)
-
         except AsyncTimeoutError as e:
             auth_stats["timeout_errors"] += 1
             logger.error(f"❌ Auth middleware timeout: {e}")
-            return self._create_auth_error_response("Authentication timed out", 408)
+            response = self._create_auth_error_response("Authentication timed out", 408)
         except HTTPException as e:
             logger.warning(f"⚠️ Auth middleware HTTP error: {e.detail}")
-            return self._create_auth_error_response(e.detail, e.status_code)
+            response = self._create_auth_error_response(e.detail, e.status_code)
         except Exception as e:
             logger.error(f"❌ Auth middleware error: {e}")
-            return self._create_auth_error_response("Authentication system error")
+            response = self._create_auth_error_response("Authentication system error")
+        else:
+            if auth_result:
+                # Principal is shared with later layers and request.state.user
+                context.set_principal(auth_result)
+                await self.app(scope, receive, send)
+                return
+            response = self._create_auth_error_response("Authentication failed")
+
+        await response(scope, receive, send)
 
     async def _authenticate_request(self, request: Request) -> Optional[User]:
         """Internal request authentication"""
@@ -902,11 +914,14 @@ def require_scope(required_scope: str):
     return decorator
 
 
-class SimpleAuthMiddleware(BaseHTTPMiddleware):
+class SimpleAuthMiddleware:
     """Simple auth middleware for compatibility"""
 
-    async def dispatch(self, request: Request, call_next):
-        return await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(scope, receive, send)
 
 
 # Alias for compatibility
@@ -1007,21 +1022,32 @@ async def create_user_in_db(user_data: dict) -> dict:
         logger.error(f"❌ Error creating user in db: {e}")
         return {}
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """Security headers middleware for test compatibility"""
-    
-    async def dispatch(self, request: Request, call_next):
+
+    HEADERS = encode_headers(
+        [
+            ("X-Content-Type-Options", "nosniff"),
+            ("X-Frame-Options", "DENY"),
+            ("X-XSS-Protection", "1; mode=block"),
+            ("Content-Security-Policy", "default-src 'self'"),
+            ("Referrer-Policy", "strict-origin-when-cross-origin"),
+        ]
+    )
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Add security headers to all responses"""
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        return response
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        def add_headers(message: Message) -> None:
+            merge_response_headers(message, self.HEADERS)
+
+        await self.app(scope, receive, on_response_start(send, add_headers))
 
 # Test compatibility classes
 class AuthService:
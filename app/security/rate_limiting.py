@@ -9,9 +9,12 @@ from typing import Dict, Optional, Tuple, Callable, Any
 from collections import defaultdict, deque
 from fastapi import Request, Response, HTTPException, status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 import hashlib
 
+from app.core.request_context import (encode_headers, get_request_context,
+                                      merge_response_headers, on_response_start)
+
 logger = logging.getLogger(__name__)
 
 # In-memory store для rate limiting (production должен использовать Redis)
@@ -205,24 +208,31 @@ def get_rate_limit_for_request(request: Request) -> Tuple[int, int]:
     
     return final_limit, window
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """Advanced rate limiting middleware with comprehensive protection"""
     
-    def __init__(self, app, enabled: bool = True):
-        super().__init__(app)
+    # Paths that are never rate limited
+    SKIP_PATHS = ("/docs", "/redoc", "/openapi.json", "/favicon.ico")
+    
+    def __init__(self, app: ASGIApp, enabled: bool = True):
+        self.app = app
         self.enabled = enabled
         
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request with rate limiting"""
-        if not self.enabled:
-            return await call_next(request)
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
         
         # Skip rate limiting for certain paths
-        skip_paths = ["/docs", "/redoc", "/openapi.json", "/favicon.ico"]
-        if any(request.url.path.startswith(path) for path in skip_paths):
-            return await call_next(request)
+        if scope["path"].startswith(self.SKIP_PATHS):
+            await self.app(scope, receive, send)
+            return
         
+        context = get_request_context(scope)
         try:
+            request = context.request
+            
             # Get client identifier
             client_id = get_client_identifier(request)
             
@@ -230,49 +240,54 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             limit, window = get_rate_limit_for_request(request)
             
             # Create rate limit key
-            rate_key = f"rate_limit:{client_id}:{request.url.path}:{request.method}"
+            rate_key = f"rate_limit:{client_id}:{context.path}:{context.method}"
             
             # Check rate limit
             is_allowed, limit_info = check_rate_limit_memory(rate_key, limit, window)
             
-            if not is_allowed:
-                # Rate limit exceeded
-                logger.warning(
-                    f"⚠️ Rate limit exceeded: {client_id} for {request.method} {request.url.path}"
-                )
-                
-                # Create rate limit response
-                response = JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={
-                        "error": "Rate limit exceeded",
-                        "message": f"Too many requests. Limit: {limit_info['limit']} per {window} seconds",
-                        "retry_after": limit_info['retry_after']
-                    }
-                )
-                
-                # Add rate limit headers
-                response.headers["X-RateLimit-Limit"] = str(limit_info['limit'])
-                response.headers["X-RateLimit-Remaining"] = str(limit_info['remaining'])
-                response.headers["X-RateLimit-Reset"] = str(limit_info['reset'])
-                response.headers["Retry-After"] = str(limit_info['retry_after'])
-                
-                return response
-            
-            # Process request
-            response = await call_next(request)
-            
-            # Add rate limit headers to successful responses
-            response.headers["X-RateLimit-Limit"] = str(limit_info['limit'])
-            response.headers["X-RateLimit-Remaining"] = str(limit_info['remaining'])
-            response.headers["X-RateLimit-Reset"] = str(limit_info['reset'])
-            
-            return response
-            
         except Exception as e:
             logger.error(f"❌ Rate limiting error: {e}")
             # Continue with request if rate limiting fails
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
+        
+        if not is_allowed:
+            # Rate limit exceeded
+            logger.warning(
+                f"⚠️ Rate limit exceeded: {client_id} for {context.method} {context.path}"
+            )
+            
+            # Create rate limit response
+            response = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={
+                    "error": "Rate limit exceeded",
+                    "message": f"Too many requests. Limit: {limit_info['limit']} per {window} seconds",
+                    "retry_after": limit_info['retry_after']
+                },
+                headers={
+                    **self._limit_headers(limit_info),
+                    "Retry-After": str(limit_info['retry_after']),
+                },
+            )
+            await response(scope, receive, send)
+            return
+        
+        # Add rate limit headers to successful responses
+        raw_headers = encode_headers(self._limit_headers(limit_info).items())
+        await self.app(
+            scope,
+            receive,
+            on_response_start(send, lambda message: merge_response_headers(message, raw_headers)),
+        )
+    
+    @staticmethod
+    def _limit_headers(limit_info: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(limit_info['limit']),
+            "X-RateLimit-Remaining": str(limit_info['remaining']),
+            "X-RateLimit-Reset": str(limit_info['reset']),
+        }
 
 # Rate limiting utilities
 
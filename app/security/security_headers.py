@@ -13,27 +13,58 @@ Provides:
 """
 
 import logging
+from typing import Dict
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import request_context
 
 logger = logging.getLogger(__name__)
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """Middleware to add security headers to all responses."""
 
-    def __init__(self, app, environment: str = "production"):
-        super().__init__(app)
+    # Paths whose responses must never be cached
+    NO_STORE_PREFIXES = ("/api/v1/auth", "/api/v1/budget")
+
+    def __init__(self, app: ASGIApp, environment: str = "production"):
+        self.app = app
         self.environment = environment
 
-    async def dispatch(self, request: Request, call_next) -> Response:
+        # Header values only depend on the environment, so encode them once
+        self.headers = request_context.encode_headers(
+            self._build_headers(environment).items()
+        )
+        self.no_store_headers = self.headers + request_context.encode_headers(
+            [("Cache-Control", "no-store, no-cache, must-revalidate, private")]
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Add security headers to response."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Cache control for sensitive endpoints
+        if scope["path"].startswith(self.NO_STORE_PREFIXES):
+            headers = self.no_store_headers
+        else:
+            headers = self.headers
+
+        def add_headers(message: Message) -> None:
+            # Hide server information
+            request_context.merge_response_headers(message, headers, drop=(b"server",))
 
-        response = await call_next(request)
+        await self.app(
+            scope, receive, request_context.on_response_start(send, add_headers)
+        )
 
+    @staticmethod
+    def _build_headers(environment: str) -> Dict[str, str]:
         # Content Security Policy
-        if self.environment == "development":
+        if environment == "development":
             csp_policy = (
                 "default-src 'self' 'unsafe-inline' 'unsafe-eval'; "
                 "connect-src 'self' http: https: ws: wss:; "
@@ -52,31 +83,19 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
                 "base-uri 'self'"
             )
 
-        response.headers["Content-Security-Policy"] = csp_policy
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        headers = {
+            "Content-Security-Policy": csp_policy,
+            "X-XSS-Protection": "1; mode=block",
+            "X-Content-Type-Options": "nosniff",
+            "X-Frame-Options": "DENY",
+            "Referrer-Policy": "strict-origin-when-cross-origin",
+        }
 
         # HSTS only in production
-        if self.environment == "production":
-            response.headers["Strict-Transport-Security"] = (
-                "max-age=31536000; includeSubDomains"
-            )
-
-        # Cache control for sensitive endpoints
-        if request.url.path.startswith("/api/v1/auth") or request.url.path.startswith(
-            "/api/v1/budget"
-        ):
-            response.headers["Cache-Control"] = (
-                "no-store, no-cache, must-revalidate, private"
-            )
-
-        # Hide server information
-        if "server" in response.headers:
-            del response.headers["server"]
+        if environment == "production":
+            headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
 
-        return response
+        return headers
 
 
 def get_client_ip(request: Request) -> str:
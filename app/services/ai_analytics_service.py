@@ -4,9 +4,9 @@ Advanced analytics, predictive modeling, and performance insights
 """
 
 import asyncio
+import calendar
 import json
 import logging
-import statistics
 import time
 import uuid
 from collections import defaultdict, deque
@@ -18,6 +18,7 @@ from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
 
 from app.config import settings
+from app.performance import columnar_store
 
 logger = logging.getLogger(__name__)
 
@@ -110,11 +111,60 @@ class PredictiveModel:
     model_insights: List[str]
 
 
+class AnalyticsDataPointsView:
+    """
+    Read-only sequence view of the columnar store
+
+    AnalyticsDataPoint objects are only materialized for the slice that is
+    actually read (e.g. data_points[-100:] for the real-time endpoint).
+    """
+
+    def __init__(self, store: columnar_store.ColumnarMetricStore):
+        self._store = store
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        size = len(self._store)
+        if isinstance(index, slice):
+            start, stop, step = index.indices(size)
+            if step != 1 or start >= stop:
+                return [self[i] for i in range(start, stop, step)]
+            return self._materialize(start, stop)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("data point index out of range")
+        return self._materialize(index, index + 1)[0]
+
+    def _materialize(self, start: int, stop: int) -> List[AnalyticsDataPoint]:
+        size = len(self._store)
+        selection = self._store.tail(size - start)
+        contexts = self._store.contexts_for_tail(size - start)
+        store = self._store
+        return [
+            AnalyticsDataPoint(
+                timestamp=datetime.fromtimestamp(selection.timestamps[i], timezone.utc),
+                metric_type=store.metric_codes.decode(selection.metrics[i]),
+                value=float(selection.values[i]),
+                model_type=store.model_codes.decode(selection.models[i]),
+                user_id=store.user_codes.decode(selection.users[i]),
+                context=contexts[i],
+            )
+            for i in range(stop - start)
+        ]
+
+
 class AIAnalyticsService:
     """Service for AI analytics and insights"""
 
-    def __init__(self):
-        self.data_points: List[AnalyticsDataPoint] = []
+    def __init__(self, retention_points: int = 1_000_000):
+        # Ring-buffered columnar store: ~26 bytes per retained point
+        self.store = columnar_store.ColumnarMetricStore(capacity=retention_points)
         self.usage_patterns: List[UsagePattern] = []
         self.cost_insights: List[CostInsight] = []
         self.predictive_models: Dict[str, PredictiveModel] = {}
@@ -122,9 +172,36 @@ class AIAnalyticsService:
         # Initialize with sample data
         self._initialize_sample_data()
 
+    @property
+    def data_points(self) -> AnalyticsDataPointsView:
+        """Retained data points, oldest first"""
+        return AnalyticsDataPointsView(self.store)
+
+    def _add_data_point(self, data_point: AnalyticsDataPoint):
+        self.store.append(
+            data_point.timestamp.timestamp(),
+            data_point.metric_type,
+            data_point.value,
+            data_point.model_type,
+            data_point.user_id,
+            data_point.context,
+        )
+
+    def _selection(
+        self,
+        days: Optional[int] = None,
+        metric_type: Optional[MetricType] = None,
+        model_type: Optional[str] = None,
+    ) -> columnar_store.Selection:
+        since = None
+        if days is not None:
+            since = (datetime.now(timezone.utc) - timedelta(days=days)).timestamp()
+        return self.store.select(since=since, metric=metric_type, model=model_type)
+
     def _initialize_sample_data(self):
         """Initialize with sample analytics data"""
         now = datetime.now(timezone.utc)
+        sample_points: List[AnalyticsDataPoint] = []
 
         # Generate sample data points for the last 30 days
         for days_back in range(30):
@@ -132,7 +209,7 @@ class AIAnalyticsService:
                 timestamp = now - timedelta(days=days_back, hours=hour)
 
                 # Add latency data points
-                self.data_points.append(
+                sample_points.append(
                     AnalyticsDataPoint(
                         timestamp=timestamp,
                         metric_type=MetricType.LATENCY,
@@ -144,7 +221,7 @@ class AIAnalyticsService:
                 )
 
                 # Add accuracy data points
-                self.data_points.append(
+                sample_points.append(
                     AnalyticsDataPoint(
                         timestamp=timestamp,
                         metric_type=MetricType.ACCURACY,
@@ -155,7 +232,7 @@ class AIAnalyticsService:
                 )
 
                 # Add cost data points
-                self.data_points.append(
+                sample_points.append(
                     AnalyticsDataPoint(
                         timestamp=timestamp,
                         metric_type=MetricType.COST,
@@ -165,6 +242,11 @@ class AIAnalyticsService:
                     )
                 )
 
+        # Oldest first keeps the store time-ordered
+        sample_points.sort(key=lambda dp: dp.timestamp)
+        for data_point in sample_points:
+            self._add_data_point(data_point)
+
     async def collect_analytics_data(
         self,
         metric_type: MetricType,
@@ -183,11 +265,8 @@ class AIAnalyticsService:
             context=context,
         )
 
-        self.data_points.append(data_point)
-
-        # Keep only last 10000 data points to manage memory
-        if len(self.data_points) > 10000:
-            self.data_points = self.data_points[-10000:]
+        # The store evicts the oldest points once retention is reached
+        self._add_data_point(data_point)
 
         logger.info(
             f"Collected analytics data: {metric_type.value} = {value} for {model_type}"
@@ -200,25 +279,24 @@ class AIAnalyticsService:
 
         logger.info(f"Analyzing usage patterns for last {time_range_days} days")
 
-        cutoff_time = datetime.now(timezone.utc) - timedelta(days=time_range_days)
-        recent_data = [dp for dp in self.data_points if dp.timestamp >= cutoff_time]
+        recent_data = self._selection(days=time_range_days)
 
         patterns = []
 
-        # Pattern 1: Peak Usage Hours
-        hourly_usage = defaultdict(int)
-        for dp in recent_data:
-            hour = dp.timestamp.hour
-            hourly_usage[hour] += 1
-
-        peak_hours = sorted(
-            hourly_usage.keys(), key=lambda h: hourly_usage[h], reverse=True
-        )[:3]
+        # Pattern 1: Peak Usage Hours (UTC)
+        hours = recent_data.timestamps.astype(np.int64) // 3600 % 24
+        hourly_usage = np.bincount(hours, minlength=24)
+        peak_hours = [
+            int(hour)
+            for hour in np.argsort(-hourly_usage, kind="stable")[:3]
+            if hourly_usage[hour] > 0
+        ]
 
         # Pattern 2: Model Preferences
-        model_usage = defaultdict(int)
-        for dp in recent_data:
-            model_usage[dp.model_type] += 1
+        model_usage = self.store.decode_counts(
+            self.store.counts_by(recent_data.models, len(self.store.model_codes)),
+            self.store.model_codes,
+        )
 
         total_usage = sum(model_usage.values())
         model_preferences = (
@@ -228,19 +306,18 @@ class AIAnalyticsService:
         )
 
         # Pattern 3: User Segments
-        user_segments = defaultdict(int)
-        user_activity = defaultdict(int)
-        for dp in recent_data:
-            if dp.user_id:
-                user_activity[dp.user_id] += 1
-
-        for user_id, activity in user_activity.items():
-            if activity >= 50:
-                user_segments["heavy_users"] += 1
-            elif activity >= 10:
-                user_segments["regular_users"] += 1
-            else:
-                user_segments["light_users"] += 1
+        user_activity = self.store.counts_by(
+            recent_data.users, len(self.store.user_codes)
+        )
+        user_activity = user_activity[user_activity > 0]
+        segment_sizes = {
+            "heavy_users": int(np.count_nonzero(user_activity >= 50)),
+            "regular_users": int(
+                np.count_nonzero((user_activity >= 10) & (user_activity < 50))
+            ),
+            "light_users": int(np.count_nonzero(user_activity < 10)),
+        }
+        user_segments = {name: size for name, size in segment_sizes.items() if size}
 
         # Create usage pattern
         pattern = UsagePattern(
@@ -249,8 +326,8 @@ class AIAnalyticsService:
             frequency=len(recent_data),
             peak_hours=peak_hours,
             model_preferences=model_preferences,
-            user_segments=dict(user_segments),
-            seasonal_trends=self._analyze_seasonal_trends(recent_data),
+            user_segments=user_segments,
+            seasonal_trends=self._analyze_seasonal_trends(recent_data.timestamps),
             recommendations=self._generate_usage_recommendations(
                 peak_hours, model_preferences, user_segments
             ),
@@ -261,21 +338,21 @@ class AIAnalyticsService:
 
         return patterns
 
-    def _analyze_seasonal_trends(
-        self, data_points: List[AnalyticsDataPoint]
-    ) -> Dict[str, float]:
+    def _analyze_seasonal_trends(self, timestamps: np.ndarray) -> Dict[str, float]:
         """Analyze seasonal trends in usage"""
-        daily_usage = defaultdict(int)
-
-        for dp in data_points:
-            day_of_week = dp.timestamp.strftime("%A")
-            daily_usage[day_of_week] += 1
-
-        total = sum(daily_usage.values())
+        total = len(timestamps)
         if total == 0:
             return {}
 
-        return {day: count / total for day, count in daily_usage.items()}
+        # 1970-01-01 was a Thursday (weekday 3)
+        weekdays = (timestamps.astype(np.int64) // 86400 + 3) % 7
+        daily_usage = np.bincount(weekdays, minlength=7)
+
+        return {
+            calendar.day_name[day]: count / total
+            for day, count in enumerate(daily_usage.tolist())
+            if count
+        }
 
     def _generate_usage_recommendations(
         self,
@@ -323,16 +400,8 @@ class AIAnalyticsService:
             f"Analyzing {metric_type.value} trends for {model_type or 'all models'}"
         )
 
-        cutoff_time = datetime.now(timezone.utc) - timedelta(days=time_range_days)
-
         # Filter data points
-        filtered_data = [
-            dp
-            for dp in self.data_points
-            if dp.timestamp >= cutoff_time
-            and dp.metric_type == metric_type
-            and (model_type is None or dp.model_type == model_type)
-        ]
+        filtered_data = self._selection(time_range_days, metric_type, model_type)
 
         if len(filtered_data) < 2:
             return TrendAnalysis(
@@ -346,24 +415,16 @@ class AIAnalyticsService:
             )
 
         # Sort by timestamp
-        filtered_data.sort(key=lambda dp: dp.timestamp)
+        filtered_data = filtered_data.sorted_by_time()
 
         # Calculate trend
-        values = [dp.value for dp in filtered_data]
-        timestamps = [dp.timestamp for dp in filtered_data]
+        values = filtered_data.values
+        last_timestamp = datetime.fromtimestamp(
+            filtered_data.timestamps[-1], timezone.utc
+        )
 
         # Simple linear regression for trend
-        n = len(values)
-        x_vals = list(range(n))
-
-        # Calculate slope
-        x_mean = statistics.mean(x_vals)
-        y_mean = statistics.mean(values)
-
-        numerator = sum((x - x_mean) * (y - y_mean) for x, y in zip(x_vals, values))
-        denominator = sum((x - x_mean) ** 2 for x in x_vals)
-
-        slope = numerator / denominator if denominator != 0 else 0
+        slope = columnar_store.linear_trend(values)
 
         # Determine trend direction and strength
         if abs(slope) < 0.01:
@@ -379,14 +440,16 @@ class AIAnalyticsService:
         # Calculate change percent
         if len(values) >= 2:
             change_percent = (
-                ((values[-1] - values[0]) / values[0]) * 100 if values[0] != 0 else 0
+                float((values[-1] - values[0]) / values[0]) * 100
+                if values[0] != 0
+                else 0
             )
         else:
             change_percent = 0
 
         # Generate forecast
         forecast_points = self._generate_forecast(
-            timestamps, values, 7
+            last_timestamp, values, 7
         )  # 7 days forecast
 
         # Generate insights
@@ -405,7 +468,7 @@ class AIAnalyticsService:
         )
 
     def _generate_forecast(
-        self, timestamps: List[datetime], values: List[float], forecast_days: int
+        self, last_timestamp: datetime, values: np.ndarray, forecast_days: int
     ) -> List[Tuple[datetime, float]]:
         """Generate simple forecast points"""
         if len(values) < 2:
@@ -413,15 +476,15 @@ class AIAnalyticsService:
 
         # Simple moving average forecast
         recent_values = values[-min(7, len(values)) :]
-        avg_value = statistics.mean(recent_values)
+        avg_value = float(recent_values.mean())
+        recent_std = float(recent_values.std(ddof=1))
 
         forecast_points = []
-        last_timestamp = timestamps[-1]
 
         for i in range(1, forecast_days + 1):
             forecast_time = last_timestamp + timedelta(days=i)
             # Add some noise to make it realistic
-            noise = np.random.normal(0, statistics.stdev(recent_values) * 0.1)
+            noise = np.random.normal(0, recent_std * 0.1)
             forecast_value = avg_value + noise
             forecast_points.append((forecast_time, forecast_value))
 
@@ -491,14 +554,15 @@ class AIAnalyticsService:
         insights = []
 
         # Insight 1: High-cost models
-        cost_data = [dp for dp in self.data_points if dp.metric_type == MetricType.COST]
-        if cost_data:
-            model_costs = defaultdict(list)
-            for dp in cost_data:
-                model_costs[dp.model_type].append(dp.value)
-
-            for model, costs in model_costs.items():
-                avg_cost = statistics.mean(costs)
+        cost_data = self._selection(metric_type=MetricType.COST)
+        if len(cost_data):
+            models = len(self.store.model_codes)
+            cost_counts = self.store.counts_by(cost_data.models, models)
+            cost_sums = self.store.sums_by(cost_data.models, cost_data.values, models)
+
+            for code in np.flatnonzero(cost_counts):
+                model = self.store.model_codes.decode(code)
+                avg_cost = float(cost_sums[code] / cost_counts[code])
                 if avg_cost > 0.025:  # Threshold for high cost
                     potential_savings = avg_cost * 0.3  # 30% potential savings
 
@@ -521,11 +585,12 @@ class AIAnalyticsService:
                     )
 
         # Insight 2: Usage inefficiency
-        usage_data = [dp for dp in self.data_points[-1000:]]  # Last 1000 requests
-        if usage_data:
-            model_usage = defaultdict(int)
-            for dp in usage_data:
-                model_usage[dp.model_type] += 1
+        usage_data = self.store.tail(1000)  # Last 1000 requests
+        if len(usage_data):
+            model_usage = self.store.decode_counts(
+                self.store.counts_by(usage_data.models, len(self.store.model_codes)),
+                self.store.model_codes,
+            )
 
             total_requests = len(usage_data)
             for model, count in model_usage.items():
@@ -583,11 +648,7 @@ class AIAnalyticsService:
         )
 
         # Filter relevant data
-        relevant_data = [
-            dp
-            for dp in self.data_points
-            if dp.metric_type == metric_type and dp.model_type == model_type
-        ]
+        relevant_data = self._selection(metric_type=metric_type, model_type=model_type)
 
         if len(relevant_data) < 10:
             return PredictiveModel(
@@ -601,36 +662,41 @@ class AIAnalyticsService:
             )
 
         # Sort by timestamp
-        relevant_data.sort(key=lambda dp: dp.timestamp)
+        relevant_data = relevant_data.sorted_by_time()
 
         # Simple time series prediction using moving average
-        values = [dp.value for dp in relevant_data]
-        timestamps = [dp.timestamp for dp in relevant_data]
+        values = relevant_data.values
 
-        # Calculate model accuracy using historical data
-        predictions_vs_actual = []
+        # Calculate model accuracy using historical data: moving average of
+        # the previous window_size points vs the actual value (via cumsum)
         window_size = min(5, len(values) // 2)
-
-        for i in range(window_size, len(values) - 1):
-            historical = values[i - window_size : i]
-            predicted = statistics.mean(historical)
-            actual = values[i]
-            predictions_vs_actual.append(
-                abs(predicted - actual) / actual if actual != 0 else 0
-            )
+        cumulative = np.concatenate(([0.0], np.cumsum(values)))
+        positions = np.arange(window_size, len(values) - 1)
+        predicted = (
+            cumulative[positions] - cumulative[positions - window_size]
+        ) / window_size
+        actual = values[positions]
+        safe_actual = np.where(actual != 0, actual, 1.0)
+        predictions_vs_actual = np.where(
+            actual != 0, np.abs(predicted - actual) / safe_actual, 0.0
+        )
 
         accuracy = (
-            1 - statistics.mean(predictions_vs_actual) if predictions_vs_actual else 0.5
+            1 - float(predictions_vs_actual.mean())
+            if len(predictions_vs_actual)
+            else 0.5
         )
         accuracy = max(0.0, min(1.0, accuracy))
 
         # Generate future predictions
         recent_values = values[-window_size:]
-        base_prediction = statistics.mean(recent_values)
-        std_dev = statistics.stdev(recent_values) if len(recent_values) > 1 else 0.1
+        base_prediction = float(recent_values.mean())
+        std_dev = float(recent_values.std(ddof=1)) if len(recent_values) > 1 else 0.1
 
         predictions = []
-        last_timestamp = timestamps[-1]
+        last_timestamp = datetime.fromtimestamp(
+            relevant_data.timestamps[-1], timezone.utc
+        )
 
         for i in range(1, forecast_days + 1):
             future_time = last_timestamp + timedelta(days=i)
@@ -691,36 +757,33 @@ class AIAnalyticsService:
         logger.info("Generating dashboard analytics")
 
         # Recent performance metrics
-        recent_data = [
-            dp
-            for dp in self.data_points
-            if dp.timestamp >= datetime.now(timezone.utc) - timedelta(days=7)
-        ]
-
-        # Calculate aggregated metrics
-        metrics_by_type = defaultdict(list)
-        for dp in recent_data:
-            metrics_by_type[dp.metric_type.value].append(dp.value)
+        recent_data = self._selection(days=7)
 
+        # Calculate aggregated metrics (one vectorized pass per metric type)
         aggregated_metrics = {}
-        for metric_type, values in metrics_by_type.items():
-            if values:
-                aggregated_metrics[metric_type] = {
-                    "avg": statistics.mean(values),
-                    "min": min(values),
-                    "max": max(values),
-                    "std": statistics.stdev(values) if len(values) > 1 else 0,
-                    "count": len(values),
-                }
+        metric_counts = self.store.counts_by(
+            recent_data.metrics, len(self.store.metric_codes)
+        )
+        for code in np.flatnonzero(metric_counts):
+            values = recent_data.values[recent_data.metrics == code]
+            metric_type = self.store.metric_codes.decode(code)
+            aggregated_metrics[metric_type.value] = {
+                "avg": float(values.mean()),
+                "min": float(values.min()),
+                "max": float(values.max()),
+                "std": float(values.std(ddof=1)) if len(values) > 1 else 0,
+                "count": len(values),
+            }
 
         # Usage statistics
-        model_usage = defaultdict(int)
-        user_activity = defaultdict(int)
-
-        for dp in recent_data:
-            model_usage[dp.model_type] += 1
-            if dp.user_id:
-                user_activity[dp.user_id] += 1
+        model_usage = self.store.decode_counts(
+            self.store.counts_by(recent_data.models, len(self.store.model_codes)),
+            self.store.model_codes,
+        )
+        user_activity = self.store.counts_by(
+            recent_data.users, len(self.store.user_codes)
+        )
+        user_activity = user_activity[user_activity > 0]
 
         # Top insights
         top_insights = []
@@ -742,16 +805,16 @@ class AIAnalyticsService:
                 "total_requests": len(recent_data),
                 "active_models": len(model_usage),
                 "active_users": len(user_activity),
-                "data_points_collected": len(self.data_points),
+                "data_points_collected": len(self.store),
             },
             "performance_metrics": aggregated_metrics,
-            "model_usage": dict(model_usage),
+            "model_usage": model_usage,
             "user_activity_distribution": {
-                "heavy_users": len([u for u in user_activity.values() if u >= 20]),
-                "regular_users": len(
-                    [u for u in user_activity.values() if 5 <= u < 20]
+                "heavy_users": int(np.count_nonzero(user_activity >= 20)),
+                "regular_users": int(
+                    np.count_nonzero((user_activity >= 5) & (user_activity < 20))
                 ),
-                "light_users": len([u for u in user_activity.values() if u < 5]),
+                "light_users": int(np.count_nonzero(user_activity < 5)),
             },
             "top_insights": top_insights,
             "last_updated": datetime.now(timezone.utc).isoformat(),
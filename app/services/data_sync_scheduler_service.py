@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 Data Sync Scheduler Service
-Упрощенная версия планировщика для интеграции с main.py
+Упрощенная версия планировщика для интеграции с main.py.
+Синхронизация инкрементальная: см. app/services/incremental_sync.py
 """
 
 import asyncio
@@ -15,17 +16,26 @@ from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 import yaml
 
+from app.services.incremental_sync import (CHANGE_SOURCES, CollectionSyncSink,
+                                           IncrementalSyncEngine, SyncReport,
+                                           SyncSink, SyncStateStore)
+
 logger = logging.getLogger(__name__)
 
 
 class DataSyncSchedulerService:
     """Сервис планировщика синхронизации данных"""
     
-    def __init__(self):
+    def __init__(self, state_store: Optional[SyncStateStore] = None, sink: Optional[SyncSink] = None):
         self.scheduler = AsyncIOScheduler()
         self.running = False
         self.config = None
         self.sync_jobs = {}
+        self.state_store = state_store
+        # Изменения индексируются в коллекциях векторного индекса
+        self.sink = sink or CollectionSyncSink()
+        self.last_reports: Dict[str, Dict] = {}
+        self._job_locks: Dict[str, asyncio.Lock] = {}
         
     async def initialize(self):
         """Инициализация планировщика"""
@@ -100,7 +110,7 @@ class DataSyncSchedulerService:
                     "source_name": "bootstrap",
                     "enabled": True,
                     "schedule": "*/30 * * * *",  # Каждые 30 минут
-                    "incremental": False,
+                    "incremental": True,
                     "config": {
                         "bootstrap_dir": "./local",
                         "supported_formats": [".pdf", ".txt", ".md", ".docx"],
@@ -110,6 +120,8 @@ class DataSyncSchedulerService:
             ],
             "global_settings": {
                 "max_concurrent_jobs": 3,
+                "max_concurrency_per_source": 4,
+                "state_path": "data/sync_state.db",
                 "job_timeout_minutes": 120,
                 "retry_failed_jobs": True,
                 "retry_delay_minutes": 15,
@@ -162,72 +174,81 @@ class DataSyncSchedulerService:
             except Exception as e:
                 logger.error(f"❌ Failed to setup sync job {job_id}: {e}")
                 
-    async def _execute_sync_job(self, job_id: str, job_config: Dict):
+    async def _execute_sync_job(self, job_id: str, job_config: Dict) -> Optional[SyncReport]:
         """Выполнение задачи синхронизации"""
-        start_time = datetime.now(timezone.utc)
-        
-        logger.info(f"🔄 Starting sync job: {job_id}")
-        
-        try:
-            source_type = job_config['source_type']
-            source_name = job_config['source_name']
-            
-            if source_type == "confluence":
-                await self._sync_confluence(job_config)
-            elif source_type == "gitlab":
-                await self._sync_gitlab(job_config)
-            elif source_type == "jira":
-                await self._sync_jira(job_config)
-            elif source_type == "local_files":
-                await self._sync_local_files(job_config)
-            else:
-                logger.warning(f"Unknown source type: {source_type}")
-                
-            duration = datetime.now(timezone.utc) - start_time
-            logger.info(f"✅ Sync job completed: {job_id} ({duration.total_seconds():.2f}s)")
-            
-        except Exception as e:
-            logger.error(f"❌ Sync job failed: {job_id} - {e}")
-            
-    async def _sync_confluence(self, job_config: Dict):
-        """Синхронизация данных Confluence"""
+        lock = self._job_locks.setdefault(job_id, asyncio.Lock())
+        if lock.locked():
+            logger.info(f"⏭️ Sync job already running, skipping: {job_id}")
+            return None
+
+        async with lock:
+            logger.info(f"🔄 Starting sync job: {job_id}")
+            try:
+                source_type = job_config['source_type']
+
+                if source_type == "confluence":
+                    report = await self._sync_confluence(job_id, job_config)
+                elif source_type == "gitlab":
+                    report = await self._sync_gitlab(job_id, job_config)
+                elif source_type == "jira":
+                    report = await self._sync_jira(job_id, job_config)
+                elif source_type == "local_files":
+                    report = await self._sync_local_files(job_id, job_config)
+                else:
+                    logger.warning(f"Unknown source type: {source_type}")
+                    return None
+
+                self.last_reports[job_id] = report.to_dict()
+                logger.info(
+                    f"✅ Sync job completed: {job_id} ({report.duration_seconds:.2f}s, "
+                    f"listed={report.listed}, changed={report.changed}, indexed={report.indexed}, "
+                    f"deleted={report.deleted})"
+                )
+                return report
+
+            except Exception as e:
+                self.last_reports[job_id] = {"source_key": job_id, "error": str(e),
+                                             "finished_at": datetime.now(timezone.utc).isoformat()}
+                logger.error(f"❌ Sync job failed: {job_id} - {e}")
+                return None
+
+    def _global_settings(self) -> Dict:
+        return (self.config or {}).get("global_settings", {})
+
+    def _get_state_store(self) -> SyncStateStore:
+        if self.state_store is None:
+            path = os.getenv("SYNC_STATE_PATH", self._global_settings().get("state_path", "data/sync_state.db"))
+            self.state_store = SyncStateStore(path)
+        return self.state_store
+
+    async def _run_incremental(self, job_id: str, job_config: Dict) -> SyncReport:
+        """Синхронизация источника по high-water mark: только изменения и удаления"""
+        max_concurrency = job_config.get(
+            "max_concurrency", self._global_settings().get("max_concurrency_per_source", 4)
+        )
+        source = CHANGE_SOURCES[job_config['source_type']](job_config.get('config', {}), max_concurrency)
+        engine = IncrementalSyncEngine(self._get_state_store(), self.sink)
+        return await engine.run(job_id, source, incremental=job_config.get('incremental', True))
+
+    async def _sync_confluence(self, job_id: str, job_config: Dict) -> SyncReport:
+        """Синхронизация данных Confluence (изменения по lastModified/версии страницы)"""
         logger.info(f"🔄 Confluence sync: {job_config['source_name']}")
-        
-        # Здесь будет реальная логика синхронизации
-        # Пока что имитация
-        await asyncio.sleep(2)
-        
-        logger.info(f"✅ Confluence sync completed: {job_config['source_name']}")
-        
-    async def _sync_gitlab(self, job_config: Dict):
-        """Синхронизация данных GitLab"""
+        return await self._run_incremental(job_id, job_config)
+
+    async def _sync_gitlab(self, job_id: str, job_config: Dict) -> SyncReport:
+        """Синхронизация данных GitLab (изменения по SHA коммитов)"""
         logger.info(f"🔄 GitLab sync: {job_config['source_name']}")
-        
-        # Здесь будет реальная логика синхронизации
-        # Пока что имитация
-        await asyncio.sleep(2)
-        
-        logger.info(f"✅ GitLab sync completed: {job_config['source_name']}")
-        
-    async def _sync_jira(self, job_config: Dict):
-        """Синхронизация данных Jira"""
+        return await self._run_incremental(job_id, job_config)
+
+    async def _sync_jira(self, job_id: str, job_config: Dict) -> SyncReport:
+        """Синхронизация данных Jira (изменения по полю updated)"""
         logger.info(f"🔄 Jira sync: {job_config['source_name']}")
-        
-        # Здесь будет реальная логика синхронизации
-        # Пока что имитация
-        await asyncio.sleep(2)
-        
-        logger.info(f"✅ Jira sync completed: {job_config['source_name']}")
-        
-    async def _sync_local_files(self, job_config: Dict):
-        """Синхронизация локальных файлов"""
+        return await self._run_incremental(job_id, job_config)
+
+    async def _sync_local_files(self, job_id: str, job_config: Dict) -> SyncReport:
+        """Синхронизация локальных файлов (изменения по mtime и хешу содержимого)"""
         logger.info(f"🔄 Local files sync: {job_config['source_name']}")
-        
-        # Здесь будет реальная логика синхронизации
-        # Пока что имитация
-        await asyncio.sleep(1)
-        
-        logger.info(f"✅ Local files sync completed: {job_config['source_name']}")
+        return await self._run_incremental(job_id, job_config)
         
     async def trigger_manual_sync(self, source_type: str = None, source_name: str = None):
         """Запуск ручной синхронизации"""
@@ -239,10 +260,15 @@ class DataSyncSchedulerService:
             else:
                 logger.warning(f"Job not found: {job_id}")
         else:
-            # Запуск всех задач
+            # Независимые источники синхронизируются параллельно
             logger.info("🔄 Manual sync triggered for all sources")
-            for job_id, job_config in self.sync_jobs.items():
-                await self._execute_sync_job(job_id, job_config)
+            semaphore = asyncio.Semaphore(max(1, self._global_settings().get("max_concurrent_jobs", 3)))
+
+            async def run(job_id: str, job_config: Dict):
+                async with semaphore:
+                    await self._execute_sync_job(job_id, job_config)
+
+            await asyncio.gather(*(run(job_id, job_config) for job_id, job_config in self.sync_jobs.items()))
                 
     def get_sync_status(self) -> Dict:
         """Получение статуса синхронизации"""
@@ -250,7 +276,8 @@ class DataSyncSchedulerService:
             "scheduler_running": self.running,
             "jobs_count": len(self.sync_jobs),
             "jobs": list(self.sync_jobs.keys()),
-            "next_runs": self._get_next_runs()
+            "next_runs": self._get_next_runs(),
+            "last_sync": self.last_reports,
         }
         
     def _get_next_runs(self) -> List[Dict]:
@@ -274,6 +301,9 @@ class DataSyncSchedulerService:
             self.scheduler.shutdown()
             self.running = False
             logger.info("✅ Data sync scheduler stopped")
+        if self.state_store is not None:
+            self.state_store.close()
+            self.state_store = None
 
 
 # Глобальный экземпляр
@@ -0,0 +1,922 @@
+"""
+Incremental Sync
+Инкрементальная синхронизация источников по high-water mark.
+
+Для каждого источника в локальной SQLite-базе хранятся:
+- watermark — до какого момента изменения уже забраны (Confluence lastModified,
+  Jira updated, SHA коммитов GitLab);
+- версия и хеш содержимого каждого элемента (версия страницы, updated задачи,
+  SHA коммита для файла GitLab, mtime+size локального файла).
+
+Запуск перечисляет только кандидатов на изменение (лёгкие запросы без тел),
+загружает содержимое лишь тех, чья версия отличается от сохранённой, и
+переиндексирует только те, у которых изменился хеш содержимого. Исчезнувшие
+элементы удаляются из индекса (tombstones).
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ItemVersion:
+    """Элемент источника с версией, по которой определяется изменение"""
+
+    item_id: str
+    version: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ChangeSet:
+    """Результат перечисления изменений"""
+
+    candidates: List[ItemVersion]
+    deleted: Set[str] = field(default_factory=set)
+    # Полный список существующих id: всё остальное из состояния — tombstones
+    present_ids: Optional[Set[str]] = None
+    watermark: Optional[str] = None
+
+
+@dataclass
+class SyncDocument:
+    """Загруженное содержимое изменившегося элемента"""
+
+    item_id: str
+    version: str
+    content: Optional[str]
+    content_hash: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class SyncReport:
+    """Итоги запуска синхронизации источника"""
+
+    source_key: str
+    incremental: bool
+    listed: int = 0
+    changed: int = 0
+    fetched: int = 0
+    indexed: int = 0
+    unchanged_content: int = 0
+    deleted: int = 0
+    errors: int = 0
+    duration_seconds: float = 0.0
+    finished_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class _TextExtractor(HTMLParser):
+    """HTML → текст без сторонних зависимостей"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip and data.strip():
+            self.parts.append(data.strip())
+
+
+def html_to_text(html: str) -> str:
+    extractor = _TextExtractor()
+    extractor.feed(html or "")
+    extractor.close()
+    return " ".join(extractor.parts)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Хранилище состояния
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class SyncStateStore:
+    """Watermark и версии элементов по источникам (SQLite)"""
+
+    def __init__(self, path: str = "data/sync_state.db"):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS sync_watermarks (
+                source_key TEXT PRIMARY KEY,
+                watermark TEXT,
+                updated_at TEXT
+            );
+            CREATE TABLE IF NOT EXISTS sync_items (
+                source_key TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                version TEXT NOT NULL,
+                content_hash TEXT,
+                synced_at TEXT,
+                PRIMARY KEY (source_key, item_id)
+            );
+            """
+        )
+
+    def get_watermark(self, source_key: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT watermark FROM sync_watermarks WHERE source_key = ?", (source_key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, source_key: str, watermark: Optional[str]):
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO sync_watermarks (source_key, watermark, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(source_key) DO UPDATE SET watermark = excluded.watermark, "
+                "updated_at = excluded.updated_at",
+                (source_key, watermark, datetime.now(timezone.utc).isoformat()),
+            )
+
+    def item_versions(self, source_key: str) -> Dict[str, Tuple[str, Optional[str]]]:
+        """item_id → (version, content_hash)"""
+        rows = self._conn.execute(
+            "SELECT item_id, version, content_hash FROM sync_items WHERE source_key = ?",
+            (source_key,),
+        )
+        return {item_id: (version, digest) for item_id, version, digest in rows}
+
+    def record_items(
+        self, source_key: str, items: Iterable[Tuple[str, str, Optional[str]]]
+    ):
+        """Сохраняет (item_id, version, content_hash) одной транзакцией"""
+        now = datetime.now(timezone.utc).isoformat()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO sync_items (source_key, item_id, version, content_hash, synced_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(source_key, item_id) DO UPDATE SET "
+                "version = excluded.version, content_hash = excluded.content_hash, "
+                "synced_at = excluded.synced_at",
+                [
+                    (source_key, item_id, version, digest, now)
+                    for item_id, version, digest in items
+                ],
+            )
+
+    def delete_items(self, source_key: str, item_ids: Iterable[str]):
+        with self._conn:
+            self._conn.executemany(
+                "DELETE FROM sync_items WHERE source_key = ? AND item_id = ?",
+                [(source_key, item_id) for item_id in item_ids],
+            )
+
+    def reset(self, source_key: str):
+        with self._conn:
+            self._conn.execute(
+                "DELETE FROM sync_items WHERE source_key = ?", (source_key,)
+            )
+            self._conn.execute(
+                "DELETE FROM sync_watermarks WHERE source_key = ?", (source_key,)
+            )
+
+    def close(self):
+        self._conn.close()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Приёмник изменений
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class SyncSink:
+    """Куда отправляются изменения: индексация и удаление документов"""
+
+    async def upsert(self, source_key: str, documents: List[SyncDocument]):
+        raise NotImplementedError
+
+    async def delete(self, source_key: str, item_ids: List[str]):
+        raise NotImplementedError
+
+
+class LoggingSyncSink(SyncSink):
+    """Приёмник по умолчанию: только журналирует изменения"""
+
+    async def upsert(self, source_key: str, documents: List[SyncDocument]):
+        logger.info(f"📥 {source_key}: {len(documents)} changed documents")
+
+    async def delete(self, source_key: str, item_ids: List[str]):
+        logger.info(f"🗑️ {source_key}: {len(item_ids)} deleted documents")
+
+
+# Коллекция векторного индекса по типу источника (префикс source_key задачи)
+SOURCE_COLLECTIONS = {
+    "confluence": "confluence",
+    "jira": "jira",
+    "gitlab": "gitlab",
+    "local_files": "documents",
+}
+
+
+class CollectionSyncSink(SyncSink):
+    """
+    Приёмник, индексирующий изменения в коллекциях CollectionManager.
+
+    Документ индексируется под id "{source_key}:{item_id}"; изменившийся
+    документ сначала удаляется, чтобы не оставались чанки старой версии.
+    Ошибка индексации поднимается наружу: движок не фиксирует версии и
+    watermark для непроиндексированных элементов.
+    """
+
+    def __init__(self, manager=None):
+        self._manager = manager
+
+    @property
+    def manager(self):
+        if self._manager is None:
+            from adapters.vectorstore.collections import get_collection_manager
+
+            self._manager = get_collection_manager()
+        return self._manager
+
+    @staticmethod
+    def collection_type(source_key: str):
+        from adapters.vectorstore.collections import CollectionType
+
+        for source_type, collection in SOURCE_COLLECTIONS.items():
+            if source_key == source_type or source_key.startswith(f"{source_type}_"):
+                return CollectionType(collection)
+        return CollectionType.DOCUMENTS
+
+    async def upsert(self, source_key: str, documents: List[SyncDocument]):
+        from adapters.vectorstore.collections import DocumentMetadata
+
+        collection_type = self.collection_type(source_key)
+        for doc in documents:
+            if not doc.content:
+                continue
+            doc_id = f"{source_key}:{doc.item_id}"
+            metadata = DocumentMetadata(
+                doc_id=doc_id,
+                title=doc.metadata.get("title")
+                or doc.metadata.get("key")
+                or doc.metadata.get("path")
+                or doc.item_id,
+                source=source_key,
+                source_type=collection_type,
+                updated_at=doc.metadata.get("updated_at"),
+                source_version=doc.version,
+                url=doc.metadata.get("url"),
+                file_path=doc.metadata.get("path"),
+            )
+            await self.manager.delete_document(doc_id, collection_type)
+            if not await self.manager.index_document(
+                doc.content, metadata, collection_type
+            ):
+                raise RuntimeError(f"Failed to index {doc_id}")
+        logger.info(f"📥 {source_key}: indexed {len(documents)} changed documents")
+
+    async def delete(self, source_key: str, item_ids: List[str]):
+        collection_type = self.collection_type(source_key)
+        for item_id in item_ids:
+            if not await self.manager.delete_document(
+                f"{source_key}:{item_id}", collection_type
+            ):
+                raise RuntimeError(f"Failed to delete {source_key}:{item_id}")
+        logger.info(f"🗑️ {source_key}: deleted {len(item_ids)} documents")
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Источники изменений
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class ChangeSource:
+    """Базовый источник: перечисление изменений и загрузка содержимого"""
+
+    source_type = "base"
+
+    def __init__(self, config: Dict[str, Any], max_concurrency: int = 4):
+        self.config = {
+            key: os.path.expandvars(value) if isinstance(value, str) else value
+            for key, value in config.items()
+        }
+        self.base_url = str(self.config.get("url", "")).rstrip("/")
+        # Ограничение одновременных запросов к одному источнику
+        self.semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.timeout = aiohttp.ClientTimeout(
+            total=self.config.get("timeout_seconds", 120)
+        )
+
+    def auth_headers(self) -> Dict[str, str]:
+        return {}
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            headers=self.auth_headers(), timeout=self.timeout
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def _get(
+        self, path: str, params: Optional[Dict[str, Any]] = None, as_json: bool = True
+    ):
+        """GET с учётом лимита параллельности и Retry-After"""
+        url = f"{self.base_url}{path}"
+        for attempt in range(3):
+            async with self.semaphore:
+                async with self.session.get(url, params=params) as response:
+                    if response.status == 429 and attempt < 2:
+                        retry_after = float(response.headers.get("Retry-After", 1))
+                    else:
+                        response.raise_for_status()
+                        return await (response.json() if as_json else response.text())
+            logger.warning(
+                f"Rate limited by {self.source_type}, waiting {retry_after}s"
+            )
+            await asyncio.sleep(retry_after)
+
+    async def list_changes(
+        self, watermark: Optional[str], known: Dict[str, Tuple[str, Optional[str]]]
+    ) -> ChangeSet:
+        raise NotImplementedError
+
+    async def fetch(self, items: List[ItemVersion]) -> List[SyncDocument]:
+        raise NotImplementedError
+
+    def _basic_or_bearer(self) -> Dict[str, str]:
+        token = self.config.get("api_token") or self.config.get("password")
+        if self.config.get("username") and token:
+            auth = base64.b64encode(
+                f"{self.config['username']}:{token}".encode()
+            ).decode()
+            return {"Authorization": f"Basic {auth}"}
+        if self.config.get("token"):
+            return {"Authorization": f"Bearer {self.config['token']}"}
+        return {}
+
+
+def _utc_isoformat(value: datetime) -> str:
+    """Время изменения в UTC, ISO-8601 (updated_at в payload коллекций)"""
+    return value.astimezone(timezone.utc).isoformat()
+
+
+def _overlapped(watermark: str, overlap_minutes: int) -> datetime:
+    """Watermark минус запас на расхождение часов и часовых поясов сервера"""
+    return datetime.fromisoformat(watermark) - timedelta(minutes=overlap_minutes)
+
+
+class ConfluenceChangeSource(ChangeSource):
+    """Страницы Confluence: кандидаты по CQL lastModified, версия — номер версии"""
+
+    source_type = "confluence"
+    page_size = 100
+
+    def auth_headers(self) -> Dict[str, str]:
+        return self._basic_or_bearer()
+
+    def _cql(self, since: Optional[datetime] = None) -> str:
+        clauses = ["type = page"]
+        spaces = self.config.get("spaces") or []
+        if spaces:
+            clauses.append("space in (" + ", ".join(f'"{s}"' for s in spaces) + ")")
+        if since is not None:
+            clauses.append(f'lastModified >= "{since.strftime("%Y-%m-%d %H:%M")}"')
+        return " AND ".join(clauses)
+
+    async def _search(self, cql: str, expand: Optional[str]) -> List[Dict[str, Any]]:
+        results, start = [], 0
+        while True:
+            params = {"cql": cql, "limit": self.page_size, "start": start}
+            if expand:
+                params["expand"] = expand
+            data = await self._get("/rest/api/content/search", params)
+            batch = data.get("results", [])
+            results.extend(batch)
+            if len(batch) < self.page_size:
+                return results
+            start += len(batch)
+
+    async def list_changes(self, watermark, known) -> ChangeSet:
+        overlap = self.config.get("watermark_overlap_minutes", 1440)
+        since = _overlapped(watermark, overlap) if watermark else None
+        pages = await self._search(self._cql(since), expand="version,space")
+
+        candidates, newest = [], watermark
+        for page in pages:
+            version = page.get("version") or {}
+            when = version.get("when")
+            updated_at = None
+            if when:
+                updated_at = _utc_isoformat(
+                    datetime.fromisoformat(when.replace("Z", "+00:00"))
+                )
+                newest = max(newest, updated_at) if newest else updated_at
+            candidates.append(
+                ItemVersion(
+                    item_id=str(page["id"]),
+                    version=str(version.get("number", when)),
+                    metadata={
+                        "title": page.get("title", ""),
+                        "space": (page.get("space") or {}).get("key"),
+                        "updated_at": updated_at,
+                    },
+                )
+            )
+
+        present = None
+        if since is None:
+            present = {item.item_id for item in candidates}
+        elif self.config.get("detect_deletions", True):
+            # Только id, без тел и версий: дешёвый список для tombstones
+            present = {
+                str(page["id"]) for page in await self._search(self._cql(), expand=None)
+            }
+        return ChangeSet(candidates=candidates, present_ids=present, watermark=newest)
+
+    async def _fetch_one(self, item: ItemVersion) -> SyncDocument:
+        page = await self._get(
+            f"/rest/api/content/{item.item_id}",
+            {"expand": "body.storage,version,space"},
+        )
+        text = html_to_text(
+            ((page.get("body") or {}).get("storage") or {}).get("value", "")
+        )
+        return SyncDocument(
+            item_id=item.item_id,
+            version=str((page.get("version") or {}).get("number", item.version)),
+            content=text,
+            content_hash=content_hash(text.encode()),
+            metadata={
+                **item.metadata,
+                "title": page.get("title", item.metadata.get("title", "")),
+                "url": f"{self.base_url}/pages/viewpage.action?pageId={item.item_id}",
+            },
+        )
+
+    async def fetch(self, items):
+        return await asyncio.gather(*(self._fetch_one(item) for item in items))
+
+
+class JiraChangeSource(ChangeSource):
+    """Задачи Jira: кандидаты по JQL updated, версия — значение updated"""
+
+    source_type = "jira"
+    page_size = 100
+    fetch_batch_size = 50
+
+    def auth_headers(self) -> Dict[str, str]:
+        return self._basic_or_bearer()
+
+    def _jql(self, since: Optional[datetime] = None) -> str:
+        clauses = []
+        projects = self.config.get("projects") or []
+        if projects:
+            clauses.append("project in (" + ", ".join(projects) + ")")
+        if since is not None:
+            clauses.append(f'updated >= "{since.strftime("%Y/%m/%d %H:%M")}"')
+        return " AND ".join(clauses) + " ORDER BY updated ASC"
+
+    async def _search(self, jql: str, fields: str) -> List[Dict[str, Any]]:
+        issues, start = [], 0
+        while True:
+            data = await self._get(
+                "/rest/api/2/search",
+                {
+                    "jql": jql,
+                    "fields": fields,
+                    "startAt": start,
+                    "maxResults": self.page_size,
+                },
+            )
+            batch = data.get("issues", [])
+            issues.extend(batch)
+            if not batch or start + len(batch) >= data.get("total", 0):
+                return issues
+            start += len(batch)
+
+    @staticmethod
+    def _parse_updated(value: str) -> datetime:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z")
+
+    async def list_changes(self, watermark, known) -> ChangeSet:
+        overlap = self.config.get("watermark_overlap_minutes", 1440)
+        since = _overlapped(watermark, overlap) if watermark else None
+        issues = await self._search(self._jql(since), fields="updated")
+
+        candidates, newest = [], watermark
+        for issue in issues:
+            updated = issue.get("fields", {}).get("updated", "")
+            candidates.append(
+                ItemVersion(str(issue["id"]), updated, {"key": issue.get("key")})
+            )
+            if updated:
+                updated_iso = _utc_isoformat(self._parse_updated(updated))
+                newest = max(newest, updated_iso) if newest else updated_iso
+
+        present = None
+        if since is None:
+            present = {item.item_id for item in candidates}
+        elif self.config.get("detect_deletions", True):
+            present = {
+                str(issue["id"])
+                for issue in await self._search(self._jql(), fields="id")
+            }
+        return ChangeSet(candidates=candidates, present_ids=present, watermark=newest)
+
+    async def _fetch_batch(self, items: List[ItemVersion]) -> List[SyncDocument]:
+        # Одна JQL-выборка на пачку задач вместо запроса на каждую
+        jql = "id in (" + ", ".join(item.item_id for item in items) + ")"
+        issues = await self._search(jql, fields="summary,description,updated,project")
+        documents = []
+        for issue in issues:
+            fields = issue.get("fields", {})
+            text = f"{fields.get('summary') or ''}\n{fields.get('description') or ''}"
+            updated = fields.get("updated", "")
+            documents.append(
+                SyncDocument(
+                    item_id=str(issue["id"]),
+                    version=updated,
+                    content=text,
+                    content_hash=content_hash(text.encode()),
+                    metadata={
+                        "key": issue.get("key"),
+                        "url": f"{self.base_url}/browse/{issue.get('key')}",
+                        "updated_at": (
+                            _utc_isoformat(self._parse_updated(updated))
+                            if updated
+                            else None
+                        ),
+                    },
+                )
+            )
+        return documents
+
+    async def fetch(self, items):
+        batches = [
+            items[i : i + self.fetch_batch_size]
+            for i in range(0, len(items), self.fetch_batch_size)
+        ]
+        results = await asyncio.gather(*(self._fetch_batch(batch) for batch in batches))
+        return [document for batch in results for document in batch]
+
+
+class GitLabChangeSource(ChangeSource):
+    """
+    Файлы GitLab. Watermark — SHA головы ветки по проектам: неизменившийся
+    проект стоит один запрос, изменившийся — сравнение коммитов (compare API).
+    """
+
+    source_type = "gitlab"
+    page_size = 100
+
+    def auth_headers(self) -> Dict[str, str]:
+        token = self.config.get("token")
+        return {"PRIVATE-TOKEN": token} if token else {}
+
+    def _wanted(self, path: str) -> bool:
+        extensions = self.config.get("file_extensions") or [".md", ".rst", ".txt"]
+        if any(excluded in path for excluded in self.config.get("exclude_paths") or []):
+            return False
+        return any(path.lower().endswith(ext) for ext in extensions)
+
+    async def _paged(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        items, page = [], 1
+        while True:
+            batch = await self._get(
+                path, {**(params or {}), "page": page, "per_page": self.page_size}
+            )
+            items.extend(batch)
+            if len(batch) < self.page_size:
+                return items
+            page += 1
+
+    async def _projects(self) -> List[Dict[str, Any]]:
+        groups = self.config.get("groups") or []
+        if not groups:
+            return await self._paged(
+                "/api/v4/projects", {"membership": "true", "simple": "true"}
+            )
+        projects = []
+        for group in groups:
+            projects.extend(
+                await self._paged(
+                    f"/api/v4/groups/{quote(group, safe='')}/projects",
+                    {"simple": "true", "include_subgroups": "true"},
+                )
+            )
+        return projects
+
+    async def _project_changes(
+        self, project, old_sha, known_paths
+    ) -> Tuple[Optional[str], List[ItemVersion], Set[str]]:
+        pid = str(project["id"])
+        ref = project.get("default_branch") or "main"
+        commit = await self._get(
+            f"/api/v4/projects/{pid}/repository/commits/{quote(ref, safe='')}"
+        )
+        head = commit["id"]
+        if head == old_sha:
+            return head, [], set()
+
+        # Файлы читаются в ревизии head: её время коммита — время их изменения
+        committed = commit.get("committed_date")
+        meta = {
+            "project": project.get("path_with_namespace", pid),
+            "ref": ref,
+            "updated_at": (
+                _utc_isoformat(datetime.fromisoformat(committed.replace("Z", "+00:00")))
+                if committed
+                else None
+            ),
+        }
+        candidates, deleted = [], set()
+        compare = None
+        if old_sha:
+            compare = await self._get(
+                f"/api/v4/projects/{pid}/repository/compare",
+                {"from": old_sha, "to": head},
+            )
+        if compare is not None and not compare.get("compare_timeout"):
+            for diff in compare.get("diffs", []):
+                if diff.get("deleted_file") or diff.get("renamed_file"):
+                    deleted.add(f"{pid}:{diff['old_path']}")
+                if not diff.get("deleted_file") and self._wanted(diff["new_path"]):
+                    candidates.append(
+                        ItemVersion(
+                            f"{pid}:{diff['new_path']}",
+                            head,
+                            {**meta, "path": diff["new_path"]},
+                        )
+                    )
+        else:
+            # Первый запуск или слишком большое сравнение: полное дерево
+            tree = await self._paged(
+                f"/api/v4/projects/{pid}/repository/tree",
+                {"ref": head, "recursive": "true"},
+            )
+            paths = {
+                node["path"]
+                for node in tree
+                if node.get("type") == "blob" and self._wanted(node["path"])
+            }
+            candidates = [
+                ItemVersion(f"{pid}:{path}", head, {**meta, "path": path})
+                for path in sorted(paths)
+            ]
+            deleted = {f"{pid}:{path}" for path in known_paths - paths}
+        return head, candidates, deleted
+
+    async def list_changes(self, watermark, known) -> ChangeSet:
+        heads = json.loads(watermark) if watermark else {}
+        known_by_project: Dict[str, Set[str]] = {}
+        for item_id in known:
+            pid, _, path = item_id.partition(":")
+            known_by_project.setdefault(pid, set()).add(path)
+
+        projects = await self._projects()
+        results = await asyncio.gather(
+            *(
+                self._project_changes(
+                    p,
+                    heads.get(str(p["id"])),
+                    known_by_project.get(str(p["id"]), set()),
+                )
+                for p in projects
+            ),
+            return_exceptions=True,
+        )
+
+        new_heads, candidates, deleted = {}, [], set()
+        for project, result in zip(projects, results):
+            pid = str(project["id"])
+            if isinstance(result, Exception):
+                logger.error(
+                    f"❌ GitLab project {pid} change detection failed: {result}"
+                )
+                if pid in heads:
+                    new_heads[pid] = heads[
+                        pid
+                    ]  # повторим со старого SHA в следующий раз
+                continue
+            new_heads[pid] = result[0]
+            candidates.extend(result[1])
+            deleted |= result[2]
+
+        # Проекты, к которым больше нет доступа или которые удалены
+        for pid, paths in known_by_project.items():
+            if pid not in {str(p["id"]) for p in projects}:
+                deleted |= {f"{pid}:{path}" for path in paths}
+
+        return ChangeSet(
+            candidates=candidates,
+            deleted=deleted,
+            watermark=json.dumps(new_heads, sort_keys=True),
+        )
+
+    async def _fetch_one(self, item: ItemVersion) -> SyncDocument:
+        pid, _, path = item.item_id.partition(":")
+        text = await self._get(
+            f"/api/v4/projects/{pid}/repository/files/{quote(path, safe='')}/raw",
+            {"ref": item.version},
+            as_json=False,
+        )
+        return SyncDocument(
+            item_id=item.item_id,
+            version=item.version,
+            content=text,
+            content_hash=content_hash(text.encode()),
+            metadata={
+                **item.metadata,
+                "url": f"{self.base_url}/{item.metadata.get('project')}/-/blob/{item.metadata.get('ref')}/{path}",
+            },
+        )
+
+    async def fetch(self, items):
+        return await asyncio.gather(*(self._fetch_one(item) for item in items))
+
+
+class LocalFilesChangeSource(ChangeSource):
+    """Локальные файлы: версия — mtime+size, переиндексация — только при смене хеша"""
+
+    source_type = "local_files"
+    text_formats = {".txt", ".md", ".rst"}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+    def _scan(self) -> List[ItemVersion]:
+        root = Path(self.config.get("bootstrap_dir", "./local"))
+        formats = {
+            f.lower() for f in self.config.get("supported_formats", [".txt", ".md"])
+        }
+        items = []
+        for path in root.rglob("*"):
+            if path.suffix.lower() in formats and path.is_file():
+                stat = path.stat()
+                items.append(
+                    ItemVersion(
+                        str(path.relative_to(root)),
+                        f"{stat.st_mtime_ns}:{stat.st_size}",
+                        {
+                            "path": str(path),
+                            "updated_at": _utc_isoformat(
+                                datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+                            ),
+                        },
+                    )
+                )
+        return items
+
+    async def list_changes(self, watermark, known) -> ChangeSet:
+        items = await asyncio.to_thread(self._scan)
+        return ChangeSet(
+            candidates=items,
+            present_ids={item.item_id for item in items},
+            watermark=datetime.now(timezone.utc).isoformat(),
+        )
+
+    def _read(self, item: ItemVersion) -> SyncDocument:
+        path = Path(item.metadata["path"])
+        data = path.read_bytes()
+        text = (
+            data.decode("utf-8", errors="replace")
+            if path.suffix.lower() in self.text_formats
+            else None
+        )
+        return SyncDocument(
+            item.item_id, item.version, text, content_hash(data), dict(item.metadata)
+        )
+
+    async def _fetch_one(self, item: ItemVersion) -> SyncDocument:
+        async with self.semaphore:
+            return await asyncio.to_thread(self._read, item)
+
+    async def fetch(self, items):
+        return await asyncio.gather(*(self._fetch_one(item) for item in items))
+
+
+CHANGE_SOURCES = {
+    "confluence": ConfluenceChangeSource,
+    "gitlab": GitLabChangeSource,
+    "jira": JiraChangeSource,
+    "local_files": LocalFilesChangeSource,
+}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Движок
+# ──────────────────────────────────────────────────────────────────────────────
+
+
+class IncrementalSyncEngine:
+    """Применяет изменения источника к приёмнику и фиксирует состояние"""
+
+    def __init__(self, state: SyncStateStore, sink: SyncSink, batch_size: int = 100):
+        self.state = state
+        self.sink = sink
+        self.batch_size = batch_size
+
+    async def run(
+        self, source_key: str, source: ChangeSource, incremental: bool = True
+    ) -> SyncReport:
+        started = time.perf_counter()
+        report = SyncReport(source_key=source_key, incremental=incremental)
+
+        known = self.state.item_versions(source_key)
+        watermark = self.state.get_watermark(source_key) if incremental else None
+        async with source:
+            changes = await source.list_changes(watermark, known if incremental else {})
+            report.listed = len(changes.candidates)
+
+            # Кандидаты из перекрытия окна watermark с той же версией отбрасываются
+            changed = [
+                item
+                for item in changes.candidates
+                if not incremental
+                or known.get(item.item_id, (None,))[0] != item.version
+            ]
+            report.changed = len(changed)
+
+            # Батчами: состояние фиксируется после каждого, прерванный запуск не повторяет работу
+            for start in range(0, len(changed), self.batch_size):
+                batch = changed[start : start + self.batch_size]
+                try:
+                    documents = await source.fetch(batch)
+                except Exception as e:
+                    report.errors += 1
+                    logger.error(
+                        f"❌ {source_key}: failed to fetch {len(batch)} items: {e}"
+                    )
+                    continue
+                report.fetched += len(documents)
+
+                to_index = [
+                    doc
+                    for doc in documents
+                    if not incremental
+                    or known.get(doc.item_id, (None, None))[1] != doc.content_hash
+                ]
+                report.unchanged_content += len(documents) - len(to_index)
+                if to_index:
+                    await self.sink.upsert(source_key, to_index)
+                    report.indexed += len(to_index)
+                self.state.record_items(
+                    source_key,
+                    [(doc.item_id, doc.version, doc.content_hash) for doc in documents],
+                )
+
+        deleted = set(changes.deleted)
+        present = changes.present_ids
+        if present is None and not incremental:
+            present = {item.item_id for item in changes.candidates}
+        if present is not None:
+            deleted |= set(known) - present
+        deleted &= set(known)
+        if deleted:
+            await self.sink.delete(source_key, sorted(deleted))
+            self.state.delete_items(source_key, deleted)
+            report.deleted = len(deleted)
+
+        # Watermark двигаем, только если все изменения применены
+        if not report.errors:
+            self.state.set_watermark(source_key, changes.watermark)
+
+        report.duration_seconds = round(time.perf_counter() - started, 3)
+        report.finished_at = datetime.now(timezone.utc).isoformat()
+        return report
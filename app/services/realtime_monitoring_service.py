@@ -6,8 +6,6 @@ Live monitoring, anomaly detection, automated alerts, and incident response
 import asyncio
 import json
 import logging
-import statistics
-import threading
 import time
 import uuid
 from collections import defaultdict, deque
@@ -19,6 +17,7 @@ from typing import Any, Callable, Dict, List, Optional, Tuple
 import numpy as np
 
 from app.config import settings
+from app.performance.streaming_stats import EWMA, RollingStats, TimeBucketCounter
 
 logger = logging.getLogger(__name__)
 
@@ -138,18 +137,42 @@ class PerformanceSLA:
     created_at: datetime
 
 
+class SeriesStats:
+    """Streaming aggregates of one metric/source series, updated in O(1) per point"""
+
+    def __init__(self, window_size: int = 50, ewma_span: int = 10):
+        self.window = RollingStats(window_size)  # anomaly baseline
+        self.ewma = EWMA(span=ewma_span)  # recent level for auto-resolve
+        # (sla_id, threshold index) -> violation counter over the SLA window
+        self.sla_counters: Dict[Tuple[str, int], TimeBucketCounter] = {}
+
+    def add(self, value: float):
+        self.window.add(value)
+        self.ewma.add(value)
+
+    def sla_counter(self, sla_id: str, index: int, threshold: "SLAThreshold") -> TimeBucketCounter:
+        key = (sla_id, index)
+        counter = self.sla_counters.get(key)
+        if counter is None:
+            counter = TimeBucketCounter(threshold.time_window_minutes * 60)
+            self.sla_counters[key] = counter
+        return counter
+
+
 class RealtimeMonitoringService:
     """Service for real-time AI monitoring"""
 
     def __init__(self):
         self.metric_buffer: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+        self.series_stats: Dict[str, SeriesStats] = {}
         self.alerts: Dict[str, Alert] = {}
         self.anomalies: Dict[str, Anomaly] = {}
         self.slas: Dict[str, PerformanceSLA] = {}
         self.alert_subscribers: List[Callable] = []
         self.anomaly_subscribers: List[Callable] = []
         self.monitoring_active = False
-        self.monitoring_thread = None
+        self.monitoring_interval = 10  # seconds between cleanup passes
+        self._monitoring_task: Optional[asyncio.Task] = None
 
         # Initialize default SLAs
         self._initialize_default_slas()
@@ -237,15 +260,45 @@ class RealtimeMonitoringService:
             metadata=metadata,
         )
 
-        # Add to buffer
+        # Add to buffer and update the streaming aggregates
         key = f"{metric.value}_{source}"
         self.metric_buffer[key].append(data_point)
+        self._get_series_stats(key).add(value)
+
+        self._ensure_monitoring_task()
 
         # Trigger real-time analysis
         await self._analyze_metric_realtime(data_point)
 
         logger.debug(f"Ingested metric: {metric.value} = {value} from {source}")
 
+    def _get_series_stats(self, key: str) -> SeriesStats:
+        stats = self.series_stats.get(key)
+        if stats is None:
+            stats = SeriesStats()
+            self.series_stats[key] = stats
+        return stats
+
+    def get_series_stats(
+        self, metric: MonitoringMetric, source: str
+    ) -> Optional[Dict[str, Any]]:
+        """Get streaming statistics of a metric/source series"""
+        stats = self.series_stats.get(f"{metric.value}_{source}")
+        if stats is None:
+            return None
+        return {
+            "window_size": len(stats.window),
+            "window_mean": stats.window.mean,
+            "window_std": stats.window.stdev,
+            "ewma": stats.ewma.value,
+            "ewma_std": stats.ewma.stdev,
+            "points_total": stats.ewma.count,
+            "sla_violation_percent": {
+                f"{sla_id}:{index}": counter.ratio() * 100
+                for (sla_id, index), counter in stats.sla_counters.items()
+            },
+        }
+
     async def _analyze_metric_realtime(self, data_point: MetricDataPoint):
         """Analyze metric in real-time for anomalies and alerts"""
 
@@ -263,19 +316,15 @@ class RealtimeMonitoringService:
     async def _detect_anomaly(self, data_point: MetricDataPoint) -> Optional[Anomaly]:
         """Detect anomalies using statistical methods"""
 
-        key = f"{data_point.metric.value}_{data_point.source}"
-        history = list(self.metric_buffer[key])
+        stats = self.series_stats.get(f"{data_point.metric.value}_{data_point.source}")
 
-        if len(history) < 10:  # Need sufficient data
+        if stats is None or len(stats.window) < 10:  # Need sufficient data
             return None
 
-        # Get recent values for baseline
-        recent_values = [dp.value for dp in history[-50:]]  # Last 50 points
+        # Baseline over the last 50 points (including this one)
         current_value = data_point.value
-
-        # Calculate statistical measures
-        mean = statistics.mean(recent_values)
-        std_dev = statistics.stdev(recent_values) if len(recent_values) > 1 else 0
+        mean = stats.window.mean
+        std_dev = stats.window.stdev
 
         if std_dev == 0:  # No variation
             return None
@@ -327,54 +376,42 @@ class RealtimeMonitoringService:
     async def _check_sla_violations(self, data_point: MetricDataPoint):
         """Check for SLA violations"""
 
+        stats = self._get_series_stats(f"{data_point.metric.value}_{data_point.source}")
+        timestamp = data_point.timestamp.timestamp()
+
         for sla in self.slas.values():
             if not sla.is_active:
                 continue
 
-            for threshold in sla.thresholds:
+            for index, threshold in enumerate(sla.thresholds):
                 if threshold.metric != data_point.metric:
                     continue
 
-                # Get recent data for time window
-                key = f"{data_point.metric.value}_{data_point.source}"
-                history = list(self.metric_buffer[key])
-
-                cutoff_time = datetime.now(timezone.utc) - timedelta(
-                    minutes=threshold.time_window_minutes
-                )
-                recent_data = [dp for dp in history if dp.timestamp >= cutoff_time]
+                # Violations within the SLA time window, counted as points arrive
+                counter = stats.sla_counter(sla.sla_id, index, threshold)
+                counter.add(timestamp, self._violates(threshold, data_point.value))
 
-                if len(recent_data) < 5:  # Need sufficient data
+                if counter.total < 5:  # Need sufficient data
                     continue
 
-                # Calculate violation percentage
-                violations = 0
-                total_points = len(recent_data)
-
-                for dp in recent_data:
-                    if (
-                        threshold.comparison == "lt"
-                        and dp.value >= threshold.threshold_value
-                    ):
-                        violations += 1
-                    elif (
-                        threshold.comparison == "gt"
-                        and dp.value <= threshold.threshold_value
-                    ):
-                        violations += 1
-                    elif (
-                        threshold.comparison == "eq"
-                        and dp.value != threshold.threshold_value
-                    ):
-                        violations += 1
-
-                violation_percent = (violations / total_points) * 100
+                violation_percent = counter.ratio() * 100
 
                 if violation_percent > threshold.violation_threshold_percent:
                     await self._create_sla_violation_alert(
                         sla, threshold, violation_percent, data_point
                     )
 
+    @staticmethod
+    def _violates(threshold: SLAThreshold, value: float) -> bool:
+        """Whether a single value violates an SLA threshold"""
+        if threshold.comparison == "lt":
+            return value >= threshold.threshold_value
+        if threshold.comparison == "gt":
+            return value <= threshold.threshold_value
+        if threshold.comparison == "eq":
+            return value != threshold.threshold_value
+        return False
+
     async def _check_threshold_alerts(self, data_point: MetricDataPoint):
         """Check for simple threshold alerts"""
 
@@ -568,22 +605,43 @@ class RealtimeMonitoringService:
         self.anomaly_subscribers.append(callback)
 
     def start_monitoring(self):
-        """Start real-time monitoring"""
+        """
+        Start real-time monitoring
+
+        The maintenance loop runs as a task on the event loop, so it never
+        touches service state concurrently with ingestion. Without a running
+        loop (e.g. at import time) it starts with the first ingested metric.
+        """
         if not self.monitoring_active:
             self.monitoring_active = True
-            self.monitoring_thread = threading.Thread(target=self._monitoring_loop)
-            self.monitoring_thread.daemon = True
-            self.monitoring_thread.start()
             logger.info("Real-time monitoring started")
+        self._ensure_monitoring_task()
 
     def stop_monitoring(self):
         """Stop real-time monitoring"""
         self.monitoring_active = False
-        if self.monitoring_thread:
-            self.monitoring_thread.join(timeout=5)
+        if self._monitoring_task and not self._monitoring_task.done():
+            self._monitoring_task.cancel()
+        self._monitoring_task = None
         logger.info("Real-time monitoring stopped")
 
-    def _monitoring_loop(self):
+    def _ensure_monitoring_task(self):
+        """Start the maintenance task on the running loop if it is not running"""
+        if not self.monitoring_active:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        task = self._monitoring_task
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        self._monitoring_task = loop.create_task(
+            self._monitoring_loop(), name="realtime-monitoring"
+        )
+
+    async def _monitoring_loop(self):
         """Background monitoring loop"""
         while self.monitoring_active:
             try:
@@ -593,11 +651,13 @@ class RealtimeMonitoringService:
                 # Auto-resolve old alerts
                 self._auto_resolve_alerts()
 
-                time.sleep(10)  # Check every 10 seconds
+                await asyncio.sleep(self.monitoring_interval)
 
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(5)
+                await asyncio.sleep(5)
 
     def _cleanup_old_data(self):
         """Clean up old data to prevent memory leaks"""
@@ -613,6 +673,12 @@ class RealtimeMonitoringService:
         for anomaly_id in old_anomalies:
             del self.anomalies[anomaly_id]
 
+        # Let SLA windows of idle series expire
+        now = time.time()
+        for stats in self.series_stats.values():
+            for counter in stats.sla_counters.values():
+                counter.advance(now)
+
     def _auto_resolve_alerts(self):
         """Auto-resolve alerts that are no longer relevant"""
         current_time = datetime.now(timezone.utc)
@@ -623,12 +689,11 @@ class RealtimeMonitoringService:
 
             # Auto-resolve alerts older than 1 hour if metric is back to normal
             if (current_time - alert.created_at).total_seconds() > 3600:
-                key = f"{alert.metric.value}_{alert.source}"
-                recent_data = list(self.metric_buffer[key])[-10:]  # Last 10 points
+                stats = self.series_stats.get(f"{alert.metric.value}_{alert.source}")
 
-                if recent_data:
-                    recent_values = [dp.value for dp in recent_data]
-                    avg_recent = statistics.mean(recent_values)
+                if stats is not None and stats.ewma.value is not None:
+                    # EWMA with a span of 10 points tracks the recent level
+                    avg_recent = stats.ewma.value
 
                     # Check if metric is back to normal
                     if alert.metric in [
@@ -411,7 +411,8 @@ def setup_di_container(environment: str = "development") -> DIContainer:
     else:
         raise ValueError(f"Unknown environment: {environment}")
     
-    return container
+    # Fail on circular or missing dependencies now rather than per request
+    return container.compile()
 
 
 # Environment detection
@@ -5,25 +5,56 @@ Manages dependency injection for hexagonal architecture.
 Binds ports (interfaces) to their concrete adapter implementations.
 """
 
-from typing import Type, TypeVar, Dict, Any, Optional, Union
+from typing import Type, TypeVar, Dict, Any, Optional, Union, Callable, Tuple
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
 import inspect
 
 T = TypeVar('T')
 
+LIFETIMES = ('singleton', 'transient', 'scoped')
+
+# Instances of 'scoped' bindings of the current request, keyed by (container, interface)
+_current_scope: ContextVar[Optional[Dict[Tuple[Any, Type], Any]]] = ContextVar('di_scope', default=None)
+
+
+class ResolutionPlan:
+    """
+    Compiled way to produce an instance of one binding.
+
+    resolve() takes no arguments: dependencies, lifetime caching and the
+    factory type check are captured when the plan is compiled, so a
+    resolution does no reflection. For async plans resolve() returns an
+    awaitable; scoped plans need an active request scope.
+    """
+
+    __slots__ = ('resolve', 'is_async', 'scoped')
+
+    def __init__(self, resolve: Callable[[], Any], is_async: bool = False, scoped: bool = False):
+        self.resolve = resolve
+        self.is_async = is_async
+        self.scoped = scoped
+
 
 class DIContainer:
     """
     Dependency Injection Container following hexagonal architecture principles.
     
     Manages the binding of ports (interfaces) to adapters (implementations).
-    Supports singleton and transient lifetimes.
+    Supports singleton, transient and scoped (one instance per request scope)
+    lifetimes, and sync or async factories.
+    
+    Constructor signatures are inspected once per binding: the first
+    resolution compiles a ResolutionPlan that is reused until the bindings
+    change.
     """
     
     def __init__(self):
         self._bindings: Dict[Type, Dict[str, Any]] = {}
         self._singletons: Dict[Type, Any] = {}
-        self._factories: Dict[Type, Any] = {}
+        self._factories: Dict[Type, Dict[str, Any]] = {}
+        self._plans: Dict[Type, ResolutionPlan] = {}
     
     def bind(self, interface: Type[T], implementation: Type[T], lifetime: str = 'singleton') -> 'DIContainer':
         """
@@ -32,7 +63,7 @@ class DIContainer:
         Args:
             interface: The interface/port to bind
             implementation: The concrete implementation/adapter
-            lifetime: 'singleton' or 'transient'
+            lifetime: 'singleton', 'transient' or 'scoped'
         
         Returns:
             Self for method chaining
@@ -44,20 +75,26 @@ class DIContainer:
             'implementation': implementation,
             'lifetime': lifetime
         }
+        self._plans.clear()
         return self
     
-    def bind_factory(self, interface: Type[T], factory: callable) -> 'DIContainer':
+    def bind_factory(self, interface: Type[T], factory: callable, lifetime: str = 'transient') -> 'DIContainer':
         """
         Bind an interface to a factory function.
         
         Args:
             interface: The interface/port to bind
-            factory: Factory function that creates the implementation
+            factory: Factory function (or coroutine function) that creates the implementation
+            lifetime: 'transient' (call the factory on every resolution), 'singleton' or 'scoped'
         
         Returns:
             Self for method chaining
         """
-        self._factories[interface] = factory
+        self._factories[interface] = {
+            'factory': factory,
+            'lifetime': lifetime
+        }
+        self._plans.clear()
         return self
     
     def bind_instance(self, interface: Type[T], instance: T) -> 'DIContainer':
@@ -72,6 +109,7 @@ class DIContainer:
             Self for method chaining
         """
         self._singletons[interface] = instance
+        self._plans.clear()
         return self
     
     def get(self, interface: Type[T]) -> T:
@@ -85,72 +123,232 @@ class DIContainer:
             The concrete implementation instance
         
         Raises:
-            DIError: If the interface is not bound or cannot be resolved
+            DIError: If the interface is not bound or cannot be resolved,
+                or needs an async factory (use aget)
         """
-        # Check if we have a specific instance bound
-        if interface in self._singletons:
-            return self._singletons[interface]
+        plan = self._plans.get(interface) or self._compile(interface, ())
+        if plan.is_async:
+            raise DIError(f"{interface} depends on an async factory, resolve it with aget()")
+        return plan.resolve()
+    
+    async def aget(self, interface: Type[T]) -> T:
+        """
+        Resolve an interface whose dependency graph may contain async factories.
         
-        # Check if we have a factory bound
-        if interface in self._factories:
-            factory = self._factories[interface]
-            instance = factory()
-            if not isinstance(instance, interface):
-                raise DIError(f"Factory for {interface} returned incompatible type {type(instance)}")
-            return instance
+        Args:
+            interface: The interface/port to resolve
         
-        # Check if we have a binding
-        if interface not in self._bindings:
-            raise DIError(f"No binding found for {interface}")
+        Returns:
+            The concrete implementation instance
+        """
+        plan = self._plans.get(interface) or self._compile(interface, ())
+        if plan.is_async:
+            return await plan.resolve()
+        return plan.resolve()
+    
+    def compile(self) -> 'DIContainer':
+        """
+        Compile resolution plans for every binding.
         
-        binding = self._bindings[interface]
-        implementation = binding['implementation']
-        lifetime = binding['lifetime']
+        Called once bindings are configured, so circular or missing
+        dependencies fail at startup instead of on the first request.
         
-        # Handle singleton lifetime
-        if lifetime == 'singleton':
-            if interface not in self._singletons:
-                self._singletons[interface] = self._create_instance(implementation)
-            return self._singletons[interface]
+        Returns:
+            Self for method chaining
         
-        # Handle transient lifetime
-        elif lifetime == 'transient':
-            return self._create_instance(implementation)
+        Raises:
+            DIError: If a binding has a circular or unresolvable dependency
+        """
+        for interface in [*self._singletons, *self._factories, *self._bindings]:
+            self._compile(interface, ())
+        return self
+    
+    def _compile(self, interface: Type, path: Tuple[Type, ...]) -> ResolutionPlan:
+        """
+        Compile (or reuse) the plan of an interface.
+        
+        Args:
+            interface: The interface/port to compile
+            path: Interfaces being compiled above this one, for cycle detection
+        
+        Returns:
+            The plan of the interface
+        """
+        plan = self._plans.get(interface)
+        if plan is not None:
+            return plan
+        
+        if interface in path:
+            cycle = ' -> '.join(_type_name(t) for t in path[path.index(interface):] + (interface,))
+            raise DIError(f"Circular dependency: {cycle}")
         
+        # Same precedence as always: instances, then factories, then class bindings
+        if interface in self._singletons:
+            instance = self._singletons[interface]
+            plan = ResolutionPlan(lambda: instance)
+        elif interface in self._factories:
+            binding = self._factories[interface]
+            plan = self._compile_factory(interface, binding['factory'], binding['lifetime'])
+        elif interface in self._bindings:
+            binding = self._bindings[interface]
+            plan = self._compile_class(interface, binding['implementation'], binding['lifetime'], path + (interface,))
         else:
-            raise DIError(f"Unknown lifetime: {lifetime}")
+            raise DIError(f"No binding found for {interface}")
+        
+        self._plans[interface] = plan
+        return plan
     
-    def _create_instance(self, implementation: Type[T]) -> T:
+    def _compile_class(self, interface: Type, implementation: Type[T], lifetime: str,
+                       path: Tuple[Type, ...]) -> ResolutionPlan:
         """
-        Create an instance of the implementation, resolving dependencies.
+        Compile a constructor call with its dependencies resolved by their own plans.
         
         Args:
+            interface: The interface/port being compiled
             implementation: The class to instantiate
+            lifetime: Lifetime of the binding
+            path: Interfaces being compiled, including this one
         
         Returns:
-            Instance of the implementation
+            The plan of the binding
         """
-        # Get constructor signature
-        sig = inspect.signature(implementation.__init__)
+        if lifetime not in LIFETIMES:
+            raise DIError(f"Unknown lifetime: {lifetime}")
         
-        # Skip 'self' parameter
-        parameters = list(sig.parameters.values())[1:]
+        # Get constructor signature, skipping 'self'
+        parameters = list(inspect.signature(implementation.__init__).parameters.values())[1:]
         
-        # Resolve dependencies
-        kwargs = {}
+        dependencies = []
         for param in parameters:
-            if param.annotation != inspect.Parameter.empty:
-                try:
-                    kwargs[param.name] = self.get(param.annotation)
-                except DIError:
-                    # If dependency cannot be resolved and has no default, raise error
-                    if param.default == inspect.Parameter.empty:
-                        raise DIError(f"Cannot resolve dependency {param.annotation} for {implementation}")
-        
-        try:
-            return implementation(**kwargs)
-        except Exception as e:
-            raise DIError(f"Failed to create instance of {implementation}: {e}")
+            if param.annotation is inspect.Parameter.empty:
+                continue
+            if param.kind in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD):
+                continue
+            if not self.is_bound(param.annotation):
+                # Unbound dependencies fall back to their default value
+                if param.default is inspect.Parameter.empty:
+                    raise DIError(f"No binding found for {param.annotation}, required by {implementation}")
+                continue
+            dependencies.append((param.name, self._compile(param.annotation, path)))
+        
+        scoped = any(plan.scoped for _, plan in dependencies)
+        if scoped and lifetime == 'singleton':
+            raise DIError(f"Singleton {implementation} cannot depend on request-scoped bindings")
+        
+        def construct(kwargs):
+            try:
+                return implementation(**kwargs)
+            except Exception as e:
+                raise DIError(f"Failed to create instance of {implementation}: {e}")
+        
+        if any(plan.is_async for _, plan in dependencies):
+            async def create():
+                kwargs = {}
+                for name, dependency in dependencies:
+                    kwargs[name] = await dependency.resolve() if dependency.is_async else dependency.resolve()
+                return construct(kwargs)
+            
+            plan = self._with_lifetime(interface, create, lifetime, is_async=True)
+        else:
+            resolvers = tuple((name, plan.resolve) for name, plan in dependencies)
+            
+            def create():
+                return construct({name: resolve() for name, resolve in resolvers})
+            
+            plan = self._with_lifetime(interface, create, lifetime, is_async=False)
+        
+        # A transient built from scoped dependencies is only resolvable inside a scope too
+        plan.scoped = plan.scoped or scoped
+        return plan
+    
+    def _compile_factory(self, interface: Type, factory: Callable, lifetime: str) -> ResolutionPlan:
+        """
+        Compile a factory call; the returned type is checked on the first call only.
+        
+        Args:
+            interface: The interface/port being compiled
+            factory: Factory function or coroutine function
+            lifetime: Lifetime of the binding
+        
+        Returns:
+            The plan of the binding
+        """
+        if lifetime not in LIFETIMES:
+            raise DIError(f"Unknown lifetime: {lifetime}")
+        
+        checked = False
+        
+        def check(instance):
+            nonlocal checked
+            if not isinstance(instance, interface):
+                raise DIError(f"Factory for {interface} returned incompatible type {type(instance)}")
+            checked = True
+            return instance
+        
+        if inspect.iscoroutinefunction(factory):
+            async def create():
+                instance = await factory()
+                return instance if checked else check(instance)
+            
+            return self._with_lifetime(interface, create, lifetime, is_async=True)
+        
+        def create():
+            instance = factory()
+            return instance if checked else check(instance)
+        
+        return self._with_lifetime(interface, create, lifetime, is_async=False)
+    
+    def _with_lifetime(self, interface: Type, create: Callable[[], Any], lifetime: str,
+                       is_async: bool) -> ResolutionPlan:
+        """
+        Wrap an instance constructor with the caching of its lifetime.
+        
+        Args:
+            interface: The interface/port being compiled
+            create: Function creating a new instance (a coroutine function if is_async)
+            lifetime: 'singleton', 'transient' or 'scoped'
+            is_async: Whether create must be awaited
+        
+        Returns:
+            The plan of the binding
+        """
+        if lifetime == 'transient':
+            return ResolutionPlan(create, is_async)
+        
+        if lifetime == 'singleton':
+            singletons = self._singletons
+            
+            def instances():
+                return singletons
+            
+            key = interface
+        else:
+            def instances():
+                scope = _current_scope.get()
+                if scope is None:
+                    raise DIError(f"{interface} is request-scoped but no request scope is active")
+                return scope
+            
+            key = (self, interface)
+        
+        if is_async:
+            async def resolve():
+                cache = instances()
+                if key not in cache:
+                    instance = await create()
+                    # Another task may have finished first: keep its instance
+                    return cache.setdefault(key, instance)
+                return cache[key]
+            
+            return ResolutionPlan(resolve, is_async=True, scoped=lifetime == 'scoped')
+        
+        def resolve():
+            cache = instances()
+            if key not in cache:
+                cache[key] = create()
+            return cache[key]
+        
+        return ResolutionPlan(resolve, scoped=lifetime == 'scoped')
     
     def _is_interface_compatible(self, interface: Type, implementation: Type) -> bool:
         """
@@ -196,6 +394,7 @@ class DIContainer:
         self._bindings.clear()
         self._singletons.clear()
         self._factories.clear()
+        self._plans.clear()
 
 
 class DIError(Exception):
@@ -203,6 +402,43 @@ class DIError(Exception):
     pass
 
 
+def _type_name(interface: Any) -> str:
+    return getattr(interface, '__name__', str(interface))
+
+
+@contextmanager
+def request_scope():
+    """
+    Open a scope for 'scoped' bindings: each is created once inside it.
+    
+    Scopes follow the context (contextvars), so tasks and threadpool calls
+    started within a request share its scope.
+    
+    Yields:
+        The dictionary holding the scoped instances
+    """
+    instances: Dict[Tuple[Any, Type], Any] = {}
+    token = _current_scope.set(instances)
+    try:
+        yield instances
+    finally:
+        _current_scope.reset(token)
+
+
+class DIScopeMiddleware:
+    """Pure ASGI middleware opening one request scope per HTTP/WebSocket request."""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        with request_scope():
+            await self.app(scope, receive, send)
+
+
 class DIConfiguration:
     """
     Configuration class for setting up dependency injection.
@@ -351,7 +587,8 @@ def configure_container(environment: str = 'development') -> DIContainer:
     else:
         raise ValueError(f"Unknown environment: {environment}")
     
-    return container
+    # Fail on circular or missing dependencies now rather than per request
+    return container.compile()
 
 
 def inject(interface: Type[T]) -> T:
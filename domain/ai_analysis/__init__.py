@@ -5,5 +5,6 @@ AI Analysis Domain - Intelligent code analysis and insights.
 # Direct imports available:
 # from domain.ai_analysis.ai_code_analyzer import analyze_code_file
 # from domain.ai_analysis.smart_refactoring_engine import analyze_refactoring_opportunities
+# from domain.ai_analysis.code_clone_detector import find_code_clones
 
 __all__ = []
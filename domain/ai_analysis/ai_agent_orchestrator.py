@@ -9,8 +9,10 @@ Phase 4A - Foundation Component
 """
 
 import asyncio
+import heapq
 import json
 import logging
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
@@ -113,8 +115,9 @@ class WorkflowStep:
     )  # Maps from previous steps
     output_key: str = "result"
     depends_on: List[str] = field(default_factory=list)
-    parallel: bool = False
+    parallel: bool = False  # Kept for compatibility; scheduling follows depends_on
     optional: bool = False
+    estimated_seconds: float = 1.0  # Weight used for critical-path priority
 
 
 @dataclass
@@ -131,6 +134,42 @@ class AutomatedWorkflow:
     retry_policy: Dict[str, Any] = field(default_factory=dict)
 
 
+@dataclass
+class StepTimelineEntry:
+    """Profiling record of a single step in a workflow run"""
+
+    step_id: str
+    agent_type: str
+    critical_path: float = 0.0
+    status: str = "pending"  # pending, queued, running, completed, failed, cancelled
+    queued_at: Optional[float] = None  # Seconds since workflow start
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "step_id": self.step_id,
+            "agent_type": self.agent_type,
+            "critical_path": self.critical_path,
+            "status": self.status,
+            "queued_at": self.queued_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "wait_time": (
+                self.started_at - self.queued_at
+                if self.started_at is not None and self.queued_at is not None
+                else None
+            ),
+            "duration": (
+                self.finished_at - self.started_at
+                if self.finished_at is not None and self.started_at is not None
+                else None
+            ),
+            "error": self.error,
+        }
+
+
 # =============================================================================
 # SPECIALIZED AGENTS
 # =============================================================================
@@ -167,18 +206,24 @@ class BaseAgent:
             task.completed_at = datetime.now()
             task.result = result
 
-            self.status = AgentStatus.IDLE
-            self.current_task = None
-
             return result
 
+        except asyncio.CancelledError:
+            # Cancelled by a workflow timeout: not an Exception, but the task is over
+            task.status = AgentStatus.TIMEOUT
+            task.error = "Task cancelled"
+            raise
+
         except Exception as e:
             logger.error(f"❌ Agent {self.agent_id} task failed: {e}")
             task.status = AgentStatus.FAILED
             task.error = str(e)
-            self.status = AgentStatus.IDLE
             raise
 
+        finally:
+            self.status = AgentStatus.IDLE
+            self.current_task = None
+
     async def _execute_specific_task(self, task: AgentTask) -> Dict[str, Any]:
         """Override in specialized agents"""
         raise NotImplementedError("Subclasses must implement _execute_specific_task")
@@ -457,13 +502,29 @@ class AIAgentOrchestrator:
     Provides intelligent coordination of multiple specialized agents.
     """
 
-    def __init__(self):
-        """Initialize the orchestrator with empty state"""
+    def __init__(
+        self,
+        max_concurrent_steps: int = 8,
+        agent_type_limits: Optional[Dict[AgentType, int]] = None,
+    ):
+        """
+        Initialize the orchestrator with empty state.
+
+        Args:
+            max_concurrent_steps: Global limit of workflow steps running at once
+            agent_type_limits: Per-agent-type step limits; defaults to the
+                number of registered agents of that type
+        """
         self.agents: Dict[str, BaseAgent] = {}
         self.active_tasks: Dict[str, AgentTask] = {}
         self.workflows: Dict[str, AutomatedWorkflow] = {}
         self.message_bus: List[AgentMessage] = []
 
+        # Workflow scheduling
+        self.max_concurrent_steps = max(1, max_concurrent_steps)
+        self.agent_type_limits: Dict[AgentType, int] = dict(agent_type_limits or {})
+        self.workflow_timelines: Dict[str, List[Dict[str, Any]]] = {}
+
         # Initialize core services
         self.core_engine = CoreLogicEngine()
 
@@ -532,6 +593,9 @@ class AIAgentOrchestrator:
             if not available_agent:
                 raise ServiceError(f"No available agent of type {agent_type.value}")
 
+            # Reserve the agent before yielding so concurrent steps skip it
+            available_agent.status = AgentStatus.WORKING
+
             # Execute task with timeout
             result = await with_timeout(
                 available_agent.execute_task(task),
@@ -609,73 +673,232 @@ class AIAgentOrchestrator:
     async def _execute_workflow_steps(
         self, workflow: AutomatedWorkflow, input_data: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Execute all steps in a workflow"""
+        """
+        Execute workflow steps as a dataflow graph.
 
-        step_results = {}
+        Each step starts as soon as its own dependencies finish, subject to
+        the global and per-agent-type concurrency limits. Ready steps are
+        prioritized by critical-path length; a failed step cancels the steps
+        downstream of it.
+        """
+
+        step_results: Dict[str, Any] = {}
         workflow_context = {"input": input_data}
 
-        # Build dependency graph
-        dependency_map = {}
-        for step in workflow.steps:
-            dependency_map[step.id] = step.depends_on
-
-        # Execute steps in dependency order
-        completed_steps = set()
-
-        while len(completed_steps) < len(workflow.steps):
-            # Find steps ready to execute
-            ready_steps = []
-            for step in workflow.steps:
-                if step.id not in completed_steps:
-                    # Check if all dependencies are completed
-                    if all(dep_id in completed_steps for dep_id in step.depends_on):
-                        ready_steps.append(step)
-
-            if not ready_steps:
-                raise ServiceError("Workflow deadlock detected - circular dependencies")
-
-            # Execute ready steps (in parallel if marked)
-            parallel_steps = [s for s in ready_steps if s.parallel]
-            sequential_steps = [s for s in ready_steps if not s.parallel]
-
-            # Execute parallel steps
-            if parallel_steps:
-                parallel_tasks = [
+        steps = {step.id: step for step in workflow.steps}
+        dependents = self._build_dependents(workflow)
+        critical_paths = self._compute_critical_paths(workflow, dependents)
+        order = {step.id: index for index, step in enumerate(workflow.steps)}
+
+        started = time.monotonic()
+
+        def elapsed() -> float:
+            return round(time.monotonic() - started, 6)
+
+        timeline = {
+            step.id: StepTimelineEntry(
+                step_id=step.id,
+                agent_type=step.agent_type.value,
+                critical_path=critical_paths[step.id],
+            )
+            for step in workflow.steps
+        }
+        remaining_deps = {step.id: set(step.depends_on) for step in workflow.steps}
+
+        ready: List[tuple] = []
+        running: Dict[asyncio.Task, str] = {}
+        running_by_type: Dict[AgentType, int] = {}
+        failures: List[str] = []
+
+        def enqueue(step_id: str) -> None:
+            timeline[step_id].status = "queued"
+            timeline[step_id].queued_at = elapsed()
+            heapq.heappush(ready, (-critical_paths[step_id], order[step_id], step_id))
+
+        def cancel_downstream(step_id: str) -> None:
+            pending = list(dependents[step_id])
+            while pending:
+                dependent_id = pending.pop()
+                entry = timeline[dependent_id]
+                if entry.status != "pending":
+                    continue
+                entry.status = "cancelled"
+                entry.error = f"Upstream step failed: {step_id}"
+                step_results[dependent_id] = {
+                    "status": "cancelled",
+                    "error": entry.error,
+                }
+                pending.extend(dependents[dependent_id])
+
+        def dispatch() -> None:
+            deferred = []
+            while ready and len(running) < self.max_concurrent_steps:
+                item = heapq.heappop(ready)
+                step = steps[item[2]]
+                if running_by_type.get(step.agent_type, 0) >= self._agent_type_limit(
+                    step.agent_type
+                ):
+                    deferred.append(item)
+                    continue
+
+                entry = timeline[step.id]
+                entry.status = "running"
+                entry.started_at = elapsed()
+                running_by_type[step.agent_type] = (
+                    running_by_type.get(step.agent_type, 0) + 1
+                )
+                task = asyncio.ensure_future(
                     self._execute_workflow_step(step, workflow_context, step_results)
-                    for step in parallel_steps
-                ]
+                )
+                running[task] = step.id
+
+            for item in deferred:
+                heapq.heappush(ready, item)
+
+        for step in workflow.steps:
+            if not step.depends_on:
+                enqueue(step.id)
 
-                parallel_results = await safe_gather(
-                    *parallel_tasks, return_exceptions=True
+        deadline = started + workflow.timeout_minutes * 60
+        try:
+            dispatch()
+            while running:
+                done, _ = await asyncio.wait(
+                    set(running),
+                    timeout=max(0.0, deadline - time.monotonic()),
+                    return_when=asyncio.FIRST_COMPLETED,
                 )
+                if not done:
+                    raise ServiceError(
+                        f"Workflow timed out after {workflow.timeout_minutes} minutes"
+                    )
 
-                for step, result in zip(parallel_steps, parallel_results):
-                    if isinstance(result, Exception):
-                        if not step.optional:
-                            raise result
-                        step_results[step.id] = {
-                            "status": "failed",
-                            "error": str(result),
-                        }
+                for task in done:
+                    step_id = running.pop(task)
+                    step = steps[step_id]
+                    running_by_type[step.agent_type] -= 1
+                    entry = timeline[step_id]
+                    entry.finished_at = elapsed()
+
+                    error = None
+                    if task.exception() is not None:
+                        error = str(task.exception())
+                        result = {"status": "failed", "error": error}
                     else:
-                        step_results[step.id] = result
-                    completed_steps.add(step.id)
-
-            # Execute sequential steps
-            for step in sequential_steps:
-                try:
-                    result = await self._execute_workflow_step(
-                        step, workflow_context, step_results
+                        result = task.result()
+                        if result.get("status") == "failed":
+                            error = result.get("error", "Step failed")
+
+                    step_results[step_id] = result
+                    entry.status = "failed" if error else "completed"
+                    entry.error = error
+
+                    if error and not step.optional:
+                        failures.append(f"{step_id}: {error}")
+                        cancel_downstream(step_id)
+                        continue
+
+                    for dependent_id in dependents[step_id]:
+                        remaining_deps[dependent_id].discard(step_id)
+                        if (
+                            not remaining_deps[dependent_id]
+                            and timeline[dependent_id].status == "pending"
+                        ):
+                            enqueue(dependent_id)
+
+                dispatch()
+        finally:
+            for task, step_id in running.items():
+                task.cancel()
+                timeline[step_id].status = "cancelled"
+                timeline[step_id].finished_at = elapsed()
+            # Let cancelled steps unwind so their agents are released before returning
+            await asyncio.gather(*running, return_exceptions=True)
+            for entry in timeline.values():
+                if entry.status in ("pending", "queued"):
+                    entry.status = "cancelled"
+            self._record_timeline(workflow.id, timeline)
+
+        if failures:
+            raise ServiceError(f"Workflow step failed - {'; '.join(failures)}")
+
+        return {
+            "step_results": step_results,
+            "final_context": workflow_context,
+            "timeline": [timeline[step.id].to_dict() for step in workflow.steps],
+            "total_time": elapsed(),
+        }
+
+    def _build_dependents(self, workflow: AutomatedWorkflow) -> Dict[str, List[str]]:
+        """Build reverse dependency map and reject unknown or circular dependencies"""
+
+        dependents: Dict[str, List[str]] = {step.id: [] for step in workflow.steps}
+        for step in workflow.steps:
+            for dep_id in step.depends_on:
+                if dep_id not in dependents:
+                    raise ServiceError(
+                        f"Workflow step {step.id} depends on unknown step: {dep_id}"
                     )
-                    step_results[step.id] = result
-                    completed_steps.add(step.id)
-                except Exception as e:
-                    if not step.optional:
-                        raise
-                    step_results[step.id] = {"status": "failed", "error": str(e)}
-                    completed_steps.add(step.id)
-
-        return {"step_results": step_results, "final_context": workflow_context}
+                dependents[dep_id].append(step.id)
+
+        # Kahn's algorithm: every step must be reachable in topological order
+        indegree = {step.id: len(set(step.depends_on)) for step in workflow.steps}
+        queue = [step_id for step_id, degree in indegree.items() if degree == 0]
+        visited = 0
+        while queue:
+            step_id = queue.pop()
+            visited += 1
+            for dependent_id in dependents[step_id]:
+                indegree[dependent_id] -= 1
+                if indegree[dependent_id] == 0:
+                    queue.append(dependent_id)
+
+        if visited != len(workflow.steps):
+            raise ServiceError("Workflow deadlock detected - circular dependencies")
+
+        return dependents
+
+    def _compute_critical_paths(
+        self, workflow: AutomatedWorkflow, dependents: Dict[str, List[str]]
+    ) -> Dict[str, float]:
+        """Longest estimated duration from each step to the end of the workflow"""
+
+        durations = {step.id: step.estimated_seconds for step in workflow.steps}
+        critical: Dict[str, float] = {}
+
+        def visit(step_id: str) -> float:
+            if step_id not in critical:
+                downstream = max(
+                    (visit(dependent_id) for dependent_id in dependents[step_id]),
+                    default=0.0,
+                )
+                critical[step_id] = durations[step_id] + downstream
+            return critical[step_id]
+
+        for step in workflow.steps:
+            visit(step.id)
+        return critical
+
+    def _agent_type_limit(self, agent_type: AgentType) -> int:
+        """Concurrency limit for steps of an agent type"""
+        if agent_type in self.agent_type_limits:
+            return max(1, self.agent_type_limits[agent_type])
+        registered = sum(
+            1 for agent in self.agents.values() if agent.agent_type == agent_type
+        )
+        return max(1, registered)
+
+    def _record_timeline(
+        self, workflow_id: str, timeline: Dict[str, StepTimelineEntry]
+    ) -> None:
+        """Keep the timeline of the latest run per workflow for profiling"""
+        self.workflow_timelines[workflow_id] = [
+            entry.to_dict() for entry in timeline.values()
+        ]
+
+    def get_workflow_timeline(self, workflow_id: str) -> List[Dict[str, Any]]:
+        """Get the step timeline of the latest run of a workflow"""
+        return self.workflow_timelines.get(workflow_id, [])
 
     async def _execute_workflow_step(
         self,
@@ -0,0 +1,445 @@
+"""
+Code Clone Detector - token-normalized clone detection across files.
+Uses Rabin-Karp rolling hashes with winnowing so detection runs in roughly
+linear time over the total number of tokens in a project.
+"""
+
+import hashlib
+import io
+import json
+import keyword
+import logging
+import re
+import tokenize
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rolling hash parameters (Rabin-Karp over 61-bit Mersenne prime)
+_HASH_BASE = 1_000_003
+_HASH_MOD = (1 << 61) - 1
+
+# Buckets larger than this are boilerplate (e.g. `self.x = x` runs) and are
+# sampled instead of expanded pairwise to keep detection linear.
+_MAX_BUCKET_SIZE = 32
+
+_GENERIC_TOKEN_RE = re.compile(
+    r"""
+    (?P<comment>\#[^\n]*|//[^\n]*)
+    |(?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+    |(?P<number>\b\d+(?:\.\d+)?\b)
+    |(?P<name>[A-Za-z_]\w*)
+    |(?P<op>==|!=|<=|>=|->|=>|&&|\|\||[^\s\w])
+    """,
+    re.VERBOSE,
+)
+
+_GENERIC_KEYWORDS = set(keyword.kwlist) | {
+    "function",
+    "var",
+    "let",
+    "const",
+    "this",
+    "new",
+    "switch",
+    "case",
+    "public",
+    "private",
+    "static",
+    "void",
+}
+
+
+@dataclass
+class TokenStream:
+    """Normalized token stream for a single source file"""
+
+    file_path: str
+    content_hash: str
+    tokens: List[str]
+    lines: List[int]  # Source line of each token
+
+
+@dataclass
+class CloneLocation:
+    """A single occurrence of a cloned fragment"""
+
+    file_path: str
+    start_line: int
+    end_line: int
+    token_start: int
+    token_end: int
+
+    @property
+    def line_count(self) -> int:
+        return self.end_line - self.start_line + 1
+
+
+@dataclass
+class CloneGroup:
+    """Set of code fragments sharing the same normalized token sequence"""
+
+    fingerprint: str
+    token_count: int
+    locations: List[CloneLocation] = field(default_factory=list)
+
+    @property
+    def occurrences(self) -> int:
+        return len(self.locations)
+
+    @property
+    def line_count(self) -> int:
+        return max((loc.line_count for loc in self.locations), default=0)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "fingerprint": self.fingerprint,
+            "token_count": self.token_count,
+            "line_count": self.line_count,
+            "occurrences": self.occurrences,
+            "locations": [
+                {
+                    "file_path": loc.file_path,
+                    "start_line": loc.start_line,
+                    "end_line": loc.end_line,
+                }
+                for loc in self.locations
+            ],
+        }
+
+
+class TokenStreamCache:
+    """
+    Cache of normalized token streams keyed by file content hash.
+
+    Streams are kept in memory and, when cache_dir is given, persisted as
+    JSON so unchanged files are not re-tokenized on the next run.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._memory: Dict[str, Tuple[List[str], List[int]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, content_hash: str) -> Optional[Tuple[List[str], List[int]]]:
+        cached = self._memory.get(content_hash)
+        if cached is None and self.cache_dir:
+            cache_file = self.cache_dir / f"{content_hash}.json"
+            if cache_file.exists():
+                try:
+                    data = json.loads(cache_file.read_text(encoding="utf-8"))
+                    cached = (data["tokens"], data["lines"])
+                    self._memory[content_hash] = cached
+                except (OSError, ValueError, KeyError) as e:
+                    logger.debug(f"Ignoring unreadable token cache {cache_file}: {e}")
+
+        if cached is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return cached
+
+    def put(self, content_hash: str, tokens: List[str], lines: List[int]) -> None:
+        self._memory[content_hash] = (tokens, lines)
+        if self.cache_dir:
+            cache_file = self.cache_dir / f"{content_hash}.json"
+            try:
+                cache_file.write_text(
+                    json.dumps({"tokens": tokens, "lines": lines}), encoding="utf-8"
+                )
+            except OSError as e:
+                logger.debug(f"Could not write token cache {cache_file}: {e}")
+
+
+class CodeCloneDetector:
+    """
+    Cross-file clone detector based on winnowed k-gram fingerprints.
+
+    Features:
+    - Identifier/literal normalization (detects renamed copies)
+    - Rabin-Karp rolling hashes over k-token windows
+    - Winnowing to keep one fingerprint per window of hashes
+    - Maximal extension of seed matches into clone regions
+    - Token stream cache shared between runs
+    """
+
+    def __init__(
+        self,
+        min_tokens: int = 50,
+        kgram_size: int = 20,
+        window_size: int = 10,
+        cache: Optional[TokenStreamCache] = None,
+    ):
+        if kgram_size < 1 or window_size < 1:
+            raise ValueError("kgram_size and window_size must be positive")
+
+        self.min_tokens = max(min_tokens, kgram_size)
+        self.kgram_size = kgram_size
+        self.window_size = window_size
+        self.cache = cache or TokenStreamCache()
+        self.streams: List[TokenStream] = []
+
+    # ------------------------------------------------------------------
+    # Input
+    # ------------------------------------------------------------------
+
+    def add_source(self, file_path: str, content: str) -> TokenStream:
+        """Tokenize (or fetch from cache) and register a source file"""
+
+        content_hash = hashlib.sha1(content.encode("utf-8", "replace")).hexdigest()
+        cached = self.cache.get(content_hash)
+
+        if cached is None:
+            tokens, lines = self.normalize(content, file_path)
+            self.cache.put(content_hash, tokens, lines)
+        else:
+            tokens, lines = cached
+
+        stream = TokenStream(
+            file_path=file_path, content_hash=content_hash, tokens=tokens, lines=lines
+        )
+        self.streams.append(stream)
+        return stream
+
+    def add_files(self, paths: Iterable[str]) -> int:
+        """Register files from disk, skipping unreadable ones"""
+
+        added = 0
+        for path in paths:
+            try:
+                content = Path(path).read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError) as e:
+                logger.debug(f"Skipping {path}: {e}")
+                continue
+            self.add_source(str(path), content)
+            added += 1
+        return added
+
+    @staticmethod
+    def normalize(content: str, file_path: str = "") -> Tuple[List[str], List[int]]:
+        """Return normalized tokens and their line numbers"""
+
+        if file_path.endswith(".py"):
+            try:
+                return _normalize_python(content)
+            except (tokenize.TokenError, IndentationError, SyntaxError):
+                pass
+        return _normalize_generic(content)
+
+    # ------------------------------------------------------------------
+    # Detection
+    # ------------------------------------------------------------------
+
+    def detect(self) -> List[CloneGroup]:
+        """Detect clone groups across all registered sources"""
+
+        # Intern token strings to small ints so hashing stays cheap
+        vocabulary: Dict[str, int] = {}
+        token_ids: List[List[int]] = [
+            [vocabulary.setdefault(tok, len(vocabulary) + 1) for tok in stream.tokens]
+            for stream in self.streams
+        ]
+
+        # Fingerprint index: hash -> [(stream index, token position)]
+        index: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        for stream_idx, ids in enumerate(token_ids):
+            for position, value in self._winnow(self._rolling_hashes(ids)):
+                bucket = index[value]
+                if len(bucket) < _MAX_BUCKET_SIZE:
+                    bucket.append((stream_idx, position))
+
+        seeds = []
+        for bucket in index.values():
+            if len(bucket) < 2:
+                continue
+            for a in range(len(bucket)):
+                for b in range(a + 1, len(bucket)):
+                    seeds.append(bucket[a] + bucket[b])
+
+        # Sorting by diagonal lets each diagonal be extended once
+        seeds.sort(key=lambda s: (s[0], s[2], s[1] - s[3], s[1]))
+
+        groups: Dict[Tuple[int, ...], CloneGroup] = {}
+        seen_fragments: Dict[Tuple[int, ...], set] = defaultdict(set)
+        last_diagonal: Optional[Tuple[int, int, int]] = None
+        covered_until = -1
+
+        for fa, pa, fb, pb in seeds:
+            diagonal = (fa, fb, pa - pb)
+            if diagonal == last_diagonal and pa < covered_until:
+                continue
+
+            ids_a, ids_b = token_ids[fa], token_ids[fb]
+            k = self.kgram_size
+            if ids_a[pa : pa + k] != ids_b[pb : pb + k]:
+                continue  # Hash collision
+
+            start_a, start_b = pa, pb
+            while start_a > 0 and start_b > 0 and ids_a[start_a - 1] == ids_b[start_b - 1]:
+                start_a -= 1
+                start_b -= 1
+            end_a, end_b = pa + k, pb + k
+            while (
+                end_a < len(ids_a)
+                and end_b < len(ids_b)
+                and ids_a[end_a] == ids_b[end_b]
+            ):
+                end_a += 1
+                end_b += 1
+
+            last_diagonal = diagonal
+            covered_until = end_a
+
+            length = end_a - start_a
+            if length < self.min_tokens:
+                continue
+            if fa == fb and start_b < end_a and start_a < end_b:
+                continue  # Overlapping self-match
+
+            key = tuple(ids_a[start_a:end_a])
+            group = groups.get(key)
+            if group is None:
+                digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+                group = CloneGroup(fingerprint=digest, token_count=length)
+                groups[key] = group
+
+            for stream_idx, start, end in ((fa, start_a, end_a), (fb, start_b, end_b)):
+                if (stream_idx, start) in seen_fragments[key]:
+                    continue
+                seen_fragments[key].add((stream_idx, start))
+                stream = self.streams[stream_idx]
+                group.locations.append(
+                    CloneLocation(
+                        file_path=stream.file_path,
+                        start_line=stream.lines[start],
+                        end_line=stream.lines[end - 1],
+                        token_start=start,
+                        token_end=end,
+                    )
+                )
+
+        result = list(groups.values())
+        for group in result:
+            group.locations.sort(key=lambda loc: (loc.file_path, loc.start_line))
+        result.sort(key=lambda g: g.token_count * g.occurrences, reverse=True)
+        return result
+
+    def _rolling_hashes(self, ids: List[int]) -> List[int]:
+        """Rabin-Karp hashes of every k-gram in the stream"""
+
+        k = self.kgram_size
+        if len(ids) < k:
+            return []
+
+        high = pow(_HASH_BASE, k - 1, _HASH_MOD)
+        value = 0
+        for token_id in ids[:k]:
+            value = (value * _HASH_BASE + token_id) % _HASH_MOD
+
+        hashes = [value]
+        for i in range(k, len(ids)):
+            value = (value - ids[i - k] * high) % _HASH_MOD
+            value = (value * _HASH_BASE + ids[i]) % _HASH_MOD
+            hashes.append(value)
+        return hashes
+
+    def _winnow(self, hashes: List[int]) -> List[Tuple[int, int]]:
+        """Select the rightmost minimal hash of every window (monotonic deque)"""
+
+        w = self.window_size
+        if not hashes:
+            return []
+        if len(hashes) <= w:
+            position = min(range(len(hashes)), key=lambda i: (hashes[i], -i))
+            return [(position, hashes[position])]
+
+        selected: List[Tuple[int, int]] = []
+        window: deque = deque()
+        last_selected = -1
+
+        for i, value in enumerate(hashes):
+            while window and hashes[window[-1]] >= value:
+                window.pop()
+            window.append(i)
+            if window[0] <= i - w:
+                window.popleft()
+            if i >= w - 1 and window[0] != last_selected:
+                last_selected = window[0]
+                selected.append((last_selected, hashes[last_selected]))
+        return selected
+
+
+def _normalize_python(content: str) -> Tuple[List[str], List[int]]:
+    tokens: List[str] = []
+    lines: List[int] = []
+    skip = {
+        tokenize.COMMENT,
+        tokenize.NL,
+        tokenize.ENCODING,
+        tokenize.ENDMARKER,
+    }
+
+    for tok in tokenize.generate_tokens(io.StringIO(content).readline):
+        if tok.type in skip:
+            continue
+        if tok.type == tokenize.NAME:
+            value = tok.string if keyword.iskeyword(tok.string) else "$id"
+        elif tok.type == tokenize.NUMBER:
+            value = "$num"
+        elif tok.type == tokenize.STRING:
+            value = "$str"
+        elif tok.type in (tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT):
+            value = tokenize.tok_name[tok.type]
+        else:
+            value = tok.string
+        tokens.append(value)
+        lines.append(tok.start[0])
+
+    return tokens, lines
+
+
+def _normalize_generic(content: str) -> Tuple[List[str], List[int]]:
+    tokens: List[str] = []
+    lines: List[int] = []
+    line = 1
+    last_end = 0
+
+    for match in _GENERIC_TOKEN_RE.finditer(content):
+        line += content.count("\n", last_end, match.start())
+        last_end = match.start()
+        kind = match.lastgroup
+        if kind == "comment":
+            continue
+        if kind == "name":
+            text = match.group()
+            value = text if text in _GENERIC_KEYWORDS else "$id"
+        elif kind == "number":
+            value = "$num"
+        elif kind == "string":
+            value = "$str"
+        else:
+            value = match.group()
+        tokens.append(value)
+        lines.append(line)
+
+    return tokens, lines
+
+
+def find_code_clones(
+    paths: Iterable[str],
+    min_tokens: int = 50,
+    cache_dir: Optional[str] = None,
+) -> List[CloneGroup]:
+    """Detect clone groups across the given files"""
+    detector = CodeCloneDetector(
+        min_tokens=min_tokens, cache=TokenStreamCache(cache_dir)
+    )
+    detector.add_files(paths)
+    return detector.detect()
@@ -15,6 +15,7 @@ from typing import Any, Dict, List, Optional, Set, Tuple
 from app.core.async_utils import AsyncTimeouts, async_retry, with_timeout
 
 from .ai_code_analyzer import CodeAnalysisResult, CodeIssue, IssueSeverity
+from .code_clone_detector import CloneGroup, CodeCloneDetector, TokenStreamCache
 
 logger = logging.getLogger(__name__)
 
@@ -136,6 +137,14 @@ class SmartRefactoringEngine:
             "j": "secondary_index",
         }
 
+        # Clone detection settings; token streams are reused between runs
+        self.duplication_settings = {
+            "min_tokens": 30,
+            "min_lines": 3,
+            "max_results": 5,
+        }
+        self.token_cache = TokenStreamCache()
+
     @async_retry(max_attempts=2, delay=1.0, exceptions=(Exception,))
     async def analyze_refactoring_opportunities(
         self,
@@ -333,7 +342,7 @@ class SmartRefactoringEngine:
         lines = content.split("\n")
 
         # Find code duplication
-        duplicates = self._find_code_duplication(lines)
+        duplicates = self._find_code_duplication(lines, file_path)
 
         for duplicate in duplicates:
             operations.append(
@@ -622,43 +631,60 @@ class SmartRefactoringEngine:
 
         return operations
 
-    def _find_code_duplication(self, lines: List[str]) -> List[Dict[str, Any]]:
+    def _find_code_duplication(
+        self, lines: List[str], file_path: str = ""
+    ) -> List[Dict[str, Any]]:
         """Find duplicated code blocks"""
 
+        detector = CodeCloneDetector(
+            min_tokens=self.duplication_settings["min_tokens"],
+            cache=self.token_cache,
+        )
+        detector.add_source(file_path, "\n".join(lines))
+
         duplicates = []
-        min_duplicate_lines = 3
-
-        # Simple duplication detection
-        for i in range(len(lines) - min_duplicate_lines):
-            for j in range(i + min_duplicate_lines, len(lines) - min_duplicate_lines):
-                # Check for sequence of identical lines
-                match_count = 0
-
-                while (
-                    i + match_count < len(lines)
-                    and j + match_count < len(lines)
-                    and lines[i + match_count].strip() == lines[j + match_count].strip()
-                    and lines[i + match_count].strip() != ""
-                ):
-                    match_count += 1
-
-                if match_count >= min_duplicate_lines:
-                    duplicate_code = "\n".join(lines[i : i + match_count])
-
-                    duplicates.append(
-                        {
-                            "first_occurrence": i + 1,
-                            "line_count": match_count,
-                            "occurrences": 2,  # Simplified - could count more
-                            "code": duplicate_code,
-                            "suggested_refactoring": self._generate_duplicate_refactoring(
-                                duplicate_code
-                            ),
-                            "confidence": 0.8,
-                        }
-                    )
+        for group in detector.detect():
+            first = group.locations[0]
+            if first.line_count < self.duplication_settings["min_lines"]:
+                continue
+
+            duplicate_code = "\n".join(lines[first.start_line - 1 : first.end_line])
+            duplicates.append(
+                {
+                    "first_occurrence": first.start_line,
+                    "line_count": first.line_count,
+                    "occurrences": group.occurrences,
+                    "code": duplicate_code,
+                    "suggested_refactoring": self._generate_duplicate_refactoring(
+                        duplicate_code
+                    ),
+                    "confidence": 0.8,
+                }
+            )
+
+        return duplicates[: self.duplication_settings["max_results"]]
+
+    def find_project_duplication(
+        self, file_paths: List[str], min_tokens: int = 50
+    ) -> List[CloneGroup]:
+        """
+        Find clone groups across a set of files.
+
+        Args:
+            file_paths: Files to scan
+            min_tokens: Minimum clone size in normalized tokens
 
-        return duplicates[:5]  # Limit to top 5 duplicates
+        Returns:
+            Clone groups ordered by duplicated token volume
+        """
+        detector = CodeCloneDetector(min_tokens=min_tokens, cache=self.token_cache)
+        detector.add_files(file_paths)
+        groups = detector.detect()
+
+        logger.info(
+            f"🔁 Found {len(groups)} clone groups across {len(detector.streams)} files"
+        )
+        return groups
 
     def _find_long_parameter_lists(self, content: str) -> List[Dict[str, Any]]:
         """Find functions with too many parameters"""
@@ -10,10 +10,14 @@ Deep Research Engine - Многошаговый режим углубленно
 - Интеграция с семантическим поиском и базой знаний
 - Real-time отслеживание хода исследования
 - Адаптивное планирование следующих шагов
+- Параллельное выполнение независимых подзапросов (ограниченный фронтир)
+- Бюджет токенов/времени и ранняя остановка при выходе уверенности на плато
 """
 
 import asyncio
 import logging
+import re
+import time
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -49,6 +53,14 @@ class ResearchStatus(Enum):
     CANCELLED = "cancelled"
 
 
+# Шаги, исследующие независимые подвопросы и выполняемые параллельно
+EXPLORATION_STEP_TYPES = {
+    ResearchStepType.INITIAL_ANALYSIS,
+    ResearchStepType.CONTEXT_GATHERING,
+    ResearchStepType.DEEP_ANALYSIS,
+}
+
+
 class StepStatus(Enum):
     """Статусы отдельных шагов"""
 
@@ -77,6 +89,8 @@ class ResearchStep:
     completed_at: Optional[datetime] = None
     error_message: str = ""
     next_steps: List[str] = field(default_factory=list)
+    depth: int = 0  # Глубина в дереве подвопросов
+    parent_step_id: Optional[str] = None
 
 
 @dataclass
@@ -123,6 +137,15 @@ class DeepResearchEngine:
             "step_timeout": 60,  # секунды
             "min_confidence_threshold": 0.6,
             "enable_adaptive_planning": True,
+            # Параллельный планировщик
+            "max_parallel_steps": 3,  # Размер фронтира одновременно выполняемых шагов
+            "max_frontier_size": 6,  # Максимум ожидающих подзапросов
+            "max_depth": 2,  # Глубина дерева подвопросов
+            "dedup_similarity": 0.8,  # Порог Жаккара для дублирующихся подзапросов
+            "token_budget": 20000,  # Оценка токенов на сессию
+            "time_budget": 300,  # Секунды на сессию
+            "plateau_delta": 0.02,  # Минимальный прирост уверенности
+            "plateau_patience": 2,  # Шагов без прироста до остановки
         }
 
     async def start_research(
@@ -148,56 +171,128 @@ class DeepResearchEngine:
     async def execute_research(
         self, session_id: str
     ) -> AsyncGenerator[ResearchStep, None]:
-        """Выполнить исследование с генерацией промежуточных результатов"""
+        """
+        Выполнить исследование с генерацией промежуточных результатов.
+
+        Независимые подзапросы выполняются параллельно в пределах фронтира,
+        шаги выдаются по мере завершения. Шаги синтеза, валидации и итога
+        ждут завершения всех исследовательских шагов.
+        """
         session = self.active_sessions.get(session_id)
         if not session:
             raise ValueError(f"Сессия {session_id} не найдена")
 
         session.status = ResearchStatus.IN_PROGRESS
         start_time = datetime.now()
+        deadline = time.monotonic() + self.config["time_budget"]
+        session.metadata.setdefault("tokens_used", 0)
+
+        running: Dict[asyncio.Task, ResearchStep] = {}
+        confidence_history: List[float] = []
+        launched = 0
+        stop_reason = ""
 
         try:
             # Планирование шагов исследования
             planned_steps = await self._plan_research_steps(session)
             session.steps = planned_steps
 
-            # Выполнение шагов
-            for i, step in enumerate(session.steps):
-                if i >= session.max_steps:
+            while True:
+                if not stop_reason and (
+                    session.metadata["tokens_used"] >= self.config["token_budget"]
+                ):
+                    stop_reason = "Исчерпан бюджет токенов"
+
+                # Запуск готовых шагов в пределах фронтира
+                if not stop_reason:
+                    for step in self._ready_steps(session):
+                        if len(running) >= self.config["max_parallel_steps"]:
+                            break
+                        reserved = self._pending_aggregation_count(session)
+                        if step.step_type in EXPLORATION_STEP_TYPES:
+                            reserved += 1
+                        else:
+                            reserved = 1
+                        if launched + reserved > session.max_steps:
+                            continue
+
+                        step.status = StepStatus.RUNNING
+                        launched += 1
+                        logger.info(f"🔍 Выполняется шаг {launched}: {step.title}")
+                        task = asyncio.ensure_future(
+                            asyncio.wait_for(
+                                self._execute_step(step, session),
+                                timeout=self.config["step_timeout"],
+                            )
+                        )
+                        running[task] = step
+
+                if not running:
                     break
 
-                session.current_step = i
-                step.status = StepStatus.RUNNING
+                done, _ = await asyncio.wait(
+                    set(running),
+                    timeout=max(0.0, deadline - time.monotonic()),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
 
-                logger.info(f"🔍 Выполняется шаг {i+1}: {step.title}")
+                if not done:
+                    stop_reason = "Исчерпан бюджет времени"
+                    for task, step in running.items():
+                        task.cancel()
+                        step.status = StepStatus.SKIPPED
+                        step.error_message = stop_reason
+                    running.clear()
+                    break
+
+                for task in done:
+                    step = running.pop(task)
+                    session.current_step += 1
+
+                    if task.exception() is not None:
+                        error = task.exception()
+                        logger.error(f"❌ Ошибка выполнения шага {step.title}: {error}")
+                        step.status = StepStatus.FAILED
+                        step.error_message = str(error) or type(error).__name__
+                        yield step
+                        continue
 
-                try:
-                    await self._execute_step(step, session)
                     step.status = StepStatus.COMPLETED
                     step.completed_at = datetime.now()
 
                     yield step
 
                     # Адаптивное планирование следующих шагов
-                    if (
-                        self.config["enable_adaptive_planning"]
-                        and i < len(session.steps) - 1
-                    ):
-                        await self._adapt_next_steps(session, i)
+                    if self.config["enable_adaptive_planning"]:
+                        await self._adapt_next_steps(
+                            session, session.steps.index(step)
+                        )
 
                     # Проверка достижения цели
-                    if await self._is_research_complete(session, step):
+                    confidence_history.append(step.confidence)
+                    if not stop_reason:
+                        if await self._is_research_complete(session, step):
+                            stop_reason = "Цель достигнута"
+                        elif self._confidence_plateaued(confidence_history):
+                            stop_reason = "Уверенность вышла на плато"
+                        elif step.step_type in EXPLORATION_STEP_TYPES:
+                            self._expand_frontier(session, step)
+
+                    if stop_reason:
                         logger.info(
-                            "✅ Исследование завершено досрочно - цель достигнута"
+                            f"✅ Исследование завершено досрочно - {stop_reason}"
                         )
-                        break
 
-                except Exception as e:
-                    logger.error(f"❌ Ошибка выполнения шага {i+1}: {e}")
-                    step.status = StepStatus.FAILED
-                    step.error_message = str(e)
-                    yield step
-                    continue
+            for step in session.steps:
+                if step.status == StepStatus.PENDING:
+                    step.status = StepStatus.SKIPPED
+                    step.error_message = stop_reason
+
+            session.metadata["stop_reason"] = stop_reason
+            session.metadata["max_depth_reached"] = max(
+                (s.depth for s in session.steps if s.status == StepStatus.COMPLETED),
+                default=0,
+            )
 
             # Финальный синтез результатов
             session.final_result = await self._synthesize_final_result(session)
@@ -215,6 +310,118 @@ class DeepResearchEngine:
             session.completed_at = datetime.now()
             raise
 
+        finally:
+            for task in running:
+                task.cancel()
+
+    def _ready_steps(self, session: ResearchSession) -> List[ResearchStep]:
+        """Шаги, зависимости которых выполнены"""
+        exploration_active = any(
+            s.step_type in EXPLORATION_STEP_TYPES
+            and s.status in (StepStatus.PENDING, StepStatus.RUNNING)
+            for s in session.steps
+        )
+
+        ready = []
+        aggregation_blocked = exploration_active
+        for step in session.steps:
+            if step.step_type in EXPLORATION_STEP_TYPES:
+                if step.status == StepStatus.PENDING:
+                    ready.append(step)
+                continue
+
+            # Агрегирующие шаги выполняются строго по порядку после исследования
+            if step.status in (StepStatus.PENDING, StepStatus.RUNNING):
+                if step.status == StepStatus.PENDING and not aggregation_blocked:
+                    ready.append(step)
+                aggregation_blocked = True
+
+        return ready
+
+    def _pending_aggregation_count(self, session: ResearchSession) -> int:
+        """Количество еще не запущенных агрегирующих шагов"""
+        return sum(
+            1
+            for s in session.steps
+            if s.step_type not in EXPLORATION_STEP_TYPES
+            and s.status == StepStatus.PENDING
+        )
+
+    def _expand_frontier(self, session: ResearchSession, step: ResearchStep):
+        """Добавление подзапросов из предложений шага во фронтир"""
+        if step.depth + 1 > self.config["max_depth"]:
+            return
+
+        pending = sum(
+            1
+            for s in session.steps
+            if s.step_type in EXPLORATION_STEP_TYPES and s.status == StepStatus.PENDING
+        )
+        known_queries = [self._query_terms(s.query) for s in session.steps]
+
+        insert_at = next(
+            (
+                i
+                for i, s in enumerate(session.steps)
+                if s.step_type not in EXPLORATION_STEP_TYPES
+            ),
+            len(session.steps),
+        )
+
+        for suggestion in step.next_steps:
+            if pending >= self.config["max_frontier_size"]:
+                break
+
+            terms = self._query_terms(suggestion)
+            if not terms or any(
+                self._jaccard(terms, known) >= self.config["dedup_similarity"]
+                for known in known_queries
+            ):
+                continue
+
+            session.steps.insert(
+                insert_at,
+                ResearchStep(
+                    step_type=ResearchStepType.DEEP_ANALYSIS,
+                    title=f"Подвопрос: {suggestion[:80]}",
+                    description=f"Углубленный анализ подвопроса шага {step.title}",
+                    query=suggestion,
+                    depth=step.depth + 1,
+                    parent_step_id=step.step_id,
+                ),
+            )
+            insert_at += 1
+            pending += 1
+            known_queries.append(terms)
+
+    def _confidence_plateaued(self, history: List[float]) -> bool:
+        """Уверенность перестала расти на протяжении нескольких шагов"""
+        patience = self.config["plateau_patience"]
+        if len(history) <= patience:
+            return False
+
+        best_before = max(history[:-patience])
+        best_now = max(history)
+        return (
+            best_now >= self.config["min_confidence_threshold"]
+            and best_now - best_before < self.config["plateau_delta"]
+        )
+
+    @staticmethod
+    def _query_terms(query: str) -> set:
+        return {term for term in re.findall(r"\w+", query.lower()) if len(term) > 2}
+
+    @staticmethod
+    def _jaccard(left: set, right: set) -> float:
+        if not left or not right:
+            return 0.0
+        return len(left & right) / len(left | right)
+
+    @staticmethod
+    def _estimate_tokens(*texts: str) -> int:
+        """Грубая оценка числа токенов (~4 символа на токен)"""
+        return sum(len(text) for text in texts if text) // 4
+
     async def _extract_research_goal(self, query: str) -> str:
         """Извлечение цели исследования из запроса"""
         system_prompt = """
@@ -344,6 +551,9 @@ class DeepResearchEngine:
             )
 
             step.result = response
+            session.metadata["tokens_used"] = session.metadata.get(
+                "tokens_used", 0
+            ) + self._estimate_tokens(step_prompt, response)
             step.confidence = self._calculate_step_confidence(step)
             step.duration = (datetime.now() - step_start).total_seconds()
 
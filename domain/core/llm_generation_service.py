@@ -3,9 +3,11 @@ LLM Generation Service для AI Assistant MVP
 Использует различные LLM для генерации RFC контента
 """
 
+import asyncio
 import logging
+import os
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from adapters.llm.llm_loader import load_llm
 
@@ -13,12 +15,32 @@ from app.models.generation import GenerationSession, TaskType, UserAnswer
 
 logger = logging.getLogger(__name__)
 
+# Секции RFC: (ключ, описание, нужен ли общий план)
+RFC_SECTIONS: List[Tuple[str, str, bool]] = [
+    ("summary", "Summary - краткое описание", True),
+    ("context", "Context - контекст и мотивация", False),
+    ("problem_statement", "Problem Statement - формулировка проблемы", False),
+    ("goals", "Goals - цели проекта", False),
+    ("architecture_overview", "Architecture Overview - архитектурное решение", True),
+    ("implementation_plan", "Implementation Plan - план реализации", True),
+    ("risk_analysis", "Risk Analysis - анализ рисков", True),
+    ("success_metrics", "Success Metrics - метрики успеха", True),
+]
+
 
 class LLMGenerationService:
     """Сервис для генерации RFC контента с помощью LLM."""
 
     def __init__(self):
         self.llm = load_llm()
+        self.rfc_config = {
+            # Одновременно генерируемых секций (ограничение нагрузки на провайдера)
+            "max_concurrent_sections": int(os.getenv("RFC_MAX_CONCURRENT_SECTIONS", "4")),
+            "section_timeout": float(os.getenv("RFC_SECTION_TIMEOUT", "60")),  # секунды
+            "use_outline": True,  # Сначала краткий план, который видят зависимые секции
+            "outline_timeout": 30,  # секунды
+            "outline_max_tokens": 400,
+        }
         logger.info(
             f"LLM Generation Service initialized with {type(self.llm).__name__}"
         )
@@ -31,40 +53,66 @@ class LLMGenerationService:
 
         Заменяет mock генерацию на реальную AI генерацию,
         используя контекст задачи и ответы пользователя.
+
+        Секции генерируются параллельно (не более max_concurrent_sections
+        одновременно). Секции, которым нужен общий план, ждут его, остальные
+        стартуют сразу. Каждая секция ограничена section_timeout и при ошибке
+        или таймауте берется из шаблона. Все промпты начинаются с одинакового
+        префикса (контекст задачи и план), что позволяет провайдеру
+        переиспользовать кэш промпта.
         """
 
         # Подготавливаем контекст для LLM
         context = await self._prepare_llm_context(session)
+        config = self.rfc_config
+        semaphore = asyncio.Semaphore(max(1, config["max_concurrent_sections"]))
 
-        # Генерируем каждую секцию с помощью LLM
-        enhanced_content = {}
-
-        sections_to_generate = [
-            ("summary", "Summary - краткое описание"),
-            ("context", "Context - контекст и мотивация"),
-            ("problem_statement", "Problem Statement - формулировка проблемы"),
-            ("goals", "Goals - цели проекта"),
-            ("architecture_overview", "Architecture Overview - архитектурное решение"),
-            ("implementation_plan", "Implementation Plan - план реализации"),
-            ("risk_analysis", "Risk Analysis - анализ рисков"),
-            ("success_metrics", "Success Metrics - метрики успеха"),
-        ]
+        outline_task: Optional[asyncio.Task] = None
+        if config["use_outline"] and any(uses for _, _, uses in RFC_SECTIONS):
+            outline_task = asyncio.ensure_future(
+                self._generate_rfc_outline(context, semaphore)
+            )
 
-        for section_key, section_description in sections_to_generate:
-            try:
-                content = await self._generate_section_content(
-                    section_key, section_description, context, session
+        async def generate(section_key: str, section_description: str, uses_outline: bool):
+            outline = await outline_task if (uses_outline and outline_task) else ""
+            shared_prefix = self._build_shared_prefix(context, outline)
+            async with semaphore:
+                return await asyncio.wait_for(
+                    self._generate_section_content(
+                        section_key, section_description, shared_prefix, session
+                    ),
+                    timeout=config["section_timeout"],
                 )
-                enhanced_content[section_key] = content
-                logger.debug(f"Generated {section_key}: {len(content)} characters")
 
-            except Exception as e:
-                logger.warning(f"Failed to generate {section_key} with LLM: {e}")
+        try:
+            results = await asyncio.gather(
+                *(generate(*section) for section in RFC_SECTIONS),
+                return_exceptions=True,
+            )
+        finally:
+            if outline_task and not outline_task.done():
+                outline_task.cancel()
+
+        # Собираем секции в исходном порядке
+        enhanced_content = {}
+
+        for (section_key, section_description, _), result in zip(RFC_SECTIONS, results):
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.TimeoutError):
+                    logger.warning(
+                        f"Generation of {section_key} timed out after "
+                        f"{config['section_timeout']}s, using template"
+                    )
+                else:
+                    logger.warning(f"Failed to generate {section_key} with LLM: {result}")
                 # Fallback на template контент
                 enhanced_content[section_key] = template_vars.get(
                     section_key,
                     f"## {section_description}\n\nКонтент будет сгенерирован...",
                 )
+            else:
+                enhanced_content[section_key] = result
+                logger.debug(f"Generated {section_key}: {len(result)} characters")
 
         # Заполняем остальные секции из шаблона
         for key, value in template_vars.items():
@@ -137,6 +185,47 @@ Q4: [вопрос 4] (опционально)
 """
         return context.strip()
 
+    def _build_shared_prefix(self, context: str, outline: str = "") -> str:
+        """
+        Общий префикс промптов секций RFC.
+
+        Одинаковое начало промптов (роль, контекст задачи, план) позволяет
+        провайдеру кэшировать префикс; инструкции секции идут после него.
+        """
+        prefix = f"""Ты - опытный архитектор программного обеспечения и пишешь RFC документ.
+
+Контекст:
+{context}"""
+        if outline:
+            prefix += f"""
+
+План RFC (согласуй секцию с ним):
+{outline}"""
+        return prefix
+
+    async def _generate_rfc_outline(
+        self, context: str, semaphore: asyncio.Semaphore
+    ) -> str:
+        """Генерирует краткий общий план RFC; пустая строка при ошибке."""
+
+        prompt = f"""{self._build_shared_prefix(context)}
+
+Составь краткий план RFC: ключевое решение, 3-5 основных компонентов и 3 главных риска.
+Не более 10 строк, только пункты списка.
+"""
+        try:
+            async with semaphore:
+                outline = await asyncio.wait_for(
+                    self.llm.generate(
+                        prompt, max_tokens=self.rfc_config["outline_max_tokens"]
+                    ),
+                    timeout=self.rfc_config["outline_timeout"],
+                )
+            return outline.strip()
+        except Exception as e:
+            logger.warning(f"Failed to generate RFC outline, sections continue without it: {e}")
+            return ""
+
     async def _generate_section_content(
         self,
         section_key: str,
@@ -144,15 +233,17 @@ Q4: [вопрос 4] (опционально)
         context: str,
         session: GenerationSession,
     ) -> str:
-        """Генерирует контент для конкретной секции RFC."""
+        """
+        Генерирует контент для конкретной секции RFC.
+
+        context - общий префикс промпта (см. _build_shared_prefix),
+        инструкции секции добавляются после него.
+        """
 
         prompts = {
-            "summary": f"""
+            "summary": """
 Напиши профессиональное Summary для RFC документа.
 
-Контекст:
-{context}
-
 Требования:
 - 2-3 предложения
 - Четко объясни ЧТО решается
@@ -161,12 +252,9 @@ Q4: [вопрос 4] (опционально)
 
 Пример: "Данный RFC описывает архитектуру системы уведомлений для увеличения engagement пользователей. Решение основано на микросервисной архитектуре и обеспечивает масштабируемость до 100K+ пользователей."
 """,
-            "context": f"""
+            "context": """
 Напиши секцию Context для RFC документа.
 
-Контекст:
-{context}
-
 Структура:
 ### Текущая ситуация
 [описание проблемы]
@@ -182,12 +270,9 @@ Q4: [вопрос 4] (опционально)
 - Четкая мотивация  
 - Связь с бизнес-целями
 """,
-            "problem_statement": f"""
+            "problem_statement": """
 Сформулируй четкое Problem Statement для RFC.
 
-Контекст:
-{context}
-
 Требования:
 - Начни с "**Проблема:**"
 - Одно четкое предложение
@@ -196,12 +281,9 @@ Q4: [вопрос 4] (опционально)
 
 Пример: "**Проблема:** Отсутствие централизованной системы уведомлений приводит к снижению retention на 15% и усложняет персонализацию контента."
 """,
-            "goals": f"""
+            "goals": """
 Определи Goals для RFC документа.
 
-Контекст:
-{context}
-
 Структура:
 **Основные цели:**
 - [цель 1]
@@ -217,12 +299,9 @@ Q4: [вопрос 4] (опционально)
 - Критерии должны быть измеримыми
 - Связь с бизнес-ценностью
 """,
-            "architecture_overview": f"""
+            "architecture_overview": """
 Опиши Architecture Overview для RFC.
 
-Контекст:
-{context}
-
 Включи:
 1. Высокоуровневую архитектуру
 2. Основные компоненты
@@ -234,12 +313,9 @@ Q4: [вопрос 4] (опционально)
 - Четкое разделение ответственности
 - Масштабируемость и надежность
 """,
-            "implementation_plan": f"""
+            "implementation_plan": """
 Создай Implementation Plan для RFC.
 
-Контекст:
-{context}
-
 Структура:
 **Фаза 1: [название] (временные рамки)**
 - [задача 1]
@@ -258,12 +334,9 @@ Q4: [вопрос 4] (опционально)
 - Четкие deliverables
 - Управление рисками
 """,
-            "risk_analysis": f"""
+            "risk_analysis": """
 Проведи Risk Analysis для RFC.
 
-Контекст:
-{context}
-
 Структура:
 **Высокие риски:**
 - [риск 1]: [описание и митигация]
@@ -280,12 +353,9 @@ Q4: [вопрос 4] (опционально)
 - Конкретные меры митигации
 - Планы отката
 """,
-            "success_metrics": f"""
+            "success_metrics": """
 Определи Success Metrics для RFC.
 
-Контекст:
-{context}
-
 Структура:
 **Technical Metrics:**
 - [метрика 1]: [целевое значение]
@@ -323,14 +393,11 @@ Q4: [вопрос 4] (опционально)
 """,
         }
 
-        prompt = prompts.get(
+        instructions = prompts.get(
             section_key,
             f"""
 Напиши секцию "{section_description}" для RFC документа.
 
-Контекст:
-{context}
-
 Требования:
 - Профессиональный тон
 - Конкретика без воды
@@ -338,6 +405,8 @@ Q4: [вопрос 4] (опционально)
 """,
         )
 
+        prompt = f"{context}\n\n{instructions.strip()}\n"
+
         response = await self.llm.generate(prompt)
         return response.strip()
 
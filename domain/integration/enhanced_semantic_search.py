@@ -5,11 +5,15 @@ Enhanced Semantic Search Service
 
 import asyncio
 import time
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 import logging
 
+from adapters.vectorstore.collections import get_collection_manager
+from adapters.vectorstore.lexical_index import LexicalIndexStore, fuse_ranked_items
+from app.core.async_utils import create_background_task
+
 from .datasource_manager import get_datasource_manager, DataSourceManager
 from .datasource_interface import DataSourceInterface, DataSourceType, QueryResult
 from .vector_search_service import VectorSearchService, get_vector_search_service
@@ -49,6 +53,11 @@ class SemanticSearchConfig:
     
     # Веса для ранжирования
     source_weights: Dict[str, float] = field(default_factory=dict)
+    
+    # Гибридный поиск: BM25 и векторный поиск объединяются через reciprocal rank fusion
+    lexical_weight: float = 1.0
+    vector_weight: float = 1.0
+    rrf_k: int = 60
 
 
 @dataclass
@@ -81,6 +90,7 @@ class EnhancedSemanticSearch:
     
     Возможности:
     - Параллельный поиск по выбранным источникам
+    - Гибридный поиск: BM25 по локальному инвертированному индексу + векторы
     - Интеллектуальное ранжирование результатов
     - Конфигурируемые веса источников
     - UI интеграция для выбора источников
@@ -89,6 +99,8 @@ class EnhancedSemanticSearch:
     def __init__(self):
         self.datasource_manager: Optional[DataSourceManager] = None
         self.vector_search: Optional[VectorSearchService] = None
+        self.lexical: Optional[LexicalIndexStore] = None
+        self._source_loads: Dict[str, asyncio.Task] = {}
         
     async def initialize(self) -> bool:
         """Инициализация сервиса"""
@@ -101,6 +113,9 @@ class EnhancedSemanticSearch:
             # Инициализация векторного поиска
             self.vector_search = get_vector_search_service()
             
+            # Лексический индекс общий с коллекциями: источники индексируются по source_id
+            self.lexical = get_collection_manager().lexical
+            
             logger.info("✅ Enhanced Semantic Search initialized")
             return True
             
@@ -267,18 +282,23 @@ class EnhancedSemanticSearch:
         async def search_single_source(source: DataSourceInterface) -> List[SearchCandidate]:
             """Поиск в одном источнике"""
             try:
-                candidates = []
-                
-                # Для SQL источников используем полнотекстовый поиск
-                if source.config.source_type in [DataSourceType.CLICKHOUSE, DataSourceType.YDB]:
-                    candidates.extend(await self._search_sql_source(query, source, config))
-                
-                # Дополнительно используем векторный поиск если доступен
+                # Лексический и векторный поиск выполняются параллельно, каждый со своим весом;
+                # пока индекс источника не наполнен, SQL источники ищутся в самой базе
+                searches = []
+                if self._has_lexical_rows(source):
+                    searches.append((self._search_lexical_source(query, source, config), config.lexical_weight))
+                elif source.config.source_type in [DataSourceType.CLICKHOUSE, DataSourceType.YDB]:
+                    self._schedule_source_load(source)
+                    searches.append((self._search_sql_source(query, source, config), config.lexical_weight))
                 if self.vector_search and config.hybrid_search:
-                    vector_candidates = await self._search_vector_source(query, source, config)
-                    candidates.extend(vector_candidates)
+                    searches.append((self._search_vector_source(query, source, config), config.vector_weight))
                 
-                return candidates
+                if not searches:
+                    return []
+                rankings = await asyncio.gather(*(search for search, _ in searches))
+                return self._fuse_candidates(
+                    [(ranking, weight) for ranking, (_, weight) in zip(rankings, searches)], config
+                )
                 
             except Exception as e:
                 logger.error(f"❌ Search failed for source {source.config.source_id}: {e}")
@@ -298,16 +318,24 @@ class EnhancedSemanticSearch:
         
         return all_candidates
     
+    def _has_lexical_rows(self, source: DataSourceInterface) -> bool:
+        """Наполнен ли лексический индекс источника (load_source_index, index_source_rows)"""
+        return bool(self.lexical) and self.lexical.info(source.config.source_id)["points_count"] > 0
+    
     async def _search_sql_source(
         self, 
         query: str, 
         source: DataSourceInterface, 
         config: SemanticSearchConfig
     ) -> List[SearchCandidate]:
-        """Поиск в SQL источнике данных"""
+        """
+        Поиск в SQL источнике данных (ILIKE по таблице источника)
+        
+        Используется, пока источник не загружен в лексический индекс
+        (load_source_index запускается в фоне при первом поиске).
+        """
         try:
-            # Базовый полнотекстовый поиск
-            # В реальной реализации здесь будет более сложная логика
+            escaped = query.replace("'", "''")
             search_query = f"""
             SELECT 
                 id,
@@ -316,8 +344,8 @@ class EnhancedSemanticSearch:
                 score,
                 metadata
             FROM documents 
-            WHERE content ILIKE '%{query}%' 
-               OR title ILIKE '%{query}%'
+            WHERE content ILIKE '%{escaped}%' 
+               OR title ILIKE '%{escaped}%'
             LIMIT {config.limit}
             """
             
@@ -343,6 +371,131 @@ class EnhancedSemanticSearch:
             logger.error(f"❌ SQL search failed for {source.config.source_id}: {e}")
             return []
     
+    async def _search_lexical_source(
+        self, 
+        query: str, 
+        source: DataSourceInterface, 
+        config: SemanticSearchConfig
+    ) -> List[SearchCandidate]:
+        """
+        BM25 поиск по локальному инвертированному индексу источника
+        
+        Заменяет ILIKE '%query%' по таблицам источника (_search_sql_source),
+        как только источник загружен через index_source_rows: такие сканы не
+        используют индексы, а индекс находит точные идентификаторы (ключи
+        задач, имена функций, коды ошибок) без обращения к источнику.
+        """
+        try:
+            if not self.lexical:
+                return []
+            
+            hits = await asyncio.to_thread(
+                self.lexical.search,
+                source.config.source_id,
+                query,
+                config.limit,
+                self._build_payload_filters(config)
+            )
+            
+            candidates = []
+            for hit in hits:
+                payload = hit["payload"]
+                content = payload.get("text", "")
+                candidate = SearchCandidate(
+                    id=str(payload.get("row_id", hit["id"])),
+                    title=payload.get("title", ""),
+                    content=content,
+                    source_id=source.config.source_id,
+                    source_type=source.config.source_type,
+                    score=hit["score"],
+                    metadata=payload.get("metadata", {}),
+                    snippet=content[:200] + "..." if config.include_snippets else None
+                )
+                candidates.append(candidate)
+            
+            return candidates
+            
+        except Exception as e:
+            logger.error(f"❌ Lexical search failed for {source.config.source_id}: {e}")
+            return []
+    
+    async def index_source_rows(self, source: DataSourceInterface, rows: List[Dict[str, Any]]) -> int:
+        """
+        Инкрементальное обновление лексического индекса источника при загрузке
+        
+        Args:
+            source: Источник данных
+            rows: Строки с полями id, title, content, metadata (повторная
+                загрузка строки с тем же id заменяет её)
+            
+        Returns:
+            Количество проиндексированных строк
+        """
+        if not self.lexical:
+            await self.initialize()
+        
+        payloads = []
+        for row in rows:
+            metadata = row.get("metadata") or {}
+            payloads.append({
+                "row_id": str(row.get("id", "")),
+                "title": row.get("title", ""),
+                "text": row.get("content", ""),
+                "metadata": metadata,
+                # Поля фильтров _build_payload_filters
+                "source_type": source.config.source_type.value,
+                "updated_at": metadata.get("updated_at"),
+            })
+        
+        await asyncio.to_thread(
+            self.lexical.upsert, source.config.source_id, [p["row_id"] for p in payloads], payloads
+        )
+        return len(payloads)
+    
+    def _schedule_source_load(self, source: DataSourceInterface) -> None:
+        """Фоновая загрузка SQL источника в лексический индекс (один раз на источник)"""
+        source_id = source.config.source_id
+        load = self._source_loads.get(source_id)
+        if load is not None and not (load.done() and (load.cancelled() or load.exception())):
+            return
+        self._source_loads[source_id] = create_background_task(
+            self.load_source_index(source), name=f"lexical_load_{source_id}"
+        )
+    
+    async def load_source_index(self, source: DataSourceInterface, batch_size: int = 1000) -> int:
+        """
+        Загрузка всех строк SQL источника в лексический индекс постранично
+        
+        После загрузки поиск по источнику идет через BM25 вместо ILIKE.
+        
+        Returns:
+            Количество проиндексированных строк
+        """
+        indexed = 0
+        offset = 0
+        while True:
+            result = await source.query(f"""
+            SELECT id, title, content, metadata
+            FROM documents
+            ORDER BY id
+            LIMIT {batch_size} OFFSET {offset}
+            """)
+            rows = result.data
+            if rows:
+                indexed += await self.index_source_rows(source, rows)
+            if len(rows) < batch_size:
+                break
+            offset += batch_size
+        
+        logger.info(f"✅ Lexical index of {source.config.source_id} loaded: {indexed} rows")
+        return indexed
+    
+    async def remove_source_rows(self, source: DataSourceInterface, row_ids: List[str]) -> int:
+        """Удаление строк источника из лексического индекса"""
+        if not self.lexical:
+            await self.initialize()
+        return await asyncio.to_thread(self.lexical.delete, source.config.source_id, [str(i) for i in row_ids])
+    
     async def _search_vector_source(
         self, 
         query: str, 
@@ -362,7 +515,8 @@ class EnhancedSemanticSearch:
                 collections=[source.config.source_id],
                 limit=config.limit,
                 include_snippets=config.include_snippets,
-                hybrid_search=True
+                hybrid_search=True,
+                filters=self._build_payload_filters(config)
             )
             
             vector_results = await self.vector_search.search(search_request)
@@ -387,6 +541,50 @@ class EnhancedSemanticSearch:
             logger.error(f"❌ Vector search failed for {source.config.source_id}: {e}")
             return []
     
+    def _fuse_candidates(
+        self, 
+        rankings: List[Tuple[List[SearchCandidate], float]], 
+        config: SemanticSearchConfig
+    ) -> List[SearchCandidate]:
+        """
+        Объединение лексического и векторного ранжирования источника (RRF)
+        
+        Скор кандидата - сумма weight / (rrf_k + rank) по ранжированиям, в
+        которых он найден; сырые скоры BM25 и косинуса не сравниваются.
+        При совпадении берется кандидат последнего ранжирования (векторного,
+        с более полными метаданными).
+        """
+        fused = fuse_ranked_items(
+            [
+                (sorted(ranking, key=lambda c: c.score, reverse=True), weight)
+                for ranking, weight in rankings
+            ],
+            key=lambda c: c.id,
+            k=config.rrf_k
+        )
+        
+        candidates = []
+        for candidate, score in fused:
+            candidate.score = score
+            candidates.append(candidate)
+        return candidates
+    
+    def _build_payload_filters(self, config: SemanticSearchConfig) -> Optional[Dict[str, Any]]:
+        """Фильтры конфигурации в DSL векторного хранилища (применяются индексами payload)"""
+        filters: Dict[str, Any] = {}
+        if config.source_types:
+            filters["source_type"] = [source_type.value for source_type in config.source_types]
+        
+        updated_at = {}
+        if config.date_from:
+            updated_at["gte"] = config.date_from.isoformat()
+        if config.date_to:
+            updated_at["lte"] = config.date_to.isoformat()
+        if updated_at:
+            filters["updated_at"] = updated_at
+        
+        return filters or None
+    
     async def _rank_results(
         self, 
         query: str, 
@@ -7,6 +7,7 @@ import logging
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
+from adapters.vectorstore.completion_index import get_completion_index
 from adapters.vectorstore.embeddings import get_embeddings_service
 
 from app.core.async_utils import (AsyncTimeouts, async_retry, safe_gather,
@@ -385,47 +386,20 @@ class EnhancedVectorSearchService:
 
         Args:
             partial_query: Partial search query
-            user_context: User context for personalization
+            user_context: User context for personalization ("sources" limits
+                completions to those data sources, "common_topics" fills up)
             max_suggestions: Maximum number of suggestions
 
         Returns:
             List of suggested search queries
         """
         try:
-            suggestions = []
-
-            # Simple suggestion logic (can be enhanced with ML)
-            query_lower = partial_query.lower()
-
-            # Common completions based on patterns
-            suggestion_patterns = {
-                "how to": ["implement", "configure", "setup", "deploy", "debug"],
-                "docker": ["container", "compose", "build", "deployment", "networking"],
-                "api": ["design", "documentation", "testing", "security", "versioning"],
-                "database": [
-                    "design",
-                    "optimization",
-                    "migration",
-                    "backup",
-                    "indexing",
-                ],
-                "python": [
-                    "best practices",
-                    "frameworks",
-                    "testing",
-                    "deployment",
-                    "performance",
-                ],
-            }
-
-            for pattern, completions in suggestion_patterns.items():
-                if pattern in query_lower:
-                    for completion in completions:
-                        suggestion = f"{partial_query} {completion}"
-                        suggestions.append(suggestion)
-                        if len(suggestions) >= max_suggestions:
-                            break
-                    break
+            # Prefix lookup in the completion index (titles, headings, popular queries)
+            sources = user_context.get("sources") if user_context else None
+            suggestions = [
+                entry["completion"]
+                for entry in get_completion_index().suggest(partial_query, max_suggestions, sources)
+            ]
 
             # Add context-based suggestions if available
             if user_context and len(suggestions) < max_suggestions:
@@ -12,6 +12,8 @@ from typing import Any, Dict, List, Optional
 
 from fastapi import UploadFile
 
+from adapters.vectorstore.completion_index import get_completion_index
+
 # Импортируем backend сервис с полной функциональностью
 try:
     from backend.search_service import SearchService as BackendSearchService
@@ -288,8 +290,11 @@ class SearchService(SearchServiceInterface):
                 query=query, sources=sources, limit=limit
             )
 
-        # Fallback
-        return [f"{query} suggestion {i}" for i in range(1, limit + 1)]
+        # Префиксный индекс автодополнения (заголовки, популярные запросы)
+        return [
+            entry["completion"]
+            for entry in get_completion_index().suggest(query, limit, sources)
+        ]
 
     async def get_source_statistics(self) -> Dict[str, Any]:
         """Получение статистики по источникам"""
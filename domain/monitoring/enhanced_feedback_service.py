@@ -11,12 +11,14 @@ Enhanced Feedback Service - Расширенная система обратно
 """
 
 import asyncio
+import bisect
 import json
 import logging
+from collections import Counter, deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
 from uuid import uuid4
 
 # Используем паттерны из Context7 документации для WebSocket PubSub
@@ -127,6 +129,130 @@ class FeedbackSummary:
     updated_at: datetime = field(default_factory=datetime.now)
 
 
+@dataclass
+class ContentAggregate:
+    """Инкрементальные агрегаты обратной связи по контенту (O(1) на элемент)"""
+
+    content_id: str = ""
+    content_type: ContentType = ContentType.AI_RESPONSE
+
+    total_items: int = 0
+    total_likes: int = 0
+    total_dislikes: int = 0
+    total_comments: int = 0
+    rating_sum: int = 0
+    rating_count: int = 0
+    rating_histogram: Counter = field(default_factory=Counter)
+    sentiment_counts: Counter = field(default_factory=Counter)
+    tag_counts: Counter = field(default_factory=Counter)
+
+    first_feedback_at: Optional[datetime] = None
+    last_feedback_at: Optional[datetime] = None
+
+    @classmethod
+    def from_items(
+        cls, content_id: str, items: Iterable[FeedbackItem]
+    ) -> "ContentAggregate":
+        aggregate = cls(content_id=content_id)
+        for item in items:
+            aggregate.add(item)
+        return aggregate
+
+    def add(self, feedback: FeedbackItem) -> None:
+        self._apply(feedback, 1)
+        if self.first_feedback_at is None or feedback.created_at < self.first_feedback_at:
+            self.first_feedback_at = feedback.created_at
+        if self.last_feedback_at is None or feedback.created_at > self.last_feedback_at:
+            self.last_feedback_at = feedback.created_at
+
+    def remove(self, feedback: FeedbackItem) -> None:
+        # Временные границы не пересчитываются: они описывают всю историю
+        self._apply(feedback, -1)
+
+    def merge(self, other: "ContentAggregate") -> None:
+        """Добавление вклада другого агрегата (например, сжатых элементов)"""
+        if self.total_items == 0:
+            self.content_type = other.content_type
+        self.total_items += other.total_items
+        self.total_likes += other.total_likes
+        self.total_dislikes += other.total_dislikes
+        self.total_comments += other.total_comments
+        self.rating_sum += other.rating_sum
+        self.rating_count += other.rating_count
+        self.rating_histogram.update(other.rating_histogram)
+        self.sentiment_counts.update(other.sentiment_counts)
+        self.tag_counts.update(other.tag_counts)
+
+        for moment in (other.first_feedback_at, other.last_feedback_at):
+            if moment is None:
+                continue
+            if self.first_feedback_at is None or moment < self.first_feedback_at:
+                self.first_feedback_at = moment
+            if self.last_feedback_at is None or moment > self.last_feedback_at:
+                self.last_feedback_at = moment
+
+    def _apply(self, feedback: FeedbackItem, sign: int) -> None:
+        self.content_type = feedback.content_type
+        self.total_items += sign
+
+        if feedback.value:
+            if feedback.feedback_type == FeedbackType.LIKE:
+                self.total_likes += sign
+            elif feedback.feedback_type == FeedbackType.DISLIKE:
+                self.total_dislikes += sign
+
+        if feedback.comment:
+            self.total_comments += sign
+
+        if feedback.rating:
+            self.rating_sum += sign * feedback.rating
+            self.rating_count += sign
+            self.rating_histogram[feedback.rating] += sign
+
+        if feedback.sentiment_score:
+            self.sentiment_counts[feedback.sentiment_score.value] += sign
+
+        for tag in feedback.tags:
+            self.tag_counts[tag] += sign
+
+    def to_summary(self) -> FeedbackSummary:
+        summary = FeedbackSummary(
+            content_id=self.content_id,
+            content_type=self.content_type,
+            total_likes=self.total_likes,
+            total_dislikes=self.total_dislikes,
+            total_comments=self.total_comments,
+        )
+        if self.total_items <= 0:
+            return summary
+
+        total_reactions = self.total_likes + self.total_dislikes
+        if total_reactions > 0:
+            summary.like_ratio = self.total_likes / total_reactions
+
+        if self.rating_count > 0:
+            summary.avg_rating = self.rating_sum / self.rating_count
+
+        summary.sentiment_distribution = {
+            sentiment: count
+            for sentiment, count in self.sentiment_counts.items()
+            if count > 0
+        }
+        summary.popular_tags = [
+            tag for tag, count in self.tag_counts.most_common(5) if count > 0
+        ]
+
+        summary.last_feedback_at = self.last_feedback_at
+        if self.first_feedback_at:
+            time_span = (
+                datetime.now() - self.first_feedback_at
+            ).total_seconds() / 3600
+            if time_span > 0:
+                summary.feedback_velocity = self.total_items / time_span
+
+        return summary
+
+
 @dataclass
 class FeedbackNotification:
     """Уведомление о новой обратной связи"""
@@ -150,10 +276,18 @@ class EnhancedFeedbackService:
         # Хранилища данных
         self.feedback_items: Dict[str, FeedbackItem] = {}
         self.content_summaries: Dict[str, FeedbackSummary] = {}
-        self.user_feedback_history: Dict[str, List[str]] = {}
+        self.user_feedback_history: Dict[str, Deque[str]] = {}
+
+        # Инкрементальные агрегаты (активные элементы) и вторичные индексы
+        self.content_aggregates: Dict[str, ContentAggregate] = {}
+        # Вклад активных элементов, удаленных при сжатии сырых данных
+        self._compacted_aggregates: Dict[str, ContentAggregate] = {}
+        self._content_index: Dict[str, Deque[str]] = {}
+        self._time_index: Deque[Tuple[datetime, str]] = deque()
 
         # Конфигурация
         self.config = {
+            "max_raw_items": 50000,  # Хранение сырых элементов, старые сжимаются в агрегаты
             "max_comment_length": 2000,
             "auto_moderation_enabled": True,
             "sentiment_analysis_enabled": True,
@@ -227,17 +361,19 @@ class EnhancedFeedbackService:
                     feedback.comment
                 )
 
-            # Сохранение
-            self.feedback_items[feedback.feedback_id] = feedback
+            # Сохранение и индексация
+            self._store_feedback(feedback)
 
-            # Обновление истории пользователя
-            if user_id not in self.user_feedback_history:
-                self.user_feedback_history[user_id] = []
-            self.user_feedback_history[user_id].append(feedback.feedback_id)
+            # Инкрементальное обновление агрегатов
+            if feedback.status == FeedbackStatus.ACTIVE:
+                self._get_aggregate(content_id, content_type).add(feedback)
 
             # Обновление сводки контента
             await self._update_content_summary(content_id, content_type)
 
+            # Сжатие старых сырых элементов
+            self._compact_feedback()
+
             # Обновление метрик
             self._update_metrics(feedback)
 
@@ -267,15 +403,14 @@ class EnhancedFeedbackService:
             if self._is_cache_valid(cache_key):
                 return self._summary_cache[cache_key]
 
-            # Фильтрация feedback по контенту
+            # Фильтрация feedback по контенту через индекс
             content_feedback = [
                 fb
-                for fb in self.feedback_items.values()
-                if fb.content_id == content_id
-                and (include_moderated or not fb.is_moderated)
+                for fb in self._iter_content_feedback(content_id)
+                if include_moderated or not fb.is_moderated
             ]
 
-            if not content_feedback:
+            if not content_feedback and content_id not in self._compacted_aggregates:
                 return FeedbackSummary(content_id=content_id)
 
             # Вычисление сводки
@@ -319,23 +454,16 @@ class EnhancedFeedbackService:
             if user_id not in self.user_feedback_history:
                 return []
 
-            feedback_ids = self.user_feedback_history[user_id]
-            user_feedback = [
-                self.feedback_items[fb_id]
-                for fb_id in feedback_ids
-                if fb_id in self.feedback_items
-            ]
-
-            # Фильтрация по типу контента
-            if content_type:
-                user_feedback = [
-                    fb for fb in user_feedback if fb.content_type == content_type
-                ]
-
-            # Сортировка по дате (новые первыми)
-            user_feedback.sort(key=lambda x: x.created_at, reverse=True)
+            # История хранится в порядке поступления: новые - в конце
+            user_feedback = []
+            for fb_id in reversed(self.user_feedback_history[user_id]):
+                if len(user_feedback) >= limit:
+                    break
+                fb = self.feedback_items.get(fb_id)
+                if fb and (not content_type or fb.content_type == content_type):
+                    user_feedback.append(fb)
 
-            return user_feedback[:limit]
+            return user_feedback
 
         except Exception as e:
             logger.error(f"❌ Error getting user feedback history: {e}")
@@ -354,6 +482,7 @@ class EnhancedFeedbackService:
                 return False
 
             feedback = self.feedback_items[feedback_id]
+            was_active = feedback.status == FeedbackStatus.ACTIVE
 
             if action == "hide":
                 feedback.status = FeedbackStatus.HIDDEN
@@ -367,6 +496,17 @@ class EnhancedFeedbackService:
             feedback.moderator_id = moderator_id
             feedback.updated_at = datetime.now()
 
+            # Корректировка агрегатов при смене активности
+            is_active = feedback.status == FeedbackStatus.ACTIVE
+            if was_active != is_active:
+                aggregate = self._get_aggregate(
+                    feedback.content_id, feedback.content_type
+                )
+                if is_active:
+                    aggregate.add(feedback)
+                else:
+                    aggregate.remove(feedback)
+
             # Обновление сводки контента
             await self._update_content_summary(
                 feedback.content_id, feedback.content_type
@@ -394,12 +534,11 @@ class EnhancedFeedbackService:
         try:
             cutoff_date = datetime.now() - time_period
 
-            # Фильтрация feedback по времени и типу
+            # Фильтрация feedback по времени (индекс) и типу
             filtered_feedback = [
                 fb
-                for fb in self.feedback_items.values()
-                if fb.created_at >= cutoff_date
-                and (not content_type or fb.content_type == content_type)
+                for fb in self._iter_feedback_since(cutoff_date)
+                if not content_type or fb.content_type == content_type
             ]
 
             if not filtered_feedback:
@@ -551,94 +690,107 @@ class EnhancedFeedbackService:
             return SentimentScore.NEUTRAL
 
     async def _update_content_summary(self, content_id: str, content_type: ContentType):
-        """Обновление сводки контента"""
-        content_feedback = [
-            fb
-            for fb in self.feedback_items.values()
-            if fb.content_id == content_id and fb.status == FeedbackStatus.ACTIVE
-        ]
-
-        summary = await self._calculate_content_summary(content_id, content_feedback)
+        """Обновление сводки контента из инкрементальных агрегатов"""
+        summary = self._get_aggregate(content_id, content_type).to_summary()
         summary.content_type = content_type
 
         self.content_summaries[content_id] = summary
 
         # Очистка кэша для этого контента
-        keys_to_remove = [
-            key for key in self._summary_cache.keys() if key.startswith(content_id)
-        ]
-        for key in keys_to_remove:
-            self._summary_cache.pop(key, None)
-            self._last_cache_update.pop(key, None)
+        for include_comments in (True, False):
+            for include_moderated in (True, False):
+                cache_key = f"{content_id}_{include_comments}_{include_moderated}"
+                self._summary_cache.pop(cache_key, None)
+                self._last_cache_update.pop(cache_key, None)
+
+    def _get_aggregate(
+        self, content_id: str, content_type: ContentType
+    ) -> ContentAggregate:
+        """Получение (или создание) агрегата контента"""
+        aggregate = self.content_aggregates.get(content_id)
+        if aggregate is None:
+            aggregate = ContentAggregate(content_id=content_id, content_type=content_type)
+            self.content_aggregates[content_id] = aggregate
+        return aggregate
+
+    def _store_feedback(self, feedback: FeedbackItem):
+        """Сохранение элемента и обновление вторичных индексов"""
+        self.feedback_items[feedback.feedback_id] = feedback
+
+        self.user_feedback_history.setdefault(feedback.user_id, deque()).append(
+            feedback.feedback_id
+        )
+        self._content_index.setdefault(feedback.content_id, deque()).append(
+            feedback.feedback_id
+        )
+
+        entry = (feedback.created_at, feedback.feedback_id)
+        if self._time_index and entry[0] < self._time_index[-1][0]:
+            # Элемент с более ранней меткой времени - сохраняем сортировку
+            bisect.insort(self._time_index, entry)
+        else:
+            self._time_index.append(entry)
+
+    def _compact_feedback(self):
+        """Удаление старейших сырых элементов сверх лимита (агрегаты сохраняются)"""
+        max_items = self.config["max_raw_items"]
+        while len(self.feedback_items) > max_items and self._time_index:
+            _, feedback_id = self._time_index.popleft()
+            feedback = self.feedback_items.pop(feedback_id, None)
+            if feedback is None:
+                continue
+
+            if feedback.status == FeedbackStatus.ACTIVE:
+                compacted = self._compacted_aggregates.get(feedback.content_id)
+                if compacted is None:
+                    compacted = ContentAggregate(content_id=feedback.content_id)
+                    self._compacted_aggregates[feedback.content_id] = compacted
+                compacted.add(feedback)
+
+            for index, key in (
+                (self.user_feedback_history, feedback.user_id),
+                (self._content_index, feedback.content_id),
+            ):
+                ids = index.get(key)
+                if not ids:
+                    continue
+                if ids[0] == feedback_id:
+                    ids.popleft()
+                else:
+                    ids.remove(feedback_id)
+                if not ids:
+                    del index[key]
+
+    def _iter_content_feedback(self, content_id: str) -> Iterable[FeedbackItem]:
+        """Сырые элементы контента через индекс по content_id"""
+        for feedback_id in self._content_index.get(content_id, ()):
+            feedback = self.feedback_items.get(feedback_id)
+            if feedback:
+                yield feedback
+
+    def _iter_feedback_since(self, cutoff: datetime) -> Iterable[FeedbackItem]:
+        """Сырые элементы, созданные не раньше cutoff, через временной индекс"""
+        # Обход с конца: позиционный доступ к deque стоит O(n)
+        recent_ids = []
+        for created_at, feedback_id in reversed(self._time_index):
+            if created_at < cutoff:
+                break
+            recent_ids.append(feedback_id)
+
+        for feedback_id in reversed(recent_ids):
+            feedback = self.feedback_items.get(feedback_id)
+            if feedback:
+                yield feedback
 
     async def _calculate_content_summary(
         self, content_id: str, feedback_list: List[FeedbackItem]
     ) -> FeedbackSummary:
-        """Вычисление сводки контента"""
-        summary = FeedbackSummary(content_id=content_id)
-
-        if not feedback_list:
-            return summary
-
-        # Подсчет лайков/дизлайков
-        likes = [
-            fb
-            for fb in feedback_list
-            if fb.feedback_type == FeedbackType.LIKE and fb.value
-        ]
-        dislikes = [
-            fb
-            for fb in feedback_list
-            if fb.feedback_type == FeedbackType.DISLIKE and fb.value
-        ]
-
-        summary.total_likes = len(likes)
-        summary.total_dislikes = len(dislikes)
-
-        total_reactions = summary.total_likes + summary.total_dislikes
-        if total_reactions > 0:
-            summary.like_ratio = summary.total_likes / total_reactions
-
-        # Подсчет комментариев
-        comments = [fb for fb in feedback_list if fb.comment]
-        summary.total_comments = len(comments)
-
-        # Средний рейтинг
-        ratings = [fb.rating for fb in feedback_list if fb.rating]
-        if ratings:
-            summary.avg_rating = sum(ratings) / len(ratings)
-
-        # Распределение тональности
-        sentiments = [
-            fb.sentiment_score.value for fb in feedback_list if fb.sentiment_score
-        ]
-        summary.sentiment_distribution = {
-            sentiment: sentiments.count(sentiment) for sentiment in set(sentiments)
-        }
-
-        # Популярные теги
-        all_tags = []
-        for fb in feedback_list:
-            all_tags.extend(fb.tags)
-
-        tag_counts = {tag: all_tags.count(tag) for tag in set(all_tags)}
-        summary.popular_tags = sorted(
-            tag_counts.items(), key=lambda x: x[1], reverse=True
-        )[:5]
-        summary.popular_tags = [tag for tag, count in summary.popular_tags]
-
-        # Временные метрики
-        if feedback_list:
-            summary.last_feedback_at = max(fb.created_at for fb in feedback_list)
-
-            # Скорость обратной связи (feedback в час)
-            time_span = (
-                datetime.now() - min(fb.created_at for fb in feedback_list)
-            ).total_seconds() / 3600
-            if time_span > 0:
-                summary.feedback_velocity = len(feedback_list) / time_span
-
-        return summary
+        """Вычисление сводки контента по сырым элементам и сжатой истории"""
+        aggregate = ContentAggregate.from_items(content_id, feedback_list)
+        compacted = self._compacted_aggregates.get(content_id)
+        if compacted:
+            aggregate.merge(compacted)
+        return aggregate.to_summary()
 
     def _update_metrics(self, feedback: FeedbackItem):
         """Обновление метрик"""
@@ -3,15 +3,17 @@ AI Assistant MVP - Monitoring Middleware
 Comprehensive request monitoring and metrics collection for FastAPI
 """
 
-import time
 import logging
-import uuid
-from typing import Callable, Dict, Any
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+import os
+import random
+from functools import lru_cache
+from typing import Any, Dict, Optional, Set, Tuple
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from prometheus_client import Counter, Histogram, Gauge, Info
 
+from app.core.request_context import (UNMATCHED_ROUTE, RequestContext,
+                                      get_request_context, normalize_path,
+                                      route_template)
 from infra.monitoring.apm import apm_manager, active_request_context, record_http_metrics
 
 logger = logging.getLogger(__name__)
@@ -106,64 +108,103 @@ APP_INFO.info({
     'service': 'ai-assistant-mvp'
 })
 
-class MonitoringMiddleware(BaseHTTPMiddleware):
-    """Comprehensive monitoring middleware for FastAPI applications."""
+# API path prefixes mapped to business features
+FEATURE_MAPPING = (
+    ('/api/v1/generate', 'rfc_generation'),
+    ('/api/v1/search', 'semantic_search'),
+    ('/api/v1/vector-search', 'vector_search'),
+    ('/api/v1/documentation', 'code_documentation'),
+    ('/api/v1/ai-enhancement', 'ai_enhancement'),
+    ('/api/v1/auth', 'authentication'),
+    ('/api/v1/budget', 'budget_management'),
+    ('/api/v1/feedback', 'feedback'),
+    ('/api/v1/learning', 'learning'),
+    ('/api/v1/llm', 'llm_management'),
+    ('/api/v1/data-sources', 'data_sources'),
+)
+
+# Label for fallback-normalized paths once max_fallback_routes is reached
+OTHER_ROUTE = "/{other}"
+
+
+@lru_cache(maxsize=1024)
+def feature_for_path(path: str) -> Optional[str]:
+    """Extract feature name from API path."""
+    for api_path, feature in FEATURE_MAPPING:
+        if path.startswith(api_path):
+            return feature
+    return None
+
+
+class MonitoringMiddleware:
+    """
+    Comprehensive monitoring middleware for FastAPI applications.
+
+    Pure ASGI: the response is observed through the send channel, so
+    streaming bodies are forwarded as they are produced.
+
+    The endpoint label is the matched route template. Requests that match
+    no route share a single label and raw-path fallbacks are capped, so
+    Prometheus label cardinality is bounded by the application's routes.
+    Access log lines are sampled; server errors and slow requests are
+    always logged.
+    """
     
-    def __init__(self, app, enable_detailed_logging: bool = True):
-        super().__init__(app)
+    def __init__(
+        self,
+        app: ASGIApp,
+        enable_detailed_logging: bool = True,
+        access_log_sample_rate: Optional[float] = None,
+        slow_request_seconds: float = 1.0,
+        max_fallback_routes: int = 500,
+    ):
+        self.app = app
         self.enable_detailed_logging = enable_detailed_logging
+        if access_log_sample_rate is None:
+            access_log_sample_rate = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "0.1"))
+        self.access_log_sample_rate = access_log_sample_rate
+        self.slow_request_seconds = slow_request_seconds
+        self.max_fallback_routes = max_fallback_routes
+        self._fallback_routes: Set[str] = set()
+        # Bound metric children per (method, endpoint, status_code)
+        self._children: Dict[Tuple[str, str, int], tuple] = {}
         
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process request with comprehensive monitoring."""
-        # Generate request ID for tracing
-        request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
-        
-        # Start time for duration calculation
-        start_time = time.time()
-        
-        # Extract request information
-        method = request.method
-        path = self._normalize_path(request.url.path)
-        user_agent = request.headers.get("user-agent", "unknown")
-        user_id = self._extract_user_id(request)
-        
-        # Calculate request size
-        request_size = self._get_request_size(request)
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Request id, start time and route are shared with other layers
+        context = get_request_context(scope)
+        request_id = context.request_id
+        method = context.method
         
         # Track active requests
         ACTIVE_REQUESTS.inc()
         
-        # Log request start if detailed logging is enabled
-        if self.enable_detailed_logging:
-            logger.info(
-                f"Request started: {request_id} {method} {path}",
-                extra={
-                    "request_id": request_id,
-                    "method": method,
-                    "path": path,
-                    "user_id": user_id,
-                    "user_agent": user_agent,
-                    "request_size": request_size
-                }
-            )
-        
-        response = None
         error_type = None
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                context.status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                context.response_size += len(message.get("body", b""))
+            await send(message)
         
         try:
             # Process request with APM tracing
-            with active_request_context(request_id, f"{method} {path}"):
-                response = await call_next(request)
+            with active_request_context(request_id, f"{method} {context.route}"):
+                await self.app(scope, receive, send_wrapper)
                 
         except Exception as e:
             error_type = type(e).__name__
             logger.error(
-                f"Request error: {request_id} {method} {path} - {error_type}: {str(e)}",
+                f"Request error: {request_id} {method} {context.path} - {error_type}: {str(e)}",
                 extra={
                     "request_id": request_id,
                     "method": method,
-                    "path": path,
+                    "path": context.path,
                     "error_type": error_type,
                     "error_message": str(e)
                 },
@@ -173,15 +214,16 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
         
         finally:
             # Calculate metrics
-            duration = time.time() - start_time
-            status_code = getattr(response, 'status_code', 500) if response else 500
-            status_class = f"{status_code // 100}xx"
-            response_size = self._get_response_size(response) if response else 0
+            duration = context.elapsed()
+            status_code = context.status_code or 500
+            path = self._endpoint_label(context, status_code)
+            response_size = context.response_size
+            user_id = context.user_id
             
             # Update Prometheus metrics
             self._update_metrics(
-                method, path, status_code, status_class, duration,
-                request_size, response_size, user_id, error_type
+                method, path, status_code, f"{status_code // 100}xx", duration,
+                self._get_request_size(scope), response_size, user_id, error_type
             )
             
             # Update APM metrics
@@ -190,115 +232,110 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
             # Track active requests
             ACTIVE_REQUESTS.dec()
             
-            # Log request completion if detailed logging is enabled
-            if self.enable_detailed_logging:
+            # One sampled access log line per request
+            if error_type is None and self._should_log(status_code, duration):
                 log_level = logging.WARNING if status_code >= 400 else logging.INFO
                 logger.log(
                     log_level,
-                    f"Request completed: {request_id} {method} {path} {status_code} {duration:.3f}s",
+                    f"Request completed: {request_id} {method} {context.path} {status_code} {duration:.3f}s",
                     extra={
                         "request_id": request_id,
                         "method": method,
-                        "path": path,
+                        "path": context.path,
+                        "route": path,
                         "status_code": status_code,
                         "duration": duration,
                         "response_size": response_size,
                         "user_id": user_id
                     }
                 )
-        
-        return response
     
+    def _should_log(self, status_code: int, duration: float) -> bool:
+        """Decide whether this request gets an access log line."""
+        if not self.enable_detailed_logging:
+            return False
+        if status_code >= 500 or duration >= self.slow_request_seconds:
+            return True
+        return random.random() < self.access_log_sample_rate
+
+    def _endpoint_label(self, context: RequestContext, status_code: int) -> str:
+        """Bounded endpoint label for this request."""
+        if not context.matched and status_code == 404:
+            return UNMATCHED_ROUTE
+
+        route = context.route
+        if route_template(context.scope) is not None:
+            return route
+
+        # Raw-path fallback (mounted non-FastAPI apps, plain ASGI endpoints)
+        if route not in self._fallback_routes:
+            if len(self._fallback_routes) >= self.max_fallback_routes:
+                return OTHER_ROUTE
+            self._fallback_routes.add(route)
+        return route
+
     def _normalize_path(self, path: str) -> str:
         """Normalize path for metrics (remove IDs, etc.)."""
-        # Replace common ID patterns
-        import re
-        
-        # Replace UUIDs
-        path = re.sub(r'/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', '/{uuid}', path, flags=re.IGNORECASE)
-        
-        # Replace numeric IDs
-        path = re.sub(r'/\d+', '/{id}', path)
-        
-        # Replace email addresses
-        path = re.sub(r'/[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', '/{email}', path)
-        
-        return path
+        return normalize_path(path)
     
-    def _extract_user_id(self, request: Request) -> str:
-        """Extract user ID from request for user-specific metrics."""
-        # Try to get user ID from different sources
-        user_id = "anonymous"
-        
-        # From request state (set by auth middleware)
-        if hasattr(request.state, 'user') and request.state.user:
-            user_id = getattr(request.state.user, 'user_id', 'unknown')
-        
-        # From headers (for API keys, etc.)
-        elif 'x-user-id' in request.headers:
-            user_id = request.headers['x-user-id']
-        
-        # From JWT token (basic extraction)
-        elif 'authorization' in request.headers:
-            auth_header = request.headers['authorization']
-            if auth_header.startswith('Bearer '):
-                # In production, decode JWT properly
-                user_id = "authenticated"
-        
-        return user_id
-    
-    def _get_request_size(self, request: Request) -> int:
+    def _get_request_size(self, scope: Scope) -> int:
         """Calculate request size in bytes."""
-        content_length = request.headers.get("content-length")
-        if content_length:
-            try:
-                return int(content_length)
-            except ValueError:
-                pass
-        return 0
-    
-    def _get_response_size(self, response: Response) -> int:
-        """Calculate response size in bytes."""
-        if response and hasattr(response, 'headers'):
-            content_length = response.headers.get("content-length")
-            if content_length:
+        for name, value in scope.get("headers", ()):
+            if name == b"content-length":
                 try:
-                    return int(content_length)
+                    return int(value)
                 except ValueError:
-                    pass
+                    return 0
         return 0
     
+    def _metric_children(self, method: str, path: str, status_code: int) -> tuple:
+        """Labelled metric children, resolved once per label combination."""
+        key = (method, path, status_code)
+        children = self._children.get(key)
+        if children is None:
+            status_class = f"{status_code // 100}xx"
+            children = (
+                REQUEST_COUNT.labels(
+                    method=method,
+                    endpoint=path,
+                    status_code=status_code,
+                    status_class=status_class
+                ),
+                REQUEST_DURATION.labels(
+                    method=method,
+                    endpoint=path,
+                    status_class=status_class
+                ),
+                REQUEST_SIZE.labels(
+                    method=method,
+                    endpoint=path
+                ),
+                RESPONSE_SIZE.labels(
+                    method=method,
+                    endpoint=path,
+                    status_class=status_class
+                ),
+            )
+            self._children[key] = children
+        return children
+
     def _update_metrics(self, method: str, path: str, status_code: int, status_class: str,
                        duration: float, request_size: int, response_size: int,
                        user_id: str, error_type: str = None) -> None:
         """Update all Prometheus metrics."""
+        count, durations, request_sizes, response_sizes = self._metric_children(
+            method, path, status_code
+        )
         
         # Basic request metrics
-        REQUEST_COUNT.labels(
-            method=method,
-            endpoint=path,
-            status_code=status_code,
-            status_class=status_class
-        ).inc()
-        
-        REQUEST_DURATION.labels(
-            method=method,
-            endpoint=path,
-            status_class=status_class
-        ).observe(duration)
+        count.inc()
+        durations.observe(duration)
         
         if request_size > 0:
-            REQUEST_SIZE.labels(
-                method=method,
-                endpoint=path
-            ).observe(request_size)
+            request_sizes.observe(request_size)
         
         if response_size > 0:
-            RESPONSE_SIZE.labels(
-                method=method,
-                endpoint=path,
-                status_class=status_class
-            ).observe(response_size)
+            response_sizes.observe(response_size)
         
         # Error metrics
         if status_code >= 400:
@@ -317,7 +354,7 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
             ).inc()
         
         # Feature-specific metrics
-        feature = self._extract_feature_from_path(path)
+        feature = feature_for_path(path)
         if feature:
             user_type = "authenticated" if user_id != "anonymous" else "anonymous"
             success = status_code < 400
@@ -330,27 +367,7 @@ class MonitoringMiddleware(BaseHTTPMiddleware):
     
     def _extract_feature_from_path(self, path: str) -> str:
         """Extract feature name from API path."""
-        # Map API paths to features
-        feature_mapping = {
-            '/api/v1/generate': 'rfc_generation',
-            '/api/v1/search': 'semantic_search',
-            '/api/v1/vector-search': 'vector_search',
-            '/api/v1/documentation': 'code_documentation',
-            '/api/v1/ai-enhancement': 'ai_enhancement',
-            '/api/v1/auth': 'authentication',
-            '/api/v1/budget': 'budget_management',
-            '/api/v1/feedback': 'feedback',
-            '/api/v1/learning': 'learning',
-            '/api/v1/llm': 'llm_management',
-            '/api/v1/data-sources': 'data_sources',
-        }
-        
-        # Find matching feature
-        for api_path, feature in feature_mapping.items():
-            if path.startswith(api_path):
-                return feature
-        
-        return None
+        return feature_for_path(path)
 
 # Business metrics functions
 def update_user_budget_usage(user_id: str, usage_percent: float) -> None:
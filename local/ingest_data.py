@@ -7,14 +7,17 @@ ingest_data.py
 
 Версия финальная:
   - Загрузка переменных окружения из .env.local (python-dotenv + find_dotenv)
-  - Использование html.parser вместо lxml
+  - Потоковый импорт Confluence (ingest_pipeline.py): fetch → parse → chunk → embed → upsert
+    через ограниченные очереди, парсер lxml и checkpoint для продолжения прерванного импорта
   - Преобразование SHA-1-строки в валидный UUID-5 для id точек
   - Оптимизированный импорт проектов из GitLab:
+      * один tar.gz архив на репозиторий вместо запроса на каждый файл, потоковое чтение без распаковки
+      * SHA коммита в --gitlab-state: неизменившиеся репозитории пропускаются при --resume
       * iterator=True для ленивой загрузки
       * simple=True для минимального JSON (включая default_branch и path_with_namespace)
       * per_page=100 для уменьшения числа запросов
   - Пересоздание коллекции через collection_exists + create_collection
-  - Параллельный импорт из Confluence с ретраями (urllib3 Retry + ThreadPoolExecutor)
+  - Ретраи HTTP-запросов к Confluence (urllib3 Retry)
   - Логирование ключевых этапов и ENV
 """
 
@@ -29,19 +32,22 @@ import json
 import logging
 import sys
 import uuid
-import math
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
 
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup  # html.parser встроен в Python
 from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient, http
 from atlassian import Jira
 import gitlab
 
+from ingest_pipeline import Checkpoint, IngestPipeline, Page
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from tools.scripts.ingestion.gitlab_archive import (CommitStateStore, IterStream, decode_content,
+                                                    iter_archive_files)
+
 # Импорт модуля bootstrap ingestion
 try:
     from ingest_bootstrap import ingest_bootstrap_materials
@@ -126,147 +132,112 @@ def create_retry_session(
 
 
 # ──────────────────────────────────────────────────────────────────────────────
-# 3. Параллельный импорт всех страниц Confluence
+# 3. Потоковый импорт страниц Confluence (см. ingest_pipeline.py)
 # ──────────────────────────────────────────────────────────────────────────────
-def ingest_conf_all_batch(
-    limit: int = 10000,
-    max_workers: int = 5,
-    space_batch_size: int = 200,
+def confluence_space_keys(session: requests.Session, base: str, headers: dict, space_batch_size: int = 200) -> list[str]:
+    """Ключи всех пространств Confluence (с пагинацией)"""
+    space_keys = []
+    start = 0
+    while True:
+        r_space = session.get(
+            f"{base}/rest/api/space",
+            params={"limit": space_batch_size, "start": start},
+            headers=headers,
+            timeout=30
+        )
+        r_space.raise_for_status()
+        results = r_space.json().get("results", [])
+        space_keys.extend(sp["key"] for sp in results if sp.get("key"))
+        # Если вернулось меньше, чем batch_size, это последняя страница
+        if len(results) < space_batch_size:
+            return space_keys
+        start += space_batch_size
+
+
+def fetch_confluence_space(session: requests.Session, base: str, headers: dict, space_key: str, page_size: int = 100):
+    """
+    Генератор страниц API одного пространства: каждая итерация — один HTTP-запрос
+    на page_size записей, поэтому в памяти не бывает больше одной страницы API на воркер.
+    """
+    start = 0
+    while True:
+        resp = session.get(
+            f"{base}/rest/api/content",
+            params={"spaceKey": space_key, "limit": page_size, "start": start, "expand": "body.storage"},
+            headers=headers,
+            timeout=30
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        results = data.get("results", [])
+        logger.info(f"[Confluence] spaceKey={space_key} start={start}: {len(results)} записей")
+        if not results:
+            return
+
+        pages = []
+        for rec in results:
+            page_id = str(rec.get("id"))
+            body_html = ((rec.get("body") or {}).get("storage") or {}).get("value")
+            if body_html is None:
+                logger.error(f"[Confluence] Нет body.storage у id={page_id} spaceKey={space_key}")
+                continue
+            url = f"{base}/pages/{page_id}"
+            pages.append(Page(page_id=page_id, html=body_html, payload={"src": "conf", "space": space_key, "url": url}))
+        yield pages
+
+        # Сервер может урезать limit, поэтому ориентируемся на _links.next, если он есть
+        links = data.get("_links")
+        has_next = "next" in links if links is not None else len(results) >= page_size
+        if not has_next:
+            return
+        start += len(results)
+
+
+def ingest_conf_pipeline(
+    space_keys: list[str] | None = None,
+    page_size: int = 100,
+    concurrency: dict | None = None,
+    html_parser: str = "lxml",
+    checkpoint: Checkpoint | None = None,
+    batch_size: int = 64,
 ):
     """
-    Пакетный (batch) импорт из Confluence по всем пространствам:
-    1) Пагинация при получении списка всех space_key
-    2) Для каждого space делаем первичный запрос, чтобы узнать totalSize и вычислить стартовые оффсеты
-    3) Собираем задачи (space_key, start) для всех страниц всех пространств
-    4) Параллельно загружаем все страницы из всех пространств через один ThreadPoolExecutor
-    5) Обрабатываем и возвращаем записи
+    Импорт Confluence через потоковый конвейер fetch → parse → chunk → embed → upsert.
+    Параллельно загружаются разные пространства; зафиксированные страницы пишутся в checkpoint.
     """
     base = os.getenv("CONFLUENCE_URL")
     token = os.getenv("CONFLUENCE_BEARER_TOKEN")
     if not base or not token:
         logger.warning("CONFLUENCE_URL или CONFLUENCE_BEARER_TOKEN не заданы → пропуск Confluence")
-        return
+        return None
 
     headers = {"Authorization": f"Bearer {token}"}
     session = create_retry_session()
 
-    # 1) Пагинация при получении всех пространств
-    space_keys = []
-    start = 0
-    while True:
+    if not space_keys:
         try:
-            r_space = session.get(
-                f"{base}/rest/api/space",
-                params={"limit": space_batch_size, "start": start},
-                headers=headers,
-                timeout=30
-            )
-            r_space.raise_for_status()
-            data = r_space.json()
-            results = data.get("results", [])
-            if not results:
-                break
-
-            for sp in results:
-                key = sp.get("key")
-                if key:
-                    space_keys.append(key)
-
-            # Если вернулось меньше, чем batch_size, это последняя страница
-            if len(results) < space_batch_size:
-                break
-
-            start += space_batch_size
+            space_keys = confluence_space_keys(session, base, headers)
         except Exception as e:
-            logger.error(f"[Confluence] Ошибка при получении списка spaces (start={start}): {e}")
-            return
-
+            logger.error(f"[Confluence] Ошибка при получении списка spaces: {e}")
+            return None
     if not space_keys:
         logger.info("[Confluence] Не найдено ни одного пространства → завершение")
-        return
+        return None
 
     logger.info(f"[Confluence] Будем импортировать следующие spaces: {space_keys}")
-
-    # 2) Для каждого space узнаем totalSize и генерируем список стартовых оффсетов
-    tasks = []  # список кортежей (space_key, start)
-    for sk in space_keys:
-        try:
-            init_resp = session.get(
-                f"{base}/rest/api/content",
-                params={"spaceKey": sk, "limit": limit, "start": 0, "expand": "body.storage"},
-                headers=headers,
-                timeout=30
-            )
-            init_resp.raise_for_status()
-            init_json = init_resp.json()
-            total_size = init_json.get("totalSize") or init_json.get("size")
-            if total_size is None:
-                raise ValueError("totalSize не найден")
-            total = int(total_size)
-            num_pages = math.ceil(total / limit)
-            start_values = [i * limit for i in range(num_pages)]
-            logger.info(f"[Confluence] spaceKey={sk}: всего записей={total}, страниц={num_pages}")
-            for start_val in start_values:
-                tasks.append((sk, start_val))
-        except Exception as e:
-            logger.error(f"[Confluence] Ошибка при инициализации spaceKey={sk}: {e}")
-            continue
-
-    if not tasks:
-        logger.info("[Confluence] Нет задач для загрузки страниц → завершение")
-        return
-
-    logger.info(f"[Confluence] Всего задач для загрузки страниц: {len(tasks)} (макс {max_workers} потоков одновременно)")
-
-    # 3) Функция для загрузки одной страницы для заданного space
-    def fetch_page(args: tuple[str, int]) -> tuple[str, list[dict]]:
-        sk, start_val = args
-        try:
-            resp = session.get(
-                f"{base}/rest/api/content",
-                params={"spaceKey": sk, "limit": limit, "start": start_val, "expand": "body.storage"},
-                headers=headers,
-                timeout=30
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            results = data.get("results", [])
-            logger.info(f"[Confluence] spaceKey={sk} start={start_val}: {len(results)} записей")
-            return sk, results
-        except Exception as e:
-            logger.warning(f"[Confluence] Ошибка загрузки spaceKey={sk} start={start_val}: {e}")
-            return sk, []
-
-    # 4) Параллельная загрузка всех страниц
-    all_results_by_space: dict[str, list[dict]] = {sk: [] for sk in space_keys}
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_task = {executor.submit(fetch_page, task): task for task in tasks}
-        for future in as_completed(future_to_task):
-            sk, page_results = future.result()
-            if page_results:
-                all_results_by_space.setdefault(sk, []).extend(page_results)
-
-    # 5) Итерация по загруженным записям и возврат результатов
-    for sk, records in all_results_by_space.items():
-        logger.info(f"[Confluence] spaceKey={sk}: всего загружено записей={len(records)}")
-        for rec in records:
-            try:
-                page_id = rec.get("id")
-                title = rec.get("title", "")
-                body_html = rec["body"]["storage"]["value"]
-                soup = BeautifulSoup(body_html, "html.parser")
-                text_content = soup.get_text(" ", strip=True)
-                url = f"{base}/pages/{page_id}"
-                for ch in wrap(text_content):
-                    sha_hex = sha_str(url + ch[:40])
-                    uid = sha_uuid(sha_hex)
-                    payload = {"src": "conf", "space": sk, "url": url, "text": ch}
-                    yield uid, ch, payload
-            except Exception as e:
-                logger.error(f"[Confluence] Ошибка при обработке id={rec.get('id')} spaceKey={sk}: {e}")
-                continue
-
+    pipeline = IngestPipeline(
+        embed_texts,
+        write_points,
+        html_parser=html_parser,
+        checkpoint=checkpoint,
+        concurrency=concurrency,
+        batch_size=batch_size,
+    )
+    metrics = asyncio.run(
+        pipeline.run(lambda sk: fetch_confluence_space(session, base, headers, sk, page_size), space_keys)
+    )
     logger.info("[Confluence] Импорт завершён")
+    return metrics
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -323,7 +294,98 @@ def git_clients_all():
                     logger.error(f"[GitLab] Ошибка аутентификации [{alias}]: {e}")
     return out
 
-def ingest_git_all():
+GIT_CODE_EXTENSIONS = {".py", ".go", ".php", ".js", ".ts"}
+GIT_MAX_FILE_SIZE = 1024 * 1024
+
+
+def git_records(alias, gl, prj, ref, path, code):
+    url = (
+        f"{gl.url}/{prj.path_with_namespace}"
+        f"/-/blob/{ref}/{path}"
+    )
+    for ch in wrap(code):
+        sha_hex = sha_str(f"{alias}:{prj.path_with_namespace}:{path}:{ch[:40]}")
+        uid = sha_uuid(sha_hex)
+        payload = {
+            "src":   "git",
+            "alias": alias,
+            "repo":  prj.path_with_namespace,
+            "path":  path,
+            "url":   url,
+            "text":  ch
+        }
+        yield uid, ch, payload
+
+
+def ingest_git_project_archive(alias, gl, prj, project, ref, state: CommitStateStore | None = None):
+    """
+    Импорт проекта из одного tar.gz архива коммита вместо запроса на каждый файл.
+    Архив читается потоком без распаковки на диск; проект с уже проиндексированным
+    коммитом пропускается целиком.
+
+    Возвращает SHA импортированного коммита (None, если проект пропущен). Записи
+    потребитель копит в батчи, поэтому SHA сохраняет он сам - после upsert
+    последнего батча с записями проекта.
+    """
+    sha = project.commits.get(ref).id
+    state_key = CommitStateStore.key(gl.url, prj.id, ref)
+    if state is not None and state.is_current(state_key, sha):
+        logger.info(f"[GitLab] Проект={prj.path_with_namespace} не изменился ({sha[:12]}) → пропуск")
+        return None
+
+    chunks = project.repository_archive(sha=sha, format="tar.gz", streamed=True, iterator=True, chunk_size=64 * 1024)
+    files = 0
+    for archive_file in iter_archive_files(IterStream(chunks), GIT_CODE_EXTENSIONS, GIT_MAX_FILE_SIZE):
+        code = decode_content(archive_file.content)
+        if code is None:
+            continue
+        files += 1
+        yield from git_records(alias, gl, prj, ref, archive_file.path, code)
+
+    logger.info(f"[GitLab] Проект={prj.path_with_namespace}: {files} файлов из архива {sha[:12]}")
+    return sha
+
+
+def ingest_git_project_files(alias, gl, prj, project, ref):
+    """Импорт проекта по одному файлу через Repository Files API"""
+    try:
+        tree_iterator = project.repository_tree(
+            ref=ref,
+            recursive=True,
+            iterator=True,
+            per_page=100
+        )
+    except gitlab.exceptions.GitlabGetError as e:
+        if e.response_code == 404:
+            logger.warning(f"[GitLab] 404 Tree Not Found для проект ID={prj.id}, ref={ref} → пропуск")
+        else:
+            logger.error(f"[GitLab] Ошибка при получении tree для проект ID={prj.id}: {e}")
+        return
+
+    for node in tree_iterator:
+        if node["type"] == "blob" and re.search(r"\.(py|go|php|js|ts)$", node["path"]):
+            try:
+                file_obj = project.files.get(
+                    file_path=node["path"],
+                    ref=ref
+                )
+                code = file_obj.decode().decode()
+            except gitlab.exceptions.GitlabGetError as e:
+                if e.response_code == 404:
+                    logger.warning(f"[GitLab] File not found {node['path']} in project ID={prj.id}")
+                else:
+                    logger.error(f"[GitLab] Ошибка при получении файла {node['path']} в проект ID={prj.id}: {e}")
+                continue
+
+            yield from git_records(alias, gl, prj, ref, node["path"], code)
+
+
+def ingest_git_all(mode: str = "archive", state: CommitStateStore | None = None,
+                   imported_commits: list | None = None):
+    """
+    Записи всех проектов GitLab. В imported_commits добавляются пары
+    (ключ состояния, SHA) проектов, все записи которых уже выданы потребителю.
+    """
     clients = git_clients_all()
     if not clients:
         logger.warning("[GitLab] Нет настроенных клиентов → пропуск GitLab")
@@ -346,51 +408,21 @@ def ingest_git_all():
 
             used_ref = prj.default_branch or "main"
             logger.info(f"[GitLab] Проект={prj.path_with_namespace}, default_branch={used_ref}")
-            try:
-                tree_iterator = project.repository_tree(
-                    ref=used_ref,
-                    recursive=True,
-                    iterator=True,
-                    per_page=100
-                )
-            except gitlab.exceptions.GitlabGetError as e:
-                if e.response_code == 404:
-                    logger.warning(f"[GitLab] 404 Tree Not Found для проект ID={prj.id}, ref={used_ref} → пропуск")
-                else:
-                    logger.error(f"[GitLab] Ошибка при получении tree для проект ID={prj.id}: {e}")
+            if mode != "archive":
+                yield from ingest_git_project_files(alias, gl, prj, project, used_ref)
                 continue
 
-            for node in tree_iterator:
-                if node["type"] == "blob" and re.search(r"\.(py|go|php|js|ts)$", node["path"]):
-                    try:
-                        file_obj = project.files.get(
-                            file_path=node["path"],
-                            ref=used_ref
-                        )
-                        code = file_obj.decode().decode()
-                    except gitlab.exceptions.GitlabGetError as e:
-                        if e.response_code == 404:
-                            logger.warning(f"[GitLab] File not found {node['path']} in project ID={prj.id}")
-                        else:
-                            logger.error(f"[GitLab] Ошибка при получении файла {node['path']} в проект ID={prj.id}: {e}")
-                        continue
-
-                    url = (
-                        f"{gl.url}/{prj.path_with_namespace}"
-                        f"/-/blob/{used_ref}/{node['path']}"
-                    )
-                    for ch in wrap(code):
-                        sha_hex = sha_str(f"{alias}:{prj.path_with_namespace}:{node['path']}:{ch[:40]}")
-                        uid = sha_uuid(sha_hex)
-                        payload = {
-                            "src":   "git",
-                            "alias": alias,
-                            "repo":  prj.path_with_namespace,
-                            "path":  node["path"],
-                            "url":   url,
-                            "text":  ch
-                        }
-                        yield uid, ch, payload
+            try:
+                sha = yield from ingest_git_project_archive(alias, gl, prj, project, used_ref, state)
+                if sha and imported_commits is not None:
+                    imported_commits.append((CommitStateStore.key(gl.url, prj.id, used_ref), sha))
+            except gitlab.exceptions.GitlabError as e:
+                if getattr(e, "response_code", None) == 404:
+                    logger.warning(f"[GitLab] 404 для проект ID={prj.id}, ref={used_ref} → пропуск")
+                else:
+                    logger.error(f"[GitLab] Ошибка при загрузке архива проект ID={prj.id}: {e}")
+            except Exception as e:
+                logger.error(f"[GitLab] Ошибка при чтении архива проект ID={prj.id}: {e}")
 
     logger.info("[GitLab] Импорт завершён")
 
@@ -430,21 +462,22 @@ def ingest_video(urls):
 # ──────────────────────────────────────────────────────────────────────────────
 # 7. Upsert в Qdrant с UUID-5
 # ──────────────────────────────────────────────────────────────────────────────
+def embed_texts(texts):
+    return ENC.encode(texts).tolist()
+
+
+def write_points(batch, vectors):
+    points = [
+        http.models.PointStruct(id=sha_uuid(uid_str), vector=vec, payload=payload)
+        for (uid_str, _, payload), vec in zip(batch, vectors)
+    ]
+    Q.upsert(COL, points)
+
+
 def upsert(batch):
     if not batch:
         return
-    texts = [b[1] for b in batch]
-    emb_vectors = ENC.encode(texts).tolist()
-    points = []
-    for (uid_str, _, payload), vec in zip(batch, emb_vectors):
-        valid_uuid = sha_uuid(uid_str)
-        point = http.models.PointStruct(
-            id=valid_uuid,
-            vector=vec,
-            payload=payload
-        )
-        points.append(point)
-    Q.upsert(COL, points)
+    write_points(batch, embed_texts([b[1] for b in batch]))
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -481,10 +514,26 @@ def main():
     parser.add_argument("--jira", help="Пример: DEV:\"project = DEV\",OPS:\"project = OPS\"")
     parser.add_argument("--videos", help="Список URL видео через запятую")
     parser.add_argument("--confluence-spaces", help="Список ключей пространств Confluence через запятую (если не указан — перебрать все)")
-    parser.add_argument("--confluence-workers", type=int, default=5, help="Число потоков для параллельного импорта из Confluence")
+    parser.add_argument("--confluence-workers", type=int, default=5, help="Число пространств Confluence, загружаемых параллельно")
+    parser.add_argument("--confluence-page-size", type=int, default=100, help="Число записей Confluence в одном запросе к API")
+    parser.add_argument("--parse-workers", type=int, default=2, help="Число потоков парсинга HTML")
+    parser.add_argument("--upsert-workers", type=int, default=2, help="Число потоков записи в Qdrant")
+    parser.add_argument("--html-parser", choices=["lxml", "html.parser"], default="lxml", help="Парсер HTML страниц Confluence")
+    parser.add_argument("--checkpoint", default=".ingest_checkpoint", help="Файл с id уже импортированных страниц Confluence")
+    parser.add_argument("--gitlab-mode", choices=["archive", "files"], default="archive", help="Импорт GitLab одним архивом на репозиторий или по одному файлу")
+    parser.add_argument("--gitlab-state", default=".gitlab_ingestion_state.json", help="Файл с SHA уже импортированных коммитов GitLab")
+    parser.add_argument("--resume", action="store_true", help="Продолжить прерванный импорт: не пересоздавать коллекцию, пропустить страницы из checkpoint и неизменившиеся репозитории GitLab")
     args = parser.parse_args()
 
-    recreate()
+    checkpoint = Checkpoint(args.checkpoint)
+    git_state = CommitStateStore(args.gitlab_state)
+    if args.resume:
+        logger.info(f"Продолжаем импорт, в checkpoint {len(checkpoint)} страниц")
+    else:
+        # Коллекция пересоздаётся, поэтому прошлый прогресс недействителен
+        checkpoint.reset()
+        git_state.reset()
+        recreate()
 
     batch = []
     BATCH_LIMIT = 64
@@ -506,22 +555,22 @@ def main():
     elif not args.no_bootstrap:
         logger.warning("[Bootstrap] Модуль ingest_bootstrap недоступен, пропускаем bootstrap материалы")
 
-    # 9.1 Импорт из Confluence (параллельно)
+    # 9.1 Импорт из Confluence (потоковый конвейер)
     if not args.no_confluence:
-        # Собираем ключи пространств, если переданы
-        if args.confluence_spaces:
-            space_keys = args.confluence_spaces.split(",")
-        else:
-            space_keys = [None]  # None означает "пробежаться по всем"
-        for sk in space_keys:
-            for rec in ingest_conf_all_batch(limit=10000, max_workers=args.confluence_workers):
-                batch.append(rec)
-                if len(batch) >= BATCH_LIMIT:
-                    upsert(batch)
-                    batch = []
-        if batch:
-            upsert(batch)
-            batch = []
+        # Ключи пространств, если переданы; иначе импортируем все
+        space_keys = args.confluence_spaces.split(",") if args.confluence_spaces else None
+        ingest_conf_pipeline(
+            space_keys,
+            page_size=args.confluence_page_size,
+            concurrency={
+                "fetch": args.confluence_workers,
+                "parse": args.parse_workers,
+                "upsert": args.upsert_workers,
+            },
+            html_parser=args.html_parser,
+            checkpoint=checkpoint,
+            batch_size=BATCH_LIMIT,
+        )
 
     # 9.2 Импорт из Jira
     if not args.no_jira and args.jira:
@@ -537,14 +586,25 @@ def main():
 
     # 9.3 Импорт из GitLab
     if not args.no_gitlab:
-        for rec in ingest_git_all():
+        # Проекты, все записи которых выданы генератором: после upsert текущего
+        # батча они целиком в Qdrant, и их коммиты можно отметить импортированными
+        imported_commits = []
+
+        def save_imported_commits():
+            for state_key, sha in imported_commits:
+                git_state.set(state_key, sha)
+            imported_commits.clear()
+
+        for rec in ingest_git_all(mode=args.gitlab_mode, state=git_state, imported_commits=imported_commits):
             batch.append(rec)
             if len(batch) >= BATCH_LIMIT:
                 upsert(batch)
                 batch = []
+                save_imported_commits()
         if batch:
             upsert(batch)
             batch = []
+        save_imported_commits()
 
     # 9.4 Импорт из видео
     if not args.no_video and args.videos:
@@ -0,0 +1,483 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ingest_pipeline.py
+
+Потоковый конвейер импорта страниц: fetch → parse → chunk → embed → upsert.
+
+- Стадии связаны ограниченными asyncio.Queue: в памяти одновременно находится
+  не больше queue_size элементов на очередь плюс то, что держат воркеры.
+  Когда медленная стадия (обычно embed) не успевает, очереди заполняются и
+  fetch приостанавливается (backpressure).
+- У каждой стадии своё число воркеров; блокирующие вызовы (HTTP, парсинг
+  HTML, модель эмбеддингов, запись в Qdrant) выполняются в пуле потоков.
+- Для каждой стадии собираются метрики: обработано, ошибки, время работы,
+  время ожидания свободного места в следующей очереди, пропускная способность.
+- Парсер HTML подключаемый: по умолчанию lxml (если установлен), иначе
+  html.parser из BeautifulSoup.
+- Страница считается зафиксированной, когда все её чанки записаны в хранилище.
+  Id зафиксированных страниц дописываются в checkpoint-файл, и повторный
+  запуск пропускает их сразу после загрузки.
+"""
+
+import asyncio
+import hashlib
+import html as html_lib
+import logging
+import os
+import re
+import textwrap
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (Any, Callable, Dict, Iterable, List, Optional, Sequence,
+                    Set, Tuple)
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html as lxml_html
+    from lxml import etree as lxml_etree
+except ImportError:  # pragma: no cover - lxml в requirements.txt, но установка может быть урезанной
+    lxml_html = None
+    lxml_etree = None
+
+logger = logging.getLogger("ingest_pipeline")
+
+NAMESPACE = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+DEFAULT_CONCURRENCY = {
+    "fetch": 4,
+    "parse": 2,
+    "chunk": 1,
+    "embed": 1,
+    "upsert": 2,
+}
+
+# Запись для векторного хранилища: (id, текст чанка, payload)
+Record = Tuple[str, str, Dict[str, Any]]
+
+_DONE = object()  # маркер конца потока в очереди
+
+
+def sha_str(s: str) -> str:
+    return hashlib.sha1(s.encode()).hexdigest()
+
+
+def sha_uuid(s: str) -> str:
+    return str(uuid.uuid5(NAMESPACE, s))
+
+
+def wrap_text(text: str, chunk_size: int = 1500) -> List[str]:
+    return textwrap.wrap(text, chunk_size, break_long_words=False, break_on_hyphens=False)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# HTML → текст
+# ──────────────────────────────────────────────────────────────────────────────
+_CDATA_RE = re.compile(r"<!\[CDATA\[(.*?)\]\]>", re.S)
+
+
+def _soup_text(body_html: str) -> str:
+    return BeautifulSoup(body_html, "html.parser").get_text(" ", strip=True)
+
+
+def _lxml_text(body_html: str) -> str:
+    """То же, что BeautifulSoup(...).get_text(" ", strip=True), но на lxml"""
+    # HTML-парсер libxml2 отбрасывает CDATA, а в Confluence в нём лежит код макросов
+    body_html = _CDATA_RE.sub(lambda m: html_lib.escape(m.group(1)), body_html)
+    if not body_html.strip():
+        return ""
+    try:
+        root = lxml_html.document_fromstring(body_html)
+    except lxml_etree.ParserError:
+        return ""
+    lxml_etree.strip_elements(root, "script", "style", with_tail=False)
+    return " ".join(part for part in (s.strip() for s in root.itertext()) if part)
+
+
+HTML_PARSERS: Dict[str, Callable[[str], str]] = {
+    "lxml": _lxml_text,
+    "html.parser": _soup_text,
+}
+
+
+def get_html_parser(name: str = "lxml") -> Callable[[str], str]:
+    """Функция извлечения текста из HTML; без lxml откатывается на html.parser"""
+    if name not in HTML_PARSERS:
+        raise ValueError(f"Неизвестный HTML-парсер: {name} (доступны: {', '.join(HTML_PARSERS)})")
+    if name == "lxml" and lxml_html is None:
+        logger.warning("lxml не установлен → используем html.parser")
+        name = "html.parser"
+    return HTML_PARSERS[name]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Модель данных, checkpoint и метрики
+# ──────────────────────────────────────────────────────────────────────────────
+@dataclass
+class Page:
+    """Страница источника; html заменяется на text после стадии parse"""
+
+    page_id: str
+    html: Optional[str]
+    payload: Dict[str, Any]
+    text: Optional[str] = None
+
+
+def chunk_page(page: Page, chunk_size: int = 1500) -> List[Record]:
+    """Чанки страницы с детерминированными id (url + начало чанка)"""
+    url = page.payload.get("url", page.page_id)
+    return [
+        (sha_uuid(sha_str(url + ch[:40])), ch, {**page.payload, "text": ch})
+        for ch in wrap_text(page.text or "", chunk_size)
+    ]
+
+
+class Checkpoint:
+    """Append-only файл с id зафиксированных страниц, по одному на строку"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.committed: Set[str] = set()
+        self._file = None
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as f:
+                # Оборванная при падении последняя строка даст лишь повторный импорт страницы
+                self.committed = {line.strip() for line in f if line.strip()}
+            logger.info(f"[Checkpoint] {self.path}: уже зафиксировано страниц={len(self.committed)}")
+
+    def __contains__(self, page_id: str) -> bool:
+        return page_id in self.committed
+
+    def __len__(self) -> int:
+        return len(self.committed)
+
+    def commit(self, page_ids: Iterable[str]):
+        new_ids = [page_id for page_id in page_ids if page_id not in self.committed]
+        if not new_ids:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+        self._file.write("".join(f"{page_id}\n" for page_id in new_ids))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.committed.update(new_ids)
+
+    def reset(self):
+        """Начать импорт с нуля"""
+        self.close()
+        self.committed.clear()
+        self.path.unlink(missing_ok=True)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    skipped: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0  # время в обработчиках (сумма по воркерам)
+    blocked_seconds: float = 0.0  # ожидание места в следующей очереди (backpressure)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Обработано элементов в секунду за время работы конвейера"""
+        return self.items_in / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "throughput_per_second": round(self.throughput, 2),
+        }
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Конвейер
+# ──────────────────────────────────────────────────────────────────────────────
+class IngestPipeline:
+    """
+    fetch(task) — синхронный генератор, отдающий списки Page (страницы API);
+    embed(texts) — векторы для списка текстов;
+    write(records, vectors) — запись батча в векторное хранилище.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], Sequence[Sequence[float]]],
+        write: Callable[[List[Record], Sequence[Sequence[float]]], Any],
+        *,
+        chunker: Callable[[Page], List[Record]] = chunk_page,
+        html_parser: str = "lxml",
+        checkpoint: Optional[Checkpoint] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        queue_size: int = 256,
+        batch_size: int = 64,
+        flush_interval: float = 1.0,
+        progress_interval: float = 30.0,
+    ):
+        self.embed = embed
+        self.write = write
+        self.chunker = chunker
+        self.parse_html = get_html_parser(html_parser)
+        self.checkpoint = checkpoint
+        self.concurrency = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.progress_interval = progress_interval
+
+        self.metrics: Dict[str, StageMetrics] = {}
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._pending: Dict[str, int] = {}  # page_id → сколько чанков ещё не записано
+        self._failed: Set[str] = set()
+
+    # Точка входа ------------------------------------------------------------
+
+    async def run(self, fetch: Callable[[Any], Iterable[List[Page]]], tasks: Iterable[Any]) -> Dict[str, StageMetrics]:
+        c = self.concurrency
+        self.metrics = {name: StageMetrics(name, c[name]) for name in DEFAULT_CONCURRENCY}
+        self._pending.clear()
+        self._failed.clear()
+
+        task_queue: asyncio.Queue = asyncio.Queue()
+        for task in tasks:
+            task_queue.put_nowait(task)
+        pages = asyncio.Queue(maxsize=self.queue_size)
+        parsed = asyncio.Queue(maxsize=self.queue_size)
+        chunks = asyncio.Queue(maxsize=self.queue_size)
+        # Батч векторов тяжёлый, держим их ровно столько, сколько нужно upsert-воркерам
+        batches = asyncio.Queue(maxsize=max(1, c["upsert"]) * 2)
+        self._queues = {"pages": pages, "parsed": parsed, "chunks": chunks, "batches": batches}
+
+        stages = [
+            self._stage([self._fetch_worker(fetch, task_queue, pages) for _ in range(c["fetch"])], pages, c["parse"]),
+            self._stage([self._map_worker("parse", self._parse, pages, parsed, blocking=True) for _ in range(c["parse"])], parsed, c["chunk"]),
+            self._stage([self._map_worker("chunk", self._chunk, parsed, chunks, blocking=False) for _ in range(c["chunk"])], chunks, c["embed"]),
+            self._stage([self._embed_worker(chunks, batches) for _ in range(c["embed"])], batches, c["upsert"]),
+            self._stage([self._upsert_worker(batches) for _ in range(c["upsert"])], None, 0),
+        ]
+
+        started = time.perf_counter()
+        running = [asyncio.ensure_future(stage) for stage in stages]
+        progress = asyncio.ensure_future(self._report_progress(started))
+        try:
+            done, pending = await asyncio.wait(running, return_when=asyncio.FIRST_EXCEPTION)
+            for task in pending:
+                task.cancel()
+            for task in done:
+                task.result()  # пробрасываем неожиданную ошибку стадии
+        finally:
+            progress.cancel()
+            for task in running:
+                task.cancel()
+            if self.checkpoint is not None:
+                self.checkpoint.close()
+
+        elapsed = time.perf_counter() - started
+        for metrics in self.metrics.values():
+            metrics.elapsed_seconds = elapsed
+        self._log_summary(elapsed)
+        return self.metrics
+
+    # Стадии -----------------------------------------------------------------
+
+    async def _stage(self, workers: List, outbox: Optional[asyncio.Queue], downstream_workers: int):
+        """Запускает воркеры стадии и после их завершения закрывает следующую очередь"""
+        await asyncio.gather(*workers)
+        for _ in range(downstream_workers):
+            await outbox.put(_DONE)
+
+    async def _emit(self, metrics: StageMetrics, outbox: asyncio.Queue, item: Any):
+        if outbox.full():
+            started = time.perf_counter()
+            await outbox.put(item)
+            metrics.blocked_seconds += time.perf_counter() - started
+        else:
+            outbox.put_nowait(item)
+        metrics.items_out += 1
+
+    async def _fetch_worker(self, fetch, tasks: asyncio.Queue, outbox: asyncio.Queue):
+        metrics = self.metrics["fetch"]
+        while True:
+            try:
+                task = tasks.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            try:
+                iterator = iter(fetch(task))
+            except Exception as e:
+                metrics.errors += 1
+                logger.error(f"[Pipeline] fetch: ошибка задачи {task!r}: {e}")
+                continue
+
+            while True:
+                started = time.perf_counter()
+                try:
+                    batch = await asyncio.to_thread(next, iterator, None)
+                except Exception as e:
+                    metrics.errors += 1
+                    logger.error(f"[Pipeline] fetch: ошибка загрузки {task!r}: {e}")
+                    break
+                finally:
+                    metrics.busy_seconds += time.perf_counter() - started
+                if batch is None:
+                    break
+
+                for page in batch:
+                    metrics.items_in += 1
+                    if self.checkpoint is not None and page.page_id in self.checkpoint:
+                        metrics.skipped += 1
+                        continue
+                    await self._emit(metrics, outbox, page)
+
+    async def _map_worker(self, name: str, handler, inbox: asyncio.Queue, outbox: asyncio.Queue, blocking: bool):
+        metrics = self.metrics[name]
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            metrics.items_in += 1
+            started = time.perf_counter()
+            try:
+                results = await asyncio.to_thread(handler, item) if blocking else handler(item)
+            except Exception as e:
+                metrics.errors += 1
+                logger.error(f"[Pipeline] {name}: ошибка при обработке id={getattr(item, 'page_id', None)}: {e}")
+                continue
+            finally:
+                metrics.busy_seconds += time.perf_counter() - started
+            for result in results:
+                await self._emit(metrics, outbox, result)
+
+    def _parse(self, page: Page) -> List[Page]:
+        page.text = self.parse_html(page.html or "")
+        page.html = None
+        return [page]
+
+    def _chunk(self, page: Page) -> List[Tuple[str, Record]]:
+        records = self.chunker(page)
+        if not records:
+            self._commit([page.page_id])
+            return []
+        self._pending[page.page_id] = len(records)
+        return [(page.page_id, record) for record in records]
+
+    async def _embed_worker(self, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        """Собирает чанки в батчи по batch_size; неполный батч сбрасывается по flush_interval"""
+        metrics = self.metrics["embed"]
+        batch: List[Tuple[str, Record]] = []
+        finished = False
+        while not finished:
+            if batch:
+                try:
+                    item = await asyncio.wait_for(inbox.get(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    item = None
+            else:
+                item = await inbox.get()
+
+            if item is _DONE:
+                finished = True
+            elif item is not None:
+                batch.append(item)
+                metrics.items_in += 1
+                if len(batch) < self.batch_size:
+                    continue
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                vectors = await asyncio.to_thread(self.embed, [record[1] for _, record in batch])
+            except Exception as e:
+                metrics.errors += 1
+                logger.error(f"[Pipeline] embed: ошибка батча из {len(batch)} чанков: {e}")
+                self._fail(page_id for page_id, _ in batch)
+                batch = []
+                continue
+            finally:
+                metrics.busy_seconds += time.perf_counter() - started
+            await self._emit(metrics, outbox, (batch, vectors))
+            batch = []
+
+    async def _upsert_worker(self, inbox: asyncio.Queue):
+        metrics = self.metrics["upsert"]
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            batch, vectors = item
+            metrics.items_in += len(batch)
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(self.write, [record for _, record in batch], vectors)
+            except Exception as e:
+                metrics.errors += 1
+                logger.error(f"[Pipeline] upsert: ошибка записи батча из {len(batch)} чанков: {e}")
+                self._fail(page_id for page_id, _ in batch)
+                continue
+            finally:
+                metrics.busy_seconds += time.perf_counter() - started
+            metrics.items_out += len(batch)
+
+            completed = []
+            for page_id, _ in batch:
+                remaining = self._pending.get(page_id)
+                if remaining is None:
+                    continue
+                if remaining == 1:
+                    del self._pending[page_id]
+                    if page_id not in self._failed:
+                        completed.append(page_id)
+                else:
+                    self._pending[page_id] = remaining - 1
+            self._commit(completed)
+
+    # Checkpoint -------------------------------------------------------------
+
+    def _commit(self, page_ids: List[str]):
+        if page_ids and self.checkpoint is not None:
+            self.checkpoint.commit(page_ids)
+
+    def _fail(self, page_ids: Iterable[str]):
+        """Страница с потерянным чанком не фиксируется и будет импортирована повторно"""
+        self._failed.update(page_ids)
+
+    # Отчётность -------------------------------------------------------------
+
+    async def _report_progress(self, started: float):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            elapsed = time.perf_counter() - started
+            stages = ", ".join(
+                f"{m.name}={m.items_in} ({m.items_in / elapsed:.1f}/s)" for m in self.metrics.values()
+            )
+            queues = ", ".join(f"{name}={q.qsize()}" for name, q in self._queues.items())
+            logger.info(f"[Pipeline] {elapsed:.0f}s: {stages}; очереди: {queues}")
+
+    def _log_summary(self, elapsed: float):
+        logger.info(f"[Pipeline] Завершено за {elapsed:.1f}s")
+        for m in self.metrics.values():
+            logger.info(
+                f"[Pipeline]   {m.name:<6} workers={m.workers} in={m.items_in} out={m.items_out} "
+                f"skipped={m.skipped} errors={m.errors} busy={m.busy_seconds:.1f}s "
+                f"blocked={m.blocked_seconds:.1f}s throughput={m.throughput:.1f}/s"
+            )
@@ -33,6 +33,8 @@ except ImportError:
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
+from app.core.router_registry import RouterRegistry, RouterSpec
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -128,411 +130,73 @@ def create_application() -> FastAPI:
     logger.info("🚀 FastAPI application created with hexagonal architecture")
     return app
 
+# Declarative router table. Routers are imported only when their feature is
+# enabled (API_FEATURES / API_DISABLED_FEATURES) and mounted in this order.
+# Routes match first-mounted first, so the order is significant: e.g. the
+# SSO router must come before backend.presentation.auth.routes, whose
+# unprefixed POST /logout would otherwise shadow it.
+API_ROUTERS = [
+    RouterSpec("backend.presentation.auth.routes", "/api/v1/auth", "core",
+               attribute="create_auth_router", factory=True, required=True),
+    RouterSpec("app.api.v1.budget_management", "/api/v1/budget", "core", required=True),
+    RouterSpec("app.api.v1.data_sync_management", "/api/v1", "data_sync"),
+    RouterSpec("infrastructure.vk_teams.presentation.bot_endpoints", "/api/v1/vk-teams/bot", "vk_teams"),
+    RouterSpec("infrastructure.vk_teams.presentation.webhook_endpoints", "/api/v1/vk-teams/webhook", "vk_teams"),
+    RouterSpec("app.api.health", "", "core"),
+    RouterSpec("app.api.v1.ai_advanced", "", "generation"),
+    RouterSpec("app.api.v1.vector_search", "/vector-search", "search"),
+    RouterSpec("app.api.v1.ai_analytics", "/analytics", "analytics"),
+    RouterSpec("app.api.v1.auth.user_settings", "/user-settings", "sso"),
+    RouterSpec("app.api.v1.auth.sso", "", "sso"),
+    RouterSpec("app.api.v1.search.search_advanced", "/search/advanced", "search"),
+    RouterSpec("app.api.v1.search.qdrant_vector_search", "/qdrant", "search"),
+    RouterSpec("app.api.v1.search.enhanced_search", "/enhanced-search", "search"),
+    RouterSpec("app.api.v1.ai.generate", "/generate", "generation"),
+    RouterSpec("app.api.v1.ai.bug_hotspot_detection", "/api/v1/hotspots", "analytics"),
+    RouterSpec("app.api.v1.ai.ai_optimization", "/ai-optimization", "ai_tools"),
+    RouterSpec("app.api.v1.ai.ai_code_analysis", "", "ai_tools"),
+    RouterSpec("app.api.v1.ai.ai_enhancement", "/ai-enhancement", "ai_tools"),
+    RouterSpec("app.api.v1.ai.llm_management", "/llm", "generation"),
+    RouterSpec("app.api.v1.ai.learning", "/learning", "learning"),
+    RouterSpec("app.api.v1.ai.rfc_generation", "/rfc", "generation"),
+    RouterSpec("app.api.v1.ai.ai_agents", "/api/v1/ai-agents", "ai_tools"),
+    RouterSpec("app.api.v1.ai.deep_research", "/deep-research", "generation"),
+    RouterSpec("app.api.v1.ai.core_optimization", "/api/v1/core-optimization", "ai_tools"),
+    RouterSpec("app.api.v1.documents.documentation", "", "documents"),
+    RouterSpec("app.api.v1.documents.documents", "", "documents"),
+    RouterSpec("app.api.v1.documents.data_sources", "/data-sources", "documents"),
+    RouterSpec("backend.presentation.auth.routes", "", "core"),
+    RouterSpec("app.api.v1.budget_management", "/budget", "core"),
+    RouterSpec("app.api.v1.realtime_monitoring", "/monitoring", "monitoring"),
+    RouterSpec("app.api.v1.admin.advanced_security", "/api/v1/security", "admin"),
+    RouterSpec("app.api.v1.admin.configurations", "", "admin"),
+    RouterSpec("app.api.v1.admin.budget_simple", "/budget", "admin"),
+    RouterSpec("app.api.v1.monitoring.metrics", "", "monitoring"),
+    RouterSpec("app.api.v1.monitoring.team_performance_forecasting", "/api/v1/team-performance", "analytics"),
+    RouterSpec("app.api.v1.monitoring.performance", "/performance", "monitoring"),
+    RouterSpec("app.api.v1.monitoring.predictive_analytics", "/api/v1/predictive-analytics", "analytics"),
+    RouterSpec("app.api.v1.data_sync_management", "/data-sync", "data_sync"),
+    RouterSpec("app.api.v1.datasources.datasource_endpoints", "/datasources", "documents"),
+    RouterSpec("app.api.v1.realtime.feedback", "", "realtime"),
+    RouterSpec("app.api.v1.realtime.websocket_endpoints", "", "realtime"),
+    RouterSpec("app.api.v1.realtime.enhanced_feedback", "/feedback", "realtime"),
+    RouterSpec("app.api.v1.realtime.async_tasks", "/async-tasks", "realtime"),
+    RouterSpec("infrastructure.vk_teams.presentation.webhook_endpoints", "/vk-teams/webhook", "vk_teams"),
+    RouterSpec("infrastructure.vk_teams.presentation.bot_endpoints", "/vk-teams/bot", "vk_teams"),
+]
+
 def setup_routes(app: FastAPI) -> None:
     """Setup all application routes"""
     try:
-        # Import auth routes
-        from backend.presentation.auth.routes import create_auth_router
-        
-        # Setup auth routes
-        auth_router = create_auth_router()
-        app.include_router(auth_router, prefix="/api/v1/auth")
-        
-        # Import budget management routes
-        from app.api.v1.budget_management import router as budget_router
-        app.include_router(budget_router, prefix="/api/v1/budget")
+        registry = RouterRegistry(API_ROUTERS)
+        report = registry.load(app)
         
-        # Import data sync management routes
-        try:
-            from app.api.v1.data_sync_management import router as data_sync_router
-            app.include_router(data_sync_router, prefix="/api/v1")
-            logger.info("✅ Data sync management routes configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ Data sync management not available: {e}")
-        
-        # Import VK Teams routes
-        try:
-            from infrastructure.vk_teams.presentation.bot_endpoints import router as vk_teams_bot_router
-            from infrastructure.vk_teams.presentation.webhook_endpoints import router as vk_teams_webhook_router
-            
-            app.include_router(vk_teams_bot_router, prefix="/api/v1/vk-teams/bot")
-            app.include_router(vk_teams_webhook_router, prefix="/api/v1/vk-teams/webhook")
-            
-            logger.info("✅ VK Teams routers configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ VK Teams integration not available: {e}")
+        # Import profile and startup budget report
+        report.log(logger)
+        app.state.router_report = report
         
         logger.info("✅ Routes configured successfully")
         
-
-        # Import app/api/health.py router
-        try:
-            from app.api.health import router as health_router
-            app.include_router(health_router, )
-            logger.info("✅ app/api/health.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/health.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai_advanced.py router
-        try:
-            from app.api.v1.ai_advanced import router as ai_advanced_router
-            app.include_router(ai_advanced_router, )
-            logger.info("✅ app/api/v1/ai_advanced.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai_advanced.py router not available: {e}")
-        
-
-        # Import app/api/v1/vector_search.py router
-        try:
-            from app.api.v1.vector_search import router as vector_search_router
-            app.include_router(vector_search_router, prefix="/vector-search")
-            logger.info("✅ app/api/v1/vector_search.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/vector_search.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai_analytics.py router
-        try:
-            from app.api.v1.ai_analytics import router as ai_analytics_router
-            app.include_router(ai_analytics_router, prefix="/analytics")
-            logger.info("✅ app/api/v1/ai_analytics.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai_analytics.py router not available: {e}")
-        
-
-        # Import app/api/v1/auth/user_settings.py router
-        try:
-            from app.api.v1.auth.user_settings import router as user_settings_router
-            app.include_router(user_settings_router, prefix="/user-settings")
-            logger.info("✅ app/api/v1/auth/user_settings.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/auth/user_settings.py router not available: {e}")
-        
-
-        # Import app/api/v1/auth/sso.py router
-        try:
-            from app.api.v1.auth.sso import router as sso_router
-            app.include_router(sso_router, )
-            logger.info("✅ app/api/v1/auth/sso.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/auth/sso.py router not available: {e}")
-        
-
-        # Import app/api/v1/search/search_advanced.py router
-        try:
-            from app.api.v1.search.search_advanced import router as search_advanced_router
-            app.include_router(search_advanced_router, prefix="/search/advanced")
-            logger.info("✅ app/api/v1/search/search_advanced.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/search/search_advanced.py router not available: {e}")
-        
-
-        # Import app/api/v1/search/qdrant_vector_search.py router
-        try:
-            from app.api.v1.search.qdrant_vector_search import router as qdrant_vector_search_router
-            app.include_router(qdrant_vector_search_router, prefix="/qdrant")
-            logger.info("✅ app/api/v1/search/qdrant_vector_search.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/search/qdrant_vector_search.py router not available: {e}")
-        
-
-        # Import app/api/v1/search/enhanced_search.py router
-        try:
-            from app.api.v1.search.enhanced_search import router as enhanced_search_router
-            app.include_router(enhanced_search_router, prefix="/enhanced-search")
-            logger.info("✅ app/api/v1/search/enhanced_search.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/search/enhanced_search.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai/generate.py router
-        try:
-            from app.api.v1.ai.generate import router as generate_router
-            app.include_router(generate_router, prefix="/generate")
-            logger.info("✅ app/api/v1/ai/generate.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai/generate.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai/bug_hotspot_detection.py router
-        try:
-            from app.api.v1.ai.bug_hotspot_detection import router as bug_hotspot_detection_router
-            app.include_router(bug_hotspot_detection_router, prefix="/api/v1/hotspots")
-            logger.info("✅ app/api/v1/ai/bug_hotspot_detection.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai/bug_hotspot_detection.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai/ai_optimization.py router
-        try:
-            from app.api.v1.ai.ai_optimization import router as ai_optimization_router
-            app.include_router(ai_optimization_router, prefix="/ai-optimization")
-            logger.info("✅ app/api/v1/ai/ai_optimization.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai/ai_optimization.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai/ai_code_analysis.py router
-        try:
-            from app.api.v1.ai.ai_code_analysis import router as ai_code_analysis_router
-            app.include_router(ai_code_analysis_router, )
-            logger.info("✅ app/api/v1/ai/ai_code_analysis.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai/ai_code_analysis.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai/ai_enhancement.py router
-        try:
-            from app.api.v1.ai.ai_enhancement import router as ai_enhancement_router
-            app.include_router(ai_enhancement_router, prefix="/ai-enhancement")
-            logger.info("✅ app/api/v1/ai/ai_enhancement.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai/ai_enhancement.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai/llm_management.py router
-        try:
-            from app.api.v1.ai.llm_management import router as llm_management_router
-            app.include_router(llm_management_router, prefix="/llm")
-            logger.info("✅ app/api/v1/ai/llm_management.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai/llm_management.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai/learning.py router
-        try:
-            from app.api.v1.ai.learning import router as learning_router
-            app.include_router(learning_router, prefix="/learning")
-            logger.info("✅ app/api/v1/ai/learning.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai/learning.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai/rfc_generation.py router
-        try:
-            from app.api.v1.ai.rfc_generation import router as rfc_generation_router
-            app.include_router(rfc_generation_router, prefix="/rfc")
-            logger.info("✅ app/api/v1/ai/rfc_generation.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai/rfc_generation.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai/ai_agents.py router
-        try:
-            from app.api.v1.ai.ai_agents import router as ai_agents_router
-            app.include_router(ai_agents_router, prefix="/api/v1/ai-agents")
-            logger.info("✅ app/api/v1/ai/ai_agents.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai/ai_agents.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai/deep_research.py router
-        try:
-            from app.api.v1.ai.deep_research import router as deep_research_router
-            app.include_router(deep_research_router, prefix="/deep-research")
-            logger.info("✅ app/api/v1/ai/deep_research.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai/deep_research.py router not available: {e}")
-        
-
-        # Import app/api/v1/ai/core_optimization.py router
-        try:
-            from app.api.v1.ai.core_optimization import router as core_optimization_router
-            app.include_router(core_optimization_router, prefix="/api/v1/core-optimization")
-            logger.info("✅ app/api/v1/ai/core_optimization.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/ai/core_optimization.py router not available: {e}")
-        
-
-        # Import app/api/v1/documents/documentation.py router
-        try:
-            from app.api.v1.documents.documentation import router as documentation_router
-            app.include_router(documentation_router, )
-            logger.info("✅ app/api/v1/documents/documentation.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/documents/documentation.py router not available: {e}")
-        
-
-        # Import app/api/v1/documents/documents.py router
-        try:
-            from app.api.v1.documents.documents import router as documents_router
-            app.include_router(documents_router, )
-            logger.info("✅ app/api/v1/documents/documents.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/documents/documents.py router not available: {e}")
-        
-
-        # Import app/api/v1/documents/data_sources.py router
-        try:
-            from app.api.v1.documents.data_sources import router as data_sources_router
-            app.include_router(data_sources_router, prefix="/data-sources")
-            logger.info("✅ app/api/v1/documents/data_sources.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/documents/data_sources.py router not available: {e}")
-        
-
-        # Import backend/presentation/auth/routes.py router
-        try:
-            from backend.presentation.auth.routes import router as routes_router
-            app.include_router(routes_router, )
-            logger.info("✅ backend/presentation/auth/routes.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ backend/presentation/auth/routes.py router not available: {e}")
-        
-
-        # Import app/api/v1/budget_management.py router
-        try:
-            from app.api.v1.budget_management import router as budget_management_router
-            app.include_router(budget_management_router, prefix="/budget")
-            logger.info("✅ app/api/v1/budget_management.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/budget_management.py router not available: {e}")
-        
-
-        # Import app/api/v1/realtime_monitoring.py router
-        try:
-            from app.api.v1.realtime_monitoring import router as realtime_monitoring_router
-            app.include_router(realtime_monitoring_router, prefix="/monitoring")
-            logger.info("✅ app/api/v1/realtime_monitoring.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/realtime_monitoring.py router not available: {e}")
-        
-
-        # Import app/api/v1/admin/advanced_security.py router
-        try:
-            from app.api.v1.admin.advanced_security import router as advanced_security_router
-            app.include_router(advanced_security_router, prefix="/api/v1/security")
-            logger.info("✅ app/api/v1/admin/advanced_security.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/admin/advanced_security.py router not available: {e}")
-        
-
-        # Import app/api/v1/admin/configurations.py router
-        try:
-            from app.api.v1.admin.configurations import router as configurations_router
-            app.include_router(configurations_router, )
-            logger.info("✅ app/api/v1/admin/configurations.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/admin/configurations.py router not available: {e}")
-        
-
-        # Import app/api/v1/admin/budget_simple.py router
-        try:
-            from app.api.v1.admin.budget_simple import router as budget_simple_router
-            app.include_router(budget_simple_router, prefix="/budget")
-            logger.info("✅ app/api/v1/admin/budget_simple.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/admin/budget_simple.py router not available: {e}")
-        
-
-        # Import app/api/v1/monitoring/metrics.py router
-        try:
-            from app.api.v1.monitoring.metrics import router as metrics_router
-            app.include_router(metrics_router, )
-            logger.info("✅ app/api/v1/monitoring/metrics.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/monitoring/metrics.py router not available: {e}")
-        
-
-        # Import app/api/v1/monitoring/team_performance_forecasting.py router
-        try:
-            from app.api.v1.monitoring.team_performance_forecasting import router as team_performance_forecasting_router
-            app.include_router(team_performance_forecasting_router, prefix="/api/v1/team-performance")
-            logger.info("✅ app/api/v1/monitoring/team_performance_forecasting.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/monitoring/team_performance_forecasting.py router not available: {e}")
-        
-
-        # Import app/api/v1/monitoring/performance.py router
-        try:
-            from app.api.v1.monitoring.performance import router as performance_router
-            app.include_router(performance_router, prefix="/performance")
-            logger.info("✅ app/api/v1/monitoring/performance.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/monitoring/performance.py router not available: {e}")
-        
-
-        # Import app/api/v1/monitoring/predictive_analytics.py router
-        try:
-            from app.api.v1.monitoring.predictive_analytics import router as predictive_analytics_router
-            app.include_router(predictive_analytics_router, prefix="/api/v1/predictive-analytics")
-            logger.info("✅ app/api/v1/monitoring/predictive_analytics.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/monitoring/predictive_analytics.py router not available: {e}")
-        
-
-        # Import app/api/v1/data_sync_management.py router
-        try:
-            from app.api.v1.data_sync_management import router as data_sync_management_router
-            app.include_router(data_sync_management_router, prefix="/data-sync")
-            logger.info("✅ app/api/v1/data_sync_management.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/data_sync_management.py router not available: {e}")
-        
-
-        # Import app/api/v1/datasources/datasource_endpoints.py router
-        try:
-            from app.api.v1.datasources.datasource_endpoints import router as datasource_endpoints_router
-            app.include_router(datasource_endpoints_router, prefix="/datasources")
-            logger.info("✅ app/api/v1/datasources/datasource_endpoints.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/datasources/datasource_endpoints.py router not available: {e}")
-        
-
-        # Import app/api/v1/realtime/feedback.py router
-        try:
-            from app.api.v1.realtime.feedback import router as feedback_router
-            app.include_router(feedback_router, )
-            logger.info("✅ app/api/v1/realtime/feedback.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/realtime/feedback.py router not available: {e}")
-        
-
-        # Import app/api/v1/realtime/websocket_endpoints.py router
-        try:
-            from app.api.v1.realtime.websocket_endpoints import router as websocket_endpoints_router
-            app.include_router(websocket_endpoints_router, )
-            logger.info("✅ app/api/v1/realtime/websocket_endpoints.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/realtime/websocket_endpoints.py router not available: {e}")
-        
-
-        # Import app/api/v1/realtime/enhanced_feedback.py router
-        try:
-            from app.api.v1.realtime.enhanced_feedback import router as enhanced_feedback_router
-            app.include_router(enhanced_feedback_router, prefix="/feedback")
-            logger.info("✅ app/api/v1/realtime/enhanced_feedback.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/realtime/enhanced_feedback.py router not available: {e}")
-        
-
-        # Import app/api/v1/realtime/async_tasks.py router
-        try:
-            from app.api.v1.realtime.async_tasks import router as async_tasks_router
-            app.include_router(async_tasks_router, prefix="/async-tasks")
-            logger.info("✅ app/api/v1/realtime/async_tasks.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ app/api/v1/realtime/async_tasks.py router not available: {e}")
-        
-
-        # Import infrastructure/vk_teams/presentation/webhook_endpoints.py router
-        try:
-            from infrastructure.vk_teams.presentation.webhook_endpoints import router as webhook_endpoints_router
-            app.include_router(webhook_endpoints_router, prefix="/vk-teams/webhook")
-            logger.info("✅ infrastructure/vk_teams/presentation/webhook_endpoints.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ infrastructure/vk_teams/presentation/webhook_endpoints.py router not available: {e}")
-        
-
-        # Import infrastructure/vk_teams/presentation/bot_endpoints.py router
-        try:
-            from infrastructure.vk_teams.presentation.bot_endpoints import router as bot_endpoints_router
-            app.include_router(bot_endpoints_router, prefix="/vk-teams/bot")
-            logger.info("✅ infrastructure/vk_teams/presentation/bot_endpoints.py router configured")
-        except ImportError as e:
-            logger.warning(f"⚠️ infrastructure/vk_teams/presentation/bot_endpoints.py router not available: {e}")
-        
     except Exception as e:
         logger.error(f"❌ Failed to setup routes: {e}")
         raise
@@ -548,6 +212,10 @@ def setup_middleware(app: FastAPI) -> None:
         # app.add_middleware(PerformanceMiddleware)
         # app.add_middleware(AuthMiddleware)
         
+        # One DI scope per request for 'scoped' bindings
+        from backend.infrastructure.di_container import DIScopeMiddleware
+        app.add_middleware(DIScopeMiddleware)
+        
         logger.info("✅ Basic middleware configured successfully")
         
     except ImportError:
@@ -697,6 +365,14 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.error(f"❌ Data sync scheduler shutdown failed: {e}")
             
+        # Leave the WebSocket delivery cluster
+        try:
+            from app.performance.websocket_notifications import websocket_manager
+            await websocket_manager.stop()
+            logger.info("✅ WebSocket delivery stopped")
+        except Exception as e:
+            logger.error(f"❌ WebSocket delivery shutdown failed: {e}")
+            
         # Cleanup tasks
         logger.info("✅ Cleanup completed")
     except Exception as e:
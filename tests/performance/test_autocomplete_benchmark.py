@@ -0,0 +1,68 @@
+"""
+Autocomplete Benchmark
+Prefix lookups of the completion index at AUTOCOMPLETE_BENCHMARK_ENTRIES
+entries (1M by default) with Zipf-distributed popularity, against a scan
+of the sorted prefix range.
+
+Prefixes are 1-8 characters of existing entries, so short prefixes match
+large ranges; lookups run with a pending delta as between merges.
+"""
+
+import bisect
+import os
+import time
+
+import numpy as np
+
+from adapters.vectorstore.completion_index import DOCUMENTS, CompletionIndex
+
+ENTRIES = int(os.getenv("AUTOCOMPLETE_BENCHMARK_ENTRIES", "1000000"))
+DELTA = 10000
+LOOKUPS = 2000
+SYLLABLES = ["ka", "fka", "de", "ploy", "ser", "vice", "api", "gate", "way", "log", "in", "re", "try", "con", "fig"]
+
+
+def make_entries(count, seed):
+    rng = np.random.default_rng(seed)
+    words = ["".join(rng.choice(SYLLABLES, 3)) for _ in range(20000)]
+    choices = rng.integers(0, len(words), (count, 3))
+    weights = rng.zipf(1.5, count).clip(max=10**6).astype(float)
+    return [(f"{words[a]} {words[b]} {words[c]} {i}", weight) for i, ((a, b, c), weight) in enumerate(zip(choices, weights))]
+
+
+def test_prefix_lookup_latency():
+    """Top-5 lookups stay well under a millisecond at 1M entries"""
+    entries = make_entries(ENTRIES, 0)
+    index = CompletionIndex()
+    start = time.perf_counter()
+    index.rebuild_source("documents", (text for text, _ in entries), (weight for _, weight in entries))
+    build_s = time.perf_counter() - start
+    index.add("documents", [text for text, _ in make_entries(DELTA, 1)])
+
+    rng = np.random.default_rng(2)
+    prefixes = [entries[i][0][:rng.integers(1, 9)] for i in rng.integers(0, ENTRIES, LOOKUPS)]
+    base = index.indexes["documents", DOCUMENTS].base
+
+    lookup_ms, scan_ms = [], []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        top = index.suggest(prefix, 5)
+        lookup_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        low = bisect.bisect_left(base.keys, prefix)
+        high = bisect.bisect_left(base.keys, prefix + "\U0010ffff")
+        expected = base.weights[low:high].max()
+        scan_ms.append((time.perf_counter() - start) * 1000)
+        assert top[0]["weight"] >= expected
+
+    start = time.perf_counter()
+    merged = index.merge()
+    merge_s = time.perf_counter() - start
+
+    print(
+        f"\nAutocomplete ({ENTRIES} entries, {DELTA} pending): build {build_s:.1f}s, merge of {merged} {merge_s:.2f}s\n"
+        f"  top-5 lookup p50 {np.median(lookup_ms):.3f}ms p99 {np.percentile(lookup_ms, 99):.3f}ms "
+        f"(range max scan p50 {np.median(scan_ms):.3f}ms p99 {np.percentile(scan_ms, 99):.3f}ms)"
+    )
+    assert np.median(lookup_ms) < 0.5 and np.percentile(lookup_ms, 99) < 1.0
@@ -0,0 +1,138 @@
+"""
+Batched Search Benchmark
+Cross-collection query latency: the previous fan-out (an existence check
+plus a search per collection) against one batched request per query.
+
+Every call to the vector store charges STORE_RTT seconds, the shape of a
+remote Qdrant; searches go to the in-memory local vector index. The
+round trip is configurable with BATCHED_SEARCH_BENCHMARK_RTT.
+"""
+
+import asyncio
+import os
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from adapters.vectorstore.collections import (CollectionManager, CollectionType,
+                                              DocumentMetadata)
+from adapters.vectorstore.embeddings import EmbeddingResult
+from adapters.vectorstore.local_index import LocalVectorStore
+
+STORE_RTT = float(os.getenv("BATCHED_SEARCH_BENCHMARK_RTT", "0.005"))
+COLLECTIONS = [
+    CollectionType.DOCUMENTS,
+    CollectionType.CONFLUENCE,
+    CollectionType.JIRA,
+    CollectionType.GITLAB,
+    CollectionType.GITHUB,
+    CollectionType.UPLOADED_FILES,
+]
+DOCUMENTS_PER_COLLECTION = 200
+QUERIES = 30
+
+
+class FakeEmbeddings:
+    async def embed_text(self, text):
+        vector = np.random.default_rng(abs(hash(text)) % 2**32).normal(size=16)
+        return EmbeddingResult(text=text, vector=vector.tolist(), token_count=1, cost_estimate=0.0)
+
+    async def embed_texts(self, texts):
+        return [await self.embed_text(text) for text in texts]
+
+
+class RemoteStore(LocalVectorStore):
+    """Local store charging one round trip per call"""
+
+    def __init__(self):
+        super().__init__()
+        self.remote = False
+
+    def _round_trip(self):
+        if self.remote:
+            time.sleep(STORE_RTT)
+
+    def collection_exists(self, collection_name):
+        self._round_trip()
+        return super().collection_exists(collection_name)
+
+    def search_vectors(self, *args, **kwargs):
+        self._round_trip()
+        return super().search_vectors(*args, **kwargs)
+
+    def search_batch(self, requests):
+        self._round_trip()
+        self.remote = False  # the batch is answered by the server in one round trip
+        try:
+            return super().search_batch(requests)
+        finally:
+            self.remote = True
+
+    def get_collection_names(self):
+        self._round_trip()
+        return super().get_collection_names()
+
+
+async def build_manager():
+    with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=FakeEmbeddings()):
+        manager = CollectionManager()
+    manager.qdrant = RemoteStore()
+    for collection_type in COLLECTIONS:
+        for i in range(DOCUMENTS_PER_COLLECTION):
+            metadata = DocumentMetadata(
+                doc_id=f"{collection_type.value}_{i}", title=f"Doc {i}", source="bench", source_type=collection_type
+            )
+            assert await manager.index_document(f"{collection_type.value} document {i}", metadata, collection_type)
+    manager.qdrant.remote = True
+    return manager
+
+
+async def fan_out_search(manager, query, limit):
+    """The previous path: a health check and a search per collection, gathered"""
+    embedding = await manager._get_or_generate_embedding(query)
+
+    async def search_one(collection_type):
+        collection_name = manager.get_collection_name(collection_type)
+        if not await asyncio.to_thread(manager.qdrant.collection_exists, collection_name):
+            return []
+        hits = await asyncio.to_thread(
+            manager.qdrant.search_vectors,
+            collection_name,
+            embedding.vector,
+            limit=manager._calculate_adaptive_limit(collection_type, limit),
+            score_threshold=0.3,
+        )
+        return [{**hit, "collection_type": collection_type.value} for hit in hits]
+
+    results = await asyncio.gather(*(search_one(collection_type) for collection_type in COLLECTIONS))
+    return sorted((hit for hits in results for hit in hits), key=lambda x: x["score"], reverse=True)[:limit]
+
+
+async def timed(search, queries):
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        await search(query)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+@pytest.mark.asyncio
+async def test_batched_search_beats_fan_out():
+    """One batched request per query is faster than a round trip per collection"""
+    manager = await build_manager()
+    queries = [f"query {i}" for i in range(QUERIES)]
+    for query in queries:  # warm the embedding cache and the known collections
+        await manager.search_documents(query, COLLECTIONS, limit=10)
+
+    fan_out_ms = await timed(lambda query: fan_out_search(manager, query, 10), queries)
+    batched_ms = await timed(lambda query: manager.search_documents(query, COLLECTIONS, limit=10), queries)
+
+    print(
+        f"\nSearch across {len(COLLECTIONS)} collections (store RTT {STORE_RTT * 1000:.0f}ms): "
+        f"fan-out p50 {np.median(fan_out_ms):.2f}ms, batched p50 {np.median(batched_ms):.2f}ms "
+        f"({np.median(fan_out_ms) / np.median(batched_ms):.1f}x)"
+    )
+    assert np.median(batched_ms) < np.median(fan_out_ms)
@@ -0,0 +1,101 @@
+"""
+Bulk Indexing Benchmark
+Per-document index_document calls versus a BulkIndexer job pooling chunks
+across documents.
+
+The embedder is a stub that charges EMBED_REQUEST_SECONDS per request plus
+EMBED_INPUT_SECONDS per input, the shape of a remote embeddings API; vectors
+go to the in-memory local vector index.
+"""
+
+import asyncio
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from adapters.vectorstore.bulk_indexing import (BulkDocument, BulkIndexer,
+                                                BulkIndexJobRegistry)
+from adapters.vectorstore.collections import (CollectionManager, CollectionType,
+                                              DocumentMetadata)
+from adapters.vectorstore.embeddings import EmbeddingResult
+
+DOCUMENTS = 500
+EMBED_REQUEST_SECONDS = float(os.getenv("BULK_INDEX_BENCHMARK_RTT", "0.02"))
+EMBED_INPUT_SECONDS = 0.0002
+
+
+class LatencyEmbeddings:
+    max_batch_inputs = 2048
+
+    def __init__(self):
+        self.requests = 0
+
+    def count_tokens(self, text):
+        return len(text) // 4
+
+    async def embed_batch(self, texts):
+        self.requests += 1
+        await asyncio.sleep(EMBED_REQUEST_SECONDS + EMBED_INPUT_SECONDS * len(texts))
+        return [EmbeddingResult(text, [0.1] * 8, len(text) // 4, 0.0) for text in texts]
+
+    async def embed_texts(self, texts):
+        return await self.embed_batch(texts)
+
+    async def embed_text(self, text):
+        return (await self.embed_batch([text]))[0]
+
+
+def make_documents():
+    documents = []
+    for i in range(DOCUMENTS):
+        text = (f"Section {i} describes the deployment pipeline. " * 50)[:2000]
+        metadata = DocumentMetadata(doc_id=f"doc_{i}", title=f"Doc {i}", source="bench", source_type=CollectionType.DOCUMENTS)
+        documents.append((text, metadata))
+    return documents
+
+
+async def run_per_document(documents):
+    embeddings = LatencyEmbeddings()
+    with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=embeddings):
+        manager = CollectionManager()
+    start = time.perf_counter()
+    for text, metadata in documents:
+        assert await manager.index_document(text, metadata)
+    elapsed = time.perf_counter() - start
+    return elapsed, manager.qdrant.count_points("docs_documents"), embeddings.requests
+
+
+async def run_bulk(documents):
+    embeddings = LatencyEmbeddings()
+    with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=embeddings):
+        manager = CollectionManager()
+    registry = BulkIndexJobRegistry(BulkIndexer(manager))
+    entries = [BulkDocument(text, metadata, CollectionType.DOCUMENTS) for text, metadata in documents]
+    start = time.perf_counter()
+    job = await registry.wait(registry.submit(entries).job_id)
+    elapsed = time.perf_counter() - start
+    assert job.to_dict()["successful"] == DOCUMENTS
+    return elapsed, manager.qdrant.count_points("docs_documents"), embeddings.requests
+
+
+@pytest.mark.asyncio
+async def test_bulk_indexing_throughput():
+    """A bulk job embeds and upserts chunks of many documents together"""
+    documents = make_documents()
+
+    single_time, single_chunks, single_requests = await run_per_document(documents)
+    bulk_time, bulk_chunks, bulk_requests = await run_bulk(documents)
+
+    print(
+        f"\nBulk indexing ({DOCUMENTS} docs, {bulk_chunks} chunks, "
+        f"{EMBED_REQUEST_SECONDS * 1000:.0f}ms/request): "
+        f"per-document {single_chunks / single_time:.0f} chunks/s ({single_requests} requests), "
+        f"bulk {bulk_chunks / bulk_time:.0f} chunks/s ({bulk_requests} requests, "
+        f"{single_time / bulk_time:.1f}x)"
+    )
+
+    assert single_chunks == bulk_chunks
+    assert bulk_requests < single_requests
+    assert bulk_time < single_time
@@ -0,0 +1,62 @@
+"""
+Feedback Submission Benchmark
+Submission latency must stay flat as stored feedback history grows
+"""
+
+import logging
+import statistics
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from domain.monitoring.enhanced_feedback_service import (
+    ContentType, EnhancedFeedbackService, FeedbackType)
+
+logger = logging.getLogger(__name__)
+
+CONTENT_IDS = [f"content_{i}" for i in range(20)]
+SAMPLE_SIZE = 1000
+
+
+async def _submit_batch(service, count, offset=0):
+    latencies = []
+    for i in range(offset, offset + count):
+        start = time.perf_counter()
+        await service.submit_feedback(
+            user_id=f"user_{i % 500}",
+            content_id=CONTENT_IDS[i % len(CONTENT_IDS)],
+            content_type=ContentType.AI_RESPONSE,
+            feedback_type=FeedbackType.RATING,
+            rating=1 + i % 5,
+        )
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+async def test_submission_latency_flat_with_history():
+    """Per-submission cost at 100k stored items stays close to the 10k cost"""
+    service = EnhancedFeedbackService(pubsub_endpoint=AsyncMock())
+    service.config["real_time_notifications"] = False
+    service.config["max_raw_items"] = 200_000
+    logging.getLogger("domain.monitoring.enhanced_feedback_service").setLevel(
+        logging.WARNING
+    )
+
+    await _submit_batch(service, 10_000 - SAMPLE_SIZE)
+    at_10k = await _submit_batch(service, SAMPLE_SIZE, offset=10_000)
+
+    await _submit_batch(service, 90_000 - SAMPLE_SIZE, offset=20_000)
+    at_100k = await _submit_batch(service, SAMPLE_SIZE, offset=200_000)
+
+    median_10k = statistics.median(at_10k) * 1e6
+    median_100k = statistics.median(at_100k) * 1e6
+    print(
+        f"\nsubmit_feedback median: {median_10k:.1f}µs @10k, "
+        f"{median_100k:.1f}µs @100k items"
+    )
+
+    assert len(service.feedback_items) == 100_000
+    assert median_100k < median_10k * 2
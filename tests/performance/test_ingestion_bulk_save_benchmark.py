@@ -0,0 +1,176 @@
+"""
+Ingestion Bulk Save Benchmark
+DatabaseManager.save_documents with save_mode "rows" (SELECT + INSERT per
+document) versus "copy" (staged bulk merge) at 10k and 100k documents.
+
+With INGESTION_BENCHMARK_DATABASE_URL pointing at a disposable Postgres both
+modes run against it. Otherwise they run against an in-memory connection
+that speaks the asyncpg calls of both paths and counts network round trips:
+the measured time is the client-side cost of DatabaseManager plus
+ROUND_TRIP_SECONDS per round trip, and the server-side SQL cost is not
+modelled.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+
+from tools.scripts.ingestion.database_manager import (CREATE_STAGING_TABLE,
+                                                      MERGE_BY_CONTENT_HASH,
+                                                      STAGING_COLUMNS,
+                                                      UPDATE_CHANGED_BY_ID,
+                                                      DatabaseManager)
+from tools.scripts.ingestion.local_files_processor import LocalDocument
+
+SIZES = (10_000, 100_000)
+CHUNK_SIZE = 5000
+POSTGRES_URL = os.getenv("INGESTION_BENCHMARK_DATABASE_URL")
+ROUND_TRIP_SECONDS = float(os.getenv("INGESTION_BENCHMARK_RTT", "0.0002"))
+
+ID = STAGING_COLUMNS.index("id")
+CONTENT_HASH = STAGING_COLUMNS.index("content_hash")
+
+
+def make_documents(count, offset=0):
+    documents = []
+    for index in range(offset, offset + count):
+        content = f"Document {index}: " + "architecture decision record text " * 8
+        content_hash = hashlib.sha256(content.encode()).hexdigest()
+        documents.append(
+            LocalDocument(
+                id=f"local:{index}",
+                title=f"doc_{index}.md",
+                content=content,
+                file_path=f"docs/doc_{index}.md",
+                file_name=f"doc_{index}.md",
+                file_extension=".md",
+                file_size=len(content),
+                file_type="text",
+                created_date="2024-05-01T10:00:00",
+                modified_date="2024-05-02T10:00:00",
+                content_hash=content_hash,
+            )
+        )
+    return documents
+
+
+class RoundTripConnection:
+    """
+    ingested_documents kept as id -> content_hash; every statement, COPY and
+    transaction or savepoint boundary (BEGIN, COMMIT) is one round trip
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.hashes = set()
+        self.staged = []
+        self.round_trips = 0
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.round_trips += 1
+        yield
+        self.round_trips += 1
+
+    async def copy_records_to_table(self, table_name, records, columns):
+        self.round_trips += 1
+        self.staged = list(records)
+
+    async def fetchval(self, sql, *args):
+        self.round_trips += 1
+        return args[0] if args[0] in self.hashes else None
+
+    async def execute(self, sql, *args):
+        self.round_trips += 1
+        if sql == CREATE_STAGING_TABLE:
+            return "CREATE TABLE"
+        if sql == UPDATE_CHANGED_BY_ID:
+            # Nothing is re-ingested with new content here
+            return "UPDATE 0"
+        # INSERT ... ON CONFLICT (id) of the row path
+        self.ids[args[0]] = args[8]
+        self.hashes.add(args[8])
+        return "INSERT 0 1"
+
+    async def fetch(self, sql, *args):
+        self.round_trips += 1
+        assert sql == MERGE_BY_CONTENT_HASH
+        merged = []
+        for record in self.staged:
+            if record[ID] in self.ids:
+                continue
+            inserted = record[CONTENT_HASH] not in self.hashes
+            if inserted:
+                self.ids[record[ID]] = record[CONTENT_HASH]
+                self.hashes.add(record[CONTENT_HASH])
+            merged.append({"inserted": inserted})
+        # ON COMMIT DELETE ROWS
+        self.staged = []
+        return merged
+
+
+class RoundTripPool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+async def run_round_trips(save_mode, documents):
+    conn = RoundTripConnection()
+    manager = DatabaseManager({"url": "postgresql://benchmark", "save_mode": save_mode, "bulk_chunk_size": CHUNK_SIZE})
+    manager.pool = RoundTripPool(conn)
+    start = time.perf_counter()
+    saved = await manager.save_documents(documents)
+    elapsed = time.perf_counter() - start
+    assert saved == len(conn.ids)
+    return elapsed, conn.round_trips, saved
+
+
+async def run_postgres(save_mode, documents):
+    manager = DatabaseManager({"url": POSTGRES_URL, "save_mode": save_mode, "bulk_chunk_size": CHUNK_SIZE})
+    await manager.initialize()
+    async with manager.pool.acquire() as conn:
+        await conn.execute("TRUNCATE ingested_documents")
+    start = time.perf_counter()
+    saved = await manager.save_documents(documents)
+    elapsed = time.perf_counter() - start
+    await manager.close()
+    return elapsed, saved
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_bulk_save_throughput(size):
+    """Staged bulk merge beats per-document statements"""
+    documents = make_documents(size)
+
+    if POSTGRES_URL:
+        backend = "postgres"
+        rows_time, rows_count = asyncio.run(run_postgres("rows", documents))
+        bulk_time, bulk_count = asyncio.run(run_postgres("copy", documents))
+    else:
+        rows_raw, rows_trips, rows_count = asyncio.run(run_round_trips("rows", documents))
+        bulk_raw, bulk_trips, bulk_count = asyncio.run(run_round_trips("copy", documents))
+        rows_time = rows_raw + rows_trips * ROUND_TRIP_SECONDS
+        bulk_time = bulk_raw + bulk_trips * ROUND_TRIP_SECONDS
+        backend = (
+            f"in-memory connection + {ROUND_TRIP_SECONDS * 1e6:.0f}us/round trip; client-side rows "
+            f"{size / rows_raw:.0f} docs/s, bulk {size / bulk_raw:.0f} docs/s; "
+            f"round trips {rows_trips} vs {bulk_trips}"
+        )
+        # BEGIN, CREATE TEMP TABLE, COPY, UPDATE, INSERT ... RETURNING, COMMIT per chunk
+        assert bulk_trips == 6 * -(-size // CHUNK_SIZE)
+
+    print(
+        f"\nBulk save ({size} docs): rows {size / rows_time:.0f} docs/s, "
+        f"bulk {size / bulk_time:.0f} docs/s ({rows_time / bulk_time:.1f}x) [{backend}]"
+    )
+
+    assert rows_count == bulk_count == size
+    assert bulk_time < rows_time
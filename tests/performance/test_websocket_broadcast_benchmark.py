@@ -0,0 +1,166 @@
+"""
+WebSocket Broadcast Benchmark
+5k in-process ASGI WebSocket connections, a few of them slow consumers
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+import pytest
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+from app.performance.websocket_notifications import (NotificationType,
+                                                     WebSocketManager)
+
+logger = logging.getLogger(__name__)
+
+CONNECTIONS = 5000
+SLOW_CONNECTIONS = 20
+SLOW_SEND_DELAY = 0.05
+
+
+class BroadcastTracker:
+    """Signals once a given number of clients received the broadcast"""
+
+    def __init__(self):
+        self.expected = 0
+        self.count = 0
+        self.done = asyncio.Event()
+
+    def reset(self, expected: int):
+        self.expected = expected
+        self.count = 0
+        self.done.clear()
+
+    def mark(self):
+        self.count += 1
+        if self.count >= self.expected:
+            self.done.set()
+
+
+class InProcessWebSocketClient:
+    """Minimal ASGI websocket client driving the app without a server"""
+
+    def __init__(self, app, path: str, tracker: BroadcastTracker, send_delay: float = 0.0):
+        self.app = app
+        self.path = path
+        self.tracker = tracker
+        self.send_delay = send_delay
+        self.inbox = asyncio.Queue()
+        self.received = 0
+        self.accepted = asyncio.Event()
+        self.task = None
+
+    async def connect(self):
+        scope = {
+            "type": "websocket",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "subprotocols": [],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+            "scheme": "ws",
+        }
+        await self.inbox.put({"type": "websocket.connect"})
+        self.task = asyncio.ensure_future(self.app(scope, self.inbox.get, self._send))
+        await self.accepted.wait()
+
+    async def disconnect(self):
+        await self.inbox.put({"type": "websocket.disconnect", "code": 1000})
+
+    async def _send(self, message):
+        if message["type"] == "websocket.accept":
+            self.accepted.set()
+        elif message["type"] == "websocket.send":
+            if self.send_delay:
+                await asyncio.sleep(self.send_delay)
+            self.received += 1
+            if '"broadcast": true' in message["text"] and not self.send_delay:
+                self.tracker.mark()
+
+
+def _build_app(manager: WebSocketManager) -> FastAPI:
+    app = FastAPI()
+
+    @app.websocket("/ws/{user_id}")
+    async def notifications(websocket: WebSocket, user_id: str):
+        await manager.connect(websocket, user_id)
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await manager.disconnect(websocket)
+
+    return app
+
+
+async def _sequential_broadcast(manager: WebSocketManager, message):
+    """Previous strategy: serialize per connection and await each send in turn"""
+    for connections in manager.active_connections.values():
+        for websocket in connections:
+            await websocket.send_text(json.dumps(message, default=str))
+
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+async def test_broadcast_5k_connections():
+    """Fast clients receive a broadcast in time independent of slow clients"""
+    manager = WebSocketManager()
+    app = _build_app(manager)
+    tracker = BroadcastTracker()
+
+    clients = [
+        InProcessWebSocketClient(
+            app,
+            f"/ws/user_{i}",
+            tracker,
+            send_delay=SLOW_SEND_DELAY if i < SLOW_CONNECTIONS else 0.0,
+        )
+        for i in range(CONNECTIONS)
+    ]
+    for client in clients:
+        await client.connect()
+    await manager.flush(timeout=30)
+
+    message = {
+        "type": NotificationType.SYSTEM_ALERT.value,
+        "data": {"message": "maintenance window", "payload": list(range(50))},
+        "broadcast": True,
+    }
+
+    tracker.reset(CONNECTIONS - SLOW_CONNECTIONS)
+    start = time.perf_counter()
+    await _sequential_broadcast(manager, message)
+    sequential_time = time.perf_counter() - start
+
+    tracker.reset(CONNECTIONS - SLOW_CONNECTIONS)
+    start = time.perf_counter()
+    result = await manager.broadcast_system_notification(
+        NotificationType.SYSTEM_ALERT, message["data"]
+    )
+    await tracker.done.wait()
+    fanout_time = time.perf_counter() - start
+
+    stats = await manager.get_connection_stats()
+    print(
+        f"\n{CONNECTIONS} connections ({SLOW_CONNECTIONS} slow): "
+        f"sequential {sequential_time * 1000:.0f}ms, "
+        f"fan-out to fast clients {fanout_time * 1000:.0f}ms, "
+        f"send p95 {stats['send_latency_ms']['p95']}ms"
+    )
+
+    assert result["sent"] == CONNECTIONS
+    assert fanout_time < sequential_time
+
+    await manager.flush(timeout=30)
+    for client in clients:
+        await client.disconnect()
+    await asyncio.gather(*(c.task for c in clients))
+    assert manager.connection_stats["current_connections"] == 0
@@ -212,30 +212,37 @@ class TestSecurityIntegration:
     @pytest.mark.asyncio
     async def test_rate_limit_middleware_integration(self):
         """Test rate limiting middleware integration"""
-        # Mock FastAPI app
-        app = MagicMock()
+        # Minimal ASGI app
+        async def app(scope, receive, send):
+            await Response("ok")(scope, receive, send)
+        
         middleware = RateLimitMiddleware(app, enabled=True)
         
-        # Mock request
-        request = MagicMock()
-        request.url.path = "/api/v1/test"
-        request.method = "GET"
-        request.state.user = None
-        request.client.host = "192.168.1.1"
-        request.headers = {}
+        # ASGI request
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": "/api/v1/test",
+            "headers": [],
+            "query_string": b"",
+            "client": ("192.168.1.1", 12345),
+        }
+        messages = []
+        
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
         
-        # Mock call_next
-        async def mock_call_next(req):
-            response = MagicMock()
-            response.headers = {}
-            return response
+        async def send(message):
+            messages.append(message)
         
         # Test successful request
-        response = await middleware.dispatch(request, mock_call_next)
+        await middleware(scope, receive, send)
+        headers = dict(messages[0]["headers"])
         
         # Should have rate limit headers
-        assert "X-RateLimit-Limit" in response.headers
-        assert "X-RateLimit-Remaining" in response.headers
+        assert messages[0]["status"] == 200
+        assert b"x-ratelimit-limit" in headers
+        assert b"x-ratelimit-remaining" in headers
     
     def test_security_configuration(self):
         """Test security configuration"""
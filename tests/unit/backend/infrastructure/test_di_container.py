@@ -8,11 +8,12 @@ Following hexagonal architecture testing principles.
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from typing import Protocol, Optional
+import inspect
 import os
 import tempfile
 from typing import runtime_checkable
 
-from backend.infrastructure.di_container import DIContainer, DIError
+from backend.infrastructure.di_container import DIContainer, DIError, DIScopeMiddleware, request_scope
 from backend.infrastructure.config.di_config import (
     EnvironmentConfig, DatabaseConfig, AuthConfig, EmailConfig, RedisConfig,
     DIConfiguration, EnhancedDIConfiguration, detect_environment
@@ -309,6 +310,138 @@ class TestDIContainer:
         assert instance.count == 42
 
 
+class TestResolutionPlans:
+    """Test compiled resolution plans, scoped lifetimes and async factories"""
+    
+    @pytest.fixture
+    def container(self):
+        """Create a fresh DI container"""
+        return DIContainer()
+    
+    def test_signature_inspected_once_per_binding(self, container):
+        """Test transient resolutions reuse the compiled plan"""
+        container.bind_instance(Optional[str], "dsn")
+        container.bind(TestServicePort, MockTestService, lifetime='transient')
+        
+        with patch("backend.infrastructure.di_container.inspect.signature", wraps=inspect.signature) as signature:
+            instances = [container.get(TestServicePort) for _ in range(3)]
+        
+        assert signature.call_count == 1
+        assert len({id(instance) for instance in instances}) == 3
+        assert all(instance.dependency == "dsn" for instance in instances)
+    
+    def test_rebinding_recompiles_plans(self, container):
+        """Test plans of dependents are dropped when a binding changes"""
+        container.bind_instance(Optional[str], "first")
+        container.bind(TestServicePort, MockTestService, lifetime='transient')
+        assert container.get(TestServicePort).dependency == "first"
+        
+        container.bind_instance(Optional[str], "second")
+        
+        assert container.get(TestServicePort).dependency == "second"
+    
+    def test_compile_detects_cycles(self, container):
+        """Test circular dependencies fail at configure time"""
+        class ServiceA:
+            def __init__(self, service_b):
+                self.service_b = service_b
+        
+        class ServiceB:
+            def __init__(self, service_a: ServiceA):
+                self.service_a = service_a
+        
+        ServiceA.__init__.__annotations__['service_b'] = ServiceB
+        container.bind(ServiceA, ServiceA).bind(ServiceB, ServiceB)
+        
+        with pytest.raises(DIError, match="Circular dependency: ServiceA -> ServiceB -> ServiceA"):
+            container.compile()
+    
+    def test_scoped_lifetime(self, container):
+        """Test scoped bindings live as long as the request scope"""
+        container.bind(TestServicePort, MockTestService, lifetime='scoped')
+        
+        with request_scope():
+            first = container.get(TestServicePort)
+            assert container.get(TestServicePort) is first
+        with request_scope():
+            assert container.get(TestServicePort) is not first
+        with pytest.raises(DIError, match="no request scope is active"):
+            container.get(TestServicePort)
+    
+    def test_singleton_cannot_capture_scoped(self, container):
+        """Test a singleton depending on a scoped binding is rejected"""
+        class Consumer:
+            def __init__(self, service: TestServicePort):
+                self.service = service
+        
+        container.bind(TestServicePort, MockTestService, lifetime='scoped')
+        container.bind(Consumer, Consumer, lifetime='singleton')
+        
+        with pytest.raises(DIError, match="cannot depend on request-scoped"):
+            container.compile()
+    
+    def test_factory_type_checked(self, container):
+        """Test factories returning an incompatible type fail"""
+        container.bind_factory(TestServicePort, lambda: "not a service")
+        
+        with pytest.raises(DIError, match="returned incompatible type"):
+            container.get(TestServicePort)
+    
+    @pytest.mark.asyncio
+    async def test_async_factory(self, container):
+        """Test async factories resolve through aget, including as dependencies"""
+        calls = []
+        
+        async def create_service():
+            calls.append(1)
+            return MockTestService("async")
+        
+        class Consumer:
+            def __init__(self, service: TestServicePort):
+                self.service = service
+        
+        container.bind_factory(TestServicePort, create_service, lifetime='singleton')
+        container.bind(Consumer, Consumer, lifetime='transient')
+        
+        with pytest.raises(DIError, match="resolve it with aget"):
+            container.get(Consumer)
+        first = await container.aget(Consumer)
+        second = await container.aget(Consumer)
+        
+        assert first is not second and first.service is second.service
+        assert first.service.dependency == "async" and len(calls) == 1
+    
+    def test_scope_middleware(self, container):
+        """Test each ASGI request gets its own scope shared by its dependencies"""
+        import uuid
+        
+        from fastapi import Depends, FastAPI
+        from fastapi.testclient import TestClient
+        
+        class IdentifiedService(MockTestService):
+            # id() of a freed instance may be reused by the next request
+            def __init__(self):
+                super().__init__()
+                self.instance_id = uuid.uuid4().hex
+        
+        container.bind(TestServicePort, IdentifiedService, lifetime='scoped')
+        app = FastAPI()
+        app.add_middleware(DIScopeMiddleware)
+        
+        def service():
+            return container.get(TestServicePort)
+        
+        @app.get("/ids")
+        def ids(first=Depends(service), second=Depends(lambda: container.get(TestServicePort))):
+            return [first.instance_id, second.instance_id]
+        
+        client = TestClient(app)
+        first, second = client.get("/ids").json(), client.get("/ids").json()
+        
+        assert first[0] == first[1] and second[0] == second[1]
+        assert first[0] != second[0]
+
+
 class TestEnvironmentConfig:
     """Test EnvironmentConfig functionality"""
     
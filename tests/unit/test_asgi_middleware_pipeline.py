@@ -0,0 +1,200 @@
+"""
+Unit tests for the pure ASGI middleware stack and the shared request context
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.request_context import (REQUEST_CONTEXT_KEY, RequestContext,
+                                      get_request_context)
+from app.security.rate_limiting import RateLimitMiddleware, in_memory_store
+from app.security.security_headers import SecurityHeadersMiddleware
+from infra.monitoring.middleware import MonitoringMiddleware
+
+
+class RecordingMiddleware:
+    """Records the context each layer sees"""
+
+    def __init__(self, app, seen):
+        self.app = app
+        self.seen = seen
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            self.seen.append(get_request_context(scope))
+        await self.app(scope, receive, send)
+
+
+class FakePrincipalMiddleware:
+    """Stands in for the auth middleware"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            principal = type("Principal", (), {"user_id": "user-42"})()
+            get_request_context(scope).set_principal(principal)
+        await self.app(scope, receive, send)
+
+
+def build_app(seen=None) -> FastAPI:
+    app = FastAPI()
+    seen = seen if seen is not None else []
+
+    @app.get("/ping")
+    async def ping(request: Request):
+        seen.append(request.state.request_context)
+        return PlainTextResponse("pong", headers={"server": "uvicorn"})
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for index in range(3):
+                yield f"chunk{index}\n"
+                await asyncio.sleep(0)
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/items/{item_id}")
+    async def item(request: Request, item_id: int):
+        return {"user": getattr(request.state, "user").user_id}
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept()
+        await websocket.send_text(await websocket.receive_text())
+        await websocket.close()
+
+    app.add_middleware(FakePrincipalMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(RecordingMiddleware, seen=seen)
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(MonitoringMiddleware, enable_detailed_logging=False)
+    return app
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    in_memory_store.clear()
+    yield
+    in_memory_store.clear()
+
+
+class TestRequestContext:
+    """Test the shared per-request context"""
+
+    def test_context_created_once_per_scope(self):
+        scope = {"type": "http", "method": "GET", "path": "/users/123", "headers": []}
+
+        context = get_request_context(scope)
+
+        assert get_request_context(scope) is context
+        assert scope["state"]["request_id"] == context.request_id
+        assert context.route == "/users/{id}"
+        assert context.user_id == "anonymous"
+
+    def test_all_layers_share_one_context(self):
+        seen = []
+        client = TestClient(build_app(seen))
+
+        response = client.get("/ping")
+
+        assert response.status_code == 200
+        assert len(seen) == 2
+        assert seen[0] is seen[1]
+        assert isinstance(seen[0], RequestContext)
+        assert seen[0].status_code == 200
+        assert seen[0].user_id == "user-42"
+
+    def test_principal_visible_on_request_state(self):
+        client = TestClient(build_app())
+
+        response = client.get("/items/7")
+
+        assert response.json() == {"user": "user-42"}
+
+
+class TestPureASGIMiddlewares:
+    """Test header handling, streaming and websocket pass-through"""
+
+    def test_headers_added_without_buffering(self):
+        client = TestClient(build_app())
+
+        response = client.get("/ping")
+
+        assert response.headers["x-frame-options"] == "DENY"
+        assert response.headers["x-ratelimit-limit"] == "100"
+        assert "server" not in response.headers
+
+    def test_no_store_for_sensitive_paths(self):
+        client = TestClient(build_app())
+
+        response = client.get("/api/v1/auth/anything")
+
+        assert response.status_code == 404
+        assert response.headers["cache-control"].startswith("no-store")
+
+    @pytest.mark.asyncio
+    async def test_streaming_chunks_forwarded_individually(self):
+        app = build_app()
+        messages = []
+        requested = asyncio.Event()
+
+        async def receive():
+            if not requested.is_set():
+                requested.set()
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Client stays connected until the response completes
+            await asyncio.Event().wait()
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/stream",
+            "raw_path": b"/stream",
+            "query_string": b"",
+            "headers": [],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        await app(scope, receive, send)
+
+        bodies = [m["body"] for m in messages if m["type"] == "http.response.body"]
+        assert b"".join(bodies) == b"chunk0\nchunk1\nchunk2\n"
+        assert len([body for body in bodies if body]) == 3
+        assert scope["state"][REQUEST_CONTEXT_KEY].response_size == 21
+
+    def test_websocket_passes_through(self):
+        client = TestClient(build_app())
+
+        with client.websocket_connect("/ws") as websocket:
+            websocket.send_text("hello")
+            assert websocket.receive_text() == "hello"
+
+    def test_rate_limited_response(self):
+        app = FastAPI()
+
+        @app.get("/api/v1/debug")
+        async def debug():
+            return {"ok": True}
+
+        app.add_middleware(RateLimitMiddleware)
+        client = TestClient(app)
+
+        statuses = [client.get("/api/v1/debug").status_code for _ in range(6)]
+
+        assert statuses == [200] * 5 + [429]
+        response = client.get("/api/v1/debug")
+        assert response.headers["x-ratelimit-remaining"] == "0"
+        assert "retry-after" in response.headers
@@ -0,0 +1,164 @@
+"""
+Tests for batched multi-collection search
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from qdrant_client.http import models
+
+from adapters.vectorstore.collections import (CollectionManager, CollectionType,
+                                              DocumentMetadata)
+from adapters.vectorstore.embeddings import EmbeddingResult
+from adapters.vectorstore.local_index import LocalVectorStore
+from adapters.vectorstore.qdrant_client import (QdrantCollectionConfig,
+                                                QdrantVectorStore)
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    async def embed_text(self, text):
+        self.calls += 1
+        vector = [1.0, 0.0] if "alpha" in text else [0.6, 0.8]
+        return EmbeddingResult(text=text, vector=vector, token_count=1, cost_estimate=0.0)
+
+    async def embed_texts(self, texts):
+        return [await self.embed_text(text) for text in texts]
+
+
+class CountingStore(LocalVectorStore):
+    """Local store that counts backend calls like round trips"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+        self._batching = False
+
+    def search_batch(self, requests):
+        self.calls.append(("search_batch", [request["collection_name"] for request in requests]))
+        self._batching = True
+        try:
+            return super().search_batch(requests)
+        finally:
+            self._batching = False
+
+    def collection_exists(self, collection_name):
+        if not self._batching:  # in-process lookups of the batch itself are not round trips
+            self.calls.append(("collection_exists", collection_name))
+        return super().collection_exists(collection_name)
+
+    def get_collection_names(self):
+        self.calls.append(("get_collection_names", None))
+        return super().get_collection_names()
+
+
+@pytest.fixture
+def manager():
+    embeddings = FakeEmbeddings()
+    with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=embeddings):
+        manager = CollectionManager()
+    manager.qdrant = CountingStore()
+    return manager
+
+
+async def index(manager, doc_id, text, collection_type):
+    metadata = DocumentMetadata(doc_id=doc_id, title=doc_id, source="test", source_type=collection_type)
+    assert await manager.index_document(text, metadata, collection_type)
+
+
+class TestBatchedSearch:
+    """Test the manager side of batched search"""
+
+    @pytest.mark.asyncio
+    async def test_one_batch_per_query_without_existence_checks(self, manager):
+        await index(manager, "doc", "alpha document", CollectionType.DOCUMENTS)
+        await index(manager, "ticket", "beta ticket", CollectionType.JIRA)
+        manager.qdrant.calls.clear()
+
+        results = await manager.search_documents("alpha", limit=5)
+        await manager.search_documents("alpha again", limit=5)
+
+        assert [r["id"] for r in results][:1] and results[0]["payload"]["original_doc_id"] == "doc"
+        assert {r["collection_type"] for r in results} == {"documents", "jira"}
+        # Existing collections are listed once, then every query is a single batch
+        assert [call[0] for call in manager.qdrant.calls] == ["get_collection_names", "search_batch", "search_batch"]
+        assert manager.qdrant.calls[1][1] == ["docs_documents", "docs_jira"]
+        assert manager.embeddings.calls == 4  # 2 documents + 2 distinct queries
+
+    @pytest.mark.asyncio
+    async def test_per_collection_limits_thresholds_and_normalization(self, manager):
+        await index(manager, "doc", "alpha document", CollectionType.DOCUMENTS)
+        await index(manager, "ticket", "alpha ticket", CollectionType.JIRA)
+        requests = []
+        search_batch = manager.qdrant.search_batch
+        manager.qdrant.search_batch = lambda batch: requests.extend(batch) or search_batch(batch)
+        manager.search_config["score_thresholds"]["jira"] = 0.8
+
+        results = await manager.search_documents("beta", [CollectionType.DOCUMENTS, CollectionType.JIRA], limit=4)
+
+        assert [(r["limit"], r["score_threshold"]) for r in requests] == [(6, 0.3), (4, 0.8)]
+        # Both score 0.6 on raw similarity: only the lenient collection passes its threshold
+        assert [r["collection_type"] for r in results] == ["documents"]
+        assert results[0]["normalized_score"] == pytest.approx((0.6 - 0.3) / 0.7)
+
+    @pytest.mark.asyncio
+    async def test_known_collections_refresh_in_background(self, manager):
+        await index(manager, "doc", "alpha document", CollectionType.DOCUMENTS)
+        await manager.search_documents("alpha", limit=5)
+        manager.qdrant.create_collection("docs_github_v1", vector_size=2)
+        manager.qdrant.switch_alias("docs_github", "docs_github_v1")
+        manager.qdrant.upsert_vectors("docs_github", [[1.0, 0.0]], [{"original_doc_id": "repo"}], ["r"])
+
+        # Still cached: the new collection is not searched yet
+        results = await manager.search_documents("alpha", limit=5)
+        assert "github" not in {r["collection_type"] for r in results}
+
+        manager.search_config["collections_ttl"] = 0.0
+        await manager.search_documents("alpha", limit=5)
+        await manager._collections_refresh
+
+        results = await manager.search_documents("alpha", limit=5)
+        assert "github" in {r["collection_type"] for r in results}
+
+    @pytest.mark.asyncio
+    async def test_new_collections_are_known_immediately(self, manager):
+        await manager.search_documents("alpha", limit=5)
+        assert manager._known_collections == set()
+
+        await index(manager, "doc", "alpha document", CollectionType.UPLOADED_FILES)
+
+        results = await manager.search_documents("alpha", limit=5)
+        assert [r["collection_type"] for r in results] == ["uploaded_files"]
+
+
+class TestQdrantBatchSearch:
+    """Test the request shape of QdrantVectorStore.search_batch_async"""
+
+    @pytest.mark.asyncio
+    async def test_requests_are_grouped_per_collection(self):
+        # Bypass __init__: no Qdrant server is needed to check the request shape
+        store = QdrantVectorStore.__new__(QdrantVectorStore)
+        store.collections = QdrantCollectionConfig()
+        store.client = AsyncMock()
+        point = models.ScoredPoint(id=1, version=0, score=0.9, payload={"n": 1})
+
+        async def query_batch_points(collection_name, requests):
+            if collection_name == "docs_jira":
+                raise ConnectionError("shard unavailable")
+            return [models.QueryResponse(points=[point]) for _ in requests]
+
+        store.client.query_batch_points.side_effect = query_batch_points
+
+        results = await store.search_batch_async([
+            {"collection_name": "docs_documents", "query_vector": [0.1], "limit": 3, "score_threshold": 0.3},
+            {"collection_name": "docs_jira", "query_vector": [0.1], "limit": 2},
+            {"collection_name": "docs_documents", "query_vector": [0.2], "limit": 5, "filters": {"n": 1}},
+        ])
+
+        assert results == [[{"id": 1, "score": 0.9, "payload": {"n": 1}}], [], [{"id": 1, "score": 0.9, "payload": {"n": 1}}]]
+        calls = {call.kwargs["collection_name"]: call.kwargs["requests"] for call in store.client.query_batch_points.await_args_list}
+        assert [request.limit for request in calls["docs_documents"]] == [3, 5]
+        assert calls["docs_documents"][0].score_threshold == 0.3
+        assert calls["docs_documents"][1].filter.must[0].match.value == 1
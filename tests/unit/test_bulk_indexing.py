@@ -0,0 +1,149 @@
+"""
+Tests for cross-document bulk indexing jobs
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from adapters.vectorstore.bulk_indexing import (BulkDocument, BulkIndexer,
+                                                BulkIndexJobRegistry,
+                                                DocumentIndexStatus)
+from adapters.vectorstore.collections import (CollectionManager, CollectionType,
+                                              DocumentMetadata)
+from adapters.vectorstore.embeddings import EmbeddingResult
+
+
+class StubEmbeddings:
+    """Batch embedder recording request sizes"""
+
+    max_batch_inputs = 2048
+
+    def __init__(self, fail_on=None, delay=0.0):
+        self.requests = []
+        self.fail_on = fail_on
+        self.delay = delay
+
+    def count_tokens(self, text):
+        return len(text) // 4
+
+    async def embed_batch(self, texts):
+        self.requests.append(len(texts))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail_on and any(self.fail_on in text for text in texts):
+            raise RuntimeError("rate limited")
+        return [EmbeddingResult(text, [float(len(text)), 1.0], len(text) // 4, 0.0) for text in texts]
+
+    async def embed_texts(self, texts):
+        return await self.embed_batch(texts)
+
+
+def make_manager(embeddings):
+    with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=embeddings):
+        return CollectionManager()
+
+
+def bulk_document(doc_id, collection_type=CollectionType.DOCUMENTS, size=2000):
+    text = (f"{doc_id} paragraph. " * (size // 15))[:size]
+    metadata = DocumentMetadata(doc_id=doc_id, title=doc_id, source="test", source_type=collection_type)
+    return BulkDocument(text, metadata, collection_type)
+
+
+class TestBulkIndexer:
+    """Test batching across documents"""
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_pooled_per_collection(self):
+        embeddings = StubEmbeddings()
+        manager = make_manager(embeddings)
+        indexer = BulkIndexer(manager, embed_batch_size=64, upsert_batch_size=100)
+        registry = BulkIndexJobRegistry(indexer)
+        entries = [bulk_document(f"doc_{i}") for i in range(40)]
+        entries += [bulk_document(f"jira_{i}", CollectionType.JIRA) for i in range(10)]
+
+        job = await registry.wait(registry.submit(entries).job_id)
+
+        qdrant = manager.qdrant
+        assert job.status == "completed"
+        assert all(status.status == "indexed" for status in job.statuses)
+        documents_chunks = sum(s.chunks_total for s in job.statuses if s.collection_type == "documents")
+        assert qdrant.count_points("docs_documents") == documents_chunks == 120
+        assert qdrant.count_points("docs_jira") == 30
+        # 120 + 30 chunks in 64-input batches, never mixing collections
+        assert embeddings.requests == [64, 56, 30]
+        assert job.upsert_batches == 3  # 100 + 20 documents chunks, 30 jira chunks
+        assert job.chunks_indexed == job.chunks_total == 150
+        assert job.to_dict()["progress"] == 1.0
+        assert job.documents == []
+
+        # Deterministic chunk ids: re-running overwrites instead of duplicating
+        await registry.wait(registry.submit([bulk_document("doc_0")]).job_id)
+        assert qdrant.count_points("docs_documents") == 120
+
+    @pytest.mark.asyncio
+    async def test_token_budget_splits_batches(self):
+        embeddings = StubEmbeddings()
+        indexer = BulkIndexer(make_manager(embeddings), embed_batch_size=100, embed_batch_tokens=1000)
+        registry = BulkIndexJobRegistry(indexer)
+
+        await registry.wait(registry.submit([bulk_document(f"doc_{i}") for i in range(4)]).job_id)
+
+        # 3 chunks of ~250, ~250 and ~100 tokens per document
+        assert embeddings.requests == [4, 5, 3]
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_only_fails_its_documents(self):
+        embeddings = StubEmbeddings(fail_on="doc_3 ")
+        indexer = BulkIndexer(make_manager(embeddings), embed_batch_size=3)
+        registry = BulkIndexJobRegistry(indexer)
+        rejected = DocumentIndexStatus("bad", "wiki", status="failed", message="Invalid collection type: wiki")
+
+        job = await registry.wait(
+            registry.submit([bulk_document(f"doc_{i}") for i in range(6)] + [rejected]).job_id
+        )
+
+        statuses = {status.doc_id: status for status in job.statuses}
+        assert job.status == "completed"
+        assert statuses["doc_3"].status == "failed"
+        assert statuses["doc_3"].message == "Embedding failed: rate limited"
+        assert statuses["bad"].to_dict()["success"] is False
+        assert [s.doc_id for s in job.statuses if s.status == "indexed"] == ["doc_0", "doc_1", "doc_2", "doc_4", "doc_5"]
+        assert job.to_dict()["failed"] == 2
+
+
+class TestBulkIndexJobRegistry:
+    """Test background execution and polling"""
+
+    @pytest.mark.asyncio
+    async def test_job_runs_in_background_with_progress(self):
+        embeddings = StubEmbeddings(delay=0.02)
+        indexer = BulkIndexer(make_manager(embeddings), embed_batch_size=10, upsert_batch_size=10, max_concurrency=1)
+        registry = BulkIndexJobRegistry(indexer)
+
+        job = registry.submit([bulk_document(f"doc_{i}") for i in range(20)], owner="user-1")
+
+        assert job.status == "pending"
+        snapshots = []
+        while not job.finished:
+            snapshots.append(job.to_dict(include_documents=False)["progress"])
+            await asyncio.sleep(0.01)
+
+        assert any(0 < progress < 1 for progress in snapshots)
+        assert snapshots == sorted(snapshots)
+        assert registry.get(job.job_id).owner == "user-1"
+        assert "results" not in job.to_dict(include_documents=False)
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_are_pruned(self):
+        registry = BulkIndexJobRegistry(BulkIndexer(make_manager(StubEmbeddings())), max_finished_jobs=2)
+
+        jobs = []
+        for i in range(4):
+            jobs.append(registry.submit([bulk_document(f"doc_{i}", size=100)]))
+            await registry.wait(jobs[-1].job_id)
+        registry.submit([bulk_document("last", size=100)])
+
+        assert registry.get(jobs[0].job_id) is None
+        assert registry.get(jobs[3].job_id) is not None
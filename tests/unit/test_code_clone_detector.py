@@ -0,0 +1,150 @@
+"""
+Unit тесты для Code Clone Detector
+
+Тестирует:
+- Нормализацию токенов (переименованные копии)
+- Поиск клонов между файлами
+- Кэширование токенных потоков
+- Интеграцию со SmartRefactoringEngine
+"""
+
+import pytest
+
+from domain.ai_analysis.code_clone_detector import (CodeCloneDetector,
+                                                     TokenStreamCache,
+                                                     find_code_clones)
+from domain.ai_analysis.smart_refactoring_engine import SmartRefactoringEngine
+
+CLONED_FUNCTION = '''
+def process_orders(orders, threshold):
+    total = 0
+    for order in orders:
+        if order.amount > threshold and order.status == "paid":
+            total += order.amount * 1.2
+        elif order.status == "pending":
+            total -= order.discount
+    return round(total, 2)
+'''
+
+RENAMED_CLONE = '''
+def process_invoices(invoices, limit):
+    result = 0
+    for invoice in invoices:
+        if invoice.amount > limit and invoice.status == "closed":
+            result += invoice.amount * 3.5
+        elif invoice.status == "open":
+            result -= invoice.discount
+    return round(result, 7)
+'''
+
+UNRELATED = '''
+class Greeter:
+    def greet(self, name):
+        return f"Hello {name}"
+'''
+
+
+class TestCodeCloneDetector:
+    """Тесты для CodeCloneDetector"""
+
+    def test_detects_renamed_clone_across_files(self):
+        """Тест поиска клона с переименованными идентификаторами"""
+        detector = CodeCloneDetector(min_tokens=30, kgram_size=10, window_size=4)
+        detector.add_source("a.py", CLONED_FUNCTION)
+        detector.add_source("b.py", RENAMED_CLONE)
+        detector.add_source("c.py", UNRELATED)
+
+        groups = detector.detect()
+
+        assert len(groups) == 1
+        files = {loc.file_path for loc in groups[0].locations}
+        assert files == {"a.py", "b.py"}
+        assert groups[0].token_count >= 30
+        assert groups[0].line_count >= 7
+
+    def test_groups_multiple_occurrences(self):
+        """Тест объединения трех копий в одну группу"""
+        detector = CodeCloneDetector(min_tokens=30, kgram_size=10, window_size=4)
+        for name in ("a.py", "b.py", "c.py"):
+            detector.add_source(name, UNRELATED + CLONED_FUNCTION)
+
+        groups = detector.detect()
+
+        assert groups[0].occurrences == 3
+
+    def test_no_clones_below_min_tokens(self):
+        """Тест порога минимального размера клона"""
+        detector = CodeCloneDetector(min_tokens=200, kgram_size=10, window_size=4)
+        detector.add_source("a.py", CLONED_FUNCTION)
+        detector.add_source("b.py", RENAMED_CLONE)
+
+        assert detector.detect() == []
+
+    def test_generic_tokenizer_for_other_languages(self):
+        """Тест токенизации не-Python файлов"""
+        js = "function f(a, b) { if (a > b) { return a * 2; } return b + 1; }\n"
+        detector = CodeCloneDetector(min_tokens=20, kgram_size=8, window_size=3)
+        detector.add_source("a.js", js)
+        detector.add_source("b.js", js.replace("a", "x"))
+
+        groups = detector.detect()
+
+        assert len(groups) == 1
+
+    def test_token_cache_reused_between_runs(self, tmp_path):
+        """Тест повторного использования кэша токенов с диска"""
+        source = tmp_path / "module.py"
+        source.write_text(CLONED_FUNCTION)
+        cache_dir = tmp_path / "cache"
+
+        first = TokenStreamCache(str(cache_dir))
+        CodeCloneDetector(cache=first).add_files([str(source)])
+        assert first.misses == 1
+
+        second = TokenStreamCache(str(cache_dir))
+        CodeCloneDetector(cache=second).add_files([str(source)])
+        assert second.hits == 1
+        assert second.misses == 0
+
+    def test_find_code_clones_from_disk(self, tmp_path):
+        """Тест convenience-функции по файлам"""
+        (tmp_path / "a.py").write_text(CLONED_FUNCTION * 2)
+        (tmp_path / "b.py").write_text(RENAMED_CLONE)
+
+        groups = find_code_clones(sorted(str(p) for p in tmp_path.glob("*.py")), min_tokens=40)
+
+        assert groups
+        assert all(group.to_dict()["occurrences"] >= 2 for group in groups)
+
+    def test_invalid_parameters(self):
+        """Тест валидации параметров"""
+        with pytest.raises(ValueError):
+            CodeCloneDetector(kgram_size=0)
+
+
+class TestRefactoringEngineDuplication:
+    """Тесты интеграции с SmartRefactoringEngine"""
+
+    def test_find_code_duplication_in_file(self):
+        """Тест поиска дублей внутри одного файла"""
+        engine = SmartRefactoringEngine()
+        content = CLONED_FUNCTION + UNRELATED + RENAMED_CLONE
+
+        duplicates = engine._find_code_duplication(content.split("\n"), "module.py")
+
+        assert len(duplicates) == 1
+        assert duplicates[0]["occurrences"] == 2
+        assert duplicates[0]["line_count"] >= 3
+        assert "process_orders" in duplicates[0]["code"]
+
+    def test_find_project_duplication(self, tmp_path):
+        """Тест поиска дублей по проекту"""
+        (tmp_path / "a.py").write_text(CLONED_FUNCTION)
+        (tmp_path / "b.py").write_text(RENAMED_CLONE)
+        engine = SmartRefactoringEngine()
+
+        groups = engine.find_project_duplication(
+            [str(tmp_path / "a.py"), str(tmp_path / "b.py")], min_tokens=30
+        )
+
+        assert len(groups) == 1
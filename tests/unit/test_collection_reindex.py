@@ -0,0 +1,201 @@
+"""
+Tests for zero-downtime collection rebuilds (shadow collection + alias swap)
+"""
+
+import asyncio
+import threading
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from adapters.vectorstore.collections import (CollectionManager, CollectionType,
+                                              DocumentMetadata)
+from adapters.vectorstore.embeddings import EmbeddingResult
+from adapters.vectorstore.local_index import LocalVectorStore
+from adapters.vectorstore.qdrant_client import QdrantError, QdrantVectorStore
+
+
+class FakeEmbeddings:
+    async def embed_text(self, text):
+        return EmbeddingResult(text=text, vector=[0.1] * 8, token_count=1, cost_estimate=0.0)
+
+    async def embed_texts(self, texts):
+        return [await self.embed_text(text) for text in texts]
+
+
+@pytest.fixture
+def manager():
+    with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=FakeEmbeddings()):
+        yield CollectionManager()
+
+
+def metadata(doc_id):
+    return DocumentMetadata(doc_id=doc_id, title=doc_id, source="test", source_type=CollectionType.DOCUMENTS)
+
+
+async def index_docs(manager, count, prefix="doc"):
+    for i in range(count):
+        assert await manager.index_document(f"content of {prefix} {i}", metadata(f"{prefix}_{i}"))
+
+
+class TestReindexCollection:
+    """Test shadow builds and alias swaps on the in-memory backend"""
+
+    @pytest.mark.asyncio
+    async def test_collections_are_created_behind_aliases(self, manager):
+        await manager.initialize_collections()
+        await index_docs(manager, 3)
+
+        qdrant = manager.qdrant
+        assert qdrant.get_aliases()["docs_documents"] == "docs_documents_v1"
+        assert "docs_documents" not in qdrant.list_collections()
+        assert qdrant.count_points("docs_documents_v1") == 3
+
+    @pytest.mark.asyncio
+    async def test_live_collection_serves_searches_during_rebuild(self, manager):
+        await index_docs(manager, 5)
+        qdrant = manager.qdrant
+        manager.reindex_config["batch_size"] = 2
+
+        # Hold the rebuild while the shadow index is "building"
+        building = threading.Event()
+        release = threading.Event()
+        wait_for_indexing = qdrant.wait_for_indexing
+
+        def blocking_wait(name, timeout):
+            assert qdrant.collections[name].indexing_threshold == 20000
+            building.set()
+            release.wait(5)
+            return wait_for_indexing(name, timeout)
+
+        qdrant.wait_for_indexing = blocking_wait
+        created = []
+        create_collection = qdrant.create_collection
+        qdrant.create_collection = lambda **kwargs: created.append(kwargs) or create_collection(**kwargs)
+
+        rebuild = asyncio.create_task(manager.reindex_collection(CollectionType.DOCUMENTS))
+        while not building.is_set():
+            await asyncio.sleep(0.01)
+
+        results = await manager.search_documents("content", [CollectionType.DOCUMENTS], limit=10)
+        assert len(results) == 5
+        stats = await manager.get_collection_stats()
+        assert stats["docs_documents"]["status"] == "rebuilding"
+        # Written to the live version and to the shadow
+        await index_docs(manager, 1, prefix="late")
+
+        release.set()
+        assert await rebuild
+
+        assert created[-1] == {"collection_name": "docs_documents_v2", "vector_size": 1536, "indexing_threshold": 0}
+        assert qdrant.resolve_collection("docs_documents") == "docs_documents_v2"
+        assert "docs_documents_v1" not in qdrant.list_collections()
+        assert qdrant.count_points("docs_documents") == 6
+        assert manager.lexical.info("docs_documents")["points_count"] == 6
+        assert len(await manager.search_documents("content", [CollectionType.DOCUMENTS], limit=10)) == 6
+        stats = await manager.get_collection_stats()
+        assert stats["docs_documents"]["version"] == "docs_documents_v2"
+
+    @pytest.mark.asyncio
+    async def test_failed_rebuild_keeps_live_version(self, manager):
+        await index_docs(manager, 3)
+        qdrant = manager.qdrant
+        qdrant.wait_for_indexing = lambda name, timeout: False
+
+        assert not await manager.reindex_collection(CollectionType.DOCUMENTS)
+
+        assert qdrant.resolve_collection("docs_documents") == "docs_documents_v1"
+        assert qdrant.list_collections() == ["docs_documents_v1"]
+        assert manager._shadow_collections == {}
+
+    @pytest.mark.asyncio
+    async def test_plain_collection_is_migrated_to_alias(self, manager):
+        qdrant = manager.qdrant
+        qdrant.create_collection("docs_jira")
+        qdrant.upsert_vectors("docs_jira", [[0.2] * 8] * 2, [{"n": 1}, {"n": 2}], ["a", "b"])
+
+        assert await manager.reindex_collection(CollectionType.JIRA)
+
+        assert qdrant.get_aliases() == {"docs_jira": "docs_jira_v1"}
+        assert qdrant.list_collections() == ["docs_jira_v1"]
+        assert qdrant.count_points("docs_jira") == 2
+
+    @pytest.mark.asyncio
+    async def test_copied_points_are_indexed_for_bm25(self, manager):
+        qdrant = manager.qdrant
+        qdrant.create_collection("docs_jira")
+        payloads = [{"title": "Runbook", "text": "restart the ingest worker"}, {"title": "FAQ", "text": "quotas"}]
+        qdrant.upsert_vectors("docs_jira", [[0.2] * 8] * 2, payloads, ["a", "b"])
+
+        assert await manager.reindex_collection(CollectionType.JIRA)
+
+        assert [hit["id"] for hit in manager.lexical.search("docs_jira", "ingest worker")] == ["a"]
+        assert [entry["text"] for entry in manager.completions.suggest("run")] == ["Runbook"]
+
+    @pytest.mark.asyncio
+    async def test_initialization_backfills_empty_lexical_index(self, manager):
+        await manager.initialize_collections()
+        await index_docs(manager, 3)
+        manager.lexical.drop("docs_documents")
+
+        await manager.initialize_collections()
+
+        assert manager.lexical.info("docs_documents")["points_count"] == 3
+        assert manager.backfill_lexical_indexes() == {}
+
+    @pytest.mark.asyncio
+    async def test_rebuild_from_documents_replaces_content(self, manager):
+        await index_docs(manager, 4)
+        manager.reindex_config["keep_previous_version"] = True
+
+        assert await manager.reindex_collection(
+            CollectionType.DOCUMENTS, documents=[("fresh content", metadata("fresh"))]
+        )
+
+        qdrant = manager.qdrant
+        assert qdrant.count_points("docs_documents") == 1
+        assert qdrant.count_points("docs_documents_v1") == 4
+
+    @pytest.mark.asyncio
+    async def test_concurrent_rebuilds_are_rejected(self, manager):
+        await index_docs(manager, 1)
+        release = threading.Event()
+        qdrant = manager.qdrant
+        wait_for_indexing = qdrant.wait_for_indexing
+        qdrant.wait_for_indexing = lambda name, timeout: release.wait(5) and wait_for_indexing(name, timeout)
+
+        first = asyncio.create_task(manager.reindex_collection(CollectionType.DOCUMENTS))
+        await asyncio.sleep(0.05)
+
+        assert not await manager.reindex_collection(CollectionType.DOCUMENTS)
+        release.set()
+        assert await first
+
+
+class TestQdrantAliases:
+    """Test the alias primitives of QdrantVectorStore"""
+
+    @pytest.mark.asyncio
+    async def test_switch_alias_is_a_single_request(self):
+        # Bypass __init__: no Qdrant server is needed to check the request shape
+        store = QdrantVectorStore.__new__(QdrantVectorStore)
+        store.client = AsyncMock()
+        store.client.get_aliases.return_value.aliases = [
+            type("Alias", (), {"alias_name": "docs_documents", "collection_name": "docs_documents_v1"})
+        ]
+
+        previous = await store.switch_alias_async("docs_documents", "docs_documents_v2")
+
+        assert previous == "docs_documents_v1"
+        store.client.update_collection_aliases.assert_awaited_once()
+        operations = store.client.update_collection_aliases.await_args.kwargs["change_aliases_operations"]
+        assert operations[0].delete_alias.alias_name == "docs_documents"
+        assert operations[1].create_alias.collection_name == "docs_documents_v2"
+        assert await store.resolve_collection_async("docs_documents") == "docs_documents_v1"
+
+    def test_memory_client_rejects_alias_shadowing_a_collection(self):
+        client = LocalVectorStore()
+        client.create_collection("docs")
+
+        with pytest.raises(QdrantError):
+            client.switch_alias("docs", "docs")
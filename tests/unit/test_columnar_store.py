@@ -0,0 +1,123 @@
+"""
+Unit tests for the columnar metric store behind AIAnalyticsService
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from app.performance.columnar_store import ColumnarMetricStore, linear_trend
+from app.services.ai_analytics_service import (AIAnalyticsService,
+                                               AnalyticsDataPoint, MetricType)
+
+
+def fill(store, count, start=1000.0, shuffle=False):
+    rows = [
+        (start + index, f"metric_{index % 3}", float(index), f"model_{index % 2}", f"user_{index % 5}")
+        for index in range(count)
+    ]
+    if shuffle:
+        random.Random(5).shuffle(rows)
+    store.extend(rows)
+    return rows
+
+
+class TestColumnarMetricStore:
+    """Test ring buffer, filters and group-bys"""
+
+    def test_ring_buffer_evicts_oldest(self):
+        store = ColumnarMetricStore(capacity=100, initial_capacity=8)
+
+        fill(store, 250)
+
+        assert len(store) == 100
+        assert store.tail(3).values.tolist() == [247.0, 248.0, 249.0]
+        assert store.select().values.tolist() == [float(i) for i in range(150, 250)]
+        assert store.count("metric_0") == len([i for i in range(150, 250) if i % 3 == 0])
+
+    @pytest.mark.parametrize("shuffle", [False, True])
+    def test_select_matches_brute_force(self, shuffle):
+        store = ColumnarMetricStore(capacity=500, initial_capacity=16)
+        rows = fill(store, 800, shuffle=shuffle)
+        retained = rows[-500:]
+
+        selection = store.select(since=1400.0, metric="metric_1", model="model_0")
+
+        expected = sorted(
+            value
+            for timestamp, metric, value, model, _ in retained
+            if timestamp >= 1400.0 and metric == "metric_1" and model == "model_0"
+        )
+        assert sorted(selection.values.tolist()) == expected
+
+    def test_unknown_filter_values_select_nothing(self):
+        store = ColumnarMetricStore(capacity=10)
+        fill(store, 5)
+
+        assert len(store.select(metric="missing")) == 0
+        assert len(store.select(model="missing")) == 0
+
+    def test_group_by_counts(self):
+        store = ColumnarMetricStore(capacity=100)
+        fill(store, 30)
+        store.append(2000.0, "metric_0", 1.0, "model_0", None)
+
+        selection = store.select()
+        users = store.counts_by(selection.users, len(store.user_codes))
+
+        assert users.tolist() == [6, 6, 6, 6, 6]
+        assert store.decode_counts(
+            store.counts_by(selection.models, len(store.model_codes)), store.model_codes
+        ) == {"model_0": 16, "model_1": 15}
+
+    def test_linear_trend_matches_polyfit(self):
+        values = np.random.default_rng(1).normal(size=200).cumsum()
+
+        assert linear_trend(values) == pytest.approx(np.polyfit(np.arange(200), values, 1)[0])
+        assert linear_trend([5.0]) == 0.0
+
+
+class TestAIAnalyticsServiceStore:
+    """Test the service on top of the columnar store"""
+
+    @pytest.mark.asyncio
+    async def test_data_points_view_materializes_tail(self):
+        service = AIAnalyticsService(retention_points=3000)
+
+        await service.collect_analytics_data(
+            MetricType.LATENCY, 123.0, "code_review", "user_x", {"request": "r1"}
+        )
+
+        assert len(service.data_points) == 2161
+        latest = service.data_points[-1]
+        assert isinstance(latest, AnalyticsDataPoint)
+        assert latest.value == 123.0
+        assert latest.metric_type == MetricType.LATENCY
+        assert latest.context == {"request": "r1"}
+        assert len(service.data_points[-100:]) == 100
+
+    @pytest.mark.asyncio
+    async def test_retention_limit(self):
+        service = AIAnalyticsService(retention_points=1000)
+
+        for _ in range(10):
+            await service.collect_analytics_data(MetricType.COST, 0.01, "rfc_generation")
+
+        assert len(service.data_points) == 1000
+        dashboard = await service.get_dashboard_analytics()
+        assert dashboard["summary"]["data_points_collected"] == 1000
+
+    @pytest.mark.asyncio
+    async def test_trend_detects_increase(self):
+        service = AIAnalyticsService(retention_points=5000)
+        for index in range(50):
+            await service.collect_analytics_data(
+                MetricType.ERROR_RATE, 1.0 + index, "semantic_search"
+            )
+
+        trend = await service.analyze_performance_trends(MetricType.ERROR_RATE)
+
+        assert trend.trend_direction == "increasing"
+        assert trend.change_percent == pytest.approx(4900.0)
+        assert len(trend.forecast_points) == 7
@@ -0,0 +1,163 @@
+"""
+Tests for the autocomplete prefix index
+"""
+
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from adapters.vectorstore.collections import (CollectionManager, CollectionType,
+                                              DocumentMetadata)
+from adapters.vectorstore.completion_index import (CompletionIndex,
+                                                   PrefixIndex, SortedRun,
+                                                   completion_entries)
+from adapters.vectorstore.embeddings import EmbeddingResult
+
+
+def brute_force(entries, prefix, limit):
+    totals = {}
+    for text, weight in entries:
+        key = " ".join(text.lower().split())
+        totals[key] = totals.get(key, 0.0) + weight
+    matching = [(key, weight) for key, weight in totals.items() if key.startswith(prefix)]
+    return sorted(matching, key=lambda item: (-item[1], item[0]))[:limit]
+
+
+class TestPrefixIndex:
+    """Test range top-k against a brute-force scan"""
+
+    @pytest.mark.parametrize("merge_every", [None, 150])
+    def test_top_k_matches_brute_force(self, merge_every):
+        rng = np.random.default_rng(0)
+        words = ["api", "apache", "app", "deploy", "docker", "db", "a", "ap"]
+        entries = [
+            (" ".join(rng.choice(words, rng.integers(1, 4))) + f" {i % 40}", float(rng.integers(1, 50)))
+            for i in range(1000)
+        ]
+        index = PrefixIndex()
+        index.build(entries[:500])
+        for i, (text, weight) in enumerate(entries[500:]):
+            index.add(text, weight)
+            if merge_every and i % merge_every == 0:
+                index.merge()
+
+        for prefix in ["a", "ap", "api", "app 1", "d", "docker", "x", ""]:
+            top = index.top(prefix, 7)
+            ranked = sorted(top.items(), key=lambda item: (-item[1][1], item[0]))[:7]
+            assert [(key, weight) for key, (_, weight) in ranked] == brute_force(entries, prefix, 7)
+
+    def test_merge_keeps_weights(self):
+        index = PrefixIndex()
+        index.build([("Deploy guide", 3.0)])
+        index.add("deploy  GUIDE", 2.0)
+        index.add("Deploy checklist", 1.0)
+
+        assert index.merge() == 2
+        assert index.pending == 0 and index.base.keys == ["deploy checklist", "deploy guide"]
+        assert index.top("deploy", 5) == {"deploy guide": ["Deploy guide", 5.0], "deploy checklist": ["Deploy checklist", 1.0]}
+
+    def test_merge_does_not_overwrite_concurrent_build(self):
+        index = PrefixIndex()
+        index.build([("Old title", 1.0)])
+        index.add("Stale heading", 1.0)
+        merged = SortedRun.merged
+
+        def merged_with_rebuild(older, newer):
+            # The base is merged outside the lock: build() lands meanwhile
+            if older is index.base:
+                thread = threading.Thread(target=index.build, args=([("New title", 1.0)],))
+                thread.start()
+                thread.join(timeout=5)
+            return merged(older, newer)
+
+        with patch.object(SortedRun, "merged", side_effect=merged_with_rebuild):
+            index.merge()
+
+        assert index.base.keys == ["new title"]
+        assert index.top("", 5) == {"new title": ["New title", 1.0]}
+
+
+class TestCompletionIndex:
+    """Test sources, query history and completions"""
+
+    def test_sources_and_data_source_ids(self):
+        index = CompletionIndex()
+        index.add("confluence", ["Deploy guide", "Deploy guide"])
+        index.add("jira", ["Deploy failed on prod"])
+
+        assert [e["text"] for e in index.suggest("dep")] == ["Deploy guide", "Deploy failed on prod"]
+        assert [e["text"] for e in index.suggest("dep", sources=["jira_main"])] == ["Deploy failed on prod"]
+        assert index.suggest("dep", sources=["gitlab_main"]) == []
+        assert index.suggest("DEPLOY g")[0]["completion"] == "DEPLOY guide"
+
+    def test_queries_are_suggested_after_distinct_users_only(self):
+        index = CompletionIndex()
+
+        assert not index.record_query("how to rotate secrets", ["gitlab"], "alice")
+        assert not index.record_query("how to rotate secrets", ["gitlab"], "alice")
+        assert not index.record_query("how to rotate secrets", ["gitlab"])
+        assert index.suggest("how") == []
+        assert index.record_query("How to rotate  secrets", ["gitlab"], "bob")
+        assert index.suggest("how")[0] == {
+            "text": "How to rotate  secrets", "weight": 3.0, "sources": ["gitlab"], "completion": "how to rotate  secrets"
+        }
+        assert index.pending_queries["how to rotate secrets"] == [3, None]
+
+        for query in ["reset password for ivan@example.com", "call 89161234567", "see https://intra/x"]:
+            index.record_query(query, ["gitlab"], "alice")
+            assert not index.record_query(query, ["gitlab"], "bob")
+
+    def test_rebuild_keeps_query_history(self):
+        index = CompletionIndex()
+        index.add("jira", ["Old title"])
+        index.record_query("old bug", ["jira"], "alice")
+        index.record_query("old bug", ["jira"], "bob")
+
+        index.rebuild_source("jira", ["New title"])
+
+        assert [e["text"] for e in index.suggest("old")] == ["old bug"]
+        assert [e["text"] for e in index.suggest("new")] == ["New title"]
+
+    def test_completion_entries(self):
+        payloads = [
+            {"title": "Runbook", "chunk_index": 0, "text": "# Setup\nintro\n## Rollback ##\n#not a heading"},
+            {"title": "Runbook", "chunk_index": 1, "text": "### Alerts"},
+        ]
+
+        assert completion_entries(payloads) == ["Runbook", "Setup", "Rollback", "Alerts"]
+
+
+class FakeEmbeddings:
+    async def embed_text(self, text):
+        return EmbeddingResult(text=text, vector=[0.6, 0.8], token_count=1, cost_estimate=0.0)
+
+    async def embed_texts(self, texts):
+        return [await self.embed_text(text) for text in texts]
+
+
+class TestManagerCompletions:
+    """Test feeding the index from ingestion and search"""
+
+    @pytest.mark.asyncio
+    async def test_ingestion_search_and_rebuild(self):
+        with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=FakeEmbeddings()):
+            manager = CollectionManager()
+        manager.completions = CompletionIndex()
+        for doc_id, title in [("a", "Kafka consumer lag"), ("b", "Kafka topics")]:
+            metadata = DocumentMetadata(doc_id=doc_id, title=title, source="test", source_type=CollectionType.CONFLUENCE)
+            assert await manager.index_document(f"# Partitions\n{title} text", metadata, CollectionType.CONFLUENCE)
+
+        assert [e["text"] for e in manager.completions.suggest("kafka")] == ["Kafka consumer lag", "Kafka topics"]
+        assert manager.completions.suggest("part")[0] == {
+            "text": "Partitions", "weight": 2.0, "sources": ["confluence"], "completion": "partitions"
+        }
+
+        await manager.search_documents("kafka lag", limit=3, user_id="alice")
+        await manager.search_documents("kafka lag", limit=3, user_id="bob")
+        assert manager.completions.suggest("kafka l", sources=["confluence_main"])[0]["text"] == "kafka lag"
+
+        assert await manager.delete_document("b", CollectionType.CONFLUENCE)
+        assert manager.rebuild_completions([CollectionType.CONFLUENCE]) == {"confluence": 2}
+        assert [e["text"] for e in manager.completions.suggest("kafka")] == ["kafka lag", "Kafka consumer lag"]
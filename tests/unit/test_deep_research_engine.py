@@ -542,5 +542,111 @@ class TestPerformance:
         assert len(engine.active_sessions) <= engine.config["max_concurrent_sessions"]
 
 
+class TestParallelResearchPlanner:
+    """Test cases for the concurrent research frontier"""
+
+    @pytest.fixture
+    def engine(self):
+        """Engine whose LLM and search calls take a fixed delay"""
+        engine = DeepResearchEngine()
+        engine.config["enable_adaptive_planning"] = False
+        engine.config["plateau_patience"] = 100
+
+        async def slow_response(query, system_prompt="", max_tokens=0):
+            await asyncio.sleep(0.05)
+            if "направления" in query:
+                return "Analyze caching layer\nanalyze Caching layer!\nReview deployment topology"
+            return "Finding " * 20
+
+        engine.llm_service = Mock()
+        engine.llm_service.generate_response = AsyncMock(side_effect=slow_response)
+        return engine
+
+    @pytest.fixture(autouse=True)
+    def mock_search(self):
+        """Mock enhanced search service"""
+        search_service = Mock()
+        search_service.enhanced_search = AsyncMock(return_value={"results": []})
+        with patch(
+            "domain.core.deep_research_engine.get_enhanced_vector_search_service",
+            AsyncMock(return_value=search_service),
+        ):
+            yield search_service
+
+    async def _run(self, engine, max_steps=7):
+        session = await engine.start_research(query="How to scale the API?", max_steps=max_steps)
+        session.research_goal = "Scale the API"
+        steps = [step async for step in engine.execute_research(session.session_id)]
+        return session, steps
+
+    @pytest.mark.asyncio
+    async def test_independent_steps_run_concurrently(self, engine):
+        """Exploration steps overlap instead of running one after another"""
+        engine.config["max_depth"] = 0
+
+        start = asyncio.get_event_loop().time()
+        session, steps = await self._run(engine, max_steps=3)
+        elapsed = asyncio.get_event_loop().time() - start
+
+        assert session.status == ResearchStatus.COMPLETED
+        assert len(steps) == 3
+        # Each step is 2 LLM calls of 0.05s; sequential would be >= 0.3s
+        assert elapsed < 0.3
+
+    @pytest.mark.asyncio
+    async def test_frontier_expansion_deduplicates(self, engine):
+        """Suggested sub-queries are added once and bounded by depth"""
+        engine.config["max_depth"] = 1
+
+        session, steps = await self._run(engine, max_steps=12)
+
+        sub_queries = [s for s in session.steps if s.depth == 1]
+        assert {s.query for s in sub_queries} == {
+            "Analyze caching layer",
+            "Review deployment topology",
+        }
+        assert all(s.parent_step_id for s in sub_queries)
+        assert session.steps[-1].step_type == ResearchStepType.FINAL_SUMMARY
+        assert session.steps[-1].status == StepStatus.COMPLETED
+
+    @pytest.mark.asyncio
+    async def test_aggregation_steps_wait_for_exploration(self, engine):
+        """Synthesis starts only after all exploration steps finished"""
+        engine.config["max_depth"] = 1
+
+        session, steps = await self._run(engine, max_steps=12)
+
+        order = [s.step_type for s in steps]
+        synthesis_index = order.index(ResearchStepType.SYNTHESIS)
+        assert all(
+            t == ResearchStepType.DEEP_ANALYSIS
+            or t in (ResearchStepType.INITIAL_ANALYSIS, ResearchStepType.CONTEXT_GATHERING)
+            for t in order[:synthesis_index]
+        )
+
+    @pytest.mark.asyncio
+    async def test_token_budget_stops_research(self, engine):
+        """No new steps are launched once the token budget is spent"""
+        engine.config["token_budget"] = 1
+
+        session, steps = await self._run(engine)
+
+        assert session.metadata["stop_reason"] == "Исчерпан бюджет токенов"
+        assert len(steps) == engine.config["max_parallel_steps"]
+        assert any(s.status == StepStatus.SKIPPED for s in session.steps)
+
+    @pytest.mark.asyncio
+    async def test_confidence_plateau_stops_research(self, engine):
+        """Research stops early once confidence stops improving"""
+        engine.config["plateau_patience"] = 2
+        engine.config["max_parallel_steps"] = 1
+        engine.config["min_confidence_threshold"] = 0.5
+
+        session, steps = await self._run(engine)
+
+        assert session.metadata["stop_reason"] == "Уверенность вышла на плато"
+        assert len(steps) == 3
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
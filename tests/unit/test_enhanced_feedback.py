@@ -825,5 +825,147 @@ class TestFeedbackAnalytics:
         assert engagement["avg_rating"] == 4.5
 
 
+class TestIncrementalAggregates:
+    """Тесты инкрементальных агрегатов и вторичных индексов"""
+
+    @pytest.fixture
+    def feedback_service(self):
+        """Сервис без real-time уведомлений"""
+        service = EnhancedFeedbackService(pubsub_endpoint=AsyncMock())
+        service.config["real_time_notifications"] = False
+        return service
+
+    async def _submit(self, service, content_id="content1", user_id="user1", **kwargs):
+        kwargs.setdefault("feedback_type", FeedbackType.LIKE)
+        kwargs.setdefault("value", True)
+        return await service.submit_feedback(
+            user_id=user_id,
+            content_id=content_id,
+            content_type=ContentType.AI_RESPONSE,
+            **kwargs,
+        )
+
+    @pytest.mark.asyncio
+    async def test_aggregate_matches_full_recalculation(self, feedback_service):
+        """Агрегаты совпадают с пересчетом по сырым элементам"""
+        await self._submit(feedback_service)
+        await self._submit(feedback_service, feedback_type=FeedbackType.DISLIKE)
+        await self._submit(
+            feedback_service, feedback_type=FeedbackType.RATING, value=None, rating=4
+        )
+        item = await self._submit(
+            feedback_service, feedback_type=FeedbackType.RATING, value=None, rating=2
+        )
+        item.tags.append("accuracy")
+
+        aggregate = feedback_service.content_aggregates["content1"]
+        assert aggregate.rating_histogram == {4: 1, 2: 1}
+
+        summary = feedback_service.content_summaries["content1"]
+        assert summary.total_likes == 1
+        assert summary.total_dislikes == 1
+        assert summary.like_ratio == 0.5
+        assert summary.avg_rating == 3.0
+
+        recalculated = await feedback_service._calculate_content_summary(
+            "content1", list(feedback_service._iter_content_feedback("content1"))
+        )
+        assert recalculated.avg_rating == summary.avg_rating
+        assert recalculated.popular_tags == ["accuracy"]
+
+    @pytest.mark.asyncio
+    async def test_moderation_updates_aggregates(self, feedback_service):
+        """Скрытие и одобрение корректируют агрегаты"""
+        item = await self._submit(feedback_service)
+
+        await feedback_service.moderate_feedback(item.feedback_id, "mod", "hide")
+        assert feedback_service.content_summaries["content1"].total_likes == 0
+
+        await feedback_service.moderate_feedback(item.feedback_id, "mod", "approve")
+        assert feedback_service.content_summaries["content1"].total_likes == 1
+
+    @pytest.mark.asyncio
+    async def test_retention_compacts_raw_items(self, feedback_service):
+        """Старые сырые элементы удаляются, агрегаты сохраняются"""
+        feedback_service.config["max_raw_items"] = 3
+        items = [
+            await self._submit(feedback_service, user_id=f"user{i % 2}")
+            for i in range(5)
+        ]
+
+        assert len(feedback_service.feedback_items) == 3
+        assert items[0].feedback_id not in feedback_service.feedback_items
+        assert feedback_service.content_summaries["content1"].total_likes == 5
+        assert len(feedback_service._content_index["content1"]) == 3
+        history = await feedback_service.get_user_feedback_history("user0")
+        assert [fb.feedback_id for fb in history] == [
+            items[4].feedback_id,
+            items[2].feedback_id,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_content_feedback_includes_compacted_items(self, feedback_service):
+        """Сводка по контенту учитывает элементы, удаленные при сжатии"""
+        feedback_service.config["max_raw_items"] = 2
+        await self._submit(feedback_service, content_id="old", rating=5)
+        await self._submit(feedback_service, content_id="old", rating=3)
+        await self._submit(feedback_service, content_id="new")
+        await self._submit(feedback_service, content_id="new")
+
+        assert "old" not in feedback_service._content_index
+
+        summary = await feedback_service.get_content_feedback("old")
+        assert summary.total_likes == 2
+        assert summary.avg_rating == 4.0
+        assert summary.last_feedback_at is not None
+
+        await self._submit(
+            feedback_service, content_id="new", feedback_type=FeedbackType.DISLIKE
+        )
+        summary = await feedback_service.get_content_feedback("new")
+        assert summary.total_likes == 2
+        assert summary.total_dislikes == 1
+
+    @pytest.mark.asyncio
+    async def test_user_history_newest_first_with_filter(self, feedback_service):
+        """История пользователя: новые первыми, фильтр по типу контента"""
+        first = await self._submit(feedback_service)
+        second = await feedback_service.submit_feedback(
+            user_id="user1",
+            content_id="content2",
+            content_type=ContentType.SEARCH_RESULT,
+            feedback_type=FeedbackType.LIKE,
+            value=True,
+        )
+        third = await self._submit(feedback_service)
+
+        history = await feedback_service.get_user_feedback_history("user1", limit=2)
+        assert [fb.feedback_id for fb in history] == [
+            third.feedback_id,
+            second.feedback_id,
+        ]
+
+        filtered = await feedback_service.get_user_feedback_history(
+            "user1", content_type=ContentType.AI_RESPONSE
+        )
+        assert [fb.feedback_id for fb in filtered] == [
+            third.feedback_id,
+            first.feedback_id,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_analytics_uses_time_index(self, feedback_service):
+        """Аналитика учитывает только элементы в периоде"""
+        old = await self._submit(feedback_service)
+        feedback_service._time_index.popleft()
+        old.created_at = datetime.now() - timedelta(days=30)
+        feedback_service._store_feedback(old)
+        await self._submit(feedback_service)
+
+        analytics = await feedback_service.get_feedback_analytics(timedelta(days=7))
+
+        assert analytics["total_feedback"] == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
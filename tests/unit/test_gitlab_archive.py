@@ -0,0 +1,230 @@
+"""
+Tests for archive-based GitLab repository ingestion
+"""
+
+import base64
+import io
+import tarfile
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from tools.scripts.ingestion.gitlab_archive import (ArchiveScanStats,
+                                                    CommitStateStore,
+                                                    IterStream,
+                                                    iter_archive_files)
+from tools.scripts.ingestion.gitlab_client import GitLabIngestionClient
+
+LONG_TEXT = "Architecture notes. " * 10
+
+
+def make_archive(files, sha="a" * 40, root="docs-main-aaaa"):
+    """tar.gz in the layout produced by git archive / GitLab"""
+    buffer = io.BytesIO()
+    with tarfile.open(
+        fileobj=buffer, mode="w:gz", format=tarfile.PAX_FORMAT, pax_headers={"comment": sha}
+    ) as archive:
+        directory = tarfile.TarInfo(root)
+        directory.type = tarfile.DIRTYPE
+        archive.addfile(directory)
+        for path, content in files.items():
+            data = content.encode() if isinstance(content, str) else content
+            info = tarfile.TarInfo(f"{root}/{path}")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+        link = tarfile.TarInfo(f"{root}/link.md")
+        link.type = tarfile.SYMTYPE
+        link.linkname = "README.md"
+        archive.addfile(link)
+    return buffer.getvalue()
+
+
+def chunked(data, size):
+    return (data[i : i + size] for i in range(0, len(data), size))
+
+
+class TestArchiveReader:
+    """Test streaming member filtering"""
+
+    def test_filters_by_extension_and_size(self):
+        data = make_archive(
+            {
+                "README.md": LONG_TEXT,
+                "docs/guide.RST": LONG_TEXT,
+                "src/main.py": "print('hi')",
+                "docs/huge.md": "x" * 5000,
+            }
+        )
+        stats = ArchiveScanStats()
+
+        # 7-byte chunks: tarfile must not rely on seeking or large reads
+        files = list(
+            iter_archive_files(IterStream(chunked(data, 7)), {".md", ".rst"}, 4096, stats)
+        )
+
+        assert [(f.path, f.content) for f in files] == [
+            ("README.md", LONG_TEXT.encode()),
+            ("docs/guide.RST", LONG_TEXT.encode()),
+        ]
+        assert stats.members == 4
+        assert stats.matched == 2
+        assert stats.skipped_extension == 1
+        assert stats.skipped_size == 1
+        assert stats.commit_sha == "a" * 40
+
+    def test_commit_state_roundtrip(self, tmp_path):
+        path = tmp_path / "state.json"
+        state = CommitStateStore(path)
+        key = CommitStateStore.key("https://gitlab", 7, "main")
+        state.set(key, "abc")
+
+        reloaded = CommitStateStore(path)
+
+        assert reloaded.is_current(key, "abc")
+        assert not reloaded.is_current(key, "def")
+        assert not reloaded.is_current(key, None)
+        reloaded.reset()
+        assert not path.exists()
+
+    def test_corrupt_state_starts_fresh(self, tmp_path):
+        path = tmp_path / "state.json"
+        path.write_text("{not json")
+
+        assert CommitStateStore(path).commits == {}
+
+
+class FakeGitLab:
+    """Minimal GitLab API serving generated archives"""
+
+    def __init__(self):
+        self.sha = "1" * 40
+        self.files = {
+            "README.md": LONG_TEXT,
+            "docs/design.md": LONG_TEXT,
+            "docs/short.md": "too short",
+            "image.md": b"\x89PNG\x00\x00" + b"x" * 100,
+            "src/app.py": LONG_TEXT,
+        }
+        self.requests = []
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/api/v4/projects", self.projects)
+        app.router.add_get("/api/v4/projects/{id}/repository/commits/{ref}", self.commit)
+        app.router.add_get("/api/v4/projects/{id}/repository/archive.tar.gz", self.archive)
+        app.router.add_get("/api/v4/projects/{id}/repository/files/{path}", self.file)
+        return app
+
+    async def projects(self, request):
+        self.requests.append("projects")
+        return web.json_response(
+            [{"id": 7, "name": "docs", "path_with_namespace": "team/docs", "default_branch": "develop"}]
+        )
+
+    async def commit(self, request):
+        self.requests.append(f"commit:{request.match_info['ref']}")
+        return web.json_response({"id": self.sha})
+
+    async def archive(self, request):
+        self.requests.append(f"archive:{request.query['sha']}")
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for chunk in chunked(make_archive(self.files, sha=self.sha), 1024):
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+
+    async def file(self, request):
+        self.requests.append("file")
+        content = base64.b64encode(LONG_TEXT.encode()).decode()
+        return web.json_response({"content": content, "encoding": "base64", "size": len(LONG_TEXT)})
+
+
+@pytest_asyncio.fixture
+async def gitlab_server():
+    fake = FakeGitLab()
+    server = TestServer(fake.app())
+    await server.start_server()
+    fake.url = str(server.make_url(""))
+    yield fake
+    await server.close()
+
+
+def make_client(url, state_file, **config):
+    return GitLabIngestionClient(
+        {
+            "url": url,
+            "token": "token",
+            "commit_state_file": str(state_file),
+            **config,
+        },
+        {"batch_size": 2},
+    )
+
+
+async def collect(client):
+    return [batch async for batch in client.fetch_content_batches()]
+
+
+class TestArchiveIngestion:
+    """Test GitLabIngestionClient in archive mode"""
+
+    @pytest.mark.asyncio
+    async def test_single_archive_request_per_repository(self, gitlab_server, tmp_path):
+        client = make_client(gitlab_server.url, tmp_path / "state.json")
+
+        batches = await collect(client)
+
+        documents = [doc for batch in batches for doc in batch]
+        assert [len(batch) for batch in batches] == [2]
+        assert {doc.file_path for doc in documents} == {"README.md", "docs/design.md"}
+        assert documents[0].branch == "develop"
+        assert documents[0].modified_date == gitlab_server.sha
+        assert documents[0].url.endswith("/team/docs/-/blob/develop/README.md")
+        assert gitlab_server.requests == ["projects", "commit:develop", f"archive:{gitlab_server.sha}"]
+
+    @pytest.mark.asyncio
+    async def test_unchanged_repository_is_skipped(self, gitlab_server, tmp_path):
+        state_file = tmp_path / "state.json"
+        await collect(make_client(gitlab_server.url, state_file))
+        gitlab_server.requests.clear()
+
+        assert await collect(make_client(gitlab_server.url, state_file)) == []
+        assert gitlab_server.requests == ["projects", "commit:develop"]
+
+        gitlab_server.sha = "2" * 40
+        gitlab_server.files["docs/new.md"] = LONG_TEXT
+        batches = await collect(make_client(gitlab_server.url, state_file))
+
+        assert sum(len(batch) for batch in batches) == 3
+        assert gitlab_server.requests[-1] == f"archive:{'2' * 40}"
+
+    @pytest.mark.asyncio
+    async def test_abandoned_iteration_does_not_record_commit(self, gitlab_server, tmp_path):
+        gitlab_server.files.update({f"docs/page_{i}.md": LONG_TEXT for i in range(20)})
+        state_file = tmp_path / "state.json"
+        client = make_client(gitlab_server.url, state_file)
+
+        batches = client.fetch_content_batches()
+        first = await batches.__anext__()
+        await batches.aclose()
+
+        assert len(first) == 2
+        assert CommitStateStore(state_file).commits == {}
+
+    @pytest.mark.asyncio
+    async def test_files_mode_keeps_per_file_requests(self, gitlab_server, tmp_path):
+        client = make_client(gitlab_server.url, tmp_path / "state.json", ingestion_mode="files")
+        client._get_repository_tree = _tree
+
+        batches = await collect(client)
+
+        assert batches[0][0].file_path == "README.md"
+        assert "file" in gitlab_server.requests
+        assert not any(r.startswith("archive") for r in gitlab_server.requests)
+
+
+async def _tree(project_id, path="", recursive=True):
+    return [{"type": "blob", "path": "README.md", "id": "1"}]
@@ -0,0 +1,461 @@
+"""
+Tests for change-detection driven incremental sync
+"""
+
+import asyncio
+import os
+import re
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.services.incremental_sync import (CollectionSyncSink,
+                                           ConfluenceChangeSource,
+                                           GitLabChangeSource,
+                                           IncrementalSyncEngine,
+                                           JiraChangeSource,
+                                           LocalFilesChangeSource, SyncSink,
+                                           SyncStateStore, html_to_text)
+
+
+class RecordingSink(SyncSink):
+    def __init__(self):
+        self.upserted = {}
+        self.deleted = []
+
+    async def upsert(self, source_key, documents):
+        for doc in documents:
+            self.upserted[doc.item_id] = doc
+
+    async def delete(self, source_key, item_ids):
+        self.deleted.extend(item_ids)
+
+    def reset(self):
+        self.upserted.clear()
+        self.deleted.clear()
+
+
+@pytest.fixture
+def engine():
+    state = SyncStateStore(":memory:")
+    sink = RecordingSink()
+    yield IncrementalSyncEngine(state, sink, batch_size=7)
+    state.close()
+
+
+@pytest_asyncio.fixture
+async def serve():
+    servers = []
+
+    async def start(app):
+        server = TestServer(app)
+        await server.start_server()
+        servers.append(server)
+        return str(server.make_url("")).rstrip("/")
+
+    yield start
+    for server in servers:
+        await server.close()
+
+
+class TestLocalFiles:
+    """Test mtime + hash change detection and tombstones"""
+
+    @pytest.mark.asyncio
+    async def test_only_changed_files_are_reindexed(self, engine, tmp_path):
+        for index in range(30):
+            (tmp_path / f"doc_{index}.md").write_text(f"document {index}")
+        (tmp_path / "image.png").write_bytes(b"\x89PNG")
+        source = lambda: LocalFilesChangeSource({"bootstrap_dir": str(tmp_path), "supported_formats": [".md"]})
+
+        first = await engine.run("local_files_bootstrap", source())
+        assert (first.listed, first.changed, first.indexed) == (30, 30, 30)
+        assert engine.sink.upserted["doc_3.md"].content == "document 3"
+
+        engine.sink.reset()
+        steady = await engine.run("local_files_bootstrap", source())
+        assert (steady.listed, steady.changed, steady.fetched, steady.indexed) == (30, 0, 0, 0)
+
+        # Touched without content change: read and hashed, but not re-embedded
+        touched = tmp_path / "doc_1.md"
+        stat = touched.stat()
+        os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        (tmp_path / "doc_2.md").write_text("document 2, edited")
+        (tmp_path / "doc_4.md").unlink()
+
+        delta = await engine.run("local_files_bootstrap", source())
+
+        assert (delta.changed, delta.fetched, delta.unchanged_content, delta.indexed) == (2, 2, 1, 1)
+        assert list(engine.sink.upserted) == ["doc_2.md"]
+        assert engine.sink.deleted == ["doc_4.md"]
+        assert delta.deleted == 1
+        assert "doc_4.md" not in engine.state.item_versions("local_files_bootstrap")
+
+    @pytest.mark.asyncio
+    async def test_full_sync_reindexes_everything(self, engine, tmp_path):
+        (tmp_path / "a.md").write_text("a")
+        source = lambda: LocalFilesChangeSource({"bootstrap_dir": str(tmp_path), "supported_formats": [".md"]})
+        await engine.run("local", source())
+
+        report = await engine.run("local", source(), incremental=False)
+
+        assert report.indexed == 1
+
+
+class FakeConfluence:
+    def __init__(self):
+        self.pages = {
+            str(i): {"version": 1, "when": f"2024-05-01T10:{i:02d}:00.000Z", "body": f"<p>Page {i}</p>"}
+            for i in range(1, 11)
+        }
+        self.searches = []
+        self.fetched = []
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/rest/api/content/search", self.search)
+        app.router.add_get("/rest/api/content/{id}", self.content)
+        return app
+
+    async def search(self, request):
+        cql = request.query["cql"]
+        self.searches.append(cql)
+        since = re.search(r'lastModified >= "([^"]+)"', cql)
+        ids = sorted(self.pages, key=int)
+        if since:
+            threshold = since.group(1).replace(" ", "T")
+            ids = [i for i in ids if self.pages[i]["when"][:16] >= threshold]
+        start, limit = int(request.query["start"]), int(request.query["limit"])
+        results = []
+        for page_id in ids[start:start + limit]:
+            page = {"id": page_id, "title": f"Page {page_id}"}
+            if "expand" in request.query:
+                page["version"] = {"number": self.pages[page_id]["version"], "when": self.pages[page_id]["when"]}
+                page["space"] = {"key": "TECH"}
+            results.append(page)
+        return web.json_response({"results": results})
+
+    async def content(self, request):
+        page_id = request.match_info["id"]
+        self.fetched.append(page_id)
+        page = self.pages[page_id]
+        return web.json_response({
+            "id": page_id,
+            "title": f"Page {page_id}",
+            "version": {"number": page["version"]},
+            "body": {"storage": {"value": page["body"]}},
+        })
+
+
+class TestConfluence:
+    """Test lastModified deltas and deletion detection"""
+
+    @pytest.mark.asyncio
+    async def test_delta_and_tombstones(self, engine, serve):
+        fake = FakeConfluence()
+        url = await serve(fake.app())
+        config = {"url": url, "token": "t", "spaces": ["TECH"], "watermark_overlap_minutes": 0}
+        ConfluenceChangeSource.page_size = 4
+
+        first = await engine.run("confluence_main", ConfluenceChangeSource(config))
+        assert first.indexed == 10
+        assert engine.state.get_watermark("confluence_main").startswith("2024-05-01T10:10:00")
+        assert engine.sink.upserted["3"].content == "Page 3"
+
+        fake.fetched.clear()
+        fake.searches.clear()
+        engine.sink.reset()
+        fake.pages["4"].update(version=2, when="2024-05-02T09:00:00.000Z", body="<p>Page 4 v2</p>")
+        del fake.pages["7"]
+
+        delta = await engine.run("confluence_main", ConfluenceChangeSource(config))
+
+        assert 'lastModified >= "2024-05-01 10:10"' in fake.searches[0]
+        # Page 10 is returned again by the >= boundary but its version is unchanged
+        assert (delta.listed, delta.changed) == (2, 1)
+        assert fake.fetched == ["4"]
+        assert engine.sink.upserted["4"].content == "Page 4 v2"
+        assert engine.sink.deleted == ["7"]
+        assert engine.state.get_watermark("confluence_main").startswith("2024-05-02T09:00:00")
+
+
+class FakeJira:
+    def __init__(self):
+        self.issues = {
+            str(100 + i): {"key": f"PROJ-{i}", "updated": f"2024-05-01T10:{i:02d}:00.000+0000", "summary": f"Issue {i}"}
+            for i in range(5)
+        }
+        self.queries = []
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/rest/api/2/search", self.search)
+        return app
+
+    async def search(self, request):
+        jql = request.query["jql"]
+        self.queries.append(jql)
+        ids = sorted(self.issues)
+        match_ids = re.search(r"id in \(([^)]*)\)", jql)
+        since = re.search(r'updated >= "([^"]+)"', jql)
+        if match_ids:
+            ids = [i.strip() for i in match_ids.group(1).split(",")]
+        elif since:
+            threshold = since.group(1).replace("/", "-").replace(" ", "T")
+            ids = [i for i in ids if self.issues[i]["updated"][:16] >= threshold]
+        issues = [
+            {"id": i, "key": self.issues[i]["key"], "fields": {
+                "updated": self.issues[i]["updated"], "summary": self.issues[i]["summary"], "description": None}}
+            for i in ids
+        ]
+        return web.json_response({"issues": issues, "total": len(issues)})
+
+
+class TestJira:
+    """Test updated-based deltas with batched issue fetches"""
+
+    @pytest.mark.asyncio
+    async def test_delta_uses_single_batched_fetch(self, engine, serve):
+        fake = FakeJira()
+        url = await serve(fake.app())
+        config = {"url": url, "username": "bot", "api_token": "t", "projects": ["PROJ"],
+                  "watermark_overlap_minutes": 0}
+
+        first = await engine.run("jira_main", JiraChangeSource(config))
+        assert first.indexed == 5
+        assert sum("id in" in q for q in fake.queries) == 1
+
+        fake.queries.clear()
+        fake.issues["102"].update(updated="2024-05-03T08:00:00.000+0000", summary="Issue 2 reopened")
+        del fake.issues["100"]
+
+        delta = await engine.run("jira_main", JiraChangeSource(config))
+
+        assert delta.changed == 1 and delta.indexed == 1
+        assert engine.sink.upserted["102"].content.startswith("Issue 2 reopened")
+        assert engine.sink.upserted["102"].metadata["updated_at"] == "2024-05-03T08:00:00+00:00"
+        assert engine.sink.deleted == ["100"]
+        assert 'updated >= "2024/05/01 10:04"' in fake.queries[0]
+
+
+class FakeGitLab:
+    def __init__(self):
+        self.head = "sha1"
+        self.files = {"README.md": "readme v1", "docs/a.md": "a v1", "docs/b.md": "b v1", "src/app.py": "code"}
+        self.compare = {}
+        self.requests = []
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/api/v4/projects", self.projects)
+        app.router.add_get("/api/v4/projects/{id}/repository/commits/{ref}", self.commit)
+        app.router.add_get("/api/v4/projects/{id}/repository/compare", self.compare_view)
+        app.router.add_get("/api/v4/projects/{id}/repository/tree", self.tree)
+        app.router.add_get("/api/v4/projects/{id}/repository/files/{path}/raw", self.raw)
+        return app
+
+    async def projects(self, request):
+        self.requests.append("projects")
+        return web.json_response([{"id": 5, "path_with_namespace": "team/docs", "default_branch": "main"}])
+
+    async def commit(self, request):
+        self.requests.append("commit")
+        return web.json_response({"id": self.head})
+
+    async def compare_view(self, request):
+        self.requests.append(f"compare:{request.query['from']}..{request.query['to']}")
+        return web.json_response(self.compare)
+
+    async def tree(self, request):
+        self.requests.append("tree")
+        return web.json_response([{"type": "blob", "path": path} for path in self.files])
+
+    async def raw(self, request):
+        path = request.match_info["path"]
+        self.requests.append(f"raw:{path}")
+        return web.Response(text=self.files[path])
+
+
+class TestGitLab:
+    """Test commit-SHA high-water marks and compare-based deltas"""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_projects_cost_one_request(self, engine, serve):
+        fake = FakeGitLab()
+        url = await serve(fake.app())
+        config = {"url": url, "token": "t"}
+
+        first = await engine.run("gitlab_main", GitLabChangeSource(config))
+        assert first.indexed == 3  # .py is not in the default extensions
+        assert "tree" in fake.requests
+
+        fake.requests.clear()
+        steady = await engine.run("gitlab_main", GitLabChangeSource(config))
+        assert fake.requests == ["projects", "commit"]
+        assert steady.changed == 0
+
+        fake.requests.clear()
+        engine.sink.reset()
+        fake.head = "sha2"
+        fake.files["docs/a.md"] = "a v2"
+        fake.files["docs/c.md"] = fake.files.pop("docs/b.md")
+        del fake.files["README.md"]
+        fake.compare = {"diffs": [
+            {"old_path": "docs/a.md", "new_path": "docs/a.md"},
+            {"old_path": "docs/b.md", "new_path": "docs/c.md", "renamed_file": True},
+            {"old_path": "README.md", "new_path": "README.md", "deleted_file": True},
+            {"old_path": "src/app.py", "new_path": "src/app.py"},
+        ]}
+
+        delta = await engine.run("gitlab_main", GitLabChangeSource(config))
+
+        assert "compare:sha1..sha2" in fake.requests and "tree" not in fake.requests
+        assert sorted(engine.sink.upserted) == ["5:docs/a.md", "5:docs/c.md"]
+        assert sorted(engine.sink.deleted) == ["5:README.md", "5:docs/b.md"]
+        assert delta.changed == 2
+        assert set(engine.state.item_versions("gitlab_main")) == {"5:docs/a.md", "5:docs/c.md"}
+
+
+class TestConcurrencyCap:
+    """Test the per-source request limit"""
+
+    @pytest.mark.asyncio
+    async def test_fetches_respect_max_concurrency(self, engine, serve):
+        fake = FakeConfluence()
+        active = {"now": 0, "max": 0}
+        original = fake.content
+
+        async def slow_content(request):
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.02)
+            active["now"] -= 1
+            return await original(request)
+
+        fake.content = slow_content
+        url = await serve(fake.app())
+
+        await engine.run("confluence", ConfluenceChangeSource({"url": url, "token": "t"}, max_concurrency=3))
+
+        assert active["max"] == 3
+
+
+def test_html_to_text():
+    assert html_to_text("<h1>Title</h1><script>x()</script><p>a &amp; b</p>") == "Title a & b"
+
+
+class FakeCollectionManager:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+        self.metadata = {}
+
+    async def index_document(self, text, metadata, collection_type):
+        self.calls.append(("index", metadata.doc_id, collection_type.value, metadata.title))
+        self.metadata[metadata.doc_id] = metadata
+        return not self.fail
+
+    async def delete_document(self, doc_id, collection_type):
+        self.calls.append(("delete", doc_id, collection_type.value))
+        return True
+
+
+class TestCollectionSink:
+    """Test indexing changes into the vector collections"""
+
+    @pytest.mark.asyncio
+    async def test_changes_are_indexed_and_deleted(self, tmp_path):
+        (tmp_path / "doc.md").write_text("hello")
+        manager = FakeCollectionManager()
+        state = SyncStateStore(":memory:")
+        engine = IncrementalSyncEngine(state, CollectionSyncSink(manager))
+        source = LocalFilesChangeSource({"bootstrap_dir": str(tmp_path), "supported_formats": [".md"]})
+
+        await engine.run("local_files_docs", source)
+        (tmp_path / "doc.md").unlink()
+        await engine.run("local_files_docs", source)
+
+        assert [call[0] for call in manager.calls] == ["delete", "index", "delete"]
+        assert manager.calls[1][2] == "documents"
+        assert manager.calls[2][1].startswith("local_files_docs:")
+        state.close()
+
+    @pytest.mark.asyncio
+    async def test_updated_at_is_the_modification_time(self, tmp_path):
+        path = tmp_path / "doc.md"
+        path.write_text("hello")
+        os.utime(path, (1714644000, 1714644000))
+        manager = FakeCollectionManager()
+        state = SyncStateStore(":memory:")
+        engine = IncrementalSyncEngine(state, CollectionSyncSink(manager))
+        source = LocalFilesChangeSource({"bootstrap_dir": str(tmp_path), "supported_formats": [".md"]})
+
+        await engine.run("local_files_docs", source)
+
+        metadata = manager.metadata["local_files_docs:doc.md"]
+        assert metadata.updated_at == "2024-05-02T10:00:00+00:00"
+        assert metadata.source_version == f"{path.stat().st_mtime_ns}:5"
+        state.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_indexing_does_not_advance_state(self, tmp_path):
+        (tmp_path / "doc.md").write_text("hello")
+        state = SyncStateStore(":memory:")
+        engine = IncrementalSyncEngine(state, CollectionSyncSink(FakeCollectionManager(fail=True)))
+        source = LocalFilesChangeSource({"bootstrap_dir": str(tmp_path), "supported_formats": [".md"]})
+
+        with pytest.raises(RuntimeError, match="Failed to index"):
+            await engine.run("local_files_docs", source)
+
+        assert state.item_versions("local_files_docs") == {}
+        assert state.get_watermark("local_files_docs") is None
+        state.close()
+
+    def test_collection_type_from_source_key(self):
+        assert CollectionSyncSink.collection_type("confluence_main").value == "confluence"
+        assert CollectionSyncSink.collection_type("gitlab_platform").value == "gitlab"
+        assert CollectionSyncSink.collection_type("unknown_x").value == "documents"
+
+
+class TestSchedulerService:
+    """Test the scheduler on top of the incremental engine"""
+
+    @pytest.mark.asyncio
+    async def test_sources_run_concurrently(self, tmp_path, monkeypatch):
+        pytest.importorskip("apscheduler")
+        from app.services.data_sync_scheduler_service import \
+            DataSyncSchedulerService
+
+        for name in ("a", "b"):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "doc.md").write_text(name)
+
+        service = DataSyncSchedulerService(state_store=SyncStateStore(":memory:"), sink=RecordingSink())
+        service.config = {"global_settings": {"max_concurrent_jobs": 2}}
+        service.sync_jobs = {
+            f"local_files_{name}": {
+                "source_type": "local_files", "source_name": name, "incremental": True,
+                "config": {"bootstrap_dir": str(tmp_path / name), "supported_formats": [".md"]},
+            }
+            for name in ("a", "b")
+        }
+        running = {"now": 0, "max": 0}
+        original = service._run_incremental
+
+        async def tracked(job_id, job_config):
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            await asyncio.sleep(0.05)
+            try:
+                return await original(job_id, job_config)
+            finally:
+                running["now"] -= 1
+
+        monkeypatch.setattr(service, "_run_incremental", tracked)
+
+        await service.trigger_manual_sync()
+
+        assert running["max"] == 2
+        assert service.get_sync_status()["last_sync"]["local_files_a"]["indexed"] == 1
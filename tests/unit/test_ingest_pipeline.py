@@ -0,0 +1,269 @@
+"""
+Tests for the streaming Confluence ingestion pipeline (local/ingest_pipeline.py)
+"""
+
+import asyncio
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(ROOT / "local"))
+
+from ingest_pipeline import (Checkpoint, IngestPipeline, Page,  # noqa: E402
+                             chunk_page, get_html_parser)
+
+FIXTURES = sorted((ROOT / "tests" / "test-data" / "confluence").glob("*.md"))
+
+
+def storage_html(markdown: str) -> str:
+    """Confluence storage format for a fixture page, with a code macro and a script"""
+    parts = []
+    for line in markdown.splitlines():
+        heading = re.match(r"#+\s+(.*)", line)
+        if heading:
+            parts.append(f"<h2>{heading.group(1)}</h2>")
+        elif line.strip():
+            parts.append(f"<p>{line.replace('&', '&amp;').replace('<', '&lt;')}</p>")
+    parts.append(
+        '<ac:structured-macro ac:name="code"><ac:plain-text-body>'
+        "<![CDATA[if a < b && c:\n    return {'ok': True}]]>"
+        "</ac:plain-text-body></ac:structured-macro>"
+    )
+    parts.append("<script>tracking()</script><p>Tom &amp; Jerry&nbsp;&mdash; end</p>")
+    return "".join(parts)
+
+
+def fixture_pages(copies: int = 1):
+    pages = []
+    for copy in range(copies):
+        for index, path in enumerate(FIXTURES):
+            page_id = f"{copy * 100 + index}"
+            pages.append(
+                Page(
+                    page_id=page_id,
+                    html=storage_html(path.read_text(encoding="utf-8")),
+                    payload={"src": "conf", "space": "DEV", "url": f"https://wiki/pages/{page_id}"},
+                )
+            )
+    return pages
+
+
+def fetch_from(pages, page_size=3, delay=0.0, fetched=None):
+    """fetch(task) over in-memory fixture pages: the task is a space key"""
+
+    def fetch(space_key):
+        space_pages = [page for page in pages if page.payload["space"] == space_key]
+        for start in range(0, len(space_pages), page_size):
+            if delay:
+                time.sleep(delay)
+            batch = space_pages[start : start + page_size]
+            if fetched is not None:
+                fetched.extend(page.page_id for page in batch)
+            yield [Page(page.page_id, page.html, dict(page.payload)) for page in batch]
+
+    return fetch
+
+
+class StubVectorStore:
+    """Thread-safe in-memory stand-in for Qdrant"""
+
+    def __init__(self, fail_pages=(), delay=0.0):
+        self.points = {}
+        self.batches = []
+        self.fail_pages = set(fail_pages)
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def embed(texts):
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def write(self, records, vectors):
+        if self.delay:
+            time.sleep(self.delay)
+        if any(payload["url"].rsplit("/", 1)[1] in self.fail_pages for _, _, payload in records):
+            raise RuntimeError("qdrant unavailable")
+        with self.lock:
+            self.batches.append(len(records))
+            for (uid, text, payload), vector in zip(records, vectors):
+                self.points[uid] = (text, payload, vector)
+
+
+def expected_points(pages):
+    parser = get_html_parser("html.parser")
+    ids = set()
+    for page in pages:
+        page = Page(page.page_id, None, page.payload, text=parser(page.html))
+        ids.update(uid for uid, _, _ in chunk_page(page))
+    return ids
+
+
+class TestHtmlParsers:
+    """Test the pluggable HTML parsers"""
+
+    @pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.stem)
+    def test_lxml_matches_html_parser(self, path):
+        body = storage_html(path.read_text(encoding="utf-8"))
+
+        lxml_text = get_html_parser("lxml")(body)
+
+        assert lxml_text == get_html_parser("html.parser")(body)
+        assert "if a < b && c:" in lxml_text
+        assert "tracking()" not in lxml_text
+        assert "Tom & Jerry\xa0— end" in lxml_text
+
+    def test_empty_and_unknown(self):
+        assert get_html_parser("lxml")("") == ""
+        assert get_html_parser("lxml")("<!-- only a comment -->") == ""
+        with pytest.raises(ValueError):
+            get_html_parser("html5lib")
+
+
+class TestCheckpoint:
+    """Test the append-only checkpoint file"""
+
+    def test_commit_reload_and_reset(self, tmp_path):
+        path = tmp_path / "state" / "checkpoint"
+        checkpoint = Checkpoint(path)
+        checkpoint.commit(["1", "2"])
+        checkpoint.commit(["2", "3"])
+        checkpoint.close()
+
+        # A crash mid-write leaves a partial trailing line
+        with path.open("a") as f:
+            f.write("4")
+        reloaded = Checkpoint(path)
+
+        assert path.read_text().splitlines() == ["1", "2", "3", "4"]
+        assert "3" in reloaded and len(reloaded) == 4
+        reloaded.reset()
+        assert not path.exists() and len(reloaded) == 0
+
+
+class TestIngestPipeline:
+    """Test the staged pipeline against fixture pages and a stub vector store"""
+
+    @pytest.mark.asyncio
+    async def test_ingests_all_pages(self, tmp_path):
+        pages = fixture_pages(copies=3)
+        store = StubVectorStore()
+        checkpoint = Checkpoint(tmp_path / "checkpoint")
+        pipeline = IngestPipeline(
+            store.embed,
+            store.write,
+            checkpoint=checkpoint,
+            batch_size=8,
+            concurrency={"fetch": 2, "parse": 3, "upsert": 2},
+        )
+
+        metrics = await pipeline.run(fetch_from(pages), ["DEV"])
+
+        assert set(store.points) == expected_points(pages)
+        assert max(store.batches) <= 8
+        assert set(Checkpoint(tmp_path / "checkpoint").committed) == {p.page_id for p in pages}
+        assert metrics["fetch"].items_in == len(pages)
+        assert metrics["parse"].items_out == len(pages)
+        assert metrics["upsert"].items_out == len(store.points)
+        assert all(m.errors == 0 for m in metrics.values())
+        assert metrics["parse"].throughput > 0
+        assert metrics["parse"].as_dict()["workers"] == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_pages_are_retried_on_resume(self, tmp_path):
+        pages = fixture_pages()
+        store = StubVectorStore(fail_pages={"3", "7"})
+        pipeline = IngestPipeline(
+            store.embed, store.write, checkpoint=Checkpoint(tmp_path / "checkpoint"), batch_size=1
+        )
+
+        first = await pipeline.run(fetch_from(pages), ["DEV"])
+
+        assert first["upsert"].errors > 0
+        committed = Checkpoint(tmp_path / "checkpoint").committed
+        assert committed == {p.page_id for p in pages} - {"3", "7"}
+
+        store.fail_pages.clear()
+        resumed = IngestPipeline(
+            store.embed, store.write, checkpoint=Checkpoint(tmp_path / "checkpoint"), batch_size=1
+        )
+        second = await resumed.run(fetch_from(pages), ["DEV"])
+
+        assert second["fetch"].skipped == len(pages) - 2
+        assert second["parse"].items_in == 2
+        assert set(store.points) == expected_points(pages)
+        assert len(Checkpoint(tmp_path / "checkpoint")) == len(pages)
+
+    @pytest.mark.asyncio
+    async def test_interrupted_run_resumes_from_last_committed_page(self, tmp_path):
+        pages = fixture_pages(copies=2)
+        store = StubVectorStore(delay=0.01)
+        checkpoint_path = tmp_path / "checkpoint"
+        pipeline = IngestPipeline(
+            store.embed, store.write, checkpoint=Checkpoint(checkpoint_path), batch_size=4, queue_size=4
+        )
+
+        run = asyncio.create_task(pipeline.run(fetch_from(pages, page_size=2), ["DEV"]))
+        while len(store.batches) < 5:
+            await asyncio.sleep(0.005)
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+
+        committed = Checkpoint(checkpoint_path).committed
+        assert 0 < len(committed) < len(pages)
+
+        store.delay = 0
+        resumed = IngestPipeline(store.embed, store.write, checkpoint=Checkpoint(checkpoint_path))
+        metrics = await resumed.run(fetch_from(pages), ["DEV"])
+
+        assert metrics["fetch"].skipped == len(committed)
+        assert metrics["parse"].items_in == len(pages) - len(committed)
+        assert set(store.points) == expected_points(pages)
+
+    @pytest.mark.asyncio
+    async def test_backpressure_bounds_pages_in_flight(self):
+        pages = fixture_pages(copies=10)
+        fetched = []
+        in_flight = []
+
+        def slow_embed(texts):
+            time.sleep(0.002)
+            return StubVectorStore.embed(texts)
+
+        def write(records, vectors):
+            written.update(payload["url"] for _, _, payload in records)
+            in_flight.append(len(fetched) - len(written))
+
+        written = set()
+        pipeline = IngestPipeline(
+            slow_embed, write, batch_size=4, queue_size=4, concurrency={"fetch": 1}
+        )
+
+        metrics = await pipeline.run(fetch_from(pages, page_size=5, fetched=fetched), ["DEV"])
+
+        assert len(written) == len(pages)
+        # Pages queue + parsed queue + one API page per fetch worker + what the
+        # chunk and embed stages hold; far below the 100 pages fetched
+        assert max(in_flight) <= 4 + 4 + 5 + 8
+        assert metrics["fetch"].blocked_seconds > 0
+
+    @pytest.mark.asyncio
+    async def test_spaces_are_fetched_concurrently(self):
+        pages = [
+            Page(str(i), f"<p>page {i}</p>", {"space": f"S{i % 4}", "url": f"u/{i}"})
+            for i in range(8)
+        ]
+        store = StubVectorStore()
+        pipeline = IngestPipeline(store.embed, store.write, concurrency={"fetch": 4})
+
+        start = time.perf_counter()
+        await pipeline.run(fetch_from(pages, page_size=1, delay=0.1), ["S0", "S1", "S2", "S3"])
+
+        # Two API pages per space: ~0.2s in parallel versus ~0.8s sequentially
+        assert time.perf_counter() - start < 0.5
+        assert len(store.points) == 8
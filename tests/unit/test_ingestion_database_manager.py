@@ -0,0 +1,219 @@
+"""
+Tests for the COPY-based bulk path of the ingestion DatabaseManager
+"""
+
+from contextlib import asynccontextmanager
+
+import asyncpg
+import pytest
+
+from tools.scripts.ingestion.confluence_client import ConfluenceDocument
+from tools.scripts.ingestion.database_manager import (MERGE_BY_CONTENT_HASH,
+                                                      STAGING_COLUMNS,
+                                                      STAGING_TABLE,
+                                                      UPDATE_CHANGED_BY_ID,
+                                                      DatabaseManager)
+
+
+def make_doc(doc_id, content=None):
+    return ConfluenceDocument(
+        id=doc_id,
+        title=f"Page {doc_id}",
+        content=content or f"content of {doc_id}",
+        space_key="DEV",
+        page_type="page",
+        url=f"https://wiki/pages/{doc_id}",
+        created_date="2024-05-01T10:00:00Z",
+        modified_date="2024-05-02T10:00:00Z",
+        author="alice",
+        labels=["adr"],
+    )
+
+
+class FakeConnection:
+    """Records the statements of the bulk path; merges succeed for every staged row"""
+
+    def __init__(self, fail_merges=0):
+        self.copies = []
+        self.statements = []
+        self.transactions = 0
+        self.fail_merges = fail_merges
+        self.staged = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transactions += 1
+        yield
+
+    async def copy_records_to_table(self, table_name, records, columns):
+        self.copies.append((table_name, list(records), columns))
+        self.staged = list(records)
+
+    async def execute(self, sql, *args):
+        self.statements.append(sql)
+        if sql == UPDATE_CHANGED_BY_ID:
+            return "UPDATE 1"
+        return "INSERT 0 1"
+
+    async def fetch(self, sql, *args):
+        self.statements.append(sql)
+        if self.fail_merges:
+            self.fail_merges -= 1
+            raise asyncpg.PostgresError("value too long for type character varying(255)")
+        # The first staged row is treated as updated by id, the last as a known hash
+        return [{"inserted": True} for _ in self.staged[1:-1]] + [{"inserted": False}]
+
+    async def fetchval(self, sql, *args):
+        self.statements.append(sql)
+        return None
+
+
+class AbortingConnection:
+    """
+    Postgres transaction semantics for the row path: after a failed statement
+    every statement fails until the enclosing savepoint rolls back, and an
+    aborted transaction commits nothing.
+    """
+
+    def __init__(self, bad_ids):
+        self.bad_ids = set(bad_ids)
+        self.table = {}
+        self.levels = []  # [pending rows, aborted] per open transaction/savepoint
+
+    @asynccontextmanager
+    async def transaction(self):
+        level = [{}, False]
+        self.levels.append(level)
+        try:
+            yield
+        except Exception:
+            self.levels.pop()
+            raise
+        self.levels.pop()
+        if level[1]:
+            if self.levels:
+                self.levels[-1][1] = True
+            return
+        (self.levels[-1][0] if self.levels else self.table).update(level[0])
+
+    def _check(self):
+        if any(aborted for _, aborted in self.levels):
+            raise asyncpg.PostgresError("current transaction is aborted, commands ignored until end of transaction block")
+
+    async def fetchval(self, sql, *args):
+        self._check()
+        return None
+
+    async def execute(self, sql, *args):
+        self._check()
+        if args[0] in self.bad_ids:
+            self.levels[-1][1] = True
+            raise asyncpg.PostgresError("value too long for type character varying(255)")
+        self.levels[-1][0][args[0]] = args[2]
+        return "INSERT 0 1"
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def make_manager(conn, **config):
+    manager = DatabaseManager({"url": "postgresql://test", **config})
+    manager.pool = FakePool(conn)
+    return manager
+
+
+class TestBulkSave:
+    """Test chunked COPY + merge"""
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_copied_and_committed_separately(self):
+        conn = FakeConnection()
+        manager = make_manager(conn, bulk_chunk_size=4)
+        progress = []
+
+        saved = await manager.save_documents(
+            [make_doc(str(i)) for i in range(10)], progress_callback=lambda done, total: progress.append((done, total))
+        )
+
+        assert [len(records) for _, records, _ in conn.copies] == [4, 4, 2]
+        assert all(table == STAGING_TABLE and columns == STAGING_COLUMNS for table, _, columns in conn.copies)
+        assert conn.transactions == 3
+        assert progress == [(4, 10), (8, 10), (10, 10)]
+        # Per chunk: one update by id plus the inserted rows
+        assert saved == (1 + 2) + (1 + 2) + (1 + 0)
+        assert MERGE_BY_CONTENT_HASH in conn.statements
+        assert not any("SELECT id FROM ingested_documents" in sql for sql in conn.statements)
+
+    @pytest.mark.asyncio
+    async def test_chunk_is_deduplicated_before_copy(self):
+        conn = FakeConnection()
+        manager = make_manager(conn)
+
+        await manager.save_documents(
+            [
+                make_doc("1", "old"),
+                make_doc("2", "shared"),
+                make_doc("3", "shared"),
+                make_doc("1", "new"),
+            ]
+        )
+
+        (_, records, _), = conn.copies
+        rows = [dict(zip(STAGING_COLUMNS, record)) for record in records]
+        # Last version per id, first document per content hash
+        assert [(row["id"], row["content"]) for row in rows] == [("2", "shared"), ("1", "new")]
+        assert rows[0]["metadata"] == (
+            '{"space_key": "DEV", "page_type": "page", "author": "alice", "labels": ["adr"], "parent_id": null}'
+        )
+        assert rows[0]["updated_at"].day == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_falls_back_to_rows(self):
+        conn = FakeConnection(fail_merges=1)
+        manager = make_manager(conn, bulk_chunk_size=2)
+
+        saved = await manager.save_documents([make_doc(str(i)) for i in range(4)])
+
+        row_inserts = [sql for sql in conn.statements if "ON CONFLICT (id)" in sql]
+        assert len(row_inserts) == 2
+        assert len(conn.copies) == 2
+        assert saved == 2 + 1
+
+    @pytest.mark.asyncio
+    async def test_rows_mode_keeps_per_document_statements(self):
+        conn = FakeConnection()
+        manager = make_manager(conn, save_mode="rows")
+
+        saved = await manager.save_documents([make_doc(str(i)) for i in range(3)])
+
+        assert saved == 3
+        assert conn.copies == []
+        # One transaction plus a savepoint per document
+        assert conn.transactions == 1 + 3
+        assert sum("SELECT id FROM ingested_documents" in sql for sql in conn.statements) == 3
+
+    @pytest.mark.asyncio
+    async def test_duplicate_hashes_in_table_disable_bulk_path(self):
+        conn = FakeConnection()
+        manager = make_manager(conn)
+        manager.bulk_supported = False
+
+        await manager.save_documents([make_doc("1")])
+
+        assert conn.copies == []
+
+    @pytest.mark.asyncio
+    async def test_failed_row_does_not_abort_the_others(self):
+        conn = AbortingConnection(bad_ids={"1"})
+        manager = make_manager(conn, save_mode="rows")
+
+        saved = await manager.save_documents([make_doc(str(i)) for i in range(4)])
+
+        assert saved == 3
+        assert sorted(conn.table) == ["0", "2", "3"]
@@ -0,0 +1,168 @@
+"""
+Tests for the BM25 lexical index and hybrid (lexical + vector) search
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from adapters.vectorstore.collections import (CollectionManager, CollectionType,
+                                              DocumentMetadata)
+from adapters.vectorstore.embeddings import EmbeddingResult
+from adapters.vectorstore.lexical_index import (LexicalIndex, LexicalIndexStore,
+                                                fuse_ranked_items,
+                                                reciprocal_rank_fusion,
+                                                tokenize)
+
+CHUNKS = {
+    "a": {"title": "Deploy guide", "text": "Rolling deploys restart pods one at a time", "source_type": "documents"},
+    "b": {"title": "Incident", "text": "PROJ-123 fails with ERR_CONN_RESET after deploy", "source_type": "jira"},
+    "c": {"title": "API", "text": "get_user_by_id returns None for deleted users", "source_type": "gitlab"},
+    "d": {"title": "Notes", "text": "deploy deploy deploy checklist", "source_type": "documents"},
+}
+
+
+def build(path=None):
+    index = LexicalIndex("test", path)
+    index.upsert(list(CHUNKS), list(CHUNKS.values()))
+    return index
+
+
+class TestLexicalIndex:
+    """Test tokenization, BM25 ranking and persistence"""
+
+    def test_tokenize_keeps_identifiers(self):
+        assert tokenize("Fix PROJ-123: get_user_by_id") == [
+            "fix", "proj-123", "proj", "123", "get_user_by_id", "get", "user", "by", "id"
+        ]
+        assert tokenize("Ошибка в v1.2") == ["ошибка", "в", "v1.2", "v1", "2"]
+
+    def test_bm25_ranking(self):
+        index = build()
+
+        assert [hit["id"] for hit in index.search("PROJ-123")] == ["b"]
+        assert [hit["id"] for hit in index.search("get_user_by_id")] == ["c"]
+        # Term frequency saturates, shorter documents win ties
+        assert [hit["id"] for hit in index.search("deploy")][:2] == ["d", "a"]
+        assert index.search("unknown words") == []
+
+    def test_filters_and_deletes(self):
+        index = build()
+
+        assert [hit["id"] for hit in index.search("deploy", filters={"source_type": "jira"})] == ["b"]
+        assert index.delete(filters={"source_type": "documents"}) == 2
+        assert [hit["id"] for hit in index.search("deploy")] == ["b"]
+
+        index.upsert(["b"], [{"text": "rewritten"}])
+        assert index.search("PROJ-123") == []
+        assert index.info()["points_count"] == 2
+
+    def test_log_survives_reopen_and_compaction(self, tmp_path):
+        index = build(str(tmp_path))
+        index.delete(ids=["a"])
+        expected = index.search("deploy")
+        index.close()
+
+        reopened = LexicalIndex("test", str(tmp_path))
+        assert reopened.search("deploy") == expected
+
+        reopened.compact()
+        reopened.close()
+        assert sum(1 for _ in open(tmp_path / "postings.jsonl")) == 3
+        assert LexicalIndex("test", str(tmp_path)).search("deploy") == expected
+
+    def test_store_replace(self, tmp_path):
+        store = LexicalIndexStore(str(tmp_path))
+        store.upsert("docs", ["old"], [{"text": "stale chunk"}])
+        store.upsert("docs_v2", ["new"], [{"text": "fresh chunk"}])
+
+        store.replace("docs", "docs_v2")
+        store.close()
+
+        reopened = LexicalIndexStore(str(tmp_path))
+        assert set(reopened.indexes) == {"docs"}
+        assert [hit["id"] for hit in reopened.search("docs", "chunk")] == ["new"]
+
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion([(["a", "b"], 1.0), (["b", "c"], 2.0), (["a"], 0.0)], k=1)
+
+        assert fused == pytest.approx({"a": 1 / 2, "b": 1 / 3 + 2 / 2, "c": 2 / 3})
+
+    def test_fused_items_keep_their_ranking_weight(self):
+        lexical = [{"id": "a", "from": "lexical"}, {"id": "b", "from": "lexical"}]
+        vector = [{"id": "b", "from": "vector"}, {"id": "c", "from": "vector"}]
+
+        fused = fuse_ranked_items([(lexical, 0.0), (vector, 1.0)], key=lambda item: item["id"], k=1)
+        assert [(item["id"], item["from"]) for item, _ in fused] == [("b", "vector"), ("c", "vector")]
+
+        # Without a lexical ranking the vector one keeps the vector weight
+        fused = fuse_ranked_items([(vector, 3.0)], key=lambda item: item["id"], k=1)
+        assert [score for _, score in fused] == pytest.approx([3 / 2, 3 / 3])
+
+
+class FakeEmbeddings:
+    """Every text embeds to the same direction: only BM25 can tell them apart"""
+
+    async def embed_text(self, text):
+        return EmbeddingResult(text=text, vector=[0.6, 0.8], token_count=1, cost_estimate=0.0)
+
+    async def embed_texts(self, texts):
+        return [await self.embed_text(text) for text in texts]
+
+
+@pytest.fixture
+def manager():
+    with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=FakeEmbeddings()):
+        return CollectionManager()
+
+
+async def index(manager, doc_id, text, collection_type=CollectionType.DOCUMENTS):
+    metadata = DocumentMetadata(doc_id=doc_id, title=doc_id, source="test", source_type=collection_type)
+    assert await manager.index_document(text, metadata, collection_type)
+
+
+class TestHybridSearch:
+    """Test lexical ingestion and fusion in CollectionManager"""
+
+    @pytest.mark.asyncio
+    async def test_exact_identifier_is_ranked_first(self, manager):
+        for i in range(5):
+            await index(manager, f"doc{i}", f"Release notes number {i}")
+        await index(manager, "ticket", "Crash on login, see PROJ-4821", CollectionType.JIRA)
+
+        results = await manager.search_documents("PROJ-4821", limit=3)
+
+        assert results[0]["payload"]["original_doc_id"] == "ticket"
+        assert results[0]["lexical_score"] > 0 and results[0]["score"] == pytest.approx(1.0)
+        assert results[0]["fused_score"] > results[1]["fused_score"]
+
+        manager.search_config["lexical_weight"] = 0.0
+        vector_only = await manager.search_documents("PROJ-4821", limit=3)
+        assert vector_only[0]["payload"]["original_doc_id"] != "ticket"
+
+    @pytest.mark.asyncio
+    async def test_lexical_hits_survive_missing_embeddings(self, manager):
+        await index(manager, "doc", "ERR_CONN_RESET troubleshooting")
+        manager._get_or_generate_embedding = lambda query: _none()
+
+        results = await manager.search_documents("ERR_CONN_RESET", limit=3)
+
+        assert [(r["payload"]["original_doc_id"], r["score"]) for r in results] == [("doc", 0.0)]
+
+    @pytest.mark.asyncio
+    async def test_deletes_and_rebuilds_update_lexical_index(self, manager):
+        await index(manager, "doc", "legacy flag ENABLE_V1")
+        await index(manager, "other", "unrelated text")
+        assert await manager.delete_document("other")
+        assert manager.lexical.info("docs_documents")["points_count"] == 1
+
+        rebuilt = DocumentMetadata(doc_id="doc", title="doc", source="test", source_type=CollectionType.DOCUMENTS)
+        assert await manager.reindex_collection(CollectionType.DOCUMENTS, [("new flag ENABLE_V2", rebuilt)])
+
+        assert set(manager.lexical.indexes) == {"docs_documents"}
+        ids = {hit["id"] for hit in manager.lexical.search("docs_documents", "ENABLE_V1 ENABLE_V2")}
+        assert ids == {point["id"] for point in manager.qdrant.scroll("docs_documents")[0]}
+
+
+async def _none():
+    return None
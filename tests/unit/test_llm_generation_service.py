@@ -0,0 +1,152 @@
+"""
+Tests for concurrent RFC section generation in LLMGenerationService
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from app.models.generation import GenerationSession, TaskType, UserAnswer
+from domain.core.llm_generation_service import (RFC_SECTIONS,
+                                                LLMGenerationService)
+
+MARKERS = {
+    "outline": "Составь краткий план",
+    "summary": "профессиональное Summary",
+    "context": "секцию Context",
+    "problem_statement": "Problem Statement",
+    "goals": "Определи Goals",
+    "architecture_overview": "Architecture Overview",
+    "implementation_plan": "Implementation Plan",
+    "risk_analysis": "Risk Analysis",
+    "success_metrics": "Success Metrics",
+}
+
+
+class FakeLLM:
+    """Answers each prompt after a per-section delay and records concurrency"""
+
+    def __init__(self, delays=None, failures=()):
+        self.delays = delays or {}
+        self.failures = set(failures)
+        self.prompts = {}
+        self.active = 0
+        self.max_active = 0
+        self.started = {}
+
+    async def generate(self, prompt, **kwargs):
+        section = next(key for key, marker in MARKERS.items() if marker in prompt)
+        self.prompts[section] = prompt
+        self.started[section] = time.perf_counter()
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(section, 0.05))
+            if section in self.failures:
+                raise RuntimeError(f"{section} failed")
+            return f"  generated {section}  "
+        finally:
+            self.active -= 1
+
+
+def make_service(llm, **config):
+    with patch("domain.core.llm_generation_service.load_llm", return_value=llm):
+        service = LLMGenerationService()
+    service.rfc_config.update(config)
+    return service
+
+
+@pytest.fixture
+def session():
+    now = datetime(2024, 1, 1)
+    return GenerationSession(
+        id="session-1",
+        task_type=TaskType.ARCHITECTURE_DESIGN,
+        initial_request="Система уведомлений",
+        created_at=now,
+        updated_at=now,
+        answers=[
+            UserAnswer(question_id="scale", question="Масштаб?", answer="100K пользователей")
+        ],
+    )
+
+
+def template_vars():
+    return {key: f"template {key}" for key, _, _ in RFC_SECTIONS} | {"title": "RFC"}
+
+
+class TestConcurrentRFCGeneration:
+    """Test concurrent section generation"""
+
+    @pytest.mark.asyncio
+    async def test_wall_time_is_outline_plus_slowest_section(self, session):
+        llm = FakeLLM(delays={"outline": 0.1, "architecture_overview": 0.3})
+        service = make_service(llm, max_concurrent_sections=8)
+
+        start = time.perf_counter()
+        content = await service.generate_enhanced_rfc_content(session, template_vars())
+        elapsed = time.perf_counter() - start
+
+        assert elapsed < 0.6  # sequential would take ~0.8s
+        assert [key for key in content][: len(RFC_SECTIONS)] == [key for key, _, _ in RFC_SECTIONS]
+        assert content["architecture_overview"] == "generated architecture_overview"
+        assert content["title"] == "RFC"
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self, session):
+        llm = FakeLLM()
+        service = make_service(llm, max_concurrent_sections=2)
+
+        await service.generate_enhanced_rfc_content(session, template_vars())
+
+        assert llm.max_active == 2
+        assert len(llm.prompts) == len(RFC_SECTIONS) + 1
+
+    @pytest.mark.asyncio
+    async def test_outline_dependency_and_shared_prefix(self, session):
+        llm = FakeLLM(delays={"outline": 0.1})
+        service = make_service(llm, max_concurrent_sections=8)
+
+        await service.generate_enhanced_rfc_content(session, template_vars())
+
+        outline_done = llm.started["outline"] + 0.1
+        for key, _, uses_outline in RFC_SECTIONS:
+            prompt = llm.prompts[key]
+            assert ("generated outline" in prompt) is uses_outline
+            if uses_outline:
+                assert llm.started[key] >= outline_done - 0.01
+            else:
+                assert llm.started[key] < outline_done
+
+        prefix = service._build_shared_prefix(
+            await service._prepare_llm_context(session), "generated outline"
+        )
+        assert llm.prompts["risk_analysis"].startswith(prefix)
+        assert llm.prompts["success_metrics"].startswith(prefix)
+
+    @pytest.mark.asyncio
+    async def test_timeouts_and_failures_fall_back_to_template(self, session):
+        llm = FakeLLM(delays={"goals": 1.0}, failures={"risk_analysis", "outline"})
+        service = make_service(llm, max_concurrent_sections=8, section_timeout=0.2)
+
+        start = time.perf_counter()
+        content = await service.generate_enhanced_rfc_content(session, template_vars())
+
+        assert time.perf_counter() - start < 0.6
+        assert content["goals"] == "template goals"
+        assert content["risk_analysis"] == "template risk_analysis"
+        assert content["summary"] == "generated summary"
+        assert "generated outline" not in llm.prompts["summary"]
+
+    @pytest.mark.asyncio
+    async def test_without_outline(self, session):
+        llm = FakeLLM()
+        service = make_service(llm, use_outline=False)
+
+        content = await service.generate_enhanced_rfc_content(session, template_vars())
+
+        assert "outline" not in llm.prompts
+        assert content["summary"] == "generated summary"
@@ -0,0 +1,256 @@
+"""
+Tests for the in-process vector index backend
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from adapters.vectorstore.collections import (CollectionManager, CollectionType,
+                                              DocumentMetadata)
+from adapters.vectorstore.embeddings import EmbeddingResult
+from adapters.vectorstore.filters import filter_matches, parse_filter
+from adapters.vectorstore.local_index import LocalCollection, LocalVectorStore
+from adapters.vectorstore.qdrant_client import (QdrantError, QdrantVectorStore,
+                                                 get_qdrant_client)
+
+
+def clustered(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(16, dim))
+    return centers[rng.integers(0, 16, n)] + 0.3 * rng.normal(size=(n, dim))
+
+
+@pytest.fixture
+def store():
+    store = LocalVectorStore()
+    store.create_collection("docs", vector_size=2)
+    store.upsert_vectors(
+        "docs",
+        [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+        [{"team": "core", "tags": ["adr"]}, {"team": "ml", "meta": {"lang": "en"}}, {"team": "core"}],
+        ["a", "b", "c"],
+    )
+    return store
+
+
+class TestExactSearch:
+    """Test scoring, filters and deletes below the full-scan threshold"""
+
+    def test_cosine_ranking_and_scores(self, store):
+        results = store.search_vectors("docs", [2.0, 0.0], limit=2)
+
+        assert [r["id"] for r in results] == ["a", "c"]
+        assert results[0]["score"] == pytest.approx(1.0)
+        assert results[1]["score"] == pytest.approx(0.7071, abs=1e-4)
+        assert results[0]["payload"]["team"] == "core"
+        assert [r["id"] for r in store.search_vectors("docs", [1.0, 0.0], score_threshold=0.5)] == ["a", "c"]
+
+    @pytest.mark.parametrize("distance, expected", [("dot", ["c", "a"]), ("Euclid", ["a", "c"])])
+    def test_other_distances(self, distance, expected):
+        collection = LocalCollection("points", 2, distance=distance)
+        collection.upsert([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]], [{}, {}, {}], ["a", "b", "c"])
+
+        results = collection.search([1.0, 0.2], limit=2)
+
+        assert [r["id"] for r in results] == expected
+        if distance == "Euclid":
+            # Euclid scores are distances: lower is closer, the threshold is an upper bound
+            assert results[0]["score"] == pytest.approx(0.2)
+            assert [r["id"] for r in collection.search([1.0, 0.2], score_threshold=0.5)] == ["a"]
+
+    def test_payload_filters(self, store):
+        assert {r["id"] for r in store.search_vectors("docs", [1.0, 0.0], filters={"team": "core"})} == {"a", "c"}
+        assert [r["id"] for r in store.search_vectors("docs", [1.0, 0.0], filters={"tags": "adr"})] == ["a"]
+        assert [r["id"] for r in store.search_vectors("docs", [1.0, 0.0], filters={"meta.lang": "en"})] == ["b"]
+        assert len(store.search_vectors("docs", [1.0, 0.0], filter_conditions={"team": ["ml", "core"]})) == 3
+        assert not filter_matches({"team": "core"}, parse_filter({"team": "ml"}))
+
+    def test_upsert_overwrites_and_delete(self, store):
+        store.upsert_vectors("docs", [[0.0, 1.0]], [{"team": "ml"}], ["a"])
+
+        assert store.count_points("docs") == 3
+        assert store.search_vectors("docs", [0.0, 1.0], limit=2)[1]["id"] in {"a", "b"}
+        assert store.delete_points("docs", filters={"team": "ml"}) == 2
+        assert store.delete_points("docs", ids=["c", "missing"]) == 1
+        assert store.count_points("docs") == 0
+        assert store.scroll("docs") == ([], None)
+
+    def test_dimension_is_enforced(self, store):
+        with pytest.raises(QdrantError):
+            store.upsert_vectors("docs", [[1.0, 0.0, 0.0]], [{}], ["d"])
+        with pytest.raises(QdrantError):
+            store.search_vectors("docs", [1.0, 0.0, 0.0])
+
+
+class TestHNSWIndex:
+    """Test graph search against exact search"""
+
+    def test_graph_recall_and_filters(self):
+        data = clustered(2000, 32)
+        collection = LocalCollection("big", 32, hnsw_config={"full_scan_threshold": 100, "ef": 128})
+        collection.upsert(data.tolist(), [{"group": i % 10} for i in range(2000)], [str(i) for i in range(2000)])
+
+        assert collection.graph is not None and collection.graph.size == 2000
+        recall = 0
+        for query in clustered(50, 32, seed=1):
+            approximate = {r["id"] for r in collection.search(query, 10)}
+            exact = {r["id"] for r in collection.search(query, 10, exact=True)}
+            recall += len(approximate & exact) / 10
+        assert recall / 50 >= 0.95
+
+        filtered = collection.search(data[0], 10, filters={"group": 3})
+        assert len(filtered) == 10
+        assert all(int(r["id"]) % 10 == 3 for r in filtered)
+
+    def test_deleted_points_are_skipped_and_compacted(self):
+        data = clustered(1200, 16)
+        collection = LocalCollection("big", 16, hnsw_config={"full_scan_threshold": 10})
+        collection.upsert(data.tolist(), [{}] * 1200, [str(i) for i in range(1200)])
+
+        assert collection.delete(ids=["0"]) == 1
+        assert "0" not in {r["id"] for r in collection.search(data[0], 5)}
+
+        collection.delete(ids=[str(i) for i in range(1, 700)])
+
+        assert collection.slots == collection.count == 500
+        assert collection.graph.size == 500
+        assert collection.search(data[900], 1)[0]["id"] == "900"
+
+    def test_bulk_load_defers_index_until_wait(self):
+        store = LocalVectorStore(hnsw_config={"full_scan_threshold": 10})
+        store.create_collection("shadow", vector_size=16, indexing_threshold=0)
+        store.upsert_vectors("shadow", clustered(500, 16).tolist(), [{}] * 500, [str(i) for i in range(500)])
+
+        assert store.collections["shadow"].graph is None
+        assert len(store.search_vectors("shadow", [1.0] * 16, limit=3)) == 3
+
+        store.update_collection("shadow", indexing_threshold=20000)
+        assert store.wait_for_indexing("shadow")
+        assert store.get_collection_info("shadow")["indexed_vectors_count"] == 500
+
+
+class TestPersistence:
+    """Test reopening a store from disk"""
+
+    def test_points_graph_and_aliases_survive_reopen(self, tmp_path):
+        data = clustered(300, 8)
+        store = LocalVectorStore(path=str(tmp_path), hnsw_config={"full_scan_threshold": 1})
+        store.create_collection("docs_v1", vector_size=8)
+        store.upsert_vectors("docs_v1", data.tolist(), [{"n": i} for i in range(300)], [str(i) for i in range(300)])
+        store.upsert_vectors("docs_v1", [data[5].tolist()], [{"n": "updated"}], ["5"])
+        store.delete_points("docs_v1", ids=["7"])
+        store.switch_alias("docs", "docs_v1")
+        before = store.search_vectors("docs", data[5].tolist(), limit=5)
+        store.close()
+
+        reopened = LocalVectorStore(path=str(tmp_path))
+
+        assert reopened.get_aliases() == {"docs": "docs_v1"}
+        assert reopened.count_points("docs") == 299
+        assert reopened.collections["docs_v1"].graph.size == 301
+        assert reopened.search_vectors("docs", data[5].tolist(), limit=5) == before
+        assert before[0]["payload"] == {"n": "updated"}
+
+        reopened.delete_collection("docs_v1")
+        assert not (tmp_path / "docs_v1").exists()
+        assert LocalVectorStore(path=str(tmp_path)).get_aliases() == {}
+
+
+class FakeEmbeddings:
+    async def embed_text(self, text):
+        return EmbeddingResult(text=text, vector=[1.0, float(len(text) % 7)], token_count=1, cost_estimate=0.0)
+
+    async def embed_texts(self, texts):
+        return [await self.embed_text(text) for text in texts]
+
+
+class FakeQdrantStore(QdrantVectorStore):
+    """Qdrant store without a server connection"""
+
+    def __init__(self, host="localhost", port=6333, api_key=None, use_ssl=False):
+        self.host, self.port = host, port
+
+
+class OffLoopStore:
+    """Backend whose blocking calls fail on the event loop thread, as QdrantVectorStore's do"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getattr__(self, name):
+        attribute = getattr(self.store, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return attribute(*args, **kwargs)
+            raise RuntimeError("Cannot run the event loop while another loop is running")
+
+        return call
+
+
+class TestBackendSelection:
+    """Test client selection and manager integration"""
+
+    def test_local_backend_is_default(self, monkeypatch, tmp_path):
+        monkeypatch.delenv("VECTOR_STORE_BACKEND", raising=False)
+        monkeypatch.setenv("LOCAL_VECTOR_STORE_PATH", str(tmp_path))
+        client = get_qdrant_client()
+
+        assert isinstance(client, LocalVectorStore)
+        assert client.path == str(tmp_path)
+
+    @pytest.mark.asyncio
+    async def test_unreachable_qdrant_degrades_to_local_index(self, monkeypatch):
+        monkeypatch.setenv("VECTOR_STORE_BACKEND", "qdrant")
+        monkeypatch.delenv("LOCAL_VECTOR_STORE_PATH", raising=False)
+        # Built inside a running loop, as get_collection_manager() is from endpoints
+        with patch("adapters.vectorstore.qdrant_client.QdrantVectorStore", FakeQdrantStore):
+            client = get_qdrant_client()
+        assert isinstance(client, FakeQdrantStore)
+
+        unhealthy = AsyncMock(return_value={"status": "unhealthy", "error": "refused"})
+        with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=FakeEmbeddings()), \
+                patch("adapters.vectorstore.collections.get_qdrant_client", return_value=client):
+            manager = CollectionManager()
+        with patch.object(client, "health_check", unhealthy):
+            results = await manager.initialize_collections()
+
+        unhealthy.assert_awaited_once()
+        assert isinstance(manager.qdrant, LocalVectorStore)
+        assert all(results.values())
+
+    @pytest.mark.asyncio
+    async def test_backend_calls_stay_off_the_event_loop(self):
+        with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=FakeEmbeddings()):
+            manager = CollectionManager()
+        manager.qdrant = OffLoopStore(LocalVectorStore())
+
+        assert all((await manager.initialize_collections()).values())
+        metadata = DocumentMetadata(doc_id="doc", title="Runbook", source="test", source_type=CollectionType.DOCUMENTS)
+        assert await manager.index_document("paragraph text. " * 150, metadata)
+        assert await manager.search_documents("paragraph", [CollectionType.DOCUMENTS], limit=5)
+        assert await manager.reindex_collection(CollectionType.DOCUMENTS)
+        assert await manager.delete_document("doc")
+
+    @pytest.mark.asyncio
+    async def test_delete_document_removes_its_chunks(self):
+        with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=FakeEmbeddings()):
+            manager = CollectionManager()
+        for doc_id in ("keep", "drop"):
+            metadata = DocumentMetadata(doc_id=doc_id, title=doc_id, source="test", source_type=CollectionType.DOCUMENTS)
+            assert await manager.index_document("paragraph text. " * 150, metadata)
+        total = manager.qdrant.count_points("docs_documents")
+
+        assert await manager.delete_document("drop")
+
+        remaining = manager.qdrant.count_points("docs_documents")
+        assert remaining == total // 2
+        results = await manager.search_documents("paragraph", [CollectionType.DOCUMENTS], limit=20)
+        assert results and all(r["payload"]["original_doc_id"] == "keep" for r in results)
@@ -0,0 +1,149 @@
+"""
+Unit tests for MonitoringMiddleware route labels, request ids and access log sampling
+"""
+
+import logging
+import uuid
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.core.request_context import (UNMATCHED_ROUTE, get_request_context,
+                                      new_request_id, normalize_path)
+from infra.monitoring.middleware import OTHER_ROUTE, MonitoringMiddleware
+
+
+def request_count(endpoint: str, status_code: str = "200", method: str = "GET") -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "http_requests_total",
+            {
+                "method": method,
+                "endpoint": endpoint,
+                "status_code": status_code,
+                "status_class": f"{status_code[0]}xx",
+            },
+        )
+        or 0.0
+    )
+
+
+def build_app(**options):
+    app = FastAPI()
+    prefix = f"/t{uuid.uuid4().hex[:8]}"
+
+    @app.get(prefix + "/items/{item_slug}")
+    async def item(item_slug: str):
+        return {"item": item_slug}
+
+    @app.get(prefix + "/fail")
+    async def fail():
+        return PlainTextResponse("boom", status_code=500)
+
+    app.add_middleware(MonitoringMiddleware, **options)
+    return app, prefix
+
+
+class TestNormalizePath:
+    """Test the raw-path fallback normalization"""
+
+    def test_identifiers_replaced(self):
+        assert normalize_path("/users/123/posts/7") == "/users/{id}/posts/{id}"
+        assert (
+            normalize_path("/docs/3fa85f64-5717-4562-b3fc-2c963f66afa6")
+            == "/docs/{uuid}"
+        )
+        assert normalize_path("/commits/3f2a9b0c1d4e5f60718293a4b5c6d7e8") == "/commits/{hash}"
+        assert normalize_path("/users/john@example.com") == "/users/{email}"
+        assert normalize_path("/api/v1/search") == "/api/v1/search"
+
+
+class TestEndpointLabels:
+    """Test bounded Prometheus endpoint labels"""
+
+    def test_route_template_used_as_label(self):
+        app, prefix = build_app(enable_detailed_logging=False)
+        client = TestClient(app)
+
+        for slug in ("alpha", "beta", "gamma"):
+            assert client.get(f"{prefix}/items/{slug}").status_code == 200
+
+        assert request_count(prefix + "/items/{item_slug}") == 3
+        assert request_count(f"{prefix}/items/alpha") == 0
+
+    def test_unmatched_requests_share_one_label(self):
+        app, prefix = build_app(enable_detailed_logging=False)
+        client = TestClient(app)
+        before = request_count(UNMATCHED_ROUTE, "404")
+
+        for index in range(5):
+            client.get(f"{prefix}/scanner/probe-{index}.php")
+
+        assert request_count(UNMATCHED_ROUTE, "404") == before + 5
+
+    def test_fallback_labels_are_capped(self):
+        async def plain_app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        app = MonitoringMiddleware(
+            plain_app, enable_detailed_logging=False, max_fallback_routes=2
+        )
+        client = TestClient(app)
+        prefix = f"/p{uuid.uuid4().hex[:8]}"
+        before = request_count(OTHER_ROUTE)
+
+        for name in ("a", "b", "c", "d", "a"):
+            client.get(f"{prefix}/{name}/42")
+
+        assert request_count(prefix + "/a/{id}") == 2
+        assert request_count(prefix + "/b/{id}") == 1
+        assert request_count(OTHER_ROUTE) == before + 2
+
+
+class TestRequestIds:
+    """Test counter-based request ids"""
+
+    def test_ids_unique_with_process_prefix(self):
+        ids = [new_request_id() for _ in range(1000)]
+
+        assert len(set(ids)) == 1000
+        assert len({request_id.split("-")[0] for request_id in ids}) == 1
+
+    def test_context_uses_generated_id(self):
+        scope = {"type": "http", "method": "GET", "path": "/", "headers": []}
+
+        context = get_request_context(scope)
+
+        assert context.request_id.split("-")[0] == new_request_id().split("-")[0]
+
+
+class TestAccessLogSampling:
+    """Test sampled access logging"""
+
+    def test_successes_sampled_errors_always_logged(self, caplog):
+        app, prefix = build_app(access_log_sample_rate=0.0)
+        client = TestClient(app)
+
+        with caplog.at_level(logging.INFO, logger="infra.monitoring.middleware"):
+            for _ in range(10):
+                client.get(f"{prefix}/items/x")
+            client.get(f"{prefix}/fail")
+
+        completed = [r for r in caplog.records if r.getMessage().startswith("Request completed")]
+        assert len(completed) == 1
+        assert completed[0].status_code == 500
+
+    def test_full_sampling_logs_one_line_per_request(self, caplog):
+        app, prefix = build_app(access_log_sample_rate=1.0)
+        client = TestClient(app)
+
+        with caplog.at_level(logging.INFO, logger="infra.monitoring.middleware"):
+            for _ in range(3):
+                client.get(f"{prefix}/items/x")
+
+        messages = [r for r in caplog.records if r.name == "infra.monitoring.middleware"]
+        assert len(messages) == 3
+        assert messages[0].route == prefix + "/items/{item_slug}"
@@ -0,0 +1,195 @@
+"""
+Tests for the payload filter DSL, its Qdrant translation and payload indexes
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from qdrant_client.http import models
+
+from adapters.vectorstore.collections import CollectionManager
+from adapters.vectorstore.embeddings import EmbeddingResult
+from adapters.vectorstore.filters import (Condition, FilterError,
+                                          filter_matches, parse_filter,
+                                          to_qdrant_filter)
+from adapters.vectorstore.local_index import LocalCollection, LocalVectorStore
+from adapters.vectorstore.qdrant_client import QdrantCollectionConfig
+
+PAYLOADS = [
+    {"source_type": "jira", "tags": ["adr", "rfc"], "chunk_index": 0, "updated_at": "2024-01-10T00:00:00Z"},
+    {"source_type": "confluence", "tags": ["rfc"], "chunk_index": 2, "updated_at": "2024-03-01T12:00:00+00:00"},
+    {"source_type": "gitlab", "author": "bot", "chunk_index": 5, "updated_at": "2023-12-31T23:59:59Z"},
+    {"source_type": "jira", "author": None, "meta": {"lang": "ru"}, "chunk_index": 1},
+]
+
+
+def matching(filters):
+    payload_filter = parse_filter(filters)
+    return [i for i, payload in enumerate(PAYLOADS) if filter_matches(payload, payload_filter)]
+
+
+class TestFilterDSL:
+    """Test parsing and Python evaluation"""
+
+    def test_parse_shapes(self):
+        parsed = parse_filter({
+            "source_type": "jira",
+            "tags": ["adr", "rfc"],
+            "chunk_index": {"gte": 1, "lt": 3},
+            "updated_at": {"gte": "2024-01-01"},
+            "must_not": [{"author": {"is_empty": True}}],
+        })
+
+        assert parsed.must == [
+            Condition("source_type", "match", "jira"),
+            Condition("tags", "any", ("adr", "rfc")),
+            Condition("chunk_index", "range", (("gte", 1), ("lt", 3))),
+            Condition("updated_at", "datetime_range", (("gte", "2024-01-01"),)),
+        ]
+        assert parsed.must_not[0].must == [Condition("author", "is_empty", True)]
+        assert parse_filter({}) is None and parse_filter(None) is None
+
+    @pytest.mark.parametrize("filters", [
+        {"chunk_index": {"between": [1, 2]}},
+        {"tags": {"any": "adr"}},
+        {"updated_at": {"gte": "yesterday"}},
+        {"chunk_index": {"gte": 1, "lte": "2024-01-01"}},
+        {"should": [{}]},
+        {"source_type": object()},
+    ])
+    def test_invalid_filters(self, filters):
+        with pytest.raises(FilterError):
+            parse_filter(filters)
+
+    def test_evaluation(self):
+        assert matching({"source_type": "jira"}) == [0, 3]
+        assert matching({"tags": "rfc"}) == [0, 1]
+        assert matching({"tags": {"except": ["adr"]}}) == [1]
+        assert matching({"chunk_index": {"gt": 0, "lte": 2}}) == [1, 3]
+        assert matching({"updated_at": {"gte": "2024-01-01T00:00:00Z", "lt": "2024-03-01T12:00:00Z"}}) == [0]
+        assert matching({"author": None}) == [0, 1, 3]
+        assert matching({"meta.lang": "ru"}) == [3]
+        assert matching({"should": [{"source_type": "gitlab"}, {"tags": "adr"}], "must_not": [{"chunk_index": 5}]}) == [0]
+        assert matching({"chunk_index": True}) == []
+
+
+class TestQdrantTranslation:
+    """Test translation of the DSL to Qdrant models"""
+
+    def test_conditions(self):
+        translated = to_qdrant_filter({
+            "source_type": "jira",
+            "tags": ["adr"],
+            "author": {"except": ["bot"]},
+            "chunk_index": {"gte": 1},
+            "score": 0.5,
+            "updated_at": {"lt": "2024-01-01T00:00:00Z"},
+            "url": None,
+        })
+
+        source, tags, author, chunk, score, updated, url = translated.must
+        assert source == models.FieldCondition(key="source_type", match=models.MatchValue(value="jira"))
+        assert tags.match == models.MatchAny(any=["adr"])
+        assert author.match == models.MatchExcept(**{"except": ["bot"]})
+        assert chunk.range == models.Range(gte=1)
+        assert score.range == models.Range(gte=0.5, lte=0.5)
+        assert updated.range == models.DatetimeRange(lt=datetime(2024, 1, 1, tzinfo=timezone.utc))
+        assert url == models.IsEmptyCondition(is_empty=models.PayloadField(key="url"))
+        assert translated.should is None and translated.must_not is None
+
+    def test_nested_clauses(self):
+        translated = to_qdrant_filter({
+            "should": [{"source_type": "jira"}, {"source_type": "gitlab"}],
+            "must_not": {"author": {"is_empty": False}},
+        })
+
+        assert translated.must is None
+        assert [nested.must[0].match.value for nested in translated.should] == ["jira", "gitlab"]
+        not_empty = translated.must_not[0].must[0]
+        assert not_empty == models.Filter(must_not=[models.IsEmptyCondition(is_empty=models.PayloadField(key="author"))])
+        assert to_qdrant_filter(None) is None
+
+
+class TestPayloadIndexes:
+    """Test that indexed filters give the same answers as scans"""
+
+    @pytest.mark.parametrize("filters", [
+        {"source_type": "jira"},
+        {"tags": ["adr", "missing"]},
+        {"chunk_index": {"gt": 0, "lte": 2}},
+        {"chunk_index": 1},
+        {"updated_at": {"gte": "2024-01-01T00:00:00Z"}},
+        {"should": [{"source_type": "gitlab"}, {"tags": "adr"}], "must_not": [{"chunk_index": 5}]},
+        {"source_type": {"except": ["jira"]}},
+    ])
+    def test_indexed_masks_match_scans(self, filters):
+        rng = np.random.default_rng(0)
+        payloads = [PAYLOADS[i] for i in rng.integers(0, len(PAYLOADS), 300)]
+        scanned = LocalCollection("scanned", 4)
+        indexed = LocalCollection("indexed", 4)
+        for name, schema in QdrantCollectionConfig.PAYLOAD_INDEXES.items():
+            indexed.create_payload_index(name, schema)
+        indexed.create_payload_index("chunk_index", "integer")
+        for collection in (scanned, indexed):
+            collection.upsert(rng.normal(size=(300, 4)).tolist(), payloads, [str(i) for i in range(300)])
+        indexed.delete(ids=["0", "1"])
+        scanned.delete(ids=["0", "1"])
+
+        payload_filter = parse_filter(filters)
+        expected = scanned._filter_mask(payload_filter) & ~scanned.deleted[:300]
+        actual = indexed._filter_mask(payload_filter) & ~indexed.deleted[:300]
+
+        assert expected.any()
+        assert np.array_equal(actual, expected)
+        found = {r["id"] for r in indexed.search([1.0, 0.0, 0.0, 0.0], limit=300, filters=filters)}
+        assert found == {str(i) for i in np.flatnonzero(expected)}
+
+    def test_indexes_survive_reopen(self, tmp_path):
+        store = LocalVectorStore(path=str(tmp_path))
+        store.create_collection("docs", vector_size=2)
+        store.create_payload_index("docs", "updated_at", "datetime")
+        store.upsert_vectors("docs", [[1.0, 0.0], [0.0, 1.0]], PAYLOADS[:2], ["a", "b"])
+        store.close()
+
+        reopened = LocalVectorStore(path=str(tmp_path))
+
+        assert reopened.get_payload_indexes("docs") == {"updated_at": "datetime"}
+        results = reopened.search_vectors("docs", [1.0, 0.0], filters={"updated_at": {"gte": "2024-02-01"}})
+        assert [r["id"] for r in results] == ["b"]
+
+
+class FakeEmbeddings:
+    async def embed_text(self, text):
+        return EmbeddingResult(text=text, vector=[0.1] * 8, token_count=1, cost_estimate=0.0)
+
+    async def embed_texts(self, texts):
+        return [await self.embed_text(text) for text in texts]
+
+
+class TestIndexMigration:
+    """Test creation and migration of payload index definitions"""
+
+    def test_collections_get_configured_indexes(self):
+        with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=FakeEmbeddings()):
+            manager = CollectionManager()
+
+        assert manager.ensure_collection("docs_documents")
+
+        assert manager.qdrant.get_payload_indexes("docs_documents_v1") == QdrantCollectionConfig.PAYLOAD_INDEXES
+
+    def test_changed_definitions_are_migrated(self):
+        with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=FakeEmbeddings()):
+            manager = CollectionManager()
+        manager.ensure_collection("docs_documents")
+        qdrant = manager.qdrant
+        qdrant.delete_payload_index("docs_documents_v1", "author")
+        qdrant.delete_payload_index("docs_documents_v1", "updated_at")
+        qdrant.create_payload_index("docs_documents_v1", "updated_at", "keyword")
+
+        changes = manager.ensure_payload_indexes("docs_documents")
+
+        assert changes == {"author": "created", "updated_at": "migrated"}
+        assert qdrant.get_payload_indexes("docs_documents")["updated_at"] == "datetime"
+        assert manager.ensure_payload_indexes("docs_documents") == {}
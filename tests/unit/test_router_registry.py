@@ -0,0 +1,186 @@
+"""
+Unit tests for the feature-flagged router registry
+"""
+
+import sys
+import textwrap
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.router_registry import (FeatureFlags, RouterRegistry,
+                                      RouterSpec)
+
+
+@pytest.fixture
+def fake_routers(tmp_path, monkeypatch):
+    """A throwaway package of router modules; returns the package name"""
+    package = f"fake_routers_{uuid.uuid4().hex[:8]}"
+    root = tmp_path / package
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "nested").mkdir()
+    (root / "nested" / "__init__.py").write_text("")
+
+    def router_module(path: str, route: str):
+        (root / path).write_text(
+            textwrap.dedent(
+                f"""
+                from fastapi import APIRouter
+
+                router = APIRouter()
+
+                @router.get("{route}")
+                async def endpoint():
+                    return {{"route": "{route}"}}
+
+                def create_router():
+                    return router
+                """
+            )
+        )
+
+    router_module("alpha.py", "/alpha")
+    router_module("beta.py", "/beta")
+    router_module("nested/gamma.py", "/gamma")
+    # Same path as alpha: whichever is mounted first wins
+    router_module("shadow.py", "/alpha")
+    (root / "broken.py").write_text("import module_that_does_not_exist\n")
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield package
+
+    for name in [name for name in sys.modules if name.startswith(package)]:
+        del sys.modules[name]
+
+
+def flags(*enabled, disabled=()):
+    return FeatureFlags(enabled or None, disabled)
+
+
+class TestFeatureFlags:
+    """Test feature flag parsing"""
+
+    def test_all_enabled_by_default(self, monkeypatch):
+        monkeypatch.delenv("API_FEATURES", raising=False)
+        monkeypatch.setenv("API_DISABLED_FEATURES", "admin")
+
+        feature_flags = FeatureFlags.from_env()
+
+        assert feature_flags.is_enabled("search")
+        assert not feature_flags.is_enabled("admin")
+
+    def test_explicit_feature_list(self, monkeypatch):
+        monkeypatch.setenv("API_FEATURES", "Core, search")
+
+        feature_flags = FeatureFlags.from_env()
+
+        assert feature_flags.is_enabled("core")
+        assert feature_flags.is_enabled("search")
+        assert not feature_flags.is_enabled("analytics")
+
+
+class TestRouterRegistry:
+    """Test loading, mounting and reporting"""
+
+    def test_disabled_feature_is_never_imported(self, fake_routers):
+        registry = RouterRegistry(
+            [
+                RouterSpec(f"{fake_routers}.alpha", feature="core"),
+                RouterSpec(f"{fake_routers}.beta", feature="analytics"),
+            ],
+            flags=flags("core"),
+            max_workers=1,
+        )
+
+        report = registry.load(FastAPI())
+
+        assert f"{fake_routers}.alpha" in sys.modules
+        assert f"{fake_routers}.beta" not in sys.modules
+        assert [r.status for r in report.results] == ["mounted", "disabled"]
+
+    def test_failed_import_is_reported(self, fake_routers):
+        app = FastAPI()
+        registry = RouterRegistry(
+            [
+                RouterSpec(f"{fake_routers}.broken"),
+                RouterSpec(f"{fake_routers}.alpha", prefix="/api"),
+            ],
+            flags=flags(),
+            max_workers=1,
+        )
+
+        report = registry.load(app)
+
+        assert [r.status for r in report.results] == ["failed", "mounted"]
+        assert "ModuleNotFoundError" in report.failed[0].error
+        assert TestClient(app).get("/api/alpha").json() == {"route": "/alpha"}
+
+    def test_required_failure_aborts_startup(self, fake_routers):
+        registry = RouterRegistry(
+            [RouterSpec(f"{fake_routers}.broken", required=True)],
+            flags=flags(),
+            max_workers=1,
+        )
+
+        with pytest.raises(RuntimeError, match="broken"):
+            registry.load(FastAPI())
+
+    def test_factory_spec(self, fake_routers):
+        app = FastAPI()
+        registry = RouterRegistry(
+            [RouterSpec(f"{fake_routers}.beta", attribute="create_router", factory=True)],
+            flags=flags(),
+            max_workers=1,
+        )
+
+        registry.load(app)
+
+        assert TestClient(app).get("/beta").status_code == 200
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_mount_order_follows_declaration(self, fake_routers, workers):
+        app = FastAPI()
+        registry = RouterRegistry(
+            [
+                RouterSpec(f"{fake_routers}.shadow"),
+                RouterSpec(f"{fake_routers}.nested.gamma"),
+                RouterSpec(f"{fake_routers}.alpha"),
+                RouterSpec(f"{fake_routers}.broken"),
+                RouterSpec(f"{fake_routers}.beta"),
+            ],
+            flags=flags(),
+            max_workers=workers,
+        )
+
+        report = registry.load(app)
+
+        paths = [route.path for route in app.routes if route.path in ("/alpha", "/beta", "/gamma")]
+        assert paths == ["/alpha", "/gamma", "/alpha", "/beta"]
+        assert [r.status for r in report.results] == [
+            "mounted",
+            "mounted",
+            "mounted",
+            "failed",
+            "mounted",
+        ]
+        first_alpha = next(route for route in app.routes if route.path == "/alpha")
+        assert first_alpha.endpoint.__module__ == f"{fake_routers}.shadow"
+
+    def test_budget_reporting(self, fake_routers):
+        registry = RouterRegistry(
+            [RouterSpec(f"{fake_routers}.alpha")],
+            flags=flags(),
+            max_workers=1,
+            budget_seconds=0.0,
+        )
+
+        report = registry.load(FastAPI())
+
+        assert report.over_budget
+        summary = report.to_dict()
+        assert summary["mounted"] == 1
+        assert summary["routers"][0]["router"] == f"{fake_routers}.alpha:router"
+        assert report.rss_after_mb > 0
@@ -0,0 +1,191 @@
+"""
+Tests for vector storage profiles (quantization, on_disk vectors, HNSW tuning)
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+from qdrant_client.http import models
+
+from adapters.vectorstore.collections import CollectionManager
+from adapters.vectorstore.embeddings import EmbeddingResult
+from adapters.vectorstore.local_index import LocalCollection, LocalVectorStore
+from adapters.vectorstore.qdrant_client import (QdrantCollectionConfig,
+                                                QdrantVectorStore)
+
+
+def clustered(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = np.random.default_rng(42).normal(size=(64, dim))
+    return centers[rng.integers(0, 64, n)] + rng.normal(size=(n, dim))
+
+
+def qdrant_store():
+    # Bypass __init__: no Qdrant server is needed to check the request shape
+    store = QdrantVectorStore.__new__(QdrantVectorStore)
+    store.client = AsyncMock()
+    store.collections = QdrantCollectionConfig()
+    store.use_memory = False
+    return store
+
+
+class TestProfiles:
+    """Test profile resolution and translation to Qdrant models"""
+
+    def test_profile_follows_collection_versions(self):
+        assert QdrantCollectionConfig.storage_profile_for("docs_confluence_v3")["name"] == "scalar_int8"
+        assert QdrantCollectionConfig.storage_profile_for("code_snippets")["name"] == "scalar_int8"
+        documents = QdrantCollectionConfig.storage_profile_for("docs_documents")
+        assert documents["name"] == "memory"
+        assert documents["hnsw_config"] == {"m": 16, "ef_construct": 100, "full_scan_threshold": 10000}
+
+    def test_qdrant_models(self):
+        scalar = QdrantCollectionConfig.STORAGE_PROFILES["scalar_int8"]
+        binary = QdrantCollectionConfig.STORAGE_PROFILES["binary"]
+
+        assert QdrantCollectionConfig.quantization_config(scalar).scalar.type == models.ScalarType.INT8
+        assert QdrantCollectionConfig.quantization_config(binary).binary.always_ram
+        assert QdrantCollectionConfig.quantization_config(QdrantCollectionConfig.STORAGE_PROFILES["memory"]) is None
+        params = QdrantCollectionConfig.search_params(binary)
+        assert params.hnsw_ef == 128
+        assert params.quantization == models.QuantizationSearchParams(rescore=True, oversampling=3.0)
+        assert QdrantCollectionConfig.search_params(QdrantCollectionConfig.STORAGE_PROFILES["memory"]).quantization is None
+
+
+class TestQdrantStorage:
+    """Test the requests QdrantVectorStore sends for profiles"""
+
+    @pytest.mark.asyncio
+    async def test_collection_is_created_with_its_profile(self):
+        store = qdrant_store()
+        store.client.get_collections.return_value.collections = []
+
+        assert await store._async_create_collection("docs_confluence_v2", indexing_threshold=0)
+
+        kwargs = store.client.create_collection.await_args.kwargs
+        assert kwargs["vectors_config"].on_disk is True
+        assert kwargs["hnsw_config"] == models.HnswConfigDiff(m=16, ef_construct=128)
+        assert kwargs["quantization_config"].scalar.quantile == 0.99
+
+    def test_sync_create_collection_reports_the_result(self):
+        store = qdrant_store()
+        store.client.get_collections.return_value.collections = []
+
+        assert store.create_collection("docs_jira_v1", vector_size=4, indexing_threshold=0) is True
+        kwargs = store.client.create_collection.await_args.kwargs
+        assert kwargs["collection_name"] == "docs_jira_v1"
+        assert kwargs["optimizers_config"] == models.OptimizersConfigDiff(indexing_threshold=0)
+
+        store.client.create_collection.side_effect = RuntimeError("refused")
+        assert store.create_collection("docs_jira_v2", vector_size=4) is False
+
+    def test_manager_does_not_alias_a_failed_collection(self):
+        store = qdrant_store()
+        store.collection_exists = lambda name: False
+        store.switch_alias = lambda *args: pytest.fail("alias switched to a missing collection")
+        store.client.get_collections.return_value.collections = []
+        store.client.create_collection.side_effect = RuntimeError("refused")
+        with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=FakeEmbeddings()):
+            manager = CollectionManager()
+        manager.qdrant = store
+
+        assert manager.ensure_collection("docs_jira") is False
+
+    @pytest.mark.asyncio
+    async def test_search_uses_profile_search_params(self):
+        store = qdrant_store()
+        store.client.search.return_value = []
+
+        await store.search_vectors_async("docs_gitlab", [0.1] * 4, filters={"source_type": "gitlab"})
+
+        params = store.client.search.await_args.kwargs["search_params"]
+        assert params.hnsw_ef == 128 and params.quantization.oversampling == 2.0
+
+    @pytest.mark.asyncio
+    async def test_existing_collection_is_migrated_in_place(self):
+        store = qdrant_store()
+        store.client.get_collection.return_value = SimpleNamespace(config=SimpleNamespace(
+            params=SimpleNamespace(vectors=SimpleNamespace(on_disk=None)),
+            hnsw_config=SimpleNamespace(m=16, ef_construct=100, full_scan_threshold=10000),
+            quantization_config=None,
+        ))
+
+        changes = await store.apply_storage_profile_async("docs_confluence_v1")
+
+        assert changes == {"on_disk": True, "hnsw_config": {"ef_construct": 128}, "quantization": "scalar"}
+        kwargs = store.client.update_collection.await_args.kwargs
+        assert kwargs["vectors_config"] == {"": models.VectorParamsDiff(on_disk=True)}
+        assert kwargs["hnsw_config"] == models.HnswConfigDiff(ef_construct=128)
+        assert kwargs["quantization_config"].scalar.type == models.ScalarType.INT8
+
+        store.client.update_collection.reset_mock()
+        store.client.get_collection.return_value.config.params.vectors.on_disk = True
+        store.client.get_collection.return_value.config.hnsw_config.ef_construct = 128
+        store.client.get_collection.return_value.config.quantization_config = SimpleNamespace(scalar=object())
+        assert await store.apply_storage_profile_async("docs_confluence_v1") == {}
+        store.client.update_collection.assert_not_awaited()
+
+
+class TestLocalQuantization:
+    """Test quantized scans of the local index against exact search"""
+
+    @pytest.mark.parametrize("profile, min_recall, max_ratio", [("scalar_int8", 0.95, 0.26), ("binary", 0.8, 0.04)])
+    def test_recall_and_memory(self, tmp_path, profile, min_recall, max_ratio):
+        data = clustered(3000, 128)
+        storage = QdrantCollectionConfig.STORAGE_PROFILES[profile]
+        collection = LocalCollection("quantized", 128, path=str(tmp_path), storage={**storage, "name": profile})
+        collection.upsert(data.tolist(), [{"n": i % 3} for i in range(3000)], [str(i) for i in range(3000)])
+
+        recall = 0
+        for query in clustered(30, 128, seed=1):
+            exact = {r["id"] for r in collection.search(query, 10, exact=True)}
+            recall += len({r["id"] for r in collection.search(query, 10)} & exact) / 10
+        assert recall / 30 >= min_recall
+
+        filtered = collection.search(data[0], 5, filters={"n": 1})
+        assert len(filtered) == 5 and all(r["payload"]["n"] == 1 for r in filtered)
+        assert collection.info()["ram_vector_bytes"] <= max_ratio * 3000 * 128 * 4
+
+    def test_quantizer_survives_reopen(self, tmp_path):
+        data = clustered(500, 32)
+        storage = {**QdrantCollectionConfig.STORAGE_PROFILES["scalar_int8"], "name": "scalar_int8"}
+        collection = LocalCollection("quantized", 32, path=str(tmp_path), storage=storage)
+        collection.upsert(data.tolist(), [{}] * 500, [str(i) for i in range(500)])
+        before = collection.search(data[3], 10)
+        collection.close()
+
+        reopened = LocalCollection("quantized", path=str(tmp_path))
+
+        assert reopened.quantizer.bounds == collection.quantizer.bounds
+        assert reopened.search(data[3], 10) == before
+
+
+class FakeEmbeddings:
+    async def embed_text(self, text):
+        return EmbeddingResult(text=text, vector=[0.1] * 8, token_count=1, cost_estimate=0.0)
+
+    async def embed_texts(self, texts):
+        return [await self.embed_text(text) for text in texts]
+
+
+class TestProfileMigration:
+    """Test migrating live collections to a changed profile"""
+
+    def test_manager_migrates_live_version(self, monkeypatch):
+        with patch("adapters.vectorstore.collections.get_embeddings_service", return_value=FakeEmbeddings()):
+            manager = CollectionManager()
+        manager.qdrant = LocalVectorStore()
+        manager.ensure_collection("docs_jira")
+        manager.qdrant.upsert_vectors("docs_jira", clustered(50, 8).tolist(), [{}] * 50, [str(i) for i in range(50)])
+        assert manager.qdrant.get_collection_info("docs_jira")["quantization"] is None
+
+        monkeypatch.setitem(QdrantCollectionConfig.COLLECTION_STORAGE_PROFILES, "jira", "binary")
+        changes = manager.ensure_storage_profile("docs_jira")
+
+        assert changes["quantization"] == {"type": "binary", "always_ram": True}
+        info = manager.qdrant.get_collection_info("docs_jira")
+        assert info["storage_profile"] == "binary" and info["name"] == "docs_jira_v1"
+        assert manager.qdrant.collections["docs_jira_v1"].quantizer.size == 50
+        assert manager.ensure_storage_profile("docs_jira") == {}
@@ -0,0 +1,143 @@
+"""
+Unit tests for streaming statistics and their use in RealtimeMonitoringService
+"""
+
+import asyncio
+import random
+import statistics
+
+import pytest
+
+from app.performance.streaming_stats import (EWMA, RollingStats,
+                                             TimeBucketCounter)
+from app.services.realtime_monitoring_service import (MonitoringMetric,
+                                                      RealtimeMonitoringService)
+
+
+class TestRollingStats:
+    """Test the Welford rolling window"""
+
+    def test_matches_statistics_module(self):
+        rnd = random.Random(7)
+        values = [rnd.gauss(1000, 150) for _ in range(500)]
+        window = RollingStats(50)
+
+        for index, value in enumerate(values):
+            window.add(value)
+            recent = values[max(0, index - 49) : index + 1]
+            assert window.mean == pytest.approx(statistics.mean(recent))
+            if len(recent) > 1:
+                assert window.stdev == pytest.approx(statistics.stdev(recent))
+
+    def test_constant_series_has_zero_stdev(self):
+        window = RollingStats(10)
+
+        for _ in range(100):
+            window.add(42.0)
+
+        assert window.stdev == 0.0
+
+
+class TestEWMA:
+    """Test exponentially weighted moving average"""
+
+    def test_converges_to_new_level(self):
+        ewma = EWMA(span=10)
+
+        for _ in range(100):
+            ewma.add(100.0)
+        for _ in range(50):
+            ewma.add(10.0)
+
+        assert ewma.alpha == pytest.approx(2 / 11)
+        assert ewma.value == pytest.approx(10.0, abs=0.01)
+
+
+class TestTimeBucketCounter:
+    """Test time-bucketed violation counters"""
+
+    def test_ratio_over_window(self):
+        counter = TimeBucketCounter(window_seconds=60, buckets=60)
+
+        for second in range(60):
+            counter.add(1000 + second, hit=second % 4 == 0)
+
+        assert counter.total == 60
+        assert counter.ratio() == pytest.approx(0.25)
+
+    def test_old_buckets_expire(self):
+        counter = TimeBucketCounter(window_seconds=60, buckets=60)
+        for second in range(30):
+            counter.add(1000 + second, hit=True)
+
+        # Window is (1015, 1075]: seconds 1016..1029 remain plus the new point
+        counter.add(1000 + 75, hit=False)
+
+        assert counter.total == 15
+        assert counter.hits == 14
+
+        counter.advance(1000 + 200)
+        assert counter.total == 0
+        assert counter.ratio() == 0.0
+
+
+class TestRealtimeMonitoringStreaming:
+    """Test the service on top of the streaming aggregates"""
+
+    @pytest.mark.asyncio
+    async def test_spike_detected_against_rolling_baseline(self):
+        service = RealtimeMonitoringService()
+        rnd = random.Random(3)
+        try:
+            for _ in range(60):
+                await service.ingest_metric(
+                    MonitoringMetric.QUEUE_SIZE, rnd.gauss(100, 5), "worker"
+                )
+            await service.ingest_metric(MonitoringMetric.QUEUE_SIZE, 400, "worker")
+
+            spikes = [
+                anomaly
+                for anomaly in service.anomalies.values()
+                if anomaly.anomalous_value == 400
+            ]
+            assert len(spikes) == 1
+            assert spikes[0].anomaly_type.value == "spike"
+            stats = service.get_series_stats(MonitoringMetric.QUEUE_SIZE, "worker")
+            assert stats["window_size"] == 50
+            assert stats["points_total"] == 61
+        finally:
+            service.stop_monitoring()
+
+    @pytest.mark.asyncio
+    async def test_sla_violation_ratio_from_counters(self):
+        service = RealtimeMonitoringService()
+        alerts = []
+
+        async def on_alert(alert):
+            alerts.append(alert)
+
+        service.subscribe_to_alerts(on_alert)
+        try:
+            for value in [500, 500, 500, 500, 2500, 2500]:
+                await service.ingest_metric(MonitoringMetric.RESPONSE_TIME, value, "api")
+
+            sla_alerts = [a for a in alerts if (a.metadata or {}).get("violation_type") == "sla"]
+            assert sla_alerts
+            assert sla_alerts[-1].current_value == pytest.approx(100 * 2 / 6)
+        finally:
+            service.stop_monitoring()
+
+    @pytest.mark.asyncio
+    async def test_maintenance_runs_as_asyncio_task(self):
+        service = RealtimeMonitoringService()
+        service.monitoring_interval = 0.01
+
+        await service.ingest_metric(MonitoringMetric.CPU_USAGE, 10, "host")
+
+        task = service._monitoring_task
+        assert isinstance(task, asyncio.Task)
+        assert task.get_loop() is asyncio.get_running_loop()
+
+        service.stop_monitoring()
+        await asyncio.sleep(0)
+        assert task.cancelled() or task.done()
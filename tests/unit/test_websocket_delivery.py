@@ -0,0 +1,205 @@
+"""
+Unit tests for cross-node WebSocket delivery in app.performance.websocket_delivery
+"""
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi import WebSocket
+
+from app.performance.websocket_delivery import (InMemoryBus,
+                                                InMemoryDeliveryBackend)
+from app.performance.websocket_notifications import (NotificationType,
+                                                     WebSocketManager)
+
+
+def make_websocket():
+    """Create a mock WebSocket recording decoded payloads"""
+    websocket = Mock(spec=WebSocket)
+    websocket.accept = AsyncMock()
+    websocket.close = AsyncMock()
+    websocket.sent = []
+
+    async def send_text(payload):
+        websocket.sent.append(json.loads(payload))
+
+    websocket.send_text = AsyncMock(side_effect=send_text)
+    return websocket
+
+
+async def make_cluster(size: int = 2, **backend_kwargs):
+    """Managers of one simulated cluster sharing an in-memory bus"""
+    bus = InMemoryBus()
+    managers = []
+    for index in range(size):
+        manager = WebSocketManager(
+            delivery_backend=InMemoryDeliveryBackend(bus, **backend_kwargs),
+            node_id=f"node-{index}",
+        )
+        await manager.start()
+        managers.append(manager)
+    return bus, managers
+
+
+def notifications(websocket):
+    return [m for m in websocket.sent if m["type"] != "connection_established"]
+
+
+class TestMultiNodeDelivery:
+    """Test routing between WebSocketManager nodes"""
+
+    @pytest.mark.asyncio
+    async def test_notification_reaches_user_on_other_node(self):
+        """A notification sent from node-0 is delivered by node-1"""
+        bus, (node_a, node_b) = await make_cluster()
+        websocket = make_websocket()
+        await node_b.connect(websocket, "alice")
+
+        delivered = await node_a.send_notification(
+            "alice", NotificationType.TASK_COMPLETED, {"task_id": "t1"}
+        )
+        await node_b.flush(timeout=1)
+
+        assert delivered is True
+        assert notifications(websocket)[0]["data"]["task_id"] == "t1"
+        assert node_a.connection_stats["messages_routed"] == 1
+        assert node_b.connection_stats["messages_received_remote"] == 1
+        assert "alice" not in bus.offline
+
+        await node_a.stop()
+        await node_b.stop()
+
+    @pytest.mark.asyncio
+    async def test_only_hosting_nodes_receive_message(self):
+        """Targeted messages are not fanned out to every node"""
+        _, (node_a, node_b, node_c) = await make_cluster(3)
+        await node_b.connect(make_websocket(), "alice")
+
+        await node_a.send_notification(
+            "alice", NotificationType.TASK_PROGRESS, {"progress": 50}
+        )
+
+        assert node_b.connection_stats["messages_received_remote"] == 1
+        assert node_c.connection_stats["messages_received_remote"] == 0
+
+    @pytest.mark.asyncio
+    async def test_offline_messages_replayed_on_any_node(self):
+        """Offline messages survive in the backend and replay on reconnect"""
+        bus, (node_a, node_b) = await make_cluster()
+
+        for index in range(3):
+            await node_a.send_notification(
+                "bob", NotificationType.TASK_PROGRESS, {"step": index}
+            )
+        assert len(bus.offline["bob"]) == 3
+        assert node_a.offline_messages == {}
+
+        websocket = make_websocket()
+        await node_b.connect(websocket, "bob")
+        await node_b.flush(timeout=1)
+
+        assert [m["data"]["step"] for m in notifications(websocket)] == [0, 1, 2]
+        assert "bob" not in bus.offline
+
+    @pytest.mark.asyncio
+    async def test_offline_queue_is_capped(self):
+        """Durable offline queue keeps only the most recent messages"""
+        bus, (node_a, _) = await make_cluster(offline_queue_size=5)
+
+        for index in range(12):
+            await node_a.send_notification(
+                "carol", NotificationType.TASK_PROGRESS, {"step": index}
+            )
+
+        stored = [json.loads(payload)["data"]["step"] for payload in bus.offline["carol"]]
+        assert stored == [7, 8, 9, 10, 11]
+
+    @pytest.mark.asyncio
+    async def test_broadcast_reaches_all_nodes(self):
+        """System broadcasts reach users connected to every node"""
+        _, (node_a, node_b) = await make_cluster()
+        local, remote = make_websocket(), make_websocket()
+        await node_a.connect(local, "alice")
+        await node_b.connect(remote, "bob")
+
+        result = await node_a.broadcast_system_notification(
+            NotificationType.SYSTEM_ALERT, {"message": "maintenance"}
+        )
+        await node_a.flush(timeout=1)
+        await node_b.flush(timeout=1)
+
+        assert result["remote_nodes"] == 1
+        assert notifications(local)[0]["data"]["message"] == "maintenance"
+        assert notifications(remote)[0]["data"]["message"] == "maintenance"
+
+    @pytest.mark.asyncio
+    async def test_disconnect_unregisters_last_connection(self):
+        """Registry entry is removed when the user's last connection closes"""
+        bus, (node_a, _) = await make_cluster()
+        first, second = make_websocket(), make_websocket()
+        await node_a.connect(first, "alice")
+        await node_a.connect(second, "alice")
+
+        await node_a.disconnect(first)
+        assert "node-0" in bus.presence["alice"]
+
+        await node_a.disconnect(second)
+        assert "alice" not in bus.presence
+
+    @pytest.mark.asyncio
+    async def test_stale_node_is_not_routed_to(self):
+        """Nodes whose heartbeat expired are treated as offline"""
+        bus, (node_a, node_b) = await make_cluster(heartbeat_ttl=30.0)
+        await node_b.connect(make_websocket(), "alice")
+        bus.presence["alice"]["node-1"] = time.time() - 60
+
+        delivered = await node_a.send_notification(
+            "alice", NotificationType.TASK_FAILED, {"task_id": "t2"}
+        )
+
+        assert delivered is False
+        assert len(bus.offline["alice"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_refreshes_registry(self):
+        """Heartbeat loop keeps registry entries of connected users fresh"""
+        bus = InMemoryBus()
+        manager = WebSocketManager(
+            delivery_backend=InMemoryDeliveryBackend(bus),
+            node_id="node-0",
+            heartbeat_interval=0.01,
+        )
+        await manager.start()
+        await manager.connect(make_websocket(), "alice")
+        bus.presence["alice"]["node-0"] = 0.0
+
+        await asyncio.sleep(0.05)
+
+        assert bus.presence["alice"]["node-0"] > time.time() - 1
+        await manager.stop()
+        assert "node-0" not in bus.handlers
+
+
+    @pytest.mark.asyncio
+    async def test_concurrent_start_joins_cluster_once(self):
+        """Concurrent first connections start the backend only once"""
+        backend = InMemoryDeliveryBackend(InMemoryBus())
+        original_start = backend.start
+        calls = []
+
+        async def slow_start(node_id, handler):
+            calls.append(node_id)
+            await asyncio.sleep(0.01)
+            await original_start(node_id, handler)
+
+        backend.start = slow_start
+        manager = WebSocketManager(delivery_backend=backend, node_id="node-0")
+
+        await asyncio.gather(*(manager.start() for _ in range(5)))
+
+        assert calls == ["node-0"]
+        await manager.stop()
+        assert manager._heartbeat_task is None
@@ -0,0 +1,156 @@
+"""
+Unit tests for WebSocketManager fan-out in app.performance.websocket_notifications
+"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi import WebSocket
+
+from app.performance.websocket_notifications import (SLOW_CONSUMER_CLOSE_CODE,
+                                                     NotificationType,
+                                                     WebSocketManager)
+
+
+def make_websocket(send_delay: float = 0.0):
+    """Create a mock WebSocket whose send takes send_delay seconds"""
+    websocket = Mock(spec=WebSocket)
+    websocket.accept = AsyncMock()
+    websocket.close = AsyncMock()
+    websocket.sent = []
+
+    async def send_text(payload):
+        if send_delay:
+            await asyncio.sleep(send_delay)
+        websocket.sent.append(json.loads(payload))
+
+    websocket.send_text = AsyncMock(side_effect=send_text)
+    return websocket
+
+
+class TestWebSocketManagerFanOut:
+    """Test concurrent, pre-serialized delivery"""
+
+    @pytest.mark.asyncio
+    async def test_connect_sends_confirmation(self):
+        """Connection confirmation goes through the outbound queue"""
+        manager = WebSocketManager()
+        websocket = make_websocket()
+
+        await manager.connect(websocket, "user1")
+        await manager.flush(timeout=1)
+
+        assert websocket.sent[0]["type"] == "connection_established"
+        assert manager.connection_stats["current_connections"] == 1
+
+    @pytest.mark.asyncio
+    async def test_broadcast_serializes_once(self):
+        """Broadcast payload is serialized once for all recipients"""
+        manager = WebSocketManager()
+        sockets = [make_websocket() for _ in range(10)]
+        for index, websocket in enumerate(sockets):
+            await manager.connect(websocket, f"user{index}")
+        await manager.flush(timeout=1)
+
+        with patch(
+            "app.performance.websocket_notifications.json.dumps",
+            wraps=json.dumps,
+        ) as dumps:
+            result = await manager.broadcast_system_notification(
+                NotificationType.SYSTEM_ALERT, {"message": "maintenance"}
+            )
+            await manager.flush(timeout=1)
+
+        assert result == {"sent": 10, "failed": 0}
+        assert dumps.call_count == 1
+        message_ids = {ws.sent[-1]["message_id"] for ws in sockets}
+        assert len(message_ids) == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_block_others(self):
+        """A slow connection does not delay delivery to fast connections"""
+        manager = WebSocketManager()
+        slow = make_websocket(send_delay=0.5)
+        fast = make_websocket()
+        await manager.connect(slow, "slow_user")
+        await manager.connect(fast, "fast_user")
+
+        await manager.broadcast_system_notification(
+            NotificationType.SYSTEM_ALERT, {"n": 1}
+        )
+        await asyncio.sleep(0.05)
+
+        assert [m["type"] for m in fast.sent] == ["connection_established", "system_alert"]
+        assert slow.sent == []
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_evicted_when_queue_full(self):
+        """Connections that overflow their queue are dropped and closed"""
+        manager = WebSocketManager(outbound_queue_size=2)
+        slow = make_websocket(send_delay=1.0)
+        await manager.connect(slow, "slow_user")
+
+        for index in range(5):
+            await manager.send_notification(
+                "slow_user", NotificationType.TASK_PROGRESS, {"n": index}
+            )
+        await asyncio.sleep(0.05)
+
+        assert manager.connection_stats["slow_consumers_evicted"] == 1
+        assert manager.connection_stats["messages_dropped"] >= 1
+        assert "slow_user" not in manager.active_connections
+        slow.close.assert_awaited_with(code=SLOW_CONSUMER_CLOSE_CODE)
+
+    @pytest.mark.asyncio
+    async def test_failed_send_disconnects(self):
+        """A send error removes the connection"""
+        manager = WebSocketManager()
+        websocket = make_websocket()
+        await manager.connect(websocket, "user1")
+        await manager.flush(timeout=1)
+        websocket.send_text.side_effect = RuntimeError("closed")
+
+        await manager.send_notification(
+            "user1", NotificationType.TASK_COMPLETED, {"task_id": "t1"}
+        )
+        await asyncio.sleep(0.01)
+
+        assert "user1" not in manager.active_connections
+        assert manager.connection_stats["messages_failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_offline_queue_and_history_bounded(self):
+        """Offline queue and history keep only the newest messages"""
+        manager = WebSocketManager(history_size=5, offline_queue_size=3)
+
+        for index in range(10):
+            await manager.send_notification(
+                "offline_user", NotificationType.TASK_PROGRESS, {"n": index}
+            )
+
+        assert len(manager.message_history) == 5
+        queued = [m["data"]["n"] for m in manager.offline_messages["offline_user"]]
+        assert queued == [7, 8, 9]
+
+        websocket = make_websocket()
+        await manager.connect(websocket, "offline_user")
+        await manager.flush(timeout=1)
+
+        assert [m["data"].get("n") for m in websocket.sent[:3]] == [7, 8, 9]
+        assert "offline_user" not in manager.offline_messages
+
+    @pytest.mark.asyncio
+    async def test_stats_include_latency_and_drops(self):
+        """Connection stats expose send latency and drop counters"""
+        manager = WebSocketManager()
+        websocket = make_websocket()
+        await manager.connect(websocket, "user1")
+        await manager.flush(timeout=1)
+
+        stats = await manager.get_connection_stats()
+
+        assert stats["send_latency_ms"]["max"] >= 0
+        assert stats["pending_outbound"] == 0
+        assert stats["connection_stats"]["messages_dropped"] == 0
@@ -0,0 +1,224 @@
+"""
+Unit тесты для dataflow-планировщика AIAgentOrchestrator
+
+Тестирует:
+- Запуск шагов по готовности зависимостей (без "волн")
+- Глобальные и per-agent-type лимиты параллелизма
+- Приоритет по критическому пути
+- Отмену downstream-шагов при ошибке
+- Таймлайн выполнения workflow
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.core.exceptions import ServiceError
+from domain.ai_analysis.ai_agent_orchestrator import (AgentType,
+                                                      AIAgentOrchestrator,
+                                                      AutomatedWorkflow,
+                                                      BaseAgent, WorkflowStep)
+
+
+@pytest.fixture(autouse=True)
+def stub_agent_services():
+    """Мокаем тяжелые сервисы, создаваемые агентами"""
+    with patch(
+        "domain.ai_analysis.ai_agent_orchestrator.CoreLogicEngine", MagicMock
+    ), patch(
+        "domain.ai_analysis.ai_agent_orchestrator.EnhancedVectorSearchService",
+        MagicMock,
+    ):
+        yield
+
+
+class SleepAgent(BaseAgent):
+    """Агент, который спит input_data['delay'] секунд"""
+
+    def __init__(self, agent_id, agent_type, log=None):
+        super().__init__(agent_id, agent_type)
+        self.log = log if log is not None else []
+
+    async def _execute_specific_task(self, task):
+        if task.task_type == "fail":
+            raise RuntimeError("boom")
+        self.log.append(task.task_type)
+        await asyncio.sleep(float(task.task_type.split(":")[1]))
+        return {"done": task.task_type}
+
+
+def step(step_id, delay, agent_type=AgentType.ARCHITECT, depends_on=None, **kwargs):
+    return WorkflowStep(
+        id=step_id,
+        name=step_id,
+        agent_type=agent_type,
+        task_type=f"sleep:{delay}" if delay is not None else "fail",
+        depends_on=depends_on or [],
+        output_key=step_id,
+        **kwargs,
+    )
+
+
+async def make_orchestrator(agent_types, **kwargs):
+    orchestrator = AIAgentOrchestrator(**kwargs)
+    orchestrator._default_agents_initialized = True
+    log = []
+    for index, agent_type in enumerate(agent_types):
+        await orchestrator.register_agent(
+            SleepAgent(f"{agent_type.value}_{index}", agent_type, log)
+        )
+    return orchestrator, log
+
+
+class TestDataflowScheduler:
+    """Тесты для dataflow-исполнения workflow"""
+
+    @pytest.mark.asyncio
+    async def test_step_starts_when_own_dependencies_ready(self):
+        """Шаг стартует сразу после своей зависимости, не дожидаясь медленного соседа"""
+        orchestrator, _ = await make_orchestrator(
+            [AgentType.ARCHITECT] * 2 + [AgentType.REVIEWER]
+        )
+        workflow = AutomatedWorkflow(
+            name="uneven",
+            steps=[
+                step("fast", 0.05),
+                step("slow", 0.3),
+                step("after_fast", 0.2, AgentType.REVIEWER, depends_on=["fast"]),
+            ],
+        )
+        orchestrator.register_workflow(workflow)
+
+        start = time.perf_counter()
+        result = await orchestrator.execute_workflow(workflow.id, {})
+        elapsed = time.perf_counter() - start
+
+        assert result["status"] == "completed"
+        # Waves would take 0.3 + 0.2; dataflow takes max(0.3, 0.05 + 0.2)
+        assert elapsed < 0.45
+        timeline = {e["step_id"]: e for e in result["result"]["timeline"]}
+        assert timeline["after_fast"]["started_at"] < timeline["slow"]["finished_at"]
+
+    @pytest.mark.asyncio
+    async def test_agent_type_limit(self):
+        """Шаги одного типа агента ограничены лимитом"""
+        orchestrator, _ = await make_orchestrator(
+            [AgentType.ARCHITECT] * 3,
+            agent_type_limits={AgentType.ARCHITECT: 1},
+        )
+        workflow = AutomatedWorkflow(
+            name="limited", steps=[step(f"s{i}", 0.05) for i in range(3)]
+        )
+        orchestrator.register_workflow(workflow)
+
+        start = time.perf_counter()
+        await orchestrator.execute_workflow(workflow.id, {})
+
+        assert time.perf_counter() - start >= 0.15
+
+    @pytest.mark.asyncio
+    async def test_critical_path_priority(self):
+        """При нехватке слотов первым запускается шаг с длинным критическим путем"""
+        orchestrator, log = await make_orchestrator(
+            [AgentType.ARCHITECT], max_concurrent_steps=1
+        )
+        workflow = AutomatedWorkflow(
+            name="priority",
+            steps=[
+                step("leaf", 0.01),
+                step("head", 0.02, estimated_seconds=5.0),
+                step("tail", 0.03, depends_on=["head"], estimated_seconds=5.0),
+            ],
+        )
+        orchestrator.register_workflow(workflow)
+
+        await orchestrator.execute_workflow(workflow.id, {})
+
+        assert log[0] == "sleep:0.02"
+
+    @pytest.mark.asyncio
+    async def test_failure_cancels_downstream(self):
+        """Ошибка шага отменяет зависящие от него шаги"""
+        orchestrator, log = await make_orchestrator([AgentType.ARCHITECT] * 2)
+        workflow = AutomatedWorkflow(
+            name="failing",
+            steps=[
+                step("broken", None),
+                step("child", 0.01, depends_on=["broken"]),
+                step("grandchild", 0.01, depends_on=["child"]),
+                step("independent", 0.01),
+            ],
+        )
+        orchestrator.register_workflow(workflow)
+
+        result = await orchestrator.execute_workflow(workflow.id, {})
+
+        assert result["status"] == "failed"
+        timeline = {
+            e["step_id"]: e for e in orchestrator.get_workflow_timeline(workflow.id)
+        }
+        assert timeline["broken"]["status"] == "failed"
+        assert timeline["child"]["status"] == "cancelled"
+        assert timeline["grandchild"]["status"] == "cancelled"
+        assert timeline["independent"]["status"] == "completed"
+        assert log == ["sleep:0.01"]
+
+    @pytest.mark.asyncio
+    async def test_optional_failure_does_not_cancel(self):
+        """Ошибка опционального шага не блокирует зависимые шаги"""
+        orchestrator, _ = await make_orchestrator([AgentType.ARCHITECT])
+        workflow = AutomatedWorkflow(
+            name="optional",
+            steps=[
+                step("maybe", None, optional=True),
+                step("child", 0.01, depends_on=["maybe"]),
+            ],
+        )
+        orchestrator.register_workflow(workflow)
+
+        result = await orchestrator.execute_workflow(workflow.id, {})
+
+        assert result["status"] == "completed"
+        assert result["result"]["step_results"]["child"]["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_cycle_detected_before_execution(self):
+        """Циклические зависимости отклоняются до запуска шагов"""
+        orchestrator, log = await make_orchestrator([AgentType.ARCHITECT])
+        workflow = AutomatedWorkflow(
+            name="cycle",
+            steps=[
+                step("a", 0.01, depends_on=["b"]),
+                step("b", 0.01, depends_on=["a"]),
+                step("c", 0.01),
+            ],
+        )
+
+        with pytest.raises(ServiceError):
+            orchestrator._build_dependents(workflow)
+
+        orchestrator.register_workflow(workflow)
+        result = await orchestrator.execute_workflow(workflow.id, {})
+        assert result["status"] == "failed"
+        assert log == []
+
+    @pytest.mark.asyncio
+    async def test_timeout_releases_agents(self):
+        """Шаги, отмененные по таймауту, освобождают агентов для следующих workflow"""
+        orchestrator, _ = await make_orchestrator([AgentType.ARCHITECT])
+        slow = AutomatedWorkflow(
+            name="slow", steps=[step("slow", 5)], timeout_minutes=0.001
+        )
+        fast = AutomatedWorkflow(name="fast", steps=[step("fast", 0.01)])
+        orchestrator.register_workflow(slow)
+        orchestrator.register_workflow(fast)
+
+        result = await orchestrator.execute_workflow(slow.id, {})
+
+        assert result["status"] == "failed"
+        agent = next(iter(orchestrator.agents.values()))
+        assert agent.status.value == "idle" and agent.current_task is None
+        result = await orchestrator.execute_workflow(fast.id, {})
+        assert result["status"] == "completed"
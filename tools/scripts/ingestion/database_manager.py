@@ -5,13 +5,50 @@ Database Manager for Data Ingestion
 
 import asyncio
 import asyncpg
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 import structlog
 from datetime import datetime
 import json
+import time
 
 logger = structlog.get_logger()
 
+STAGING_TABLE = "ingest_staging"
+STAGING_COLUMNS = (
+    "id", "title", "content", "source_type", "source_name", "source_url",
+    "file_path", "metadata", "content_hash", "created_at", "updated_at",
+)
+
+# Временная таблица живёт в сессии соединения и очищается при каждом COMMIT
+CREATE_STAGING_TABLE = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE}
+(LIKE ingested_documents) ON COMMIT DELETE ROWS
+"""
+
+# Документы с известным id и новым содержимым (если такое содержимое ещё не сохранено)
+UPDATE_CHANGED_BY_ID = f"""
+UPDATE ingested_documents d SET
+    title = s.title,
+    content = s.content,
+    metadata = s.metadata,
+    content_hash = s.content_hash,
+    updated_at = s.updated_at
+FROM {STAGING_TABLE} s
+WHERE d.id = s.id
+  AND d.content_hash IS DISTINCT FROM s.content_hash
+  AND NOT EXISTS (SELECT 1 FROM ingested_documents o WHERE o.content_hash = s.content_hash)
+"""
+
+# Новые id; повторно встреченное содержимое только отмечается временем ingested_at
+MERGE_BY_CONTENT_HASH = f"""
+INSERT INTO ingested_documents ({", ".join(STAGING_COLUMNS)})
+SELECT {", ".join("s." + column for column in STAGING_COLUMNS)}
+FROM {STAGING_TABLE} s
+WHERE NOT EXISTS (SELECT 1 FROM ingested_documents d WHERE d.id = s.id)
+ON CONFLICT (content_hash) DO UPDATE SET ingested_at = CURRENT_TIMESTAMP
+RETURNING (xmax = 0) AS inserted
+"""
+
 
 class DatabaseManager:
     """Менеджер базы данных для ingestion"""
@@ -20,6 +57,8 @@ class DatabaseManager:
         self.config = config
         self.pool = None
         self.db_url = config["url"]
+        # Слияние по ON CONFLICT (content_hash) требует уникального индекса
+        self.bulk_supported = True
     
     async def initialize(self):
         """Инициализация пула соединений"""
@@ -81,7 +120,6 @@ class DatabaseManager:
         create_indexes = [
             "CREATE INDEX IF NOT EXISTS idx_documents_source_type ON ingested_documents(source_type);",
             "CREATE INDEX IF NOT EXISTS idx_documents_created_at ON ingested_documents(created_at);",
-            "CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON ingested_documents(content_hash);",
             "CREATE INDEX IF NOT EXISTS idx_ingestion_stats_source ON ingestion_stats(source_type, source_name);"
         ]
         
@@ -91,74 +129,206 @@ class DatabaseManager:
             
             for index_sql in create_indexes:
                 await conn.execute(index_sql)
+
+            try:
+                await conn.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_content_hash_unique "
+                    "ON ingested_documents(content_hash);"
+                )
+            except asyncpg.UniqueViolationError as e:
+                # В старых данных уже есть дубликаты содержимого
+                self.bulk_supported = False
+                logger.warning("Duplicate content hashes found, bulk merge disabled", error=str(e))
         
         logger.info("Database tables created/verified")
     
-    async def save_documents(self, documents: List[Any]) -> int:
-        """Сохранение документов в базу данных"""
+    async def save_documents(
+        self,
+        documents: List[Any],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> int:
+        """
+        Сохранение документов в базу данных.
+
+        По умолчанию документы загружаются через COPY во временную таблицу и
+        сливаются одним INSERT ... ON CONFLICT на чанк; каждый чанк фиксируется
+        отдельной транзакцией. save_mode: "rows" включает построчную вставку.
+        Возвращает количество вставленных и обновлённых документов.
+        """
         if not documents:
             return 0
-        
+
+        if self.config.get("save_mode", "copy") == "rows" or not self.bulk_supported:
+            return await self._save_documents_rows(documents)
+
+        chunk_size = self.config.get("bulk_chunk_size", 5000)
+        total = len(documents)
         saved_count = 0
-        
+        processed = 0
+        started = time.perf_counter()
+
         try:
             async with self.pool.acquire() as conn:
-                async with conn.transaction():
-                    for doc in documents:
-                        try:
-                            # Подготовка данных
-                            doc_data = self._prepare_document_data(doc)
-                            
-                            # Проверка существования документа по хешу
-                            existing = await conn.fetchval(
-                                "SELECT id FROM ingested_documents WHERE content_hash = $1",
-                                doc_data["content_hash"]
-                            )
-                            
-                            if existing:
-                                logger.debug("Document already exists, skipping", doc_id=doc_data["id"])
-                                continue
-                            
-                            # Вставка документа
-                            await conn.execute("""
-                                INSERT INTO ingested_documents 
-                                (id, title, content, source_type, source_name, source_url, 
-                                 file_path, metadata, content_hash, created_at, updated_at)
-                                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
-                                ON CONFLICT (id) DO UPDATE SET
-                                    title = EXCLUDED.title,
-                                    content = EXCLUDED.content,
-                                    metadata = EXCLUDED.metadata,
-                                    updated_at = EXCLUDED.updated_at
-                            """,
-                                doc_data["id"],
-                                doc_data["title"],
-                                doc_data["content"],
-                                doc_data["source_type"],
-                                doc_data["source_name"],
-                                doc_data["source_url"],
-                                doc_data["file_path"],
-                                json.dumps(doc_data["metadata"]),
-                                doc_data["content_hash"],
-                                doc_data["created_at"],
-                                doc_data["updated_at"]
-                            )
-                            
-                            saved_count += 1
-                            
-                        except Exception as e:
-                            logger.error(
-                                "Failed to save document",
-                                doc_id=getattr(doc, 'id', 'unknown'),
-                                error=str(e)
-                            )
-            
+                for start in range(0, total, chunk_size):
+                    chunk = documents[start:start + chunk_size]
+                    try:
+                        saved_count += await self._merge_chunk(conn, chunk)
+                    except asyncpg.PostgresError as e:
+                        # Чанк откатился целиком: повторяем построчно, чтобы
+                        # один проблемный документ не терял остальные
+                        logger.warning("Bulk merge failed, retrying chunk row by row",
+                                       chunk_start=start, error=str(e))
+                        saved_count += await self._save_rows(conn, chunk)
+
+                    processed += len(chunk)
+                    elapsed = time.perf_counter() - started
+                    logger.info(
+                        "Documents batch merged",
+                        processed=processed,
+                        total=total,
+                        saved=saved_count,
+                        docs_per_second=round(processed / elapsed, 1) if elapsed else None,
+                    )
+                    if progress_callback:
+                        progress_callback(processed, total)
+
+            logger.info("Documents saved to database", saved_count=saved_count, total=total)
+            return saved_count
+
+        except Exception as e:
+            logger.error("Failed to save documents batch", error=str(e))
+            raise
+
+    async def _merge_chunk(self, conn, documents: List[Any]) -> int:
+        """COPY чанка во временную таблицу и слияние с ingested_documents в одной транзакции"""
+        records = self._staging_records(documents)
+        if not records:
+            return 0
+
+        async with conn.transaction():
+            await conn.execute(CREATE_STAGING_TABLE)
+            await conn.copy_records_to_table(STAGING_TABLE, records=records, columns=STAGING_COLUMNS)
+            status = await conn.execute(UPDATE_CHANGED_BY_ID)
+            inserted = await conn.fetch(MERGE_BY_CONTENT_HASH)
+
+        updated_count = int(status.split()[-1])
+        inserted_count = sum(1 for row in inserted if row["inserted"])
+        logger.debug(
+            "Chunk merged",
+            documents=len(records),
+            inserted=inserted_count,
+            updated=updated_count,
+            refreshed=len(inserted) - inserted_count,
+        )
+        return inserted_count + updated_count
+
+    def _staging_records(self, documents: List[Any]) -> List[tuple]:
+        """
+        Строки для COPY: в чанке остаётся последняя версия каждого id и первый
+        документ с каждым content_hash (как при построчной вставке)
+        """
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for doc in documents:
+            try:
+                doc_data = self._prepare_document_data(doc)
+            except Exception as e:
+                logger.error("Failed to prepare document", doc_id=getattr(doc, 'id', 'unknown'), error=str(e))
+                continue
+            by_id.pop(doc_data["id"], None)
+            by_id[doc_data["id"]] = doc_data
+
+        seen_hashes = set()
+        records = []
+        for doc_data in by_id.values():
+            if doc_data["content_hash"] in seen_hashes:
+                continue
+            seen_hashes.add(doc_data["content_hash"])
+            records.append(tuple(
+                json.dumps(doc_data[column]) if column == "metadata" else doc_data[column]
+                for column in STAGING_COLUMNS
+            ))
+        return records
+
+    async def _save_documents_rows(self, documents: List[Any]) -> int:
+        """Построчное сохранение в одной транзакции (save_mode: rows)"""
+        try:
+            async with self.pool.acquire() as conn:
+                saved_count = await self._save_rows(conn, documents)
+
             logger.info("Documents saved to database", saved_count=saved_count, total=len(documents))
             return saved_count
-            
+
         except Exception as e:
             logger.error("Failed to save documents batch", error=str(e))
             raise
+
+    async def _save_rows(self, conn, documents: List[Any]) -> int:
+        """
+        SELECT по content_hash и INSERT для каждого документа.
+
+        Каждый документ пишется в своей точке сохранения (вложенная
+        транзакция): ошибка одной строки откатывает только её, иначе Postgres
+        прервал бы всю транзакцию вместе с остальными строками.
+        """
+        saved_count = 0
+
+        async with conn.transaction():
+            for doc in documents:
+                try:
+                    # Подготовка данных
+                    doc_data = self._prepare_document_data(doc)
+
+                    async with conn.transaction():
+                        saved_count += await self._save_row(conn, doc_data)
+
+                except Exception as e:
+                    logger.error(
+                        "Failed to save document",
+                        doc_id=getattr(doc, 'id', 'unknown'),
+                        error=str(e)
+                    )
+
+        return saved_count
+
+    async def _save_row(self, conn, doc_data: Dict[str, Any]) -> int:
+        """Вставка одного документа; 0, если документ с таким хешем уже есть"""
+        # Проверка существования документа по хешу
+        existing = await conn.fetchval(
+            "SELECT id FROM ingested_documents WHERE content_hash = $1",
+            doc_data["content_hash"]
+        )
+
+        if existing:
+            logger.debug("Document already exists, skipping", doc_id=doc_data["id"])
+            return 0
+
+        # Вставка документа
+        await conn.execute("""
+            INSERT INTO ingested_documents 
+            (id, title, content, source_type, source_name, source_url, 
+             file_path, metadata, content_hash, created_at, updated_at)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+            ON CONFLICT (id) DO UPDATE SET
+                title = EXCLUDED.title,
+                content = EXCLUDED.content,
+                metadata = EXCLUDED.metadata,
+                content_hash = EXCLUDED.content_hash,
+                updated_at = EXCLUDED.updated_at
+        """,
+            doc_data["id"],
+            doc_data["title"],
+            doc_data["content"],
+            doc_data["source_type"],
+            doc_data["source_name"],
+            doc_data["source_url"],
+            doc_data["file_path"],
+            json.dumps(doc_data["metadata"]),
+            doc_data["content_hash"],
+            doc_data["created_at"],
+            doc_data["updated_at"]
+        )
+
+        return 1
     
     def _prepare_document_data(self, doc: Any) -> Dict[str, Any]:
         """Подготовка данных документа для сохранения"""
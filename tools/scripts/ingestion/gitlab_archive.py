@@ -0,0 +1,158 @@
+"""
+GitLab Repository Archive Reader
+Потоковое чтение tar.gz архива репозитория без распаковки на диск
+"""
+
+import asyncio
+import io
+import json
+import os
+import tarfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Set
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class ArchiveFile:
+    """Файл из архива репозитория"""
+    path: str  # путь внутри репозитория, без корневого каталога архива
+    content: bytes
+    size: int
+
+
+@dataclass
+class ArchiveScanStats:
+    """Статистика просмотра архива"""
+    members: int = 0
+    matched: int = 0
+    skipped_extension: int = 0
+    skipped_size: int = 0
+    bytes_read: int = 0
+    commit_sha: Optional[str] = None  # из pax-заголовка git archive
+
+
+def file_extension(path: str) -> str:
+    """Расширение файла в нижнем регистре (с точкой)"""
+    name = path.rsplit("/", 1)[-1]
+    return "." + name.rsplit(".", 1)[-1].lower() if "." in name else ""
+
+
+class IterStream(io.RawIOBase):
+    """Read-only файловый объект поверх итератора чанков bytes"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def iter_async_chunks(stream: "aiohttp.StreamReader", loop: asyncio.AbstractEventLoop) -> Iterator[bytes]:  # noqa: F821
+    """
+    Синхронный итератор чанков асинхронного потока для вызова из рабочего потока:
+    каждое чтение выполняется в event loop, а рабочий поток ждёт результат
+    """
+    while True:
+        chunk = asyncio.run_coroutine_threadsafe(stream.readany(), loop).result()
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_archive_files(
+    fileobj,
+    extensions: Optional[Set[str]] = None,
+    max_file_size_bytes: Optional[int] = None,
+    stats: Optional[ArchiveScanStats] = None,
+) -> Iterator[ArchiveFile]:
+    """
+    Файлы tar.gz архива, подходящие по расширению и размеру.
+
+    Архив читается последовательно (режим "r|gz"), в памяти находится только
+    текущий файл; неподходящие члены архива пропускаются без чтения содержимого.
+    """
+    stats = stats if stats is not None else ArchiveScanStats()
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as archive:
+        for member in archive:
+            if stats.commit_sha is None:
+                stats.commit_sha = archive.pax_headers.get("comment")
+            if not member.isfile():
+                continue
+            stats.members += 1
+
+            # git archive кладёт всё в каталог <project>-<ref>-<sha>/
+            path = member.name.split("/", 1)[1] if "/" in member.name else member.name
+            if extensions and file_extension(path) not in extensions:
+                stats.skipped_extension += 1
+                continue
+            if max_file_size_bytes is not None and member.size > max_file_size_bytes:
+                stats.skipped_size += 1
+                logger.warning("File too large, skipping", file_path=path, size_mb=member.size / 1024 / 1024)
+                continue
+
+            content = archive.extractfile(member).read()
+            stats.matched += 1
+            stats.bytes_read += len(content)
+            yield ArchiveFile(path=path, content=content, size=member.size)
+
+
+def decode_content(content: bytes) -> Optional[str]:
+    """Текст файла (utf-8, затем latin-1); None для бинарных файлов"""
+    if b"\0" in content[:8192]:
+        return None
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return content.decode("latin-1")
+
+
+class CommitStateStore:
+    """SHA последнего проиндексированного коммита для каждого проекта и ветки (JSON-файл)"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.commits: Dict[str, str] = {}
+        if self.path.exists():
+            try:
+                self.commits = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning("Failed to load commit state, starting fresh", path=str(self.path), error=str(e))
+
+    @staticmethod
+    def key(base_url: str, project_id: Any, ref: str) -> str:
+        return f"{base_url}|{project_id}|{ref}"
+
+    def get(self, key: str) -> Optional[str]:
+        return self.commits.get(key)
+
+    def is_current(self, key: str, sha: Optional[str]) -> bool:
+        return sha is not None and self.commits.get(key) == sha
+
+    def set(self, key: str, sha: str):
+        """Запоминает SHA и атомарно сохраняет файл"""
+        self.commits[key] = sha
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(self.commits, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        self.commits.clear()
+        self.path.unlink(missing_ok=True)
@@ -1,6 +1,7 @@
 """
 GitLab Data Ingestion Client
-Многопоточная загрузка файлов из GitLab репозиториев
+Загрузка файлов из GitLab репозиториев: одним архивом на ветку (по умолчанию)
+или по одному файлу через Repository Files API
 """
 
 import asyncio
@@ -12,6 +13,10 @@ from urllib.parse import urljoin, quote
 import structlog
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from .gitlab_archive import (ArchiveScanStats, CommitStateStore, IterStream,
+                             decode_content, file_extension,
+                             iter_archive_files, iter_async_chunks)
+
 logger = structlog.get_logger()
 
 
@@ -47,6 +52,13 @@ class GitLabIngestionClient:
         self.supported_extensions = set(server_config.get("file_extensions", [".md", ".rst", ".txt"]))
         self.max_file_size_mb = server_config.get("max_file_size_mb", 10)
         self.max_file_size_bytes = self.max_file_size_mb * 1024 * 1024
+
+        # "archive" — один tar.gz на ветку, "files" — отдельный запрос на каждый файл
+        self.ingestion_mode = server_config.get("ingestion_mode", "archive")
+        # SHA проиндексированных коммитов: неизменившиеся репозитории пропускаются целиком
+        self.commit_state = CommitStateStore(
+            server_config.get("commit_state_file", ".gitlab_ingestion_state.json")
+        )
     
     async def __aenter__(self):
         """Async context manager entry"""
@@ -86,6 +98,9 @@ class GitLabIngestionClient:
     async def _make_request(self, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
         """Выполнение HTTP запроса с retry логикой"""
         url = urljoin(self.base_url, endpoint)
+        if params:
+            # aiohttp не принимает bool в query-параметрах
+            params = {k: str(v).lower() if isinstance(v, bool) else v for k, v in params.items()}
         
         try:
             async with self.session.get(url, params=params) as response:
@@ -380,9 +395,151 @@ class GitLabIngestionClient:
             )
             return None
     
+    async def _get_ref_commit_sha(self, project_id: int, ref: str) -> Optional[str]:
+        """SHA последнего коммита ветки"""
+        try:
+            commit = await self._make_request(
+                f"/api/v4/projects/{project_id}/repository/commits/{quote(ref, safe='')}"
+            )
+            return commit.get("id")
+        except Exception as e:
+            logger.error("Failed to fetch ref commit", project_id=project_id, ref=ref, error=str(e))
+            return None
+
+    async def get_repository_archive_files(
+        self, project: Dict[str, Any], ref: str, sha: str
+    ) -> AsyncGenerator[List[GitLabDocument], None]:
+        """
+        Файлы репозитория из одного tar.gz архива коммита.
+
+        Архив читается потоково в рабочем потоке (tarfile в режиме "r|gz"), файлы
+        фильтруются по расширению и размеру на лету и через ограниченную очередь
+        передаются в event loop, поэтому в памяти находится не больше батча файлов.
+        """
+        project_id = project.get("id")
+        batch_size = self.processing_config.get("batch_size", 50)
+        loop = asyncio.get_running_loop()
+        files: asyncio.Queue = asyncio.Queue(maxsize=batch_size)
+        done = object()
+        stopped = False
+        stats = ArchiveScanStats()
+
+        def put(item):
+            asyncio.run_coroutine_threadsafe(files.put(item), loop).result()
+
+        def chunks(stream):
+            for chunk in iter_async_chunks(stream, loop):
+                if stopped:
+                    return  # потребитель ушёл: обрываем чтение архива
+                yield chunk
+
+        def scan(stream):
+            try:
+                for archive_file in iter_archive_files(
+                    IterStream(chunks(stream)),
+                    self.supported_extensions,
+                    self.max_file_size_bytes,
+                    stats,
+                ):
+                    if stopped:
+                        return
+                    put(archive_file)
+            except Exception:
+                if not stopped:
+                    raise
+            finally:
+                if not stopped:
+                    put(done)
+
+        url = f"{self.base_url}/api/v4/projects/{project_id}/repository/archive.tar.gz"
+        # Архив большого репозитория качается дольше общего таймаута сессии
+        timeout = aiohttp.ClientTimeout(total=None, connect=30, sock_read=60)
+        async with self.session.get(url, params={"sha": sha}, timeout=timeout) as response:
+            response.raise_for_status()
+            worker = loop.run_in_executor(None, scan, response.content)
+            batch = []
+            try:
+                while True:
+                    item = await files.get()
+                    if item is done:
+                        break
+                    document = self._archive_document(project, ref, sha, item)
+                    if document is None:
+                        continue
+                    batch.append(document)
+                    if len(batch) >= batch_size:
+                        yield batch
+                        batch = []
+                if batch:
+                    yield batch
+            finally:
+                stopped = True
+                # Освобождаем рабочий поток, если он ждёт места в очереди
+                while not worker.done():
+                    try:
+                        files.get_nowait()
+                    except asyncio.QueueEmpty:
+                        await asyncio.sleep(0.01)
+            await worker
+
+        logger.info(
+            "Archive processed",
+            project=project.get("path_with_namespace", project.get("name")),
+            ref=ref,
+            sha=sha,
+            members=stats.members,
+            matched=stats.matched,
+            skipped_extension=stats.skipped_extension,
+            skipped_size=stats.skipped_size,
+            bytes_read=stats.bytes_read,
+        )
+
+    def _archive_document(self, project: Dict[str, Any], ref: str, sha: str, archive_file) -> Optional[GitLabDocument]:
+        """Документ из файла архива"""
+        content = decode_content(archive_file.content)
+        if content is None or len(content.strip()) < 50:
+            return None
+
+        project_id = project.get("id")
+        project_path = project.get("path_with_namespace") or project.get("name", "")
+        return GitLabDocument(
+            id=f"{project_id}:{archive_file.path}",
+            title=self._get_file_title(archive_file.path),
+            content=content,
+            file_path=archive_file.path,
+            project_name=project.get("name", ""),
+            project_id=str(project_id),
+            branch=ref,
+            url=f"{self.base_url}/{project_path}/-/blob/{ref}/{archive_file.path}",
+            created_date="",
+            modified_date=sha,
+            author="",
+            file_extension=file_extension(archive_file.path),
+            file_size=archive_file.size,
+        )
+
+    async def _get_project_archive_batches(self, project: Dict[str, Any]) -> AsyncGenerator[List[GitLabDocument], None]:
+        """Батчи документов проекта; пропускает проект, если коммит уже проиндексирован"""
+        project_id = project.get("id")
+        ref = project.get("default_branch") or "main"
+        sha = await self._get_ref_commit_sha(project_id, ref)
+        if sha is None:
+            return
+
+        state_key = CommitStateStore.key(self.base_url, project_id, ref)
+        if self.commit_state.is_current(state_key, sha):
+            logger.info("Repository unchanged, skipping", project_id=project_id, ref=ref, sha=sha)
+            return
+
+        async for file_batch in self.get_repository_archive_files(project, ref, sha):
+            yield file_batch
+
+        # Фиксируем SHA только после того, как все батчи обработаны потребителем
+        self.commit_state.set(state_key, sha)
+
     def _get_file_extension(self, file_path: str) -> str:
         """Получение расширения файла"""
-        return "." + file_path.split(".")[-1].lower() if "." in file_path else ""
+        return file_extension(file_path)
     
     def _get_file_title(self, file_path: str) -> str:
         """Получение заголовка файла"""
@@ -406,7 +563,11 @@ class GitLabIngestionClient:
                     logger.info("Processing project", project_name=project_name, project_id=project_id)
                     
                     try:
-                        async for file_batch in self.get_repository_files(project_id, project_name):
+                        if self.ingestion_mode == "archive":
+                            file_batches = self._get_project_archive_batches(project)
+                        else:
+                            file_batches = self.get_repository_files(project_id, project_name)
+                        async for file_batch in file_batches:
                             if file_batch:
                                 yield file_batch
                                 